@@ -5,7 +5,7 @@ Atbild par pavadzīmju apstrādi ar OCR un datu ekstraktēšanu
 
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import asyncio
 import logging
 import numpy as np
@@ -15,11 +15,9 @@ from datetime import datetime
 
 from app.database import get_db
 from app.models import Invoice, Product  # Jauns imports no complete_models
-from app.services.ocr.ocr_main import OCRService
-from app.services.extraction_service import ExtractionService
-from app.services.hybrid_service import HybridExtractionService
-from app.services.document_structure_service import DocumentStructureAnalyzer
+from app.services.service_container import get_services
 from app.config import UPLOAD_DIR
+from app.services.structure_serialization import dumps, structure_summary
 import json
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -94,9 +92,9 @@ async def process_structure_aware_ocr_background(file_id: int, file_path: str):
     try:
         logger.info(f"Sāk Structure-Aware OCR background process: {file_id}")
         
-        # Inicializē OCR servisu
-        ocr_service = OCRService()
-        await ocr_service.initialize()
+        # Aplikācijas mēroga OCR serviss (inicializēts startup laikā)
+        services = await get_services()
+        ocr_service = services.ocr_service
         
         # Veic Structure-Aware OCR
         result = await ocr_service.extract_text_with_structure(file_path)
@@ -116,9 +114,9 @@ async def process_structure_aware_ocr_background(file_id: int, file_path: str):
                 logger.debug(f"Serializējam structure: {structure_result['structure']}")
                 logger.debug(f"Serializējam zone_results: {structure_result['zone_results']}")
                 logger.debug(f"Serializējam table_results: {structure_result['table_results']}")
-                invoice.document_structure = json.dumps(convert_int64(structure_result['structure']))
-                invoice.detected_zones = json.dumps(convert_int64(structure_result['zone_results']))
-                invoice.table_regions = json.dumps(convert_int64(structure_result['table_results']))
+                invoice.document_structure = dumps(structure_result['structure'])
+                invoice.detected_zones = dumps(structure_result['zone_results'])
+                invoice.table_regions = dumps(structure_result['table_results'])
                 
                 # Atzīmē ka ir structure-aware results
                 invoice.has_structure_analysis = True
@@ -231,57 +229,25 @@ async def process_structure_analysis(file_id: int):
             logger.error(f"Fails neeksistē: {file_path}")
             return
         
-        # Inicializējam Document Structure Analyzer
-        structure_analyzer = DocumentStructureAnalyzer()
+        # Kopīgais Document Structure Analyzer
+        services = await get_services()
+        structure_analyzer = services.structure_analyzer
         
-        # Veicam structure analysis
-        structure_result = await structure_analyzer.analyze_document(str(file_path))
+        # Veicam structure analysis iztaisnotā lapā (tāpat kā struktūras OCR)
+        page, _ = await services.ocr_service.structure_aware_ocr.deskew_page(str(file_path))
+        structure_result = await structure_analyzer.analyze_document(page)
         
         if structure_result is None:
             logger.error(f"Structure analysis neizdevās failam {invoice.original_filename}")
             return
         
         # Konvertējam structure objektus uz JSON
-        structure_dict = {
-            'image_width': structure_result.image_width,
-            'image_height': structure_result.image_height,
-            'zones': [
-                {
-                    'type': zone.type,
-                    'bounds': {
-                        'x1': zone.bounds.x1, 'y1': zone.bounds.y1,
-                        'x2': zone.bounds.x2, 'y2': zone.bounds.y2
-                    },
-                    'confidence': zone.confidence
-                } for zone in structure_result.zones
-            ],
-            'tables': [
-                {
-                    'bounds': {
-                        'x1': table.bounds.x1, 'y1': table.bounds.y1,
-                        'x2': table.bounds.x2, 'y2': table.bounds.y2
-                    },
-                    'confidence': table.confidence,
-                    'cell_count': (
-                        sum(len(row) if isinstance(row, list) else 1 for row in table.cells)
-                        if isinstance(table.cells, list) else 1
-                    )
-                } for table in structure_result.tables
-            ],
-            'text_blocks': [
-                {
-                    'x1': block.x1, 'y1': block.y1,
-                    'x2': block.x2, 'y2': block.y2
-                } for block in structure_result.text_blocks
-            ],
-            'confidence': structure_result.confidence,
-            'processing_time_ms': structure_result.processing_time_ms
-        }
+        structure_dict = structure_summary(structure_result)
         
         # Saglabājam Structure Analysis rezultātu
-        invoice.document_structure = json.dumps(convert_int64(structure_dict))
-        invoice.detected_zones = json.dumps(convert_int64(structure_dict['zones']))
-        invoice.table_regions = json.dumps(convert_int64(structure_dict['tables']))
+        invoice.document_structure = dumps(structure_dict)
+        invoice.detected_zones = dumps(structure_dict['zones'])
+        invoice.table_regions = dumps(structure_dict['tables'])
         invoice.structure_confidence = structure_result.confidence
         invoice.has_structure_analysis = True
         invoice.structure_analyzed_at = datetime.utcnow()
@@ -422,30 +388,25 @@ async def process_invoice_ocr(file_id: int):
             db.commit()
             return
         
-        # Inicializējam servisus
-        ocr_service = OCRService()
-        await ocr_service.initialize()
-        
-        # Inicializējam Document Structure Analyzer
-        structure_analyzer = DocumentStructureAnalyzer()
-        
-        # Izvēlēti servisu (default: hybrid, fallback: regex)
-        try:
-            extraction_service = HybridExtractionService()
-            use_hybrid = True
-            logger.info("Izmanto hibridāo ekstraktēšanas servisu (regex + NER)")
-        except Exception as e:
-            logger.warning(f"Hibridais serviss nav pieejams, izmanto regex: {e}")
-            extraction_service = ExtractionService()
-            use_hybrid = False
+        # Aplikācijas mēroga servisi (inicializēti vienreiz startup laikā)
+        services = await get_services()
+        ocr_service = services.ocr_service
+        structure_analyzer = services.structure_analyzer
+        extraction_service = services.extraction_service
+        use_hybrid = services.use_hybrid
         
         # 🆕 PARALLEL EXECUTION: OCR + Structure Analysis vienlaicīgi
         logger.info(f"Sākam parallel OCR + Structure analysis: {file_path}")
         
+        # Lapas slīpums tiek novērtēts vienreiz: struktūras analīze saņem iztaisnotu lapu,
+        # adaptīvā OCR (prognozētājs un priekšapstrāde) - to pašu leņķi
+        page, skew = await ocr_service.structure_aware_ocr.deskew_page(str(file_path))
+        
         # Async parallel execution
         tasks = [
-            ocr_service.extract_text_adaptive(str(file_path)),
-            structure_analyzer.analyze_document(str(file_path))
+            ocr_service.extract_text_adaptive(str(file_path), supplier_hint=invoice.supplier_name,
+                                              skew_angle=skew['angle']),
+            structure_analyzer.analyze_document(page)
         ]
         
         ocr_result, structure_result = await asyncio.gather(*tasks)
@@ -472,45 +433,11 @@ async def process_invoice_ocr(file_id: int):
         # 🆕 Saglabājam Structure Analysis rezultātu
         if structure_result:
             # Konvertējam structure objektus uz JSON
-            structure_dict = {
-                'image_width': structure_result.image_width,
-                'image_height': structure_result.image_height,
-                'zones': [
-                    {
-                        'type': zone.type,
-                        'bounds': {
-                            'x1': zone.bounds.x1, 'y1': zone.bounds.y1,
-                            'x2': zone.bounds.x2, 'y2': zone.bounds.y2
-                        },
-                        'confidence': zone.confidence
-                    } for zone in structure_result.zones
-                ],
-                'tables': [
-                    {
-                        'bounds': {
-                            'x1': table.bounds.x1, 'y1': table.bounds.y1,
-                            'x2': table.bounds.x2, 'y2': table.bounds.y2
-                        },
-                        'confidence': table.confidence,
-                        'cell_count': (
-                            sum(len(row) if isinstance(row, list) else 1 for row in table.cells)
-                            if isinstance(table.cells, list) else 1
-                        )
-                    } for table in structure_result.tables
-                ],
-                'text_blocks': [
-                    {
-                        'x1': block.x1, 'y1': block.y1,
-                        'x2': block.x2, 'y2': block.y2
-                    } for block in structure_result.text_blocks
-                ],
-                'confidence': structure_result.confidence,
-                'processing_time_ms': structure_result.processing_time_ms
-            }
+            structure_dict = structure_summary(structure_result)
             
-            invoice.document_structure = json.dumps(convert_int64(structure_dict))
-            invoice.detected_zones = json.dumps(convert_int64(structure_dict['zones']))
-            invoice.table_regions = json.dumps(convert_int64(structure_dict['tables']))
+            invoice.document_structure = dumps(structure_dict)
+            invoice.detected_zones = dumps(structure_dict['zones'])
+            invoice.table_regions = dumps(structure_dict['tables'])
             invoice.structure_confidence = structure_result.confidence
             invoice.has_structure_analysis = True
             invoice.structure_analyzed_at = datetime.utcnow()
@@ -537,6 +464,12 @@ async def process_invoice_ocr(file_id: int):
         invoice.supplier_address = extracted_data.supplier_address  
         invoice.supplier_bank_account = extracted_data.supplier_bank_account
         
+        # Piegādātāja OCR stratēģiju vēsture nākamo dokumentu prognozēm; prognozes
+        # īsceļa uzvara tikai apstiprina prognozi, tāpēc vēsturē netiek skaitīta
+        if not (ocr_result.get('adaptive') or {}).get('shortcut'):
+            await asyncio.to_thread(ocr_service.strategy_predictor.learn_supplier,
+                                    invoice.supplier_name, invoice.ocr_strategy)
+        
         # Saņēmēja informācija
         invoice.recipient_name = extracted_data.recipient_name
         invoice.recipient_reg_number = extracted_data.recipient_reg_number
@@ -1147,3 +1080,141 @@ async def export_learning_data():
             "message": "Nevar eksportēt datus",
             "error": str(e)
         })
+
+
+async def get_ready_services():
+    """
+    Atgriež inicializētu servisu konteineru vai 503 (tā pati gatavība, ko rāda /ready)
+    
+    Raises:
+        HTTPException: 503, ja inicializācija neizdevās (OCR serviss nav pieejams)
+    """
+    services = await get_services()
+    if not services.initialized:
+        raise HTTPException(status_code=503, detail=services.get_status())
+    return services
+
+
+@router.get("/ocr/strategy-predictor")
+async def get_strategy_predictor_statistics():
+    """
+    Atgriež adaptīvās OCR stratēģiju prognozētāja metriku (hit rate)
+    
+    Returns:
+        dict: Prognozētāja statistika
+    """
+    services = await get_ready_services()
+    
+    return {
+        "status": "success",
+        "statistics": services.ocr_service.strategy_predictor.get_metrics()
+    }
+
+
+@router.post("/ocr/strategy-predictor/retrain")
+async def retrain_strategy_predictor(
+    include_image_stats: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Pārapmāca stratēģiju prognozētāju no invoices tabulas
+    
+    Args:
+        include_image_stats: Pārrēķināt arī attēlu statistiku saglabātajiem failiem
+        
+    Returns:
+        dict: Apmācības kopsavilkums
+    """
+    services = await get_ready_services()
+    
+    try:
+        summary = await asyncio.to_thread(
+            services.ocr_service.strategy_predictor.retrain_from_db, db, include_image_stats
+        )
+        return {
+            "status": "success",
+            "summary": summary
+        }
+    except Exception as e:
+        logger.error(f"Prognozētāja apmācības kļūda: {e}")
+        raise HTTPException(status_code=500, detail=f"Prognozētāja apmācības kļūda: {str(e)}")
+
+
+@router.get("/ocr/cache")
+async def get_ocr_cache_statistics():
+    """
+    Atgriež OCR rezultātu keša statistiku (hit/miss, izmērs)
+    
+    Returns:
+        dict: Keša statistika
+    """
+    services = await get_ready_services()
+    
+    return {
+        "status": "success",
+        "statistics": services.ocr_service.ocr_cache.get_metrics()
+    }
+
+
+@router.delete("/ocr/cache")
+async def invalidate_ocr_cache(stale_only: bool = False):
+    """
+    Iztīra OCR rezultātu kešu (piem., pēc Tesseract vai traineddata atjaunināšanas)
+    
+    Args:
+        stale_only: Dzēst tikai ierakstus, kas izveidoti ar citu Tesseract versiju
+        
+    Returns:
+        dict: Dzēsto ierakstu skaits
+    """
+    services = await get_ready_services()
+    
+    try:
+        removed = await services.ocr_service.ocr_cache.invalidate(stale_only=stale_only)
+        return {
+            "status": "success",
+            "removed": removed
+        }
+    except Exception as e:
+        logger.error(f"OCR keša iztīrīšanas kļūda: {e}")
+        raise HTTPException(status_code=500, detail=f"OCR keša iztīrīšanas kļūda: {str(e)}")
+
+
+@router.get("/structure/templates")
+async def list_layout_templates():
+    """
+    Atgriež piegādātāju izkārtojumu šablonus un to hit rate
+    
+    Returns:
+        dict: Šablonu saraksts un statistika
+    """
+    services = await get_ready_services()
+    template_cache = services.structure_analyzer.template_cache
+    
+    return {
+        "status": "success",
+        "statistics": template_cache.get_metrics(),
+        "templates": template_cache.list_templates()
+    }
+
+
+@router.delete("/structure/templates")
+async def evict_layout_templates(template_id: Optional[str] = None):
+    """
+    Dzēš vienu izkārtojuma šablonu vai visus (piem., pēc piegādātāja rēķina formas maiņas)
+    
+    Args:
+        template_id: Šablona ID; ja nav norādīts - dzēš visus
+        
+    Returns:
+        dict: Dzēsto šablonu skaits
+    """
+    services = await get_ready_services()
+    
+    removed = await asyncio.to_thread(services.structure_analyzer.template_cache.evict, template_id)
+    if template_id and not removed:
+        raise HTTPException(status_code=404, detail=f"Šablons nav atrasts: {template_id}")
+    return {
+        "status": "success",
+        "removed": removed
+    }
@@ -48,6 +48,15 @@ TESSERACT_CONFIG = {
     "char_whitelist": "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzĀĒĪŌŪāēīōūčĢģĶķĻļŅņŠšŽž.,€$%-()/"
 }
 
+# OCR dzinēja (Tesseract worker pool) iestatījumi
+OCR_ENGINE = {
+    "executor": get_env("OCR_EXECUTOR", "process"),  # process vai thread
+    "max_workers": int(get_env("OCR_WORKERS", str(os.cpu_count() or 2))),
+    "max_queue": int(get_env("OCR_MAX_QUEUE", "64")),  # Maksimālais gaidošo darbu skaits
+    "timeout": TESSERACT_CONFIG["timeout"],  # Noklusētais timeout vienam izsaukumam (sekundes)
+    "start_method": "spawn",  # Drošs arī ar uvicorn pavedieniem un Windows
+}
+
 # OCR priekšapstrādes iestatījumi
 IMAGE_PREPROCESSING = {
     "enable": True,
@@ -55,8 +64,84 @@ IMAGE_PREPROCESSING = {
     "target_dpi": 300,
     "enhancement_level": "medium",  # low, medium, high
     "denoise": True,
+    # Denoise pēc trokšņa novērtējuma (Immerkær sigma līdzenos apgabalos)
+    "denoise_skip_sigma": 3.0,    # Zemāk - denoise netiek izpildīts
+    "denoise_heavy_sigma": 8.0,   # Zemāk - mazāks NLM meklēšanas logs (11 nevis 21)
+    "denoise_color_sigma": 3.0,   # Krāsu troksnis krāsainam NLM (tikai, ja krāsa jāsaglabā)
+    "noise_sample_pixels": 1_000_000,  # Novērtējuma paraugs lielām lapām
     "auto_rotate": True,
-    "binarize": True
+    # Slīpuma novērtējums - projekcijas profils samazinātā binārā lapā (vienreiz dokumentam)
+    "skew_analysis_width": 1000,
+    "skew_max_angle": 10.0,
+    "deskew_min_angle": 0.5,      # Mazāks slīpums netiek labots
+    # Lielas lapas (A3, telefona foto) - denoise, binarizācija un rotācija pārklājošās joslās paralēli
+    "tile_workers": int(get_env("PREPROCESS_TILE_WORKERS", "0")),  # 0 - CPU kodolu skaits, 1 - izslēgts
+    "tile_min_pixels": 6_000_000,
+    "tile_min_band_rows": 256,
+    "binarize": True,
+    # Starprezultātu PNG saglabāšana temp/ (tikai atkļūdošanai)
+    "debug_spill": get_env("OCR_DEBUG_SPILL", "false").lower() == "true"
+}
+
+# Adaptīvās OCR iestatījumi (extract_text_adaptive)
+ADAPTIVE_OCR = {
+    # race - visas stratēģijas paralēli, uzvar pirmā, kas pārsniedz slieksni (zaudētāju jau sāktie
+    # Tesseract/priekšapstrādes darbi tiek pabeigti fonā - tie netiek apturēti)
+    # sequential - stratēģijas viena pēc otras (iepriekšējā uzvedība)
+    "mode": get_env("ADAPTIVE_OCR_MODE", "race"),
+    # Sākuma stratēģijas prognozēšana pēc attēla statistikas un piegādātāja vēstures
+    "predictor": get_env("ADAPTIVE_OCR_PREDICTOR", "true").lower() == "true",
+    "predictor_path": "./data/learning/ocr_strategy_history.json",
+    "predictor_min_samples": 3,  # Minimālais vēstures ierakstu skaits prognozei
+    "predictor_save_every": 10,  # Saglabā vēsturi katrus 10 atjauninājumus (un pie izslēgšanas)
+    # Daļa dokumentu tiek apstrādāta bez prognozes, lai grupu vēsture neapstiprinātu tikai prognozes
+    "predictor_explore_rate": float(get_env("ADAPTIVE_OCR_EXPLORE_RATE", "0.05")),
+}
+
+# OCR rezultātu kešs (satura hash + OCR konfigurācija)
+OCR_CACHE = {
+    "enabled": get_env("OCR_CACHE_ENABLED", "true").lower() == "true",
+    "dir": get_env("OCR_CACHE_DIR", str(BASE_DIR / "data" / "ocr_cache")),
+    "max_size_mb": int(get_env("OCR_CACHE_MAX_MB", "256")),  # Diska LRU limits
+    "use_database": get_env("OCR_CACHE_DB", "false").lower() == "true",  # Kopīgs kešs starp replikām
+}
+
+# Struktūras OCR iestatījumi (StructureAwareOCR)
+STRUCTURE_OCR = {
+    # batched - tabulas šūnas salīmētas kompozītattēlos (viens Tesseract izsaukums partijai)
+    # per_cell - atsevišķs Tesseract izsaukums katrai šūnai
+    "table_cell_mode": get_env("TABLE_CELL_OCR_MODE", "batched"),
+    "batch_max_cells": 60,  # Šūnas vienā kompozītā
+    "batch_max_height": 8000,  # Kompozīta augstuma limits pikseļos
+    "batch_gutter": 40,  # Baltā atstarpe starp šūnām
+    # Vienlaicīgie zonu/tabulu OCR darbi vienam dokumentam (lai viens liels rēķins neaizņem visu pool)
+    "max_concurrency": int(get_env("STRUCTURE_OCR_CONCURRENCY", "4")),
+    # Pilnas lapas OCR tiek veikts tikai, ja zonu vidējais confidence ir zem šī sliekšņa
+    "full_page_fallback_confidence": 0.6,
+}
+
+# Dokumenta struktūras analīzes iestatījumi
+STRUCTURE_ANALYSIS = {
+    # Platums pikseļos, kurā darbojas detektori; koordinātes tiek pārrēķinātas uz pilnu izšķirtspēju.
+    # 0 - analīze pilnā izšķirtspējā
+    "analysis_width": int(get_env("STRUCTURE_ANALYSIS_WIDTH", "0")),
+    # Samazina tikai, ja lapa ir vismaz par šo koeficientu platāka
+    "min_downscale_ratio": 1.25,
+    # Šūnu robežas tiek precizētas pilnā izšķirtspējā
+    "refine_cells": True,
+}
+
+# Piegādātāju izkārtojumu šabloni - zonu un tabulu režģa atkārtota izmantošana bez pilnas detekcijas
+LAYOUT_TEMPLATES = {
+    "enabled": get_env("LAYOUT_TEMPLATES_ENABLED", "false").lower() == "true",
+    "path": get_env("LAYOUT_TEMPLATES_PATH", "./data/learning/layout_templates.json"),
+    "max_templates": int(get_env("LAYOUT_TEMPLATES_MAX", "500")),  # LRU pēc pēdējās izmantošanas
+    "save_every": 20,  # Šablonu lietojums (hits, last_used_at) tiek saglabāts katrus 20 trāpījumus un pie izslēgšanas
+    "fingerprint_width": 800,  # Līniju maskas platums nospiedumam
+    "max_hamming_distance": 10,  # No 64 perceptual hash bitiem
+    "max_aspect_delta": 0.03,  # Relatīvā malu attiecības atšķirība
+    "min_alignment": 0.96,  # Minimālā rindu/kolonnu līniju profilu korelācija (cita rindu skaita tabula ~0.94)
+    "max_shift_ratio": 0.03,  # Maksimālā nobīde izlīdzināšanā (daļa no lapas izmēra)
 }
 
 # Datu ekstraktēšanas iestatījumi
@@ -228,7 +313,13 @@ class Settings:
         self.allowed_extensions = ALLOWED_EXTENSIONS
         self.tesseract_cmd = TESSERACT_CMD
         self.tesseract_config = TESSERACT_CONFIG
+        self.ocr_engine = OCR_ENGINE
         self.image_preprocessing = IMAGE_PREPROCESSING
+        self.adaptive_ocr = ADAPTIVE_OCR
+        self.ocr_cache = OCR_CACHE
+        self.structure_ocr = STRUCTURE_OCR
+        self.structure_analysis = STRUCTURE_ANALYSIS
+        self.layout_templates = LAYOUT_TEMPLATES
         self.pdf_config = PDF_CONFIG
         self.regex_patterns = REGEX_PATTERNS
         self.confidence_threshold = CONFIDENCE_THRESHOLD
@@ -15,6 +15,8 @@ from app.api import corrections, products
 
 # Importēt datubāzes konfigurāciju
 from app.database import engine, create_tables
+from app.services.ocr.ocr_engine import shutdown_ocr_engine
+from app.services.service_container import get_service_container
 
 app = FastAPI(
     title="Invoice Processing API",
@@ -64,7 +66,24 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint - vai OCR un ekstraktēšanas servisi ir inicializēti"""
+    return get_service_container().get_status()
+
 # Datubāzes inicializācija pie aplikācijas startēšanas
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    # Vienreizēja OCR/ekstraktēšanas servisu inicializācija un worker pool iesildīšana
+    await get_service_container().initialize()
+
+# OCR worker pool apturēšana, iemācītās stratēģiju vēstures un šablonu lietojuma saglabāšana pie izslēgšanas
+@app.on_event("shutdown")
+async def shutdown_event():
+    services = get_service_container()
+    if services.ocr_service is not None:
+        services.ocr_service.strategy_predictor.flush()
+    if services.structure_analyzer is not None:
+        services.structure_analyzer.template_cache.flush()
+    shutdown_ocr_engine()
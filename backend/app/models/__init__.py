@@ -1,5 +1,5 @@
 # Models moduļa inicializācija
-from .complete_models import Base, Invoice, Product, Supplier, ErrorCorrection
+from .complete_models import Base, Invoice, Product, Supplier, ErrorCorrection, OcrCacheEntry
 
 # Eksportējam visus modeļus
-__all__ = ['Base', 'Invoice', 'Product', 'Supplier', 'ErrorCorrection']
+__all__ = ['Base', 'Invoice', 'Product', 'Supplier', 'ErrorCorrection', 'OcrCacheEntry']
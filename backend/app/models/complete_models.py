@@ -264,5 +264,23 @@ class ErrorCorrection(Base):
             result[column.name] = value
         return result
 
+class OcrCacheEntry(Base):
+    __tablename__ = 'ocr_cache'
+    
+    # Satura hash + OCR konfigurācijas atslēga
+    cache_key = Column(String(64), primary_key=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+    
+    # === OCR REZULTĀTS ===
+    raw_text = Column(Text)
+    cleaned_text = Column(Text)
+    confidence = Column(Float)
+    payload = Column(Text)  # JSON - papildu rezultāta lauki
+    
+    # === DZINĒJA INFORMĀCIJA ===
+    engine_fingerprint = Column(String)  # Tesseract versija + traineddata
+    hits = Column(Integer, default=0)
+
 # Eksportējam visus modeļus
-__all__ = ['Base', 'Invoice', 'Product', 'Supplier', 'ErrorCorrection']
+__all__ = ['Base', 'Invoice', 'Product', 'Supplier', 'ErrorCorrection', 'OcrCacheEntry']
@@ -5,14 +5,22 @@ Analizē dokumentu fizisko struktūru (tabulas, zonas, kolonnas)
 
 import cv2
 import numpy as np
-from typing import List, Dict, Optional, Tuple, Any
-from dataclasses import dataclass, asdict
+from collections.abc import Sequence
+from typing import Iterator, List, Dict, Optional, Tuple, Any, Union
+from dataclasses import dataclass
 from datetime import datetime
 import logging
 import asyncio
 import json
+import math
+import time
 from enum import Enum
 
+from app.config import LAYOUT_TEMPLATES, STRUCTURE_ANALYSIS
+
+from .page_image import PageImage
+from .spatial_index import BoxIndex
+
 logger = logging.getLogger(__name__)
 
 class ZoneType(Enum):
@@ -27,7 +35,8 @@ class ZoneType(Enum):
     BODY = "body"
     SUMMARY = "summary"
 
-@dataclass
+# slots=True - blīvā lapā ir tūkstošiem šo objektu (bez __dict__ katram)
+@dataclass(slots=True)
 class BoundingBox:
     """Koordināšu taisnstūris"""
     x1: int
@@ -50,8 +59,64 @@ class BoundingBox:
     @property
     def center(self) -> Tuple[int, int]:
         return ((self.x1 + self.x2) // 2, (self.y1 + self.y2) // 2)
+    
+    def to_dict(self) -> Dict[str, int]:
+        return {"x1": int(self.x1), "y1": int(self.y1), "x2": int(self.x2), "y2": int(self.y2)}
 
-@dataclass
+class BoxArray(Sequence):
+    """
+    Kompakts BoundingBox saraksts - (N, 4) int32 masīvs [x1, y1, x2, y2]
+    
+    Detektori ar tūkstošiem komponenšu atgriež masīvu; BoundingBox objekti
+    tiek veidoti tikai piekļūstot elementiem (iterācija, serializācija).
+    """
+    
+    __slots__ = ('array',)
+    
+    def __init__(self, array: Optional[np.ndarray] = None):
+        if array is None:
+            array = np.empty((0, 4), dtype=np.int32)
+        self.array = np.asarray(array, dtype=np.int32).reshape(-1, 4)
+    
+    @classmethod
+    def from_boxes(cls, boxes) -> 'BoxArray':
+        """BoxArray no BoundingBox objektiem (esošs BoxArray netiek kopēts)"""
+        if isinstance(boxes, BoxArray):
+            return boxes
+        return cls(np.array([(box.x1, box.y1, box.x2, box.y2) for box in boxes], dtype=np.int32))
+    
+    def __len__(self) -> int:
+        return len(self.array)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return BoxArray(self.array[index])
+        return BoundingBox(*(int(value) for value in self.array[index]))
+    
+    def __iter__(self) -> Iterator[BoundingBox]:
+        for x1, y1, x2, y2 in self.array.tolist():
+            yield BoundingBox(x1, y1, x2, y2)
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, BoxArray):
+            return np.array_equal(self.array, other.array)
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"BoxArray({len(self)} boxes)"
+    
+    def scaled(self, scale_x: float, scale_y: float, width: int, height: int) -> 'BoxArray':
+        """Pārrēķina koordinātes (x1/y1 uz leju, x2/y2 uz augšu) un ierobežo ar lapas izmēru"""
+        scaled = self.array.astype(np.float64) * (scale_x, scale_y, scale_x, scale_y)
+        result = np.concatenate([np.floor(scaled[:, :2]), np.ceil(scaled[:, 2:])], axis=1)
+        return BoxArray(np.clip(result, 0, (width, height, width, height)))
+    
+    def to_dicts(self) -> List[Dict[str, int]]:
+        return [dict(zip(('x1', 'y1', 'x2', 'y2'), row)) for row in self.array.tolist()]
+
+@dataclass(slots=True)
 class TableCell:
     """Tabulas šūna"""
     bounds: BoundingBox
@@ -59,8 +124,17 @@ class TableCell:
     confidence: float = 0.0
     row_index: int = 0
     column_index: int = 0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bounds": self.bounds.to_dict(),
+            "text": self.text,
+            "confidence": float(self.confidence),
+            "row_index": int(self.row_index),
+            "column_index": int(self.column_index)
+        }
 
-@dataclass
+@dataclass(slots=True)
 class TableRegion:
     """Tabulas reģions dokumentā"""
     bounds: BoundingBox
@@ -93,26 +167,47 @@ class TableRegion:
     @property
     def column_count(self) -> int:
         return self.columns
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bounds": self.bounds.to_dict(),
+            "cells": [cell.to_dict() for cell in self.cells],
+            "confidence": float(self.confidence),
+            "rows": int(self.rows),
+            "columns": int(self.columns)
+        }
 
-@dataclass
+@dataclass(slots=True)
 class DocumentZone:
     """Dokumenta zona (header/body/footer)"""
     zone_type: ZoneType  # Izmanto enum nevis string
     bounds: BoundingBox
     confidence: float = 0.0
     text_blocks: List[BoundingBox] = None
+    bands: List[BoundingBox] = None  # Satura joslas - tikai tās tiek sūtītas zonu OCR
     
     def __post_init__(self):
         if self.text_blocks is None:
             self.text_blocks = []
+        if self.bands is None:
+            self.bands = []
 
     # Backward compatibility property
     @property
     def type(self) -> str:
         """Backward compatibility - atgriež zone_type kā string"""
         return self.zone_type.value
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "zone_type": self.zone_type.value,
+            "bounds": self.bounds.to_dict(),
+            "confidence": float(self.confidence),
+            "text_blocks": BoxArray.from_boxes(self.text_blocks).to_dicts(),
+            "bands": BoxArray.from_boxes(self.bands).to_dicts()
+        }
 
-@dataclass
+@dataclass(slots=True)
 class DocumentStructure:
     """Pilna dokumenta struktūras informācija"""
     image_width: int
@@ -123,21 +218,34 @@ class DocumentStructure:
     confidence: float = 0.0
     processing_time_ms: int = 0
     detected_at: datetime = None
+    detector_timings_ms: Dict[str, float] = None  # Katra detektora izpildes laiks
+    analysis_scale: float = 1.0  # Pilnās izšķirtspējas / analīzes izšķirtspējas attiecība
+    layout_template: Optional[str] = None  # Izkārtojuma šablona ID, ja tabulu režģis ņemts no šablona
     
     def __post_init__(self):
         if self.detected_at is None:
             self.detected_at = datetime.utcnow()
+        if self.detector_timings_ms is None:
+            self.detector_timings_ms = {}
     
     def to_dict(self) -> Dict[str, Any]:
-        """Konvertē uz dictionary JSON serialization vajadzībām"""
+        """
+        Konvertē uz dictionary JSON serialization vajadzībām
+        
+        Tieša konversija ar Python tipiem (bez rekursīvā asdict kopēšanas un
+        NumPy skalāru pēcapstrādes); zone_type - enum vērtība.
+        """
         return {
-            "image_width": self.image_width,
-            "image_height": self.image_height,
-            "zones": [asdict(zone) for zone in self.zones],
-            "tables": [asdict(table) for table in self.tables],
-            "text_blocks": [asdict(block) for block in self.text_blocks],
-            "confidence": self.confidence,
+            "image_width": int(self.image_width),
+            "image_height": int(self.image_height),
+            "zones": [zone.to_dict() for zone in self.zones],
+            "tables": [table.to_dict() for table in self.tables],
+            "text_blocks": BoxArray.from_boxes(self.text_blocks).to_dicts(),
+            "confidence": float(self.confidence),
             "processing_time_ms": self.processing_time_ms,
+            "detector_timings_ms": self.detector_timings_ms,
+            "analysis_scale": self.analysis_scale,
+            "layout_template": self.layout_template,
             "detected_at": self.detected_at.isoformat() if self.detected_at else None
         }
 
@@ -152,15 +260,24 @@ class DocumentStructureAnalyzer:
     - Column header recognition
     """
     
-    def __init__(self):
+    def __init__(self, template_cache=None):
         self.logger = logging.getLogger(__name__)
         
+        # Piegādātāju izkārtojumu šabloni (cikliska imports - šablonu modulis izmanto šī moduļa dataclass)
+        from .layout_template_cache import LayoutTemplateCache
+        self.template_cache = template_cache if template_cache is not None else LayoutTemplateCache()
+        
         # Table detection parametri
         self.table_detection_params = {
             "min_table_area": 5000,  # Minimālais tabulas laukums pikseļos
             "line_thickness": 2,     # Līniju biezums
             "min_line_length": 100,  # Minimālais līnijas garums
             "max_line_gap": 10,      # Maksimālais līnijas pārtraukums
+            "max_hough_candidates": 2000,  # Hough kandidātu limits trokšņainiem skenējumiem
+            "dominated_containment": 0.9,  # Kandidāts ar >=90% laukuma cita kandidāta iekšienē tiek atmests
+            "grid_line_coverage": 0.5,  # Režģa līnijai jāaptver vismaz 50% tabulas platuma/augstuma
+            "min_cell_size": 8,          # Šaurākas atstarpes starp līnijām - dubultlīnija, nevis šūna
+            "separator_coverage": 0.5,   # Zem šī kolonnu atdalītājs šūnā trūkst - apvienota šūna
         }
         
         # Zone detection parametri
@@ -168,16 +285,30 @@ class DocumentStructureAnalyzer:
             "header_zone_ratio": 0.25,    # Header = top 25%
             "footer_zone_ratio": 0.15,    # Footer = bottom 15%
             "summary_zone_ratio": 0.20,   # Summary = bottom 20%
+            "band_gap_ratio": 0.01,       # Tukšas joslas, augstākas par 1% lapas, atdala satura joslas
+            "band_padding_ratio": 0.002,  # Satura joslas mala virs/zem teksta
+            "max_block_height_ratio": 0.5,  # Augstāki komponenti (rāmji, skenēšanas malas) nav saturs
+            "min_ink_height": 3,          # Zemāki tintes komponenti (punkti, troksnis) joslas neveido
+            "min_ink_area": 6,
         }
         
+        # Daudzizšķirtspējas analīze (analysis_width=0 - pilnā izšķirtspējā)
+        self.analysis_params = dict(STRUCTURE_ANALYSIS)
+        
         self.logger.info("DocumentStructureAnalyzer inicializēts")
     
-    async def analyze_document(self, image_path: str) -> DocumentStructure:
+    async def analyze_document(self, image_path: Union[str, PageImage],
+                               analysis_width: Optional[int] = None) -> DocumentStructure:
         """
         Galvenā metode - analizē dokumenta struktūru
         
+        Tabulas un teksta bloki tiek meklēti samazinātā lapas kopijā, ja
+        analysis_width ir norādīts; koordinātes tiek pārrēķinātas uz pilnu
+        izšķirtspēju un šūnu robežas precizētas oriģinālajā attēlā.
+        
         Args:
-            image_path: Ceļš uz attēlu
+            image_path: Ceļš uz attēlu vai jau dekodēts PageImage
+            analysis_width: Analīzes platums pikseļos (None - no konfigurācijas, 0 - pilnā izšķirtspējā)
             
         Returns:
             DocumentStructure: Pilna struktūras informācija
@@ -187,21 +318,41 @@ class DocumentStructureAnalyzer:
         try:
             self.logger.info(f"Sākam dokumenta struktūras analīzi: {image_path}")
             
-            # Ielādēt attēlu
-            image = await self._load_image(image_path)
-            if image is None:
+            # Ielādēt attēlu (PageImage netiek dekodēts atkārtoti)
+            page = await self._load_image(image_path)
+            if page is None:
                 raise ValueError(f"Nevarēja ielādēt attēlu: {image_path}")
             
-            height, width = image.shape[:2]
+            height, width = page.shape[:2]
             
-            # Paralēlās operācijas
-            tasks = [
-                self._detect_zones(image),
-                self._detect_tables(image),
-                self._detect_text_blocks(image)
-            ]
+            timings: Dict[str, float] = {}
+            fingerprint, template = None, None
+            if self.template_cache.enabled:
+                fingerprint, template = await self._offload('template_lookup', self._match_layout_template,
+                                                            page, timings=timings)
+            analysis_page = await self._analysis_level(page, analysis_width, timings)
             
-            zones, tables, text_blocks = await asyncio.gather(*tasks)
+            if template is not None:
+                # Zināms izkārtojums - tabulu režģis no šablona, teksta bloki no šīs lapas
+                tables = template.tables
+                text_blocks = await self._detect_text_blocks(analysis_page, timings=timings)
+                if analysis_page is not page:
+                    _, text_blocks = await self._offload('rescale', self._rescale_to_page, page,
+                                                         analysis_page, [], text_blocks, timings=timings)
+            else:
+                # Paralēlās operācijas - detektori darbojas pavedienos (OpenCV atlaiž GIL)
+                # un izmanto kopīgās PageImage reprezentācijas (gray, binarizācijas, malas)
+                tables, text_blocks = await asyncio.gather(
+                    self._detect_tables(analysis_page, timings=timings),
+                    self._detect_text_blocks(analysis_page, timings=timings)
+                )
+                
+                if analysis_page is not page:
+                    tables, text_blocks = await self._offload('rescale', self._rescale_to_page, page,
+                                                              analysis_page, tables, text_blocks, timings=timings)
+            
+            # Zonas no satura izvietojuma (teksta bloki un tabulas pilnas izšķirtspējas koordinātēs)
+            zones = await self._detect_zones(page, text_blocks, tables, timings=timings)
             
             # Aprēķināt kopējo confidence
             confidence = self._calculate_overall_confidence(zones, tables)
@@ -216,10 +367,17 @@ class DocumentStructureAnalyzer:
                 text_blocks=text_blocks,
                 confidence=confidence,
                 processing_time_ms=int(processing_time),
-                detected_at=start_time
+                detected_at=start_time,
+                detector_timings_ms=timings,
+                analysis_scale=round(width / analysis_page.width, 4),
+                layout_template=template.template_id if template else None
             )
             
+            if fingerprint is not None and template is None:
+                await asyncio.to_thread(self.template_cache.store, fingerprint, structure, page.source)
+            
             self.logger.info(f"Struktūras analīze pabeigta: {processing_time:.2f}ms, confidence: {confidence:.2f}")
+            self.logger.debug(f"Detektoru laiki (ms): {timings}")
             return structure
             
         except Exception as e:
@@ -235,26 +393,252 @@ class DocumentStructureAnalyzer:
                 processing_time_ms=int((datetime.utcnow() - start_time).total_seconds() * 1000)
             )
     
-    async def _load_image(self, image_path: str) -> Optional[np.ndarray]:
+    async def _load_image(self, image_path: Union[str, PageImage]) -> Optional[PageImage]:
         """Asinhronā attēla ielāde"""
         try:
-            # OpenCV ielāde loop thread, lai nebloķētu
-            loop = asyncio.get_event_loop()
-            image = await loop.run_in_executor(None, cv2.imread, image_path)
-            return image
+            # OpenCV dekodēšana pavedienā, lai nebloķētu
+            return await PageImage.load_async(image_path)
         except Exception as e:
             self.logger.error(f"Kļūda attēla ielādē: {str(e)}")
             return None
     
-    async def _detect_zones(self, image: np.ndarray) -> List[DocumentZone]:
+    def _match_layout_template(self, page: PageImage):
+        """
+        Aprēķina lapas izkārtojuma nospiedumu un meklē atbilstošu šablonu
+        
+        Returns:
+            Tuple: (LayoutFingerprint vai None, TemplateMatch vai None)
+        """
+        from .layout_template_cache import layout_fingerprint
+        
+        level = page.pyramid_level(min(page.width, LAYOUT_TEMPLATES["fingerprint_width"]))
+        horizontal, vertical = self._line_masks(level.adaptive_binary(15, 10), level.shape)
+        fingerprint = layout_fingerprint(cv2.bitwise_or(horizontal, vertical), page.width, page.height)
+        template = self.template_cache.lookup(fingerprint)
+        if template is not None:
+            self.logger.info(f"Izmantots izkārtojuma šablons {template.template_id} "
+                             f"(attālums {template.distance}, izlīdzinājums {template.alignment})")
+        return fingerprint, template
+    
+    async def _analysis_level(self, page: PageImage, analysis_width: Optional[int],
+                              timings: Dict[str, float]) -> PageImage:
+        """Izvēlas lapas izšķirtspēju struktūras detektoriem"""
+        target = self.analysis_params["analysis_width"] if analysis_width is None else analysis_width
+        if not target or page.width < target * self.analysis_params["min_downscale_ratio"]:
+            return page
+        return await self._offload('downscale', page.pyramid_level, target, timings=timings)
+    
+    def _rescale_to_page(self, page: PageImage, level: PageImage, tables: List[TableRegion],
+                         text_blocks: List[BoundingBox]) -> Tuple[List[TableRegion], List[BoundingBox]]:
+        """
+        Pārrēķina samazinātajā attēlā atrastās koordinātes uz pilnu izšķirtspēju
+        
+        Tabulu robežas tiek paplašinātas par vienu analīzes pikseli (noapaļošanas
+        kļūda); šūnas tiek atpazītas no jauna pilnas izšķirtspējas tabulas izgriezumā.
+        
+        Args:
+            page: Pilnas izšķirtspējas lapa
+            level: Lapa, kurā darbojās detektori
+            tables: Tabulas analīzes koordinātēs
+            text_blocks: Teksta bloki analīzes koordinātēs
+            
+        Returns:
+            Tuple: (tabulas, teksta bloki) pilnas izšķirtspējas koordinātēs
+        """
+        scale_x = page.width / level.width
+        scale_y = page.height / level.height
+        
+        def scale_box(box: BoundingBox, padding: int = 0) -> BoundingBox:
+            return BoundingBox(
+                max(0, math.floor(box.x1 * scale_x) - padding),
+                max(0, math.floor(box.y1 * scale_y) - padding),
+                min(page.width, math.ceil(box.x2 * scale_x) + padding),
+                min(page.height, math.ceil(box.y2 * scale_y) + padding)
+            )
+        
+        padding = math.ceil(max(scale_x, scale_y))
+        rescaled = []
+        for table in tables:
+            bounds = scale_box(table.bounds, padding)
+            if table.cells and self.analysis_params["refine_cells"]:
+                region = (slice(bounds.y1, bounds.y2), slice(bounds.x1, bounds.x2))
+                horizontal, vertical = self._line_masks(page.adaptive_binary(15, 10)[region], page.shape)
+                cells = self._extract_grid_cells(horizontal, vertical, origin=(bounds.x1, bounds.y1))
+                grid = self._grid_shape(cells)
+            else:
+                cells = [TableCell(bounds=scale_box(cell.bounds), text=cell.text, confidence=cell.confidence,
+                                   row_index=cell.row_index, column_index=cell.column_index)
+                         for cell in table.cells]
+                grid = {'rows': table.rows, 'columns': table.columns}
+            rescaled.append(TableRegion(bounds=bounds, cells=cells, confidence=table.confidence, **grid))
+        
+        return rescaled, BoxArray.from_boxes(text_blocks).scaled(scale_x, scale_y, page.width, page.height)
+    
+    @staticmethod
+    async def _offload(name: str, fn, *args, timings: Optional[Dict[str, float]] = None):
         """
-        Atpazīst dokumenta zonas (header, body, footer, summary)
+        Izpilda CPU-intensīvu detektoru pavedienā un reģistrē tā izpildes laiku
+        
+        Args:
+            name: Detektora nosaukums timings vārdnīcā
+            fn: Sinhronā detektora funkcija
+            timings: Vārdnīca, kurā ierakstīt laiku milisekundēs
+        """
+        def run():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                if timings is not None:
+                    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        
+        return await asyncio.to_thread(run)
+    
+    async def _detect_zones(self, image: Union[np.ndarray, PageImage],
+                            text_blocks: Optional[Sequence] = None,
+                            tables: Optional[List[TableRegion]] = None,
+                            timings: Optional[Dict[str, float]] = None) -> List[DocumentZone]:
+        """
+        Atpazīst dokumenta zonas (header, body, footer, summary) no satura izvietojuma
+        
+        Args:
+            image: Lapas attēls
+            text_blocks: Teksta bloki lapas koordinātēs (None - tiek atpazīti no attēla)
+            tables: Atpazītās tabulas lapas koordinātēs
+            timings: Vārdnīca detektoru laikiem
+        """
+        return await self._offload('zones', self._detect_zones_sync, image, text_blocks, tables or [],
+                                   timings=timings)
+    
+    def _detect_zones_sync(self, image: Union[np.ndarray, PageImage], text_blocks: Optional[Sequence],
+                           tables: List[TableRegion]) -> List[DocumentZone]:
+        """
+        Zonu atpazīšana (sinhronā daļa)
+        
+        Satura joslas ir teksta bloku, lapas tintes komponentu un tabulu
+        horizontālās projekcijas profila nepārtrauktie posmi; tukšas joslas un
+        malas zonās neietilpst. Tintes komponenti ietver arī sīku tekstu, ko
+        teksta bloku filtrs atmet. Joslas tiek
+        klasificētas pēc to centra: virs pirmās tabulas - header, zem pēdējās
+        tabulas - summary, lapas apakšējā footer_zone_ratio daļā - footer, pārējās -
+        body. Bez tabulām header/summary robežas nosaka fiksētās attiecības.
+        Katras zonas joslas tiek saglabātas DocumentZone.bands. Tiek ņemtas
+        vērā tikai tabulas ar šūnu režģi - Hough kandidāti bez šūnām var aptvert
+        tukšas joslas.
         """
         height, width = image.shape[:2]
+        params = self.zone_detection_params
+        if text_blocks is None:
+            text_blocks = self._detect_text_blocks_sync(image)
+        
+        boxes = np.concatenate([BoxArray.from_boxes(text_blocks).array, self._ink_boxes(image)])
+        boxes = boxes[(boxes[:, 3] - boxes[:, 1]) <= height * params["max_block_height_ratio"]]
+        tables = [table for table in tables if table.cells]
+        if tables:
+            boxes = np.concatenate([boxes, BoxArray.from_boxes([table.bounds for table in tables]).array])
+        bands = self._content_bands(boxes, width, height)
+        if len(bands) == 0:
+            # Saturs nav atrasts (tukša lapa vai detektoru kļūda) - fiksētās zonas
+            return self._fixed_ratio_zones(width, height)
+        
+        footer_start = height * (1 - params["footer_zone_ratio"])
+        if tables:
+            header_end = min(table.bounds.y1 for table in tables)
+            summary_start = max(table.bounds.y2 for table in tables)
+        else:
+            header_end = height * params["header_zone_ratio"]
+            summary_start = height * (1 - params["summary_zone_ratio"])
+        
+        center = (bands[:, 1] + bands[:, 3]) / 2
+        band_types = np.full(len(bands), ZoneType.BODY, dtype=object)
+        band_types[center >= summary_start] = ZoneType.SUMMARY
+        band_types[center >= footer_start] = ZoneType.FOOTER
+        band_types[center < header_end] = ZoneType.HEADER
+        
+        zones = []
+        for zone_type, confidence in ((ZoneType.HEADER, 0.85), (ZoneType.FOOTER, 0.75),
+                                      (ZoneType.SUMMARY, 0.70), (ZoneType.BODY, 0.90)):
+            zone_bands = bands[band_types == zone_type]
+            if len(zone_bands) == 0:
+                continue
+            x1, y1 = zone_bands[:, :2].min(axis=0).tolist()
+            x2, y2 = zone_bands[:, 2:].max(axis=0).tolist()
+            zones.append(DocumentZone(
+                zone_type=zone_type,
+                bounds=BoundingBox(x1, y1, x2, y2),
+                confidence=confidence,
+                bands=list(BoxArray(zone_bands))
+            ))
+        
+        covered = int(((bands[:, 2] - bands[:, 0]) * (bands[:, 3] - bands[:, 1])).sum())
+        self.logger.debug(f"Satura joslas: {len(bands)}, {covered / max(1, width * height):.0%} no lapas")
+        return zones
+    
+    def _ink_boxes(self, image: Union[np.ndarray, PageImage]) -> np.ndarray:
+        """
+        Lapas binārā slāņa tintes komponenti (N, 4) [x1, y1, x2, y2]
+        
+        Atšķirībā no _detect_text_blocks_sync (10 px filtrs) ietver sīku tekstu,
+        piem. 9 px augstu IBAN rindu kājenē; atmesti tikai trokšņa punkti.
+        """
+        params = self.zone_detection_params
+        _, _, stats, _ = cv2.connectedComponentsWithStats(PageImage.load(image).binary, connectivity=8)
+        stats = stats[1:]  # 0 - fons
+        keep = ((stats[:, cv2.CC_STAT_HEIGHT] >= params["min_ink_height"])
+                & (stats[:, cv2.CC_STAT_AREA] >= params["min_ink_area"]))
+        x, y, w, h = (stats[keep, i].astype(np.int64) for i in range(4))
+        return np.stack([x, y, x + w, y + h], axis=1)
+    
+    def _content_bands(self, boxes: np.ndarray, width: int, height: int) -> np.ndarray:
+        """
+        Satura joslas no bloku horizontālās projekcijas profila
+        
+        Args:
+            boxes: (N, 4) bloki [x1, y1, x2, y2]
+            width: Lapas platums
+            height: Lapas augstums
+            
+        Returns:
+            np.ndarray: (B, 4) joslas no augšas uz leju; x robežas - joslas bloku aptvērums
+        """
+        boxes = np.clip(boxes.astype(np.int64), 0, (width, height, width, height))
+        boxes = boxes[(boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])]
+        if len(boxes) == 0:
+            return np.empty((0, 4), dtype=np.int64)
+        
+        # Rindu profils: bloku skaits katrā rindā (starpību masīvs + kumulatīvā summa)
+        profile = np.zeros(height + 1, dtype=np.int64)
+        np.add.at(profile, boxes[:, 1], 1)
+        np.add.at(profile, boxes[:, 3], -1)
+        occupied = np.cumsum(profile[:-1]) > 0
+        
+        # Satura posmi; īsākas atstarpes (rindstarpas) posmus neatdala
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], occupied.astype(np.int8), [0]))))
+        starts, ends = edges[0::2], edges[1::2]
+        min_gap = max(8, int(height * self.zone_detection_params["band_gap_ratio"]))
+        separate = (starts[1:] - ends[:-1]) >= min_gap
+        starts = starts[np.concatenate(([True], separate))]
+        ends = ends[np.concatenate((separate, [True]))]
+        
+        # Joslas x robežas - tajā esošo bloku aptvērums (katrs bloks pieder tieši vienai joslai)
+        band = np.searchsorted(starts, boxes[:, 1], side='right') - 1
+        x1 = np.full(len(starts), width, dtype=np.int64)
+        x2 = np.zeros(len(starts), dtype=np.int64)
+        np.minimum.at(x1, band, boxes[:, 0])
+        np.maximum.at(x2, band, boxes[:, 2])
+        
+        padding = max(2, int(height * self.zone_detection_params["band_padding_ratio"]))
+        return np.stack([
+            np.maximum(0, x1 - padding), np.maximum(0, starts - padding),
+            np.minimum(width, x2 + padding), np.minimum(height, ends + padding)
+        ], axis=1)
+    
+    def _fixed_ratio_zones(self, width: int, height: int) -> List[DocumentZone]:
+        """Fiksētu attiecību zonas (header/footer/summary/body), ja satura izvietojums nav zināms"""
         header_height = int(height * self.zone_detection_params["header_zone_ratio"])
         footer_start = int(height * (1 - self.zone_detection_params["footer_zone_ratio"]))
         summary_start = int(height * (1 - self.zone_detection_params["summary_zone_ratio"]))
-        zones = [
+        return [
             DocumentZone(
                 zone_type=ZoneType.HEADER,
                 bounds=BoundingBox(0, 0, width, header_height),
@@ -276,30 +660,28 @@ class DocumentStructureAnalyzer:
                 confidence=0.90
             ),
         ]
-        return zones
     
-    async def _detect_tables(self, image: np.ndarray) -> List[TableRegion]:
+    async def _detect_tables(self, image: Union[np.ndarray, PageImage],
+                             timings: Optional[Dict[str, float]] = None) -> List[TableRegion]:
         """
         Uzlabota tabulu atpazīšana ar vairākām metodēm un kvalitātes pārbaudi
         """
         try:
-            tables = []
-            
-            # 1. Uzlabota morfologiskā pieeja
-            tables_morphological = await self._detect_tables_morphological_enhanced(image)
-            tables.extend(tables_morphological)
-            
-            # 2. Hough line detection ar adaptīviem parametriem
-            tables_hough = await self._detect_tables_hough_enhanced(image)
-            tables.extend(tables_hough)
-            
-            # 3. Contour-based ar uzlabotu filtrēšanu
-            tables_contour = await self._detect_tables_contour_enhanced(image)
-            tables.extend(tables_contour)
+            # 1.-3. Morfologiskā, Hough un contour pieeja paralēli pavedienos
+            detected = await asyncio.gather(
+                self._detect_tables_morphological_enhanced(image, timings=timings),
+                self._detect_tables_hough_enhanced(image, timings=timings),
+                self._detect_tables_contour_enhanced(image, timings=timings)
+            )
+            tables = [table for method_tables in detected for table in method_tables]
             
-            # Apvienot overlapping tabulas un filtrēt kvalitāti
+            # Atmest dominētos kandidātus, apvienot overlapping tabulas un filtrēt kvalitāti
+            start = time.perf_counter()
+            tables = self._prune_dominated_tables(tables)
             tables = self._merge_overlapping_tables(tables)
             tables = self._filter_table_quality(tables, image.shape)
+            if timings is not None:
+                timings['table_merge'] = round((time.perf_counter() - start) * 1000, 1)
             
             self.logger.debug(f"Atpazītas {len(tables)} augstas kvalitātes tabulas")
             return tables
@@ -308,23 +690,21 @@ class DocumentStructureAnalyzer:
             self.logger.error(f"Kļūda tabulu atpazīšanā: {e}")
             return []
     
-    async def _detect_tables_morphological_enhanced(self, image: np.ndarray) -> List[TableRegion]:
+    async def _detect_tables_morphological_enhanced(self, image: Union[np.ndarray, PageImage],
+                                                    timings: Optional[Dict[str, float]] = None) -> List[TableRegion]:
         """Uzlabota morfologiskā tabulu atpazīšana"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        
-        # Adaptīva binarizācija
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY_INV, 15, 10)
+        return await self._offload('tables_morphological', self._detect_tables_morphological_sync,
+                                   image, timings=timings)
+    
+    def _detect_tables_morphological_sync(self, image: Union[np.ndarray, PageImage]) -> List[TableRegion]:
+        """Morfologiskā tabulu atpazīšana (sinhronā daļa)"""
+        page = PageImage.load(image)
         
-        # Horizontālo līniju atpazīšana ar adaptīvu kernel izmēru
-        h_kernel_size = max(30, image.shape[1] // 30)
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (h_kernel_size, 1))
-        horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
+        # Adaptīva binarizācija (kešota lapas līmenī)
+        binary = page.adaptive_binary(15, 10)
         
-        # Vertikālo līniju atpazīšana
-        v_kernel_size = max(15, image.shape[0] // 50)
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, v_kernel_size))
-        vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+        # Horizontālās un vertikālās līnijas ar adaptīvu kernel izmēru
+        horizontal_lines, vertical_lines = self._line_masks(binary, image.shape)
         
         # Apvienot līnijas
         table_mask = cv2.bitwise_or(horizontal_lines, vertical_lines)
@@ -348,8 +728,9 @@ class DocumentStructureAnalyzer:
                 aspect_ratio = w / h if h > 0 else 0
                 if 0.3 <= aspect_ratio <= 10:
                     
-                    # Analizēt šūnu struktūru
-                    cells = await self._analyze_table_cells_enhanced(image[y:y+h, x:x+w])
+                    # Šūnu režģis no jau aprēķinātajām līniju maskām
+                    cells = self._extract_grid_cells(horizontal_lines[y:y+h, x:x+w],
+                                                     vertical_lines[y:y+h, x:x+w], origin=(x, y))
                     
                     # Aprēķināt confidence balstoties uz struktūru
                     confidence = self._calculate_table_confidence(cells, w, h, area)
@@ -357,27 +738,24 @@ class DocumentStructureAnalyzer:
                     table = TableRegion(
                         bounds=BoundingBox(x, y, x + w, y + h),
                         cells=cells,
-                        confidence=confidence
+                        confidence=confidence,
+                        **self._grid_shape(cells)
                     )
                     tables.append(table)
         
         return tables
     
-    async def _detect_tables_hough_enhanced(self, image: np.ndarray) -> List[TableRegion]:
+    async def _detect_tables_hough_enhanced(self, image: Union[np.ndarray, PageImage],
+                                            timings: Optional[Dict[str, float]] = None) -> List[TableRegion]:
         """Uzlabota Hough line tabulu atpazīšana"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
-        
-        # Gaussian blur ar adaptīvu kernel
-        kernel_size = max(3, min(7, image.shape[0] // 200))
-        if kernel_size % 2 == 0:
-            kernel_size += 1
-        blurred = cv2.GaussianBlur(gray, (kernel_size, kernel_size), 0)
+        return await self._offload('tables_hough', self._detect_tables_hough_sync, image, timings=timings)
+    
+    def _detect_tables_hough_sync(self, image: Union[np.ndarray, PageImage]) -> List[TableRegion]:
+        """Hough line tabulu atpazīšana (sinhronā daļa)"""
+        page = PageImage.load(image)
         
-        # Canny edge detection ar adaptīviem sliekšņiem
-        median_val = np.median(blurred)
-        lower = int(max(0, 0.7 * median_val))
-        upper = int(min(255, 1.3 * median_val))
-        edges = cv2.Canny(blurred, lower, upper)
+        # Canny malu karte ar adaptīviem sliekšņiem (kešota lapas līmenī)
+        edges = page.edges
         
         # Hough line detection
         lines = cv2.HoughLinesP(edges, 1, np.pi/180, 
@@ -388,18 +766,13 @@ class DocumentStructureAnalyzer:
         if lines is None:
             return []
         
-        # Klasificēt un apvienot līnijas
-        horizontal_lines = []
-        vertical_lines = []
-        
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-            
-            if abs(angle) <= 10 or abs(angle) >= 170:
-                horizontal_lines.append(line[0])
-            elif abs(angle - 90) <= 10 or abs(angle + 90) <= 10:
-                vertical_lines.append(line[0])
+        # Klasificēt līnijas pēc leņķa (vektorizēti)
+        lines = lines.reshape(-1, 4).astype(np.int64)
+        angle = np.abs(np.degrees(np.arctan2(lines[:, 3] - lines[:, 1], lines[:, 2] - lines[:, 0])))
+        is_horizontal = (angle <= 10) | (angle >= 170)
+        is_vertical = ~is_horizontal & (np.abs(angle - 90) <= 10)
+        horizontal_lines = lines[is_horizontal]
+        vertical_lines = lines[is_vertical]
         
         # Apvienot paralēlās līnijas
         horizontal_lines = self._merge_parallel_lines(horizontal_lines, True)
@@ -407,37 +780,49 @@ class DocumentStructureAnalyzer:
         
         # Atrast tabulu reģionus no līniju krustpunktiem
         tables = []
-        for i, h_line in enumerate(horizontal_lines[:-1]):
-            for j, v_line in enumerate(vertical_lines[:-1]):
-                # Aprēķināt iespējamo tabulas reģionu
-                next_h = horizontal_lines[i + 1] if i + 1 < len(horizontal_lines) else None
-                next_v = vertical_lines[j + 1] if j + 1 < len(vertical_lines) else None
-                
-                if next_h and next_v:
-                    x1 = min(v_line[0], v_line[2])
-                    y1 = min(h_line[1], h_line[3])
-                    x2 = max(next_v[0], next_v[2])
-                    y2 = max(next_h[1], next_h[3])
-                    
-                    if x2 > x1 and y2 > y1:
-                        w, h = x2 - x1, y2 - y1
-                        if w * h > 5000:  # Minimālais tabulas izmērs
-                            table = TableRegion(
-                                bounds=BoundingBox(x1, y1, x2, y2),
-                                cells=[],
-                                confidence=0.75
-                            )
-                            tables.append(table)
+        max_candidates = self.table_detection_params["max_hough_candidates"]
+        candidate_count = (max(0, len(horizontal_lines) - 1)) * (max(0, len(vertical_lines) - 1))
+        if candidate_count > max_candidates:
+            # Blīvā lapā paturēt garākās līnijas, lai kandidātu skaits paliek ierobežots
+            keep = max(2, int(math.sqrt(max_candidates)) + 1)
+            horizontal_lines = self._longest_lines(horizontal_lines, keep, horizontal=True)
+            vertical_lines = self._longest_lines(vertical_lines, keep, horizontal=False)
+            self.logger.debug(f"Hough kandidāti ierobežoti: {candidate_count} -> {(keep - 1) ** 2}")
+        
+        if len(horizontal_lines) < 2 or len(vertical_lines) < 2:
+            return tables
+        
+        # Reģions starp katrām divām blakus horizontālajām un vertikālajām līnijām (režģis H-1 x V-1)
+        top = np.minimum(horizontal_lines[:-1, 1], horizontal_lines[:-1, 3])[:, None]
+        bottom = np.maximum(horizontal_lines[1:, 1], horizontal_lines[1:, 3])[:, None]
+        left = np.minimum(vertical_lines[:-1, 0], vertical_lines[:-1, 2])[None, :]
+        right = np.maximum(vertical_lines[1:, 0], vertical_lines[1:, 2])[None, :]
+        
+        regions = np.stack(np.broadcast_arrays(left, top, right, bottom), axis=-1).reshape(-1, 4)
+        width = regions[:, 2] - regions[:, 0]
+        height = regions[:, 3] - regions[:, 1]
+        valid = (width > 0) & (height > 0) & (width * height > 5000)  # Minimālais tabulas izmērs
+        
+        for x1, y1, x2, y2 in regions[valid].tolist():
+            tables.append(TableRegion(
+                bounds=BoundingBox(x1, y1, x2, y2),
+                cells=[],
+                confidence=0.75
+            ))
         
         return tables
     
-    async def _detect_tables_contour_enhanced(self, image: np.ndarray) -> List[TableRegion]:
+    async def _detect_tables_contour_enhanced(self, image: Union[np.ndarray, PageImage],
+                                              timings: Optional[Dict[str, float]] = None) -> List[TableRegion]:
         """Uzlabota contour-based tabulu atpazīšana"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image
+        return await self._offload('tables_contour', self._detect_tables_contour_sync, image, timings=timings)
+    
+    def _detect_tables_contour_sync(self, image: Union[np.ndarray, PageImage]) -> List[TableRegion]:
+        """Contour-based tabulu atpazīšana (sinhronā daļa)"""
+        page = PageImage.load(image)
         
-        # Adaptīva threshold
-        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY_INV, 11, 2)
+        # Adaptīva threshold (kešota lapas līmenī)
+        binary = page.adaptive_binary(11, 2)
         
         # Morfologiskās operācijas lai uzlabotu struktūru
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
@@ -477,95 +862,213 @@ class DocumentStructureAnalyzer:
     
     async def _analyze_table_cells_enhanced(self, table_region: np.ndarray) -> List[TableCell]:
         """Uzlabota šūnu analīze tabulas reģionā"""
+        return await asyncio.to_thread(self._analyze_table_cells_sync, table_region)
+    
+    def _analyze_table_cells_sync(self, table_region: np.ndarray) -> List[TableCell]:
+        """Šūnu analīze tabulas izgriezumā (sinhronā daļa); koordinātes relatīvas pret izgriezumu"""
         if table_region.size == 0:
             return []
         
         gray = cv2.cvtColor(table_region, cv2.COLOR_BGR2GRAY) if len(table_region.shape) == 3 else table_region
-        
-        # Adaptīva binarizācija šūnu robežu atpazīšanai
         binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                     cv2.THRESH_BINARY_INV, 11, 2)
-        
-        # Atrast potenciālās šūnu robežas
-        contours, _ = cv2.findContours(binary, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+                                     cv2.THRESH_BINARY_INV, 15, 10)
+        horizontal, vertical = self._line_masks(binary, binary.shape)
+        return self._extract_grid_cells(horizontal, vertical)
+    
+    @staticmethod
+    def _line_masks(binary: np.ndarray, page_shape: tuple) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Horizontālo un vertikālo līniju maskas ar morfologisko atvēršanu
         
-        cells = []
-        min_cell_area = max(100, table_region.shape[0] * table_region.shape[1] * 0.001)
+        Kernel izmērs ir relatīvs pret lapas izmēru, tāpēc tabulas izgriezumam
+        jānodod visas lapas shape, lai rezultāts sakristu ar lapas līmeņa maskām.
+        """
+        h_kernel_size = max(30, page_shape[1] // 30)
+        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (h_kernel_size, 1))
+        horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
         
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > min_cell_area:
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Pārbaudīt vai forma ir šūnas veida
-                if w > 10 and h > 10:  # Minimālais šūnas izmērs
-                    cell = TableCell(
-                        bounds=BoundingBox(x, y, x + w, y + h),
-                        text="",  # Teksts tiks pievienots ar OCR
-                        confidence=0.7
-                    )
-                    cells.append(cell)
+        v_kernel_size = max(15, page_shape[0] // 50)
+        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, v_kernel_size))
+        vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+        return horizontal, vertical
+    
+    def _grid_lines(self, profile: np.ndarray, span: int) -> List[Tuple[int, int]]:
+        """
+        Režģa līniju pozīcijas no projekcijas profila
         
-        return cells
+        Args:
+            profile: Līniju pikseļu skaits katrā rindā (vai kolonnā)
+            span: Tabulas platums (vai augstums) - pilnas līnijas garums
+            
+        Returns:
+            List[Tuple[int, int]]: (sākums, beigas) katrai līnijai; tabulas malas
+            tiek pievienotas, ja ārējās līnijas trūkst
+        """
+        min_cell = self.table_detection_params["min_cell_size"]
+        rows = np.flatnonzero(profile >= span * self.table_detection_params["grid_line_coverage"])
+        
+        lines: List[Tuple[int, int]] = []
+        if rows.size:
+            for group in np.split(rows, np.flatnonzero(np.diff(rows) > 1) + 1):
+                start, end = int(group[0]), int(group[-1]) + 1
+                # Tuvas līnijas (dubultlīnija, biezs rāmis) - viena līnija
+                if lines and start - lines[-1][1] < min_cell:
+                    lines[-1] = (lines[-1][0], end)
+                else:
+                    lines.append((start, end))
+        
+        extent = len(profile)
+        # Atstarpe līdz apgabala malai, kas nav lielāka par min_cell, ir tikai izgriezuma rezerve
+        if not lines or lines[0][0] > min_cell:
+            lines.insert(0, (0, 0))
+        if lines[-1][1] < extent - min_cell:
+            lines.append((extent, extent))
+        return lines
     
-    def _merge_parallel_lines(self, lines: List, is_horizontal: bool) -> List:
-        """Apvieno paralēlās līnijas"""
-        if not lines:
+    def _extract_grid_cells(self, horizontal: np.ndarray, vertical: np.ndarray,
+                            origin: Tuple[int, int] = (0, 0)) -> List[TableCell]:
+        """
+        Rekonstruē tabulas šūnas no līniju maskām
+        
+        Rindu un kolonnu robežas ir maskas projekcijas maksimumi; šūna ir
+        atstarpe starp divām blakus līnijām. Ja kolonnu atdalītājs konkrētā
+        rindā trūkst, blakus šūnas tiek apvienotas (column span).
+        
+        Args:
+            horizontal: Horizontālo līniju maska tabulas apgabalā
+            vertical: Vertikālo līniju maska tabulas apgabalā
+            origin: Tabulas apgabala stūris lapas koordinātēs
+            
+        Returns:
+            List[TableCell]: Nepārklājošas šūnas ar row_index/column_index, rindu secībā
+        """
+        height, width = horizontal.shape[:2]
+        if height == 0 or width == 0:
             return []
         
-        merged = []
-        tolerance = 15  # Pikseļu tolerance
+        rows = self._grid_lines(np.count_nonzero(horizontal, axis=1), width)
+        columns = self._grid_lines(np.count_nonzero(vertical, axis=0), height)
+        if len(rows) < 2 or len(columns) < 2:
+            return []
         
-        # Kārtot līnijas
-        if is_horizontal:
-            lines.sort(key=lambda line: (line[1] + line[3]) // 2)
-        else:
-            lines.sort(key=lambda line: (line[0] + line[2]) // 2)
+        separator_coverage = self.table_detection_params["separator_coverage"]
+        ox, oy = origin
+        cells = []
+        for row_index, ((_, top), (bottom, _)) in enumerate(zip(rows, rows[1:])):
+            if bottom <= top:
+                continue
+            span_start = None
+            for column_index, ((_, left), (right, _)) in enumerate(zip(columns, columns[1:])):
+                if right <= left:
+                    continue
+                if span_start is None:
+                    span_start = (column_index, left)
+                
+                # Vai labajā pusē ir atdalītājs šajā rindā?
+                separator_start, separator_end = columns[column_index + 1]
+                is_last = column_index + 2 == len(columns)
+                if not is_last and separator_end > separator_start:
+                    band = vertical[top:bottom, separator_start:separator_end]
+                    if np.count_nonzero(band.any(axis=1)) < separator_coverage * (bottom - top):
+                        continue
+                
+                cells.append(TableCell(
+                    bounds=BoundingBox(ox + span_start[1], oy + top, ox + right, oy + bottom),
+                    confidence=0.7,
+                    row_index=row_index,
+                    column_index=span_start[0]
+                ))
+                span_start = None
         
-        current_group = [lines[0]]
+        return cells
+    
+    @staticmethod
+    def _grid_shape(cells: List[TableCell]) -> Dict[str, int]:
+        """TableRegion rows/columns no šūnu indeksiem"""
+        if not cells:
+            return {'rows': 0, 'columns': 0}
+        return {
+            'rows': max(cell.row_index for cell in cells) + 1,
+            'columns': max(cell.column_index for cell in cells) + 1
+        }
+    
+    @staticmethod
+    def _longest_lines(lines: np.ndarray, keep: int, horizontal: bool) -> np.ndarray:
+        """Garākās līnijas, saglabājot to pozīciju secību"""
+        lines = np.asarray(lines).reshape(-1, 4)
+        if len(lines) <= keep:
+            return lines
+        axis = 0 if horizontal else 1
+        lengths = np.abs(lines[:, axis + 2] - lines[:, axis])
+        return lines[np.sort(np.argsort(-lengths, kind='stable')[:keep])]
+    
+    def _merge_parallel_lines(self, lines: np.ndarray, is_horizontal: bool) -> np.ndarray:
+        """
+        Apvieno paralēlās līnijas
         
-        for i in range(1, len(lines)):
-            current_line = lines[i]
-            last_line = current_group[-1]
-            
-            if is_horizontal:
-                current_pos = (current_line[1] + current_line[3]) // 2
-                last_pos = (last_line[1] + last_line[3]) // 2
-            else:
-                current_pos = (current_line[0] + current_line[2]) // 2
-                last_pos = (last_line[0] + last_line[2]) // 2
+        Līnijas tiek kārtotas pēc pozīcijas (vidējā y horizontālajām, x vertikālajām);
+        blakus līnijas, kuru pozīcijas atšķiras ne vairāk kā par toleranci, veido grupu.
+        
+        Args:
+            lines: (N, 4) masīvs [x1, y1, x2, y2]
+            is_horizontal: Horizontālas vai vertikālas līnijas
             
-            if abs(current_pos - last_pos) <= tolerance:
-                current_group.append(current_line)
-            else:
-                if current_group:
-                    merged_line = self._merge_line_group(current_group, is_horizontal)
-                    merged.append(merged_line)
-                current_group = [current_line]
+        Returns:
+            np.ndarray: (G, 4) apvienotās līnijas pozīciju secībā
+        """
+        lines = np.asarray(lines, dtype=np.int64).reshape(-1, 4)
+        if len(lines) == 0:
+            return lines
         
-        if current_group:
-            merged_line = self._merge_line_group(current_group, is_horizontal)
-            merged.append(merged_line)
+        tolerance = 15  # Pikseļu tolerance
         
+        # Kārtot līnijas pēc pozīcijas
+        across, along = (1, 0) if is_horizontal else (0, 1)
+        position = (lines[:, across] + lines[:, across + 2]) // 2
+        order = np.argsort(position, kind='stable')
+        lines, position = lines[order], position[order]
+        
+        # Grupas sākas tur, kur attālums līdz iepriekšējai līnijai pārsniedz toleranci
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(position) > tolerance) + 1))
+        counts = np.diff(np.append(starts, len(lines)))
+        
+        merged = np.empty((len(starts), 4), dtype=np.int64)
+        # Pozīcija - grupas vidējā; garums - grupas kopējais aptvērums
+        merged[:, across] = np.add.reduceat(lines[:, across], starts) // counts
+        merged[:, across + 2] = np.add.reduceat(lines[:, across + 2], starts) // counts
+        merged[:, along] = np.minimum.reduceat(np.minimum(lines[:, along], lines[:, along + 2]), starts)
+        merged[:, along + 2] = np.maximum.reduceat(np.maximum(lines[:, along], lines[:, along + 2]), starts)
         return merged
     
-    def _merge_line_group(self, lines: List, is_horizontal: bool) -> List:
-        """Apvieno līniju grupu"""
-        if not lines:
-            return []
+    def _prune_dominated_tables(self, tables: List[TableRegion]) -> List[TableRegion]:
+        """
+        Atmet kandidātus, kas gandrīz pilnībā atrodas cita kandidāta iekšienē
         
-        if is_horizontal:
-            avg_y1 = sum(line[1] for line in lines) // len(lines)
-            avg_y2 = sum(line[3] for line in lines) // len(lines)
-            min_x = min(min(line[0], line[2]) for line in lines)
-            max_x = max(max(line[0], line[2]) for line in lines)
-            return [min_x, avg_y1, max_x, avg_y2]
-        else:
-            avg_x1 = sum(line[0] for line in lines) // len(lines)
-            avg_x2 = sum(line[2] for line in lines) // len(lines)
-            min_y = min(min(line[1], line[3]) for line in lines)
-            max_y = max(max(line[1], line[3]) for line in lines)
-            return [avg_x1, min_y, avg_x2, max_y]
+        Kandidāts ir dominēts, ja vismaz dominated_containment no tā laukuma ir
+        lielākā kandidātā ar ne mazāku confidence un ne mazāk šūnām (piem., Hough
+        režģa šūnas morfologiski atrastas tabulas iekšienē).
+        """
+        if len(tables) <= 1:
+            return tables
+        
+        containment = self.table_detection_params["dominated_containment"]
+        index = BoxIndex.build([table.bounds for table in tables])
+        kept = []
+        for i, table in enumerate(tables):
+            area = table.bounds.area
+            dominated = area > 0 and any(
+                tables[j].bounds.area > area
+                and tables[j].confidence >= table.confidence
+                and len(tables[j].cells) >= len(table.cells)
+                and self._intersection_area(table.bounds, tables[j].bounds) >= containment * area
+                for j in index.query(table.bounds) if j != i
+            )
+            if not dominated:
+                kept.append(table)
+        
+        if len(kept) < len(tables):
+            self.logger.debug(f"Atmesti {len(tables) - len(kept)} dominēti tabulu kandidāti")
+        return kept
     
     def _merge_overlapping_tables(self, tables: List[TableRegion]) -> List[TableRegion]:
         """Apvieno pārklājošās tabulas"""
@@ -574,6 +1077,8 @@ class DocumentStructureAnalyzer:
         
         merged = []
         used = set()
+        # Pārbauda tikai kandidātus, kas telpiski krustojas (nevis visus pārus)
+        index = BoxIndex.build([table.bounds for table in tables])
         
         for i, table1 in enumerate(tables):
             if i in used:
@@ -582,9 +1087,10 @@ class DocumentStructureAnalyzer:
             current_group = [table1]
             used.add(i)
             
-            for j, table2 in enumerate(tables[i+1:], i+1):
-                if j in used:
+            for j in index.query(table1.bounds):
+                if j <= i or j in used:
                     continue
+                table2 = tables[j]
                     
                 # Pārbaudīt pārklāšanos
                 overlap = self._calculate_bbox_overlap(table1.bounds, table2.bounds)
@@ -601,12 +1107,17 @@ class DocumentStructureAnalyzer:
         
         return merged
     
+    @staticmethod
+    def _intersection_area(bbox1: BoundingBox, bbox2: BoundingBox) -> int:
+        """Divu bounding box krustojuma laukums"""
+        x_overlap = max(0, min(bbox1.x2, bbox2.x2) - max(bbox1.x1, bbox2.x1))
+        y_overlap = max(0, min(bbox1.y2, bbox2.y2) - max(bbox1.y1, bbox2.y1))
+        return x_overlap * y_overlap
+    
     def _calculate_bbox_overlap(self, bbox1: BoundingBox, bbox2: BoundingBox) -> float:
         """Aprēķina bounding box pārklāšanās koeficientu"""
         # Aprēķināt krustojuma laukumu
-        x_overlap = max(0, min(bbox1.x2, bbox2.x2) - max(bbox1.x1, bbox2.x1))
-        y_overlap = max(0, min(bbox1.y2, bbox2.y2) - max(bbox1.y1, bbox2.y1))
-        intersection_area = x_overlap * y_overlap
+        intersection_area = self._intersection_area(bbox1, bbox2)
         
         # Aprēķināt savienojuma laukumu
         area1 = (bbox1.x2 - bbox1.x1) * (bbox1.y2 - bbox1.y1)
@@ -626,18 +1137,18 @@ class DocumentStructureAnalyzer:
         max_x = max(table.bounds.x2 for table in tables)
         max_y = max(table.bounds.y2 for table in tables)
         
-        # Apvienot šūnas
-        all_cells = []
-        for table in tables:
-            all_cells.extend(table.cells)
+        # Šūnas - no kandidāta ar pilnīgāko režģi (citu metožu šūnas to dublētu)
+        richest = max(tables, key=lambda table: len(table.cells))
         
         # Aprēķināt vidējo confidence
         avg_confidence = sum(table.confidence for table in tables) / len(tables)
         
         return TableRegion(
             bounds=BoundingBox(min_x, min_y, max_x, max_y),
-            cells=all_cells,
-            confidence=min(0.95, avg_confidence * 1.1)  # Nedaudz paaugstina confidence apvienotajām
+            cells=richest.cells,
+            confidence=min(0.95, avg_confidence * 1.1),  # Nedaudz paaugstina confidence apvienotajām
+            rows=richest.rows,
+            columns=richest.columns
         )
     
     def _filter_table_quality(self, tables: List[TableRegion], image_shape: tuple) -> List[TableRegion]:
@@ -690,33 +1201,32 @@ class DocumentStructureAnalyzer:
         
         return min(0.95, base_confidence)
     
-    async def _detect_text_blocks(self, image: np.ndarray) -> List[BoundingBox]:
+    async def _detect_text_blocks(self, image: Union[np.ndarray, PageImage],
+                                  timings: Optional[Dict[str, float]] = None) -> List[BoundingBox]:
         """
         Teksta bloku atpazīšana
         """
+        return await self._offload('text_blocks', self._detect_text_blocks_sync, image, timings=timings)
+    
+    def _detect_text_blocks_sync(self, image: Union[np.ndarray, PageImage]) -> BoxArray:
+        """Teksta bloku atpazīšana (sinhronā daļa)"""
         # Šobrīd vienkāršota implementācija
         # Vēlāk var izmantot EAST text detector vai līdzīgu
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
-        # Simple contour-based text block detection
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+        # Simple connected-component text block detection (Otsu binārais no PageImage)
+        thresh = PageImage.load(image).binary
         
         # Morphological operations to connect text
         kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
         morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
         
-        contours, _ = cv2.findContours(morph, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Komponenšu statistika vienā izsaukumā - bez Python cikla pa kontūrām
+        _, _, stats, _ = cv2.connectedComponentsWithStats(morph, connectivity=8)
+        x, y, w, h = (stats[1:, i] for i in range(4))  # 0 - fons
         
-        text_blocks = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            
-            # Filter tiny regions
-            if w < 10 or h < 10:
-                continue
-                
-            text_blocks.append(BoundingBox(x, y, x + w, y + h))
+        # Filter tiny regions
+        keep = (w >= 10) & (h >= 10)
+        text_blocks = BoxArray(np.stack([x, y, x + w, y + h], axis=1)[keep])
         
         self.logger.debug(f"Atpazīti {len(text_blocks)} teksta bloki")
         return text_blocks
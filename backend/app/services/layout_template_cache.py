@@ -0,0 +1,364 @@
+"""
+Piegādātāju izkārtojumu šablonu kešs
+Atkārtoti izmanto zināma izkārtojuma tabulu režģi, ja lapas līniju nospiedums sakrīt
+(zonas katrai lapai tiek aprēķinātas no jauna pēc tās satura)
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import LAYOUT_TEMPLATES
+
+from .document_structure_service import (
+    BoundingBox, DocumentStructure, TableCell, TableRegion
+)
+
+logger = logging.getLogger(__name__)
+
+# Perceptual hash: DCT no 32x32 attēla, zemo frekvenču 8x8 bloks -> 64 biti
+HASH_SIZE = 32
+HASH_BLOCK = 8
+# Maskas izpludināšana pirms hash (daļa no platuma) - tievas līnijas nedrīkst pārslēgt bitus nelielas nobīdes dēļ
+HASH_BLUR_RATIO = 1 / 50
+# Rindu/kolonnu projekciju garums un izlīdzināšana (bin) izlīdzināšanas pārbaudei
+PROFILE_BINS = 256
+PROFILE_SIGMA = 1.5
+
+
+@dataclass
+class LayoutFingerprint:
+    """Lapas līniju izkārtojuma nospiedums"""
+    phash: int
+    width: int
+    height: int
+    row_profile: np.ndarray
+    column_profile: np.ndarray
+
+    @property
+    def aspect(self) -> float:
+        return self.width / self.height if self.height else 0.0
+
+
+@dataclass
+class TemplateMatch:
+    """Atrasts šablons, pārrēķināts uz pašreizējās lapas koordinātēm"""
+    template_id: str
+    tables: List[TableRegion]
+    distance: int
+    alignment: float
+    offset: Tuple[int, int]
+
+
+def layout_fingerprint(line_mask: np.ndarray, page_width: int, page_height: int,
+                       min_ink_ratio: float = 0.002) -> Optional[LayoutFingerprint]:
+    """
+    Aprēķina izkārtojuma nospiedumu no līniju maskas
+
+    Args:
+        line_mask: Horizontālo un vertikālo līniju maska (var būt samazināta)
+        page_width: Pilnās lapas platums
+        page_height: Pilnās lapas augstums
+        min_ink_ratio: Minimālais līniju pikseļu īpatsvars; lapām bez līnijām
+            nospiedums nav informatīvs (visas tukšās lapas sakristu)
+
+    Returns:
+        LayoutFingerprint vai None
+    """
+    if line_mask.size == 0 or np.count_nonzero(line_mask) < line_mask.size * min_ink_ratio:
+        return None
+
+    mask = (line_mask > 0).astype(np.float32)
+    blurred = cv2.GaussianBlur(mask, (0, 0), max(1.0, mask.shape[1] * HASH_BLUR_RATIO))
+    small = cv2.resize(blurred, (HASH_SIZE, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    block = cv2.dct(small)[:HASH_BLOCK, :HASH_BLOCK].flatten()
+    # DC komponente (vidējā vērtība) netiek ņemta mediānā
+    bits = block > np.median(block[1:])
+    phash = int(''.join('1' if bit else '0' for bit in bits), 2)
+
+    return LayoutFingerprint(
+        phash=phash,
+        width=page_width,
+        height=page_height,
+        row_profile=_profile(mask.sum(axis=1)),
+        column_profile=_profile(mask.sum(axis=0))
+    )
+
+
+def _profile(values: np.ndarray) -> np.ndarray:
+    """Projekcija, pārrēķināta uz PROFILE_BINS garumu, izlīdzināta un normalizēta (vidējais 0, norma 1)"""
+    resized = cv2.resize(values.astype(np.float32).reshape(-1, 1), (1, PROFILE_BINS),
+                         interpolation=cv2.INTER_AREA)
+    resized = cv2.GaussianBlur(resized, (1, 0), sigmaX=0, sigmaY=PROFILE_SIGMA).ravel()
+    resized -= resized.mean()
+    norm = np.linalg.norm(resized)
+    return resized / norm if norm > 0 else resized
+
+
+def _best_shift(template: np.ndarray, current: np.ndarray, max_shift: int) -> Tuple[float, int]:
+    """Nobīde (bin), pie kuras profilu korelācija ir vislielākā"""
+    best_score, best_shift = -1.0, 0
+    for shift in range(-max_shift, max_shift + 1):
+        score = float(np.dot(template, np.roll(current, -shift)))
+        if score > best_score:
+            best_score, best_shift = score, shift
+    return best_score, best_shift
+
+
+class LayoutTemplateCache:
+    """
+    Izkārtojumu šablonu kešs (JSON fails, LRU pēc pēdējās izmantošanas)
+
+    Šablons satur tikai tabulu režģi (zonas ir atkarīgas no lapas satura un
+    tiek aprēķinātas katru reizi); atkārtotai izmantošanai jāsakrīt
+    perceptual hash (Hamming attālums), malu attiecībai un rindu/kolonnu
+    līniju projekcijām (izlīdzināšanas pārbaude ar nobīdi).
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None,
+                 max_templates: Optional[int] = None, save_every: Optional[int] = None):
+        self.enabled = LAYOUT_TEMPLATES["enabled"] if enabled is None else enabled
+        self.path = Path(path or LAYOUT_TEMPLATES["path"])
+        self.max_templates = max_templates or LAYOUT_TEMPLATES["max_templates"]
+        self.max_distance = LAYOUT_TEMPLATES["max_hamming_distance"]
+        self.max_aspect_delta = LAYOUT_TEMPLATES["max_aspect_delta"]
+        self.min_alignment = LAYOUT_TEMPLATES["min_alignment"]
+        self.max_shift_ratio = LAYOUT_TEMPLATES["max_shift_ratio"]
+        self.save_every = max(1, save_every or LAYOUT_TEMPLATES["save_every"])
+        # Trāpījumi kopš pēdējās saglabāšanas (LRU secībai jāsaglabājas arī pēc restarta)
+        self._unsaved_hits = 0
+
+        self._lock = threading.Lock()
+        # Atsevišķa slēdzene ierakstīšanai, lai paralēli store() nepārrakstītu viens otra failu
+        self._save_lock = threading.Lock()
+        self.templates: Dict[str, Dict[str, Any]] = {}
+
+        self.metrics = {
+            'lookups': 0,
+            'hits': 0,
+            'misses': 0,
+            'rejected_alignment': 0,
+            'uninformative': 0,
+            'stores': 0,
+            'evictions': 0
+        }
+
+        if self.enabled:
+            self._load()
+
+    def lookup(self, fingerprint: Optional[LayoutFingerprint]) -> Optional[TemplateMatch]:
+        """
+        Meklē šablonu, kas atbilst nospiedumam
+
+        Args:
+            fingerprint: layout_fingerprint() rezultāts (None - lapa bez līnijām)
+
+        Returns:
+            TemplateMatch ar koordinātēm pašreizējā lapā vai None
+        """
+        with self._lock:
+            match = self._match(fingerprint)
+            due = match is not None and self._unsaved_hits >= self.save_every
+        if due:
+            self.save()
+        return match
+
+    def _match(self, fingerprint: Optional[LayoutFingerprint]) -> Optional[TemplateMatch]:
+        """lookup() daļa, kas izpildās zem slēdzenes"""
+        self.metrics['lookups'] += 1
+        if fingerprint is None:
+            self.metrics['uninformative'] += 1
+            self.metrics['misses'] += 1
+            return None
+
+        candidates = []
+        for template_id, template in self.templates.items():
+            distance = bin(template['phash'] ^ fingerprint.phash).count('1')
+            aspect_delta = abs(template['width'] / template['height'] - fingerprint.aspect) / fingerprint.aspect
+            if distance <= self.max_distance and aspect_delta <= self.max_aspect_delta:
+                candidates.append((distance, template_id))
+
+        max_shift = max(1, int(PROFILE_BINS * self.max_shift_ratio))
+        for distance, template_id in sorted(candidates):
+            template = self.templates[template_id]
+            row_score, row_shift = _best_shift(np.asarray(template['row_profile'], np.float32),
+                                               fingerprint.row_profile, max_shift)
+            column_score, column_shift = _best_shift(np.asarray(template['column_profile'], np.float32),
+                                                     fingerprint.column_profile, max_shift)
+            alignment = min(row_score, column_score)
+            if alignment < self.min_alignment:
+                self.metrics['rejected_alignment'] += 1
+                continue
+
+            offset = (round(column_shift * fingerprint.width / PROFILE_BINS),
+                      round(row_shift * fingerprint.height / PROFILE_BINS))
+            template['hits'] += 1
+            template['last_used_at'] = datetime.utcnow().isoformat()
+            self.metrics['hits'] += 1
+            self._unsaved_hits += 1
+            tables = self._project(template, fingerprint, offset)
+            return TemplateMatch(template_id=template_id, tables=tables,
+                                 distance=distance, alignment=round(alignment, 3), offset=offset)
+
+        self.metrics['misses'] += 1
+        return None
+
+    def store(self, fingerprint: Optional[LayoutFingerprint], structure: DocumentStructure,
+              source: Optional[str] = None) -> Optional[str]:
+        """
+        Saglabā struktūru kā šablonu (pēc pilnas detekcijas)
+
+        Returns:
+            str: Šablona ID vai None, ja lapai nav informatīva nospieduma
+        """
+        if fingerprint is None:
+            return None
+
+        now = datetime.utcnow().isoformat()
+        template_id = uuid.uuid4().hex[:12]
+        template = {
+            'phash': fingerprint.phash,
+            'width': fingerprint.width,
+            'height': fingerprint.height,
+            'row_profile': [round(float(v), 5) for v in fingerprint.row_profile],
+            'column_profile': [round(float(v), 5) for v in fingerprint.column_profile],
+            'tables': [table.to_dict() for table in structure.tables],
+            'source': Path(source).name if source else None,
+            'hits': 0,
+            'created_at': now,
+            'last_used_at': now
+        }
+
+        with self._lock:
+            self.templates[template_id] = template
+            self.metrics['stores'] += 1
+            while len(self.templates) > self.max_templates:
+                oldest = min(self.templates, key=lambda key: self.templates[key]['last_used_at'])
+                del self.templates[oldest]
+                self.metrics['evictions'] += 1
+        self.save()
+        return template_id
+
+    @staticmethod
+    def _project(template: Dict[str, Any], fingerprint: LayoutFingerprint,
+                 offset: Tuple[int, int]) -> List[TableRegion]:
+        """Pārrēķina šablona tabulu koordinātes uz pašreizējās lapas izmēru un nobīdi"""
+        scale_x = fingerprint.width / template['width']
+        scale_y = fingerprint.height / template['height']
+        dx, dy = offset
+
+        def box(bounds: Dict[str, int]) -> BoundingBox:
+            return BoundingBox(
+                min(fingerprint.width, max(0, round(bounds['x1'] * scale_x) + dx)),
+                min(fingerprint.height, max(0, round(bounds['y1'] * scale_y) + dy)),
+                min(fingerprint.width, max(0, round(bounds['x2'] * scale_x) + dx)),
+                min(fingerprint.height, max(0, round(bounds['y2'] * scale_y) + dy))
+            )
+
+        return [
+            TableRegion(
+                bounds=box(table['bounds']),
+                cells=[TableCell(bounds=box(cell['bounds']), confidence=cell['confidence'],
+                                 row_index=cell['row_index'], column_index=cell['column_index'])
+                       for cell in table['cells']],
+                confidence=table['confidence'],
+                rows=table['rows'],
+                columns=table['columns']
+            )
+            for table in template['tables']
+        ]
+
+    def list_templates(self) -> List[Dict[str, Any]]:
+        """Šablonu kopsavilkums (bez profiliem un šūnām)"""
+        with self._lock:
+            return [
+                {
+                    'template_id': template_id,
+                    'source': template['source'],
+                    'size': [template['width'], template['height']],
+                    'tables': len(template['tables']),
+                    'cells': sum(len(table['cells']) for table in template['tables']),
+                    'hits': template['hits'],
+                    'created_at': template['created_at'],
+                    'last_used_at': template['last_used_at']
+                }
+                for template_id, template in sorted(self.templates.items(),
+                                                    key=lambda item: item[1]['last_used_at'], reverse=True)
+            ]
+
+    def evict(self, template_id: Optional[str] = None) -> int:
+        """
+        Dzēš vienu šablonu vai visus
+
+        Returns:
+            int: Dzēsto šablonu skaits
+        """
+        with self._lock:
+            if template_id is None:
+                removed = len(self.templates)
+                self.templates.clear()
+            else:
+                removed = 1 if self.templates.pop(template_id, None) is not None else 0
+            self.metrics['evictions'] += removed
+        if removed:
+            self.save()
+        return removed
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Atgriež šablonu keša metriku (hit rate)"""
+        with self._lock:
+            lookups = self.metrics['lookups']
+            return {
+                'enabled': self.enabled,
+                'path': str(self.path),
+                'templates': len(self.templates),
+                'max_templates': self.max_templates,
+                'hit_rate': self.metrics['hits'] / lookups if lookups else 0.0,
+                **self.metrics
+            }
+
+    def save(self):
+        """Saglabā šablonus uz diska (atomāra ierakstīšana)"""
+        if not self.enabled:
+            return
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with self._save_lock:
+                with self._lock:
+                    # Detektoru koordinātes var būt numpy skaitļi
+                    data = json.dumps({'templates': self.templates}, ensure_ascii=False,
+                                      default=lambda value: value.item() if hasattr(value, 'item') else str(value))
+                    self._unsaved_hits = 0
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_text(data, encoding='utf-8')
+                os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.error(f"Izkārtojumu šablonu saglabāšanas kļūda: {e}")
+            tmp_path.unlink(missing_ok=True)
+
+    def flush(self):
+        """Saglabā nesaglabātos šablonu trāpījumus (pie izslēgšanas)"""
+        with self._lock:
+            pending = self._unsaved_hits
+        if pending:
+            self.save()
+
+    def _load(self):
+        """Ielādē saglabātos šablonus"""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.templates = json.load(f).get('templates', {})
+            logger.info(f"Ielādēti {len(self.templates)} izkārtojumu šabloni")
+        except Exception as e:
+            logger.warning(f"Izkārtojumu šablonu ielādes kļūda: {e}")
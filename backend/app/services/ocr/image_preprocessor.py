@@ -4,25 +4,158 @@ Uzlabo attēlu kvalitāti OCR procesam
 """
 
 import cv2
+import hashlib
+import json
 import numpy as np
 from PIL import Image, ImageEnhance, ImageFilter, ImageOps
 import logging
-from typing import Tuple, Optional, Union
+import uuid
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Tuple, Optional, Sequence, Union
 from pathlib import Path
 import os
 
+from app.config import IMAGE_PREPROCESSING
+
+from .noise_estimator import choose_denoise
+from .preprocessing_graph import Pipeline, PreprocessingGraph, Step, step
+from .skew_estimator import SkewEstimate, estimate_skew
+from .tiled_preprocessing import get_tiled_executor
+
 logger = logging.getLogger(__name__)
 
+# Attēls var būt ceļš, dekodēts masīvs vai kodēti baiti
+ImageSource = Union[str, Path, np.ndarray, bytes]
+
+# Kopīgais pelēktoņu prefikss - light un aggressive stratēģijas to aprēķina vienreiz dokumentam
+NORMALIZED_GRAY = (
+    step('gray'),
+    step('resize', upscale=False),
+    step('deskew'),
+    step('denoise'),
+    step('resize', upscale=True),
+)
+
+LIGHT_PIPELINE: Pipeline = NORMALIZED_GRAY + (
+    step('clahe', clip_limit=3.0),
+    step('binarize', block_size=11, c=2),
+    step('morphology'),
+)
+
+INVOICE_PIPELINE: Pipeline = NORMALIZED_GRAY + (
+    step('clahe', clip_limit=4.0),
+    step('gamma', gamma=1.2),
+    step('invoice_binarize', block_size=15, c=2),
+    step('invoice_morphology'),
+)
+
+# IMAGE_PREPROCESSING atslēgas, kas nemaina priekšapstrādes rezultātu (worker skaits
+# atšķiras starp serveriem, joslu apstrāde ir bitu precīza)
+FINGERPRINT_EXCLUDED_KEYS = ("debug_spill", "tile_workers")
+
+
+def preprocessing_fingerprint(invoice_mode: bool) -> str:
+    """
+    Priekšapstrādes varianta nospiedums OCR keša atslēgai
+    
+    Mainās līdz ar pipeline soļiem vai IMAGE_PREPROCESSING sliekšņiem (denoise,
+    slīpums, joslas), lai pēc izmaiņām kešs neatgrieztu novecojušu tekstu.
+    
+    Args:
+        invoice_mode: INVOICE_PIPELINE (True) vai LIGHT_PIPELINE (False)
+        
+    Returns:
+        str: Saīsināts SHA-256
+    """
+    source = json.dumps({
+        'pipeline': INVOICE_PIPELINE if invoice_mode else LIGHT_PIPELINE,
+        'config': {key: value for key, value in IMAGE_PREPROCESSING.items()
+                   if key not in FINGERPRINT_EXCLUDED_KEYS}
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+
+
+def load_image(source: ImageSource) -> np.ndarray:
+    """
+    Ielādē attēlu kā BGR masīvu (masīvus atgriež bez kopēšanas)
+    
+    Args:
+        source: Ceļš, numpy masīvs vai kodēti attēla baiti
+        
+    Returns:
+        np.ndarray: Dekodēts attēls
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+        name = "buferis"
+    else:
+        image = cv2.imread(str(source))
+        name = source
+    if image is None:
+        raise ValueError(f"Nevarēja ielādēt attēlu: {name}")
+    return image
+
+
+@lru_cache(maxsize=32)
+def gamma_lut(gamma: float) -> np.ndarray:
+    """
+    uint8 uzmeklēšanas tabula gamma korekcijai (kešota pēc gamma, tikai lasāma)
+    
+    Rezultāts sakrīt ar np.power(image / 255.0, gamma) * 255.0 -> uint8,
+    bet bez float64 lapas izmēra kopijām.
+    """
+    lut = (np.power(np.arange(256) / 255.0, gamma) * 255.0).astype(np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+
+def apply_lut(image: np.ndarray, lut: np.ndarray) -> np.ndarray:
+    """
+    Piemēro uint8 LUT katram pikselim
+    
+    Rakstāmus masīvus maina vietā; tikai lasāmiem (kopīgi grafa starprezultāti,
+    izsaucēja avots) tiek izveidots viens jauns uint8 buferis.
+    """
+    return cv2.LUT(image, lut, dst=image if image.flags.writeable else None)
+
+
 class ImagePreprocessor:
     """Attēlu priekšapstrādes klase OCR kvalitātes uzlabošanai"""
     
     def __init__(self):
+        # Diskā raksta tikai debug režīmā (vai legacy ceļu API)
         self.temp_dir = Path("temp/preprocessed")
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        self.debug_spill = IMAGE_PREPROCESSING.get("debug_spill", False)
+        # Lielām lapām lokālās operācijas tiek izpildītas joslās paralēli
+        self.tiles = get_tiled_executor()
+        
+    def spill(self, image: np.ndarray, name: str, suffix: str) -> Optional[str]:
+        """
+        Saglabā starprezultātu diskā, ja ieslēgts debug režīms
+        
+        Faila nosaukumā ir unikāls sufikss, lai vienlaicīgas apstrādes
+        ar vienādu faila nosaukumu nepārrakstītu viena otras failus.
         
+        Returns:
+            Optional[str]: Ceļš uz saglabāto failu vai None
+        """
+        if not self.debug_spill:
+            return None
+        return self._write_temp(image, name, suffix)
+    
+    def _write_temp(self, image: np.ndarray, name: str, suffix: str) -> str:
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        output_path = self.temp_dir / f"{name}_{uuid.uuid4().hex[:8]}_{suffix}.png"
+        cv2.imwrite(str(output_path), image)
+        return str(output_path)
+    
     def preprocess_image(self, image_path: str, save_steps: bool = False) -> str:
         """
-        Galvenā priekšapstrādes funkcija
+        Priekšapstrāde ar rezultātu failā (saderībai ar ceļu API)
+        
+        OCR pipeline izmanto preprocess_array - bez PNG ierakstīšanas.
         
         Args:
             image_path: Ceļš uz oriģinālo attēlu
@@ -32,74 +165,118 @@ class ImagePreprocessor:
             str: Ceļš uz priekšapstrādāto attēlu
         """
         try:
-            # Ielādēt attēlu
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Nevarēja ielādēt attēlu: {image_path}")
-            
-            original_name = Path(image_path).stem
-            step_counter = 0
-            
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "original")
-                step_counter += 1
-            
-            # 1. Izmēra normalizācija (ja pārāk mazs vai liels)
-            image = self._normalize_size(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "resized")
-                step_counter += 1
-            
-            # 2. Rotācijas korekcija
-            image = self._correct_rotation(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "rotated")
-                step_counter += 1
-            
-            # 3. Trokšņa samazināšana
-            image = self._denoise(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "denoised")
-                step_counter += 1
-            
-            # 4. Kontrasta uzlabošana
-            image = self._enhance_contrast(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "contrast")
-                step_counter += 1
-            
-            # 5. Binarizācija (melnbalts)
-            image = self._binarize(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "binary")
-                step_counter += 1
-            
-            # 6. Morfologiskās operācijas
-            image = self._morphological_operations(image)
-            if save_steps:
-                self._save_step(image, original_name, step_counter, "morphology")
-            
-            # Saglabāt finālo rezultātu
-            output_path = self.temp_dir / f"{original_name}_processed.png"
-            cv2.imwrite(str(output_path), image)
-            
-            logger.info(f"Attēls priekšapstrādāts: {output_path}")
-            return str(output_path)
-            
+            image = load_image(image_path)
         except Exception as e:
             logger.error(f"Kļūda priekšapstrādējot attēlu {image_path}: {e}")
-            return image_path  # Atgriež oriģinālo, ja kļūda
+            return image_path
+        
+        processed = self.preprocess_array(image, save_steps=save_steps, name=Path(image_path).stem)
+        if processed is image:
+            return image_path
+        return self._write_temp(processed, Path(image_path).stem, "processed")
     
-    def _normalize_size(self, image: np.ndarray, target_dpi: int = 300) -> np.ndarray:
+    def graph(self, source: Union[np.ndarray, Callable[[], np.ndarray]],
+              pipelines: Sequence[Sequence[Step]] = (LIGHT_PIPELINE, INVOICE_PIPELINE),
+              skew_angle: Optional[float] = None) -> PreprocessingGraph:
         """
-        Normalizē attēla izmēru optimālam OCR
+        Viena dokumenta priekšapstrādes grafs ar šī preprocesora soļiem
         
         Args:
-            image: OpenCV attēls
-            target_dpi: Mērķa DPI vērtība
+            source: BGR attēls vai funkcija, kas to ielādē
+            pipelines: Pipeline, kas tiks izpildītas (kopīgais prefikss tiek aprēķināts vienreiz)
+            skew_angle: Jau novērtēts lapas slīpums (None - novērtē deskew solis)
             
         Returns:
-            np.ndarray: Izmēra normalizēts attēls
+            PreprocessingGraph
+        """
+        metadata: Dict[str, Any] = {}
+        if skew_angle is not None:
+            metadata['skew'] = SkewEstimate(angle=skew_angle, source='image_stats').to_dict()
+        operations = {
+            'gray': self._to_gray,
+            'resize': self._resize,
+            'deskew': partial(self._correct_rotation, metadata=metadata),
+            'denoise': partial(self._denoise_normalized, metadata=metadata),
+            'clahe': self._enhance_contrast,
+            'gamma': self._gamma,
+            'binarize': self._binarize,
+            'invoice_binarize': self._binarize_invoice,
+            'morphology': self._morphological_operations,
+            'invoice_morphology': self._invoice_morphology,
+        }
+        return PreprocessingGraph(source, operations, pipelines, metadata=metadata)
+    
+    def _run_pipeline(self, image: Optional[np.ndarray], pipeline: Pipeline, label: str, name: str,
+                      metadata: Optional[Dict[str, Any]], graph: Optional[PreprocessingGraph],
+                      save_steps: bool = False, skew_angle: Optional[float] = None) -> np.ndarray:
+        """Izpilda pipeline dokumenta grafā (vai vienreizējā grafā) un ieraksta metadatus"""
+        graph = graph or self.graph(image, pipelines=(pipeline,), skew_angle=skew_angle)
+        trace: List[Dict[str, Any]] = []
+        on_step = None
+        if save_steps:
+            self._save_step(graph.source, name, 0, "original")
+            on_step = lambda step_name, result: self._save_step(result, name, len(trace), step_name)
+        
+        result = graph.run(pipeline, trace=trace, on_step=on_step)
+        if metadata is not None:
+            for key in ('skew', 'denoise'):
+                if key in graph.metadata:
+                    metadata[key] = graph.metadata[key]
+            metadata['preprocessing'] = {'pipeline': label, 'steps': trace}
+        return result
+    
+    def preprocess_array(self, image: Optional[np.ndarray], save_steps: bool = False,
+                         name: str = "image", metadata: Optional[Dict[str, Any]] = None,
+                         graph: Optional[PreprocessingGraph] = None,
+                         skew_angle: Optional[float] = None) -> np.ndarray:
+        """
+        Galvenā priekšapstrādes funkcija (atmiņā)
+        
+        Pelēktoņu pipeline: gray -> samazināšana -> rotācija -> denoise ->
+        palielināšana -> CLAHE -> binarizācija -> morfoloģija. Mazus attēlus
+        attīra pirms palielināšanas - mazāk pikseļu un troksnis vēl nav izsmērēts.
+        
+        Args:
+            image: BGR attēls (None, ja dots graph - tas dekodē attēlu pats)
+            save_steps: Vai saglabāt katru apstrādes soli (debug)
+            name: Nosaukums debug failiem
+            metadata: Vārdnīca, kurā ierakstīt denoise lēmumu ('denoise') un soļus ('preprocessing')
+            graph: Dokumenta grafs, ja vairākas stratēģijas apstrādā to pašu attēlu
+            skew_angle: Jau zināms slīpums bez grafa (0.0 - lapa jau iztaisnota)
+            
+        Returns:
+            np.ndarray: Priekšapstrādāts attēls (oriģinālais, ja kļūda)
+        """
+        try:
+            processed = self._run_pipeline(image, LIGHT_PIPELINE, 'light', name, metadata, graph, save_steps,
+                                           skew_angle=skew_angle)
+            logger.info(f"Attēls priekšapstrādāts: {name}")
+            return processed
+            
+        except Exception as e:
+            logger.error(f"Kļūda priekšapstrādējot attēlu {name}: {e}")
+            return image if image is not None else graph.source  # Atgriež oriģinālo, ja kļūda
+    
+    def _to_gray(self, image: np.ndarray) -> np.ndarray:
+        """Pelēktoņu attēls (viena kanāla attēlus atgriež bez izmaiņām)"""
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    
+    def _resize(self, image: np.ndarray, upscale: bool) -> np.ndarray:
+        """Izmēra normalizācija tikai vienā virzienā (samazināšana pirms denoise, palielināšana pēc)"""
+        target = self._normalized_shape(image)
+        if target is None or (target[0] > image.shape[0]) != upscale:
+            return image
+        return self._normalize_size(image)
+    
+    def _denoise_normalized(self, image: np.ndarray, metadata: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Denoise pirms palielināšanas - scale metadatos ir attiecība pret normalizēto lapu"""
+        target = self._normalized_shape(image)
+        scale = image.shape[0] / target[0] if target is not None and target[0] > image.shape[0] else 1.0
+        return self._denoise(image, metadata, scale=scale)
+    
+    def _normalized_shape(self, image: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        OCR mērķa izmērs (augstums, platums) vai None, ja izmērs jau ir piemērots
         """
         height, width = image.shape[:2]
         
@@ -110,134 +287,133 @@ class ImagePreprocessor:
         # Ja attēls pārāk mazs, palielinām
         if height < min_height or width < min_width:
             scale_factor = max(min_height / height, min_width / width)
-            new_height = int(height * scale_factor)
-            new_width = int(width * scale_factor)
-            
-            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
-            logger.debug(f"Attēls palielināts: {width}x{height} -> {new_width}x{new_height}")
-        
         # Ja attēls pārāk liels (>4000px), samazinām
         elif height > 4000 or width > 4000:
             scale_factor = min(4000 / height, 4000 / width)
-            new_height = int(height * scale_factor)
-            new_width = int(width * scale_factor)
+        else:
+            return None
+        return int(height * scale_factor), int(width * scale_factor)
+    
+    def _normalize_size(self, image: np.ndarray, target_dpi: int = 300) -> np.ndarray:
+        """
+        Normalizē attēla izmēru optimālam OCR
+        
+        Args:
+            image: OpenCV attēls
+            target_dpi: Mērķa DPI vērtība
             
+        Returns:
+            np.ndarray: Izmēra normalizēts attēls
+        """
+        target = self._normalized_shape(image)
+        if target is None:
+            return image
+        
+        height, width = image.shape[:2]
+        new_height, new_width = target
+        if new_height > height:
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_CUBIC)
+            logger.debug(f"Attēls palielināts: {width}x{height} -> {new_width}x{new_height}")
+        else:
             image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
             logger.debug(f"Attēls samazināts: {width}x{height} -> {new_width}x{new_height}")
         
         return image
     
-    def _correct_rotation(self, image: np.ndarray) -> np.ndarray:
+    def _correct_rotation(self, image: np.ndarray, metadata: Optional[Dict[str, Any]] = None) -> np.ndarray:
         """
-        Koriģē attēla rotāciju, izmantojot teksta līniju analīzi
+        Koriģē lapas slīpumu pēc projekcijas profila samazinātā binārā lapā
+        
+        Ja leņķis jau ir zināms (metadata['skew'], piem., no stratēģijas
+        prognozētāja), tas netiek novērtēts atkārtoti.
         
         Args:
             image: OpenCV attēls
+            metadata: Vārdnīca ar zināmo vai ierakstāmo slīpumu ('skew')
             
         Returns:
             np.ndarray: Rotācijas koriģēts attēls
         """
-        try:
-            # Konvertē uz pelēktoņu
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Atrod malas
-            edges = cv2.Canny(gray, 100, 200, apertureSize=3)
-            
-            # Hough līniju detekcija
-            lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
-            
-            if lines is not None:
-                angles = []
-                for rho, theta in lines[:20]:  # Analizē tikai pirmo 20 līniju
-                    angle = theta * 180 / np.pi
-                    # Normalizē leņķi
-                    if angle > 90:
-                        angle = angle - 180
-                    angles.append(angle)
-                
-                # Aprēķina vidējo rotācijas leņķi
-                if angles:
-                    rotation_angle = np.median(angles)
-                    
-                    # Rotē attēlu tikai ja leņķis > 0.5 grādi
-                    if abs(rotation_angle) > 0.5:
-                        center = (image.shape[1]//2, image.shape[0]//2)
-                        rotation_matrix = cv2.getRotationMatrix2D(center, rotation_angle, 1.0)
-                        image = cv2.warpAffine(image, rotation_matrix, (image.shape[1], image.shape[0]), 
-                                             flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_REPLICATE)
-                        logger.debug(f"Attēls pagriezts par {rotation_angle:.2f} grādiem")
+        if not IMAGE_PREPROCESSING.get("auto_rotate", True):
+            return image
         
-        except Exception as e:
-            logger.warning(f"Nevarēja koriģēt rotāciju: {e}")
+        skew = metadata.get('skew') if metadata is not None else None
+        if skew is None:
+            skew = estimate_skew(image).to_dict()
+            if metadata is not None:
+                metadata['skew'] = skew
         
-        return image
+        rotated = self.tiles.rotate(image, skew['angle'])
+        if rotated is not image:
+            logger.debug(f"Attēls pagriezts par {skew['angle']:.2f} grādiem")
+        return rotated
     
-    def _denoise(self, image: np.ndarray) -> np.ndarray:
+    def _denoise(self, image: np.ndarray, metadata: Optional[Dict[str, Any]] = None,
+                 scale: float = 1.0) -> np.ndarray:
         """
-        Samazina troksni attēlā
+        Samazina troksni attēlā, ja trokšņa novērtējums to prasa
+        
+        Non-local means ir dārgākais priekšapstrādes solis; tīriem attēliem tas
+        tiek izlaists, vidējam troksnim - pelēktoņu variants ar mazāku meklēšanas logu.
+        Rezultāts tiek binarizēts, tāpēc krāsa netiek saglabāta.
         
         Args:
             image: OpenCV attēls
+            metadata: Vārdnīca, kurā ierakstīt lēmumu ('denoise')
+            scale: Attēla izšķirtspēja attiecībā pret normalizēto lapu
             
         Returns:
-            np.ndarray: Trokšņa samazināts attēls
+            np.ndarray: Trokšņa samazināts attēls (pelēktoņu, ja denoise izpildīts)
         """
-        # Non-local means denoising
-        if len(image.shape) == 3:  # Krāsains attēls
-            denoised = cv2.fastNlMeansDenoisingColored(image, None, 10, 10, 7, 21)
-        else:  # Pelēktoņu attēls
-            denoised = cv2.fastNlMeansDenoising(image, None, 10, 7, 21)
-        
+        decision = choose_denoise(image, keep_color=False, scale=round(scale, 3))
+        denoised = self.tiles.denoise(image, decision)
+        if metadata is not None:
+            metadata['denoise'] = decision.to_dict()
+        logger.debug(f"Denoise: {decision.variant} (sigma {decision.sigma}, {decision.elapsed_ms} ms)")
         return denoised
     
-    def _enhance_contrast(self, image: np.ndarray) -> np.ndarray:
+    def _enhance_contrast(self, image: np.ndarray, clip_limit: float = 3.0) -> np.ndarray:
         """
-        Uzlabo attēla kontrastu
+        Uzlabo attēla kontrastu (CLAHE pelēktoņu attēlam)
         
         Args:
-            image: OpenCV attēls
+            image: OpenCV attēls (krāsainam tiek izmantots pelēktoņu kanāls)
+            clip_limit: CLAHE kontrasta ierobežojums
             
         Returns:
-            np.ndarray: Kontrasta uzlabots attēls
+            np.ndarray: Kontrasta uzlabots pelēktoņu attēls
         """
-        # CLAHE (Contrast Limited Adaptive Histogram Equalization)
-        if len(image.shape) == 3:
-            # Krāsainiem attēliem - konvertē uz LAB krāsu telpu
-            lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            lab[:,:,0] = clahe.apply(lab[:,:,0])
-            image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-        else:
-            # Pelēktoņu attēliem
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            image = clahe.apply(image)
-        
-        return image
+        # CLAHE (Contrast Limited Adaptive Histogram Equalization) - rakstāmu attēlu maina vietā
+        gray = self._to_gray(image)
+        clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=(8, 8))
+        return clahe.apply(gray, dst=gray if gray.flags.writeable else None)
     
-    def _binarize(self, image: np.ndarray) -> np.ndarray:
+    def _gamma(self, image: np.ndarray, gamma: float = 1.2) -> np.ndarray:
+        """Gamma korekcija ar uint8 LUT (gamma > 1 padara pelēkos toņus tumšākus)"""
+        return apply_lut(image, gamma_lut(float(gamma)))
+    
+    def _binarize(self, image: np.ndarray, block_size: int = 11, c: int = 2) -> np.ndarray:
         """
         Pārveido attēlu uz melnbaltu (binarizācija)
         
         Args:
             image: OpenCV attēls
+            block_size: Adaptīvā sliekšņa apgabala izmērs
+            c: Konstante, ko atņem no apgabala vidējā
             
         Returns:
             np.ndarray: Binarizēts attēls
         """
-        # Konvertē uz pelēktoņu, ja vajag
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
-        
         # Adaptive threshold - labāk strādā ar dažādu apgaismojumu
-        binary = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY, 11, 2
-        )
-        
-        return binary
+        return self.tiles.adaptive_threshold(self._to_gray(image), block_size, c)
+    
+    def _binarize_invoice(self, image: np.ndarray, block_size: int = 15, c: int = 2) -> np.ndarray:
+        """Pavadzīmju binarizācija - Otsu kombinācijā ar Gaussian adaptive"""
+        gray = self._to_gray(image)
+        _, otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        adaptive = self.tiles.adaptive_threshold(gray, block_size, c)
+        # Kombinē abas metodes
+        return cv2.bitwise_and(otsu, adaptive, dst=otsu)
     
     def _morphological_operations(self, image: np.ndarray) -> np.ndarray:
         """
@@ -261,17 +437,26 @@ class ImagePreprocessor:
         
         return image
     
+    def _invoice_morphology(self, image: np.ndarray) -> np.ndarray:
+        """Specializēta morfoloģija pavadzīmju tekstam un tabulu līnijām"""
+        kernel_line = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
+        kernel_text = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
+        
+        # Uzlabo horizontālās līnijas (tabulas)
+        image = cv2.morphologyEx(image, cv2.MORPH_CLOSE, kernel_line, iterations=1)
+        return cv2.morphologyEx(image, cv2.MORPH_OPEN, kernel_text, iterations=1)
+    
     def _save_step(self, image: np.ndarray, name: str, step: int, description: str):
         """Saglabā apstrādes soli debug vajadzībām"""
         debug_dir = self.temp_dir / "debug"
-        debug_dir.mkdir(exist_ok=True)
+        debug_dir.mkdir(parents=True, exist_ok=True)
         
         filename = f"{name}_{step:02d}_{description}.png"
         cv2.imwrite(str(debug_dir / filename), image)
     
     def preprocess_for_invoice(self, image_path: str) -> str:
         """
-        Specializēta priekšapstrāde pavadzīmēm
+        Pavadzīmju priekšapstrāde ar rezultātu failā (saderībai ar ceļu API)
         
         Args:
             image_path: Ceļš uz pavadzīmes attēlu
@@ -280,54 +465,46 @@ class ImagePreprocessor:
             str: Ceļš uz priekšapstrādāto attēlu
         """
         try:
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Nevarēja ielādēt attēlu: {image_path}")
-            
-            # Specializēti uzstādījumi pavadzīmēm
-            original_name = Path(image_path).stem
-            
-            # 1. Agresīvāka kontrasta uzlabošana (pavadzīmes bieži ir vājā kvalitātē)
-            if len(image.shape) == 3:
-                lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-                clahe = cv2.createCLAHE(clipLimit=4.0, tileGridSize=(8,8))
-                lab[:,:,0] = clahe.apply(lab[:,:,0])
-                image = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
-            
-            # 2. Gamma korekcija 
-            gamma = 1.2
-            image = np.power(image / 255.0, gamma) * 255.0
-            image = image.astype(np.uint8)
-            
-            # 3. Uzlabota binarizācija pavadzīmēm
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            
-            # Otsu threshold kombinācijā ar Gaussian adaptive
-            _, otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                           cv2.THRESH_BINARY, 15, 2)
-            
-            # Kombinē abas metodes
-            binary = cv2.bitwise_and(otsu, adaptive)
-            
-            # 4. Specializēta morfologija pavadzīmju tekstam
-            kernel_line = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 1))
-            kernel_text = cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2))
-            
-            # Uzlabo horizontālās līnijas (tabulas)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel_line, iterations=1)
-            binary = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel_text, iterations=1)
-            
-            # Saglabāt rezultātu
-            output_path = self.temp_dir / f"{original_name}_invoice_processed.png"
-            cv2.imwrite(str(output_path), binary)
-            
-            logger.info(f"Pavadzīme priekšapstrādāta: {output_path}")
-            return str(output_path)
-            
+            image = load_image(image_path)
         except Exception as e:
             logger.error(f"Kļūda priekšapstrādējot pavadzīmi {image_path}: {e}")
             return image_path
+        
+        processed = self.preprocess_invoice_array(image, name=Path(image_path).stem)
+        if processed is image:
+            return image_path
+        return self._write_temp(processed, Path(image_path).stem, "invoice_processed")
+    
+    def preprocess_invoice_array(self, image: Optional[np.ndarray], name: str = "image",
+                                 metadata: Optional[Dict[str, Any]] = None,
+                                 graph: Optional[PreprocessingGraph] = None,
+                                 skew_angle: Optional[float] = None) -> np.ndarray:
+        """
+        Specializēta priekšapstrāde pavadzīmēm (atmiņā)
+        
+        Kopīgs prefikss ar preprocess_array (līdz palielināšanai), tad agresīvāks
+        CLAHE (pavadzīmes bieži ir vājā kvalitātē), gamma, Otsu+adaptive
+        binarizācija un tabulu līniju morfoloģija.
+        
+        Args:
+            image: BGR pavadzīmes attēls (None, ja dots graph)
+            name: Nosaukums žurnālam
+            metadata: Vārdnīca denoise lēmumam un soļiem
+            graph: Dokumenta grafs, ja vairākas stratēģijas apstrādā to pašu attēlu
+            skew_angle: Jau zināms slīpums bez grafa (0.0 - lapa jau iztaisnota)
+            
+        Returns:
+            np.ndarray: Binarizēts attēls (oriģinālais, ja kļūda)
+        """
+        try:
+            binary = self._run_pipeline(image, INVOICE_PIPELINE, 'invoice', name, metadata, graph,
+                                        skew_angle=skew_angle)
+            logger.info(f"Pavadzīme priekšapstrādāta: {name}")
+            return binary
+            
+        except Exception as e:
+            logger.error(f"Kļūda priekšapstrādējot pavadzīmi {name}: {e}")
+            return image if image is not None else graph.source
     
     def cleanup_temp_files(self, keep_recent: int = 10):
         """
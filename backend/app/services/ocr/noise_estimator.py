@@ -0,0 +1,156 @@
+"""
+Trokšņa novērtējums un denoise lēmums
+Lēts Immerkær sigma novērtējums nosaka, vai un kā izpildīt non-local means denoise
+"""
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from app.config import IMAGE_PREPROCESSING
+
+# Immerkær trokšņa novērtējuma kodols
+NOISE_KERNEL = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+
+# Paraugu joslas augstums (rindas) lielām lapām
+SAMPLE_STRIP_ROWS = 32
+
+
+@dataclass
+class DenoiseDecision:
+    """Denoise lēmums vienam attēlam (tiek ierakstīts OCR metadatos)"""
+    sigma: float                # Trokšņa novērtējums līdzenos apgabalos
+    variant: str                # none | gray | color
+    reason: str
+    h: float = 0.0              # Filtra stiprums
+    template_window: int = 7
+    search_window: int = 21
+    scale: float = 1.0          # Denoise izšķirtspēja / normalizētās lapas izšķirtspēja
+    chroma_sigma: Optional[float] = None
+    elapsed_ms: float = 0.0
+    tiles: int = 1              # Joslu skaits (lielām lapām - paralēli)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _sample_strips(gray: np.ndarray, max_pixels: int) -> List[np.ndarray]:
+    """Vienmērīgi izvietotas horizontālas joslas (lielām lapām pietiek ar ~1 MP)"""
+    height, width = gray.shape[:2]
+    if height * width <= max_pixels or height <= SAMPLE_STRIP_ROWS:
+        return [gray]
+    count = max(1, max_pixels // (SAMPLE_STRIP_ROWS * width))
+    starts = np.linspace(0, height - SAMPLE_STRIP_ROWS, count).astype(int)
+    return [gray[y:y + SAMPLE_STRIP_ROWS] for y in starts]
+
+
+def estimate_noise_sigma(gray: np.ndarray, exclude_edges: bool = False,
+                         max_pixels: Optional[int] = None) -> float:
+    """
+    Immerkær ātrais trokšņa sigma novērtējums
+
+    Args:
+        gray: Viena kanāla attēls
+        exclude_edges: Izslēgt 10% pikseļu ar lielāko gradientu (teksta malas
+            citādi tiek uzskatītas par troksni)
+        max_pixels: Paraugu pikseļu limits (None - viss attēls)
+
+    Returns:
+        float: Trokšņa standartnovirzes novērtējums
+    """
+    strips = _sample_strips(gray, max_pixels) if max_pixels else [gray]
+    responses, gradients = [], []
+    for strip in strips:
+        if strip.shape[0] < 3 or strip.shape[1] < 3:
+            continue
+        strip = strip.astype(np.float32)
+        responses.append(np.abs(cv2.filter2D(strip, -1, NOISE_KERNEL))[1:-1, 1:-1].ravel())
+        if exclude_edges:
+            gx = cv2.Sobel(strip, cv2.CV_32F, 1, 0)
+            gy = cv2.Sobel(strip, cv2.CV_32F, 0, 1)
+            gradients.append((np.abs(gx) + np.abs(gy))[1:-1, 1:-1].ravel())
+    if not responses:
+        return 0.0
+
+    response = np.concatenate(responses)
+    if exclude_edges:
+        gradient = np.concatenate(gradients)
+        k = int(0.9 * (len(gradient) - 1))
+        response = response[gradient <= np.partition(gradient, k)[k]]
+    return float(response.mean() * np.sqrt(0.5 * np.pi) / 6.0)
+
+
+def choose_denoise(image: np.ndarray, keep_color: bool = False, scale: float = 1.0,
+                   params: Optional[Dict[str, Any]] = None) -> DenoiseDecision:
+    """
+    Izvēlas denoise variantu pēc trokšņa novērtējuma
+
+    - sigma < denoise_skip_sigma: bez denoise
+    - sigma < denoise_heavy_sigma: pelēktoņu NLM ar mazāku meklēšanas logu (11)
+    - citādi: pelēktoņu NLM ar pilnu logu (21)
+    Krāsains NLM tikai, ja krāsa jāsaglabā un krāsu troksnis pārsniedz denoise_color_sigma.
+
+    Args:
+        image: BGR vai pelēktoņu attēls
+        keep_color: Vai rezultātam jāpaliek krāsainam
+        scale: Attēla izšķirtspēja attiecībā pret normalizēto lapu (metadatiem)
+        params: Sliekšņi (None - IMAGE_PREPROCESSING)
+
+    Returns:
+        DenoiseDecision
+    """
+    params = params or IMAGE_PREPROCESSING
+    if not params.get("denoise", True):
+        return DenoiseDecision(sigma=0.0, variant='none', reason='disabled', scale=scale)
+
+    color = image.ndim == 3
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if color else image
+    max_pixels = params.get("noise_sample_pixels", 1_000_000)
+    sigma = round(estimate_noise_sigma(gray, exclude_edges=True, max_pixels=max_pixels), 2)
+
+    if sigma < params.get("denoise_skip_sigma", 3.0):
+        return DenoiseDecision(sigma=sigma, variant='none', reason='clean', scale=scale)
+
+    heavy = sigma >= params.get("denoise_heavy_sigma", 8.0)
+    decision = DenoiseDecision(
+        sigma=sigma,
+        variant='gray',
+        reason='heavy_noise' if heavy else 'light_noise',
+        h=round(float(np.clip(1.25 * sigma, 3.0, 15.0)), 1),
+        search_window=21 if heavy else 11,
+        scale=scale
+    )
+
+    if color and keep_color:
+        # Krāsu troksnis - B un R kanālu starpības troksnis
+        chroma = cv2.subtract(image[:, :, 0], image[:, :, 2], dtype=cv2.CV_16S)
+        decision.chroma_sigma = round(estimate_noise_sigma(chroma, exclude_edges=True,
+                                                           max_pixels=max_pixels), 2)
+        if decision.chroma_sigma >= params.get("denoise_color_sigma", 3.0):
+            decision.variant = 'color'
+    return decision
+
+
+def apply_denoise(image: np.ndarray, decision: DenoiseDecision) -> np.ndarray:
+    """
+    Izpilda denoise pēc lēmuma (laiks tiek ierakstīts decision.elapsed_ms)
+
+    Returns:
+        np.ndarray: 'gray' variantam - viena kanāla attēls; 'none' - tas pats masīvs
+    """
+    if decision.variant == 'none':
+        return image
+
+    start = time.perf_counter()
+    if decision.variant == 'color' and image.ndim == 3:
+        denoised = cv2.fastNlMeansDenoisingColored(image, None, decision.h, decision.h,
+                                                   decision.template_window, decision.search_window)
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        denoised = cv2.fastNlMeansDenoising(gray, None, decision.h,
+                                            decision.template_window, decision.search_window)
+    decision.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+    return denoised
@@ -0,0 +1,338 @@
+"""
+OCR rezultātu kešs
+Atslēga: faila satura hash + OCR konfigurācija; diska LRU un opcionāla Postgres tabula
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.config import OCR_CACHE
+
+logger = logging.getLogger(__name__)
+
+# Faila lasīšanas bloks hash aprēķinam
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """Aprēķina faila satura SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Divu līmeņu OCR rezultātu kešs
+
+    1. Lokālais disks - JSON faili, izmēra ierobežots LRU (pēc mtime)
+    2. Postgres ocr_cache tabula (ja ieslēgta) - kopīgs starp backend replikām
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_size_mb: Optional[int] = None,
+                 enabled: Optional[bool] = None,
+                 use_database: Optional[bool] = None):
+        self.enabled = OCR_CACHE["enabled"] if enabled is None else enabled
+        self.use_database = OCR_CACHE["use_database"] if use_database is None else use_database
+        self.cache_dir = Path(cache_dir or OCR_CACHE["dir"])
+        self.max_size_bytes = (max_size_mb if max_size_mb is not None else OCR_CACHE["max_size_mb"]) * 1024 * 1024
+
+        # Mainās pēc Tesseract/traineddata atjaunināšanas
+        self.engine_fingerprint = "unknown"
+
+        self._lock = threading.Lock()
+        self._disk_size: Optional[int] = None
+        # (ceļš, izmērs, mtime) -> satura hash, lai atkārtoti nelasa failu
+        self._hash_memo: Dict[tuple, str] = {}
+
+        self.metrics = {
+            'hits': 0,
+            'disk_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'invalidations': 0,
+            'errors': 0
+        }
+
+    def set_engine_fingerprint(self, fingerprint: str):
+        """Iestata OCR dzinēja nospiedumu (iekļauts katrā atslēgā)"""
+        self.engine_fingerprint = fingerprint or "unknown"
+
+    def make_key(self, file_path: str, variant: Dict[str, Any]) -> str:
+        """
+        Izveido keša atslēgu
+
+        Args:
+            file_path: Ceļš uz attēlu vai PDF
+            variant: OCR konfigurācija (stratēģija, psm, whitelist, valoda, priekšapstrāde)
+
+        Returns:
+            str: SHA-256 atslēga
+        """
+        stat = os.stat(file_path)
+        memo_key = (str(file_path), stat.st_size, stat.st_mtime_ns)
+        content_hash = self._hash_memo.get(memo_key)
+        if content_hash is None:
+            content_hash = hash_file(file_path)
+            if len(self._hash_memo) > 1024:
+                self._hash_memo.clear()
+            self._hash_memo[memo_key] = content_hash
+
+        key_source = json.dumps({
+            'content': content_hash,
+            'variant': variant,
+            'engine': self.engine_fingerprint
+        }, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    # === Sinhronās operācijas (izpildās pavedienā) ===
+
+    def get_sync(self, key: str) -> Optional[Dict[str, Any]]:
+        """Meklē ierakstu diskā, pēc tam datubāzē"""
+        entry = self._disk_get(key)
+        if entry is not None:
+            self.metrics['disk_hits'] += 1
+        elif self.use_database:
+            entry = self._db_get(key)
+            if entry is not None:
+                self.metrics['db_hits'] += 1
+                # Aizpilda lokālo līmeni nākamajiem pieprasījumiem
+                self._disk_put(key, entry)
+
+        if entry is None:
+            self.metrics['misses'] += 1
+        else:
+            self.metrics['hits'] += 1
+        return entry
+
+    def put_sync(self, key: str, raw_text: str, cleaned_text: str, confidence: float,
+                 payload: Optional[Dict[str, Any]] = None):
+        """Saglabā ierakstu visos ieslēgtajos līmeņos"""
+        entry = {
+            'raw_text': raw_text,
+            'cleaned_text': cleaned_text,
+            'confidence': confidence,
+            'payload': payload or {},
+            'engine_fingerprint': self.engine_fingerprint,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        self._disk_put(key, entry)
+        if self.use_database:
+            self._db_put(key, entry)
+        self.metrics['stores'] += 1
+
+    def invalidate_sync(self, stale_only: bool = False) -> Dict[str, int]:
+        """
+        Dzēš keša ierakstus
+
+        Args:
+            stale_only: Dzēst tikai ierakstus ar citu dzinēja nospiedumu
+
+        Returns:
+            Dict: Dzēsto ierakstu skaits katrā līmenī
+        """
+        removed = {'disk': 0, 'database': 0}
+
+        with self._lock:
+            if self.cache_dir.exists():
+                for entry_file in self.cache_dir.glob('*.json'):
+                    if stale_only and not self._is_stale(entry_file):
+                        continue
+                    try:
+                        entry_file.unlink()
+                        removed['disk'] += 1
+                    except OSError:
+                        pass
+            self._disk_size = None
+
+        if self.use_database:
+            removed['database'] = self._db_invalidate(stale_only)
+
+        self.metrics['invalidations'] += 1
+        logger.info(f"OCR kešs iztīrīts: {removed}")
+        return removed
+
+    # === Async saskarne ===
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            return await asyncio.to_thread(self.get_sync, key)
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.warning(f"OCR keša lasīšanas kļūda: {e}")
+            return None
+
+    async def put(self, key: str, raw_text: str, cleaned_text: str, confidence: float,
+                  payload: Optional[Dict[str, Any]] = None):
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self.put_sync, key, raw_text, cleaned_text, confidence, payload)
+        except Exception as e:
+            self.metrics['errors'] += 1
+            logger.warning(f"OCR keša saglabāšanas kļūda: {e}")
+
+    async def invalidate(self, stale_only: bool = False) -> Dict[str, int]:
+        return await asyncio.to_thread(self.invalidate_sync, stale_only)
+
+    # === Diska līmenis ===
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _disk_get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # LRU - atjauno piekļuves laiku
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def _disk_put(self, key: str, entry: Dict[str, Any]):
+        data = json.dumps(entry, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if self._disk_size is None:
+                self._disk_size = sum(p.stat().st_size for p in self.cache_dir.glob('*.json'))
+
+            path = self._entry_path(key)
+            previous_size = path.stat().st_size if path.exists() else 0
+
+            # Atomāra ierakstīšana - citi procesi neredz pusē ierakstītu failu
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            self._disk_size += len(data) - previous_size
+            if self._disk_size > self.max_size_bytes:
+                self._evict(keep=path)
+
+    def _evict(self, keep: Path):
+        """Dzēš vecākos (pēc pēdējās piekļuves) ierakstus, līdz izmērs ir limitā"""
+        entries = []
+        for entry_file in self.cache_dir.glob('*.json'):
+            try:
+                stat = entry_file.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry_file))
+            except OSError:
+                continue
+        entries.sort(key=lambda item: item[0])
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_file in entries:
+            if total <= self.max_size_bytes:
+                break
+            if entry_file == keep:
+                continue
+            try:
+                entry_file.unlink()
+                total -= size
+                self.metrics['evictions'] += 1
+            except OSError:
+                pass
+        self._disk_size = total
+
+    def _is_stale(self, entry_file: Path) -> bool:
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('engine_fingerprint') != self.engine_fingerprint
+        except (OSError, json.JSONDecodeError):
+            return True
+
+    # === Datubāzes līmenis ===
+
+    def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        from app.database import SessionLocal
+        from app.models import OcrCacheEntry
+
+        db = SessionLocal()
+        try:
+            row = db.query(OcrCacheEntry).filter(OcrCacheEntry.cache_key == key).first()
+            if row is None:
+                return None
+            row.hits = (row.hits or 0) + 1
+            row.last_used_at = datetime.utcnow()
+            db.commit()
+            return {
+                'raw_text': row.raw_text,
+                'cleaned_text': row.cleaned_text,
+                'confidence': row.confidence,
+                'payload': json.loads(row.payload) if row.payload else {},
+                'engine_fingerprint': row.engine_fingerprint,
+                'created_at': row.created_at.isoformat() if row.created_at else None
+            }
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, entry: Dict[str, Any]):
+        from app.database import SessionLocal
+        from app.models import OcrCacheEntry
+
+        db = SessionLocal()
+        try:
+            db.merge(OcrCacheEntry(
+                cache_key=key,
+                raw_text=entry['raw_text'],
+                cleaned_text=entry['cleaned_text'],
+                confidence=entry['confidence'],
+                payload=json.dumps(entry['payload'], ensure_ascii=False),
+                engine_fingerprint=entry['engine_fingerprint'],
+                last_used_at=datetime.utcnow(),
+                hits=0
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _db_invalidate(self, stale_only: bool) -> int:
+        from app.database import SessionLocal
+        from app.models import OcrCacheEntry
+
+        db = SessionLocal()
+        try:
+            query = db.query(OcrCacheEntry)
+            if stale_only:
+                query = query.filter(OcrCacheEntry.engine_fingerprint != self.engine_fingerprint)
+            removed = query.delete(synchronize_session=False)
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Atgriež keša metriku"""
+        lookups = self.metrics['hits'] + self.metrics['misses']
+        return {
+            'enabled': self.enabled,
+            'use_database': self.use_database,
+            'cache_dir': str(self.cache_dir),
+            'disk_size_bytes': self._disk_size,
+            'max_size_bytes': self.max_size_bytes,
+            'engine_fingerprint': self.engine_fingerprint,
+            'hit_rate': self.metrics['hits'] / lookups if lookups else 0.0,
+            **self.metrics
+        }
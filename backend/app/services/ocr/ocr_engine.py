@@ -0,0 +1,411 @@
+"""
+Kopīgais Tesseract OCR dzinējs
+Izpilda Tesseract izsaukumus ierobežotā process pool, lai nebloķētu event loop
+"""
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Union
+
+import numpy as np
+
+# OCR pamata bibliotēkas
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+from app.config import OCR_ENGINE
+
+logger = logging.getLogger(__name__)
+
+# Attēls var būt ceļš, dekodēts masīvs, PIL attēls vai kodēti baiti (PNG/JPEG)
+ImageInput = Union[str, np.ndarray, bytes, Any]
+
+
+class OCREngineError(RuntimeError):
+    """OCR dzinēja kļūda."""
+    pass
+
+
+class OCRTimeoutError(OCREngineError):
+    """OCR izsaukums nepabeidzās atvēlētajā laikā."""
+    pass
+
+
+def _prepare_image(image: ImageInput):
+    """Pārveido ievades attēlu formātā, ko pieņem pytesseract"""
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        from PIL import Image
+        return Image.open(io.BytesIO(bytes(image)))
+    if isinstance(image, np.ndarray):
+        from PIL import Image
+        # OpenCV masīvi ir BGR; Tesseract CLI saņem nesaspiestu BMP (pytesseract
+        # noklusēti kodētu PNG, kas lielām lapām aizņem simtiem ms)
+        if image.ndim == 3 and image.shape[2] == 3:
+            image = image[:, :, ::-1]
+        pil_image = Image.fromarray(np.ascontiguousarray(image))
+        pil_image.format = 'BMP'
+        return pil_image
+    return image
+
+
+def parse_tesseract_data(data: Dict[str, list]) -> Dict[str, Any]:
+    """
+    Saliek tekstu, vārdu koordinātes un confidence no image_to_data rezultāta
+
+    Teksts tiek veidots tāpat kā Tesseract txt izvadē: vārdi rindā atdalīti ar
+    atstarpi, rindas ar jaunu rindu, bloki/paragrāfi ar tukšu rindu.
+
+    Args:
+        data: pytesseract.Output.DICT rezultāts
+
+    Returns:
+        Dict: 'text', 'words' un 'confidence' (0-1, vidējā vārdu confidence)
+    """
+    words = []
+    lines = []
+    current_line_key = None
+    current_par_key = None
+    current_line = []
+
+    for i, word_text in enumerate(data.get('text', [])):
+        try:
+            conf = float(data['conf'][i])
+        except (TypeError, ValueError):
+            conf = -1.0
+        if conf < 0 or not str(word_text).strip():
+            continue
+
+        par_key = (data['block_num'][i], data['par_num'][i])
+        line_key = par_key + (data['line_num'][i],)
+
+        if line_key != current_line_key:
+            if current_line:
+                lines.append(' '.join(current_line))
+            if current_par_key is not None and par_key != current_par_key:
+                lines.append('')
+            current_line = []
+            current_line_key = line_key
+            current_par_key = par_key
+
+        current_line.append(str(word_text))
+        words.append({
+            'text': str(word_text),
+            'conf': conf,
+            'left': int(data['left'][i]),
+            'top': int(data['top'][i]),
+            'width': int(data['width'][i]),
+            'height': int(data['height'][i]),
+            'block': int(data['block_num'][i]),
+            'par': int(data['par_num'][i]),
+            'line': int(data['line_num'][i])
+        })
+
+    if current_line:
+        lines.append(' '.join(current_line))
+
+    confidences = [word['conf'] for word in words]
+    return {
+        'text': '\n'.join(lines),
+        'words': words,
+        'confidence': (sum(confidences) / len(confidences) / 100.0) if confidences else 0.0
+    }
+
+
+def _run_tesseract(method: str, image: ImageInput, config: str,
+                   tesseract_cmd: Optional[str], timeout: float,
+                   submitted_at: float) -> Dict[str, Any]:
+    """
+    Worker funkcija - izpildās pool procesā
+
+    Jābūt moduļa līmenī, lai to varētu nosūtīt (pickle) uz worker procesu.
+    """
+    started_at = time.time()
+
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    prepared = _prepare_image(image)
+
+    if method in ('image_to_data', 'image_to_text_data'):
+        output = pytesseract.image_to_data(
+            prepared, config=config, timeout=timeout,
+            output_type=pytesseract.Output.DICT
+        )
+        if method == 'image_to_text_data':
+            # Teksts un confidence no viena Tesseract izsaukuma
+            output = parse_tesseract_data(output)
+    else:
+        output = pytesseract.image_to_string(prepared, config=config, timeout=timeout)
+
+    return {
+        'output': output,
+        'wait_time': max(0.0, started_at - submitted_at),
+        'run_time': time.time() - started_at
+    }
+
+
+def _noop() -> bool:
+    """Tukšs darbs worker procesu iesildīšanai"""
+    return True
+
+
+class OCREngine:
+    """
+    Ierobežots Tesseract worker pool
+
+    Visi OCR izsaukumi (OCRService, StructureAwareOCR) iet caur šo dzinēju.
+    Katram izsaukumam ir timeout, un dzinējs uzskaita rindas dziļumu.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 executor_type: Optional[str] = None,
+                 max_queue: Optional[int] = None,
+                 default_timeout: Optional[float] = None,
+                 start_method: Optional[str] = None):
+        self.max_workers = max(1, max_workers or OCR_ENGINE["max_workers"])
+        self.executor_type = executor_type or OCR_ENGINE["executor"]
+        self.max_queue = max(0, max_queue if max_queue is not None else OCR_ENGINE["max_queue"])
+        self.default_timeout = default_timeout or OCR_ENGINE["timeout"]
+        self.start_method = start_method or OCR_ENGINE.get("start_method")
+        self.tesseract_cmd = None
+
+        self._executor = None
+        self._lock = threading.Lock()
+        # asyncio.Semaphore ir piesaistīts konkrētam event loop
+        self._semaphores = weakref.WeakKeyDictionary()
+
+        self.metrics = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timeouts': 0,
+            'cancelled': 0,   # Atcelti pirms sākuma (izņemti no rindas)
+            'abandoned': 0,   # Atcelti izpildes laikā - worker darbu pabeidz (CPU netiek atbrīvots)
+            'in_flight': 0,
+            'waiting': 0,
+            'max_queue_depth': 0,
+            'ocr_calls': 0,
+            'total_wait_time': 0.0,
+            'total_run_time': 0.0
+        }
+
+        logger.info(f"OCR dzinējs konfigurēts: {self.executor_type}, workers={self.max_workers}")
+
+    def set_tesseract_cmd(self, tesseract_cmd: Optional[str]):
+        """Iestata Tesseract ceļu, ko nodot worker procesiem"""
+        self.tesseract_cmd = tesseract_cmd
+
+    def _get_executor(self):
+        """Izveido executor pie pirmā pieprasījuma"""
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'thread':
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="ocr-engine"
+                    )
+                else:
+                    mp_context = multiprocessing.get_context(self.start_method) if self.start_method else None
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=mp_context
+                    )
+                logger.info(f"OCR worker pool palaists: {self.max_workers} {self.executor_type} workers")
+            return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Atgriež pašreizējā event loop semaforu (pool + rindas ierobežojums)"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_workers + self.max_queue)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    @property
+    def queue_depth(self) -> int:
+        """Darbi, kas gaida brīvu worker (pool rindā vai pirms tās)"""
+        return max(0, self.metrics['in_flight'] - self.max_workers) + self.metrics['waiting']
+
+    async def submit(self, fn: Callable, *args, timeout: Optional[float] = None) -> Any:
+        """
+        Izpilda funkciju worker pool ar timeout
+
+        Args:
+            fn: Moduļa līmeņa (pickle-ējama) funkcija
+            *args: Funkcijas argumenti
+            timeout: Maksimālais gaidīšanas laiks sekundēs
+
+        Returns:
+            Funkcijas rezultāts
+        """
+        timeout = timeout or self.default_timeout
+        semaphore = self._get_semaphore()
+
+        self.metrics['waiting'] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.metrics['waiting'] -= 1
+
+        self.metrics['submitted'] += 1
+        self.metrics['in_flight'] += 1
+        self.metrics['max_queue_depth'] = max(self.metrics['max_queue_depth'], self.queue_depth)
+
+        future = None
+        try:
+            future = self._get_executor().submit(fn, *args)
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+            self.metrics['completed'] += 1
+            return result
+        except asyncio.TimeoutError:
+            # Ja darbs vēl nav sācies, to izņem no rindas
+            future.cancel()
+            self.metrics['timeouts'] += 1
+            raise OCRTimeoutError(f"OCR izsaukums pārsniedza {timeout}s")
+        except asyncio.CancelledError:
+            # Jau palaistu Tesseract izsaukumu nevar apturēt - tas tiek pabeigts worker
+            if future is not None:
+                self.metrics['cancelled' if future.cancel() else 'abandoned'] += 1
+            raise
+        except Exception:
+            self.metrics['failed'] += 1
+            raise
+        finally:
+            self.metrics['in_flight'] -= 1
+            semaphore.release()
+
+    async def _call_tesseract(self, method: str, image: ImageInput, config: str,
+                              timeout: Optional[float]) -> Any:
+        """Izsauc pytesseract metodi worker procesā"""
+        if not PYTESSERACT_AVAILABLE:
+            raise OCREngineError("pytesseract bibliotēka nav instalēta")
+
+        timeout = timeout or self.default_timeout
+        result = await self.submit(
+            _run_tesseract, method, image, config, self.tesseract_cmd, timeout, time.time(),
+            timeout=timeout
+        )
+
+        self.metrics['ocr_calls'] += 1
+        self.metrics['total_wait_time'] += result['wait_time']
+        self.metrics['total_run_time'] += result['run_time']
+        return result['output']
+
+    async def image_to_string(self, image: ImageInput, config: str = "",
+                              timeout: Optional[float] = None) -> str:
+        """
+        Atpazīst tekstu attēlā
+
+        Args:
+            image: Ceļš, numpy masīvs, PIL attēls vai kodēti attēla baiti
+            config: Tesseract konfigurācijas string
+            timeout: Timeout sekundēs (None = noklusētais)
+
+        Returns:
+            str: Atpazītais teksts
+        """
+        return await self._call_tesseract('image_to_string', image, config, timeout)
+
+    async def image_to_data(self, image: ImageInput, config: str = "",
+                            timeout: Optional[float] = None) -> Dict[str, list]:
+        """
+        Atgriež Tesseract vārdu datus (pytesseract.Output.DICT formātā)
+
+        Args:
+            image: Ceļš, numpy masīvs, PIL attēls vai kodēti attēla baiti
+            config: Tesseract konfigurācijas string
+            timeout: Timeout sekundēs (None = noklusētais)
+
+        Returns:
+            Dict: Vārdu teksts, koordinātes un confidence
+        """
+        return await self._call_tesseract('image_to_data', image, config, timeout)
+
+    async def image_to_text_data(self, image: ImageInput, config: str = "",
+                                 timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Viens Tesseract izsaukums, kas atgriež tekstu, vārdu koordinātes un confidence
+        
+        Aizstāj image_to_string + image_to_data pāri uz viena attēla.
+        
+        Args:
+            image: Ceļš, numpy masīvs, PIL attēls vai kodēti attēla baiti
+            config: Tesseract konfigurācijas string
+            timeout: Timeout sekundēs (None = noklusētais)
+            
+        Returns:
+            Dict: 'text', 'words' (teksts, conf, koordinātes) un 'confidence' (0-1)
+        """
+        return await self._call_tesseract('image_to_text_data', image, config, timeout)
+    
+    async def warm_up(self) -> None:
+        """Palaiž visus worker procesus iepriekš, lai pirmais pieprasījums negaida"""
+        await asyncio.gather(*[self.submit(_noop) for _ in range(self.max_workers)])
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Atgriež dzinēja metriku"""
+        calls = self.metrics['ocr_calls'] or 1
+        return {
+            'executor': self.executor_type,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'started': self._executor is not None,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.metrics['in_flight'],
+            'max_queue_depth': self.metrics['max_queue_depth'],
+            'submitted': self.metrics['submitted'],
+            'completed': self.metrics['completed'],
+            'failed': self.metrics['failed'],
+            'timeouts': self.metrics['timeouts'],
+            'cancelled': self.metrics['cancelled'],
+            'abandoned': self.metrics['abandoned'],
+            'ocr_calls': self.metrics['ocr_calls'],
+            'avg_wait_ms': self.metrics['total_wait_time'] / calls * 1000,
+            'avg_run_ms': self.metrics['total_run_time'] / calls * 1000
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Aptur worker pool"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+                logger.info("OCR worker pool apturēts")
+
+
+# Kopīgā dzinēja instance
+_default_engine: Optional[OCREngine] = None
+_default_engine_lock = threading.Lock()
+
+
+def get_ocr_engine() -> OCREngine:
+    """
+    Atgriež kopīgo OCR dzinēja instanci
+
+    Returns:
+        OCREngine: Procesa mēroga dzinējs
+    """
+    global _default_engine
+
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = OCREngine()
+        return _default_engine
+
+
+def shutdown_ocr_engine(wait: bool = True):
+    """Aptur kopīgo OCR dzinēju (aplikācijas izslēgšanas laikā)"""
+    global _default_engine
+
+    with _default_engine_lock:
+        if _default_engine is not None:
+            _default_engine.shutdown(wait=wait)
+            _default_engine = None
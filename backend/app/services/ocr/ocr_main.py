@@ -5,10 +5,13 @@ Koordinē visus OCR apstrādes soļus
 
 import asyncio
 import logging
-from typing import Dict, List, Optional, Union
+from functools import partial
+from typing import Any, Dict, List, Optional, Union
 from pathlib import Path
 import time
 
+import numpy as np
+
 # OCR pamata bibliotēkas
 try:
     import pytesseract
@@ -17,13 +20,28 @@ except ImportError:
     PYTESSERACT_AVAILABLE = False
 
 from .tesseract_config import TesseractManager
-from .image_preprocessor import ImagePreprocessor
+from .image_preprocessor import ImagePreprocessor, load_image, preprocessing_fingerprint
+from .preprocessing_graph import PreprocessingGraph
 from .text_cleaner import TextCleaner
 from .pdf_processor import PDFProcessor
 from .structure_aware_ocr import StructureAwareOCR, StructureAwareOCRResult
+from .ocr_engine import get_ocr_engine
+from .strategy_predictor import StrategyPredictor
+from .ocr_cache import OCRCache
+from app.config import ADAPTIVE_OCR
 
 logger = logging.getLogger(__name__)
 
+# Adaptīvās OCR stratēģijas prioritātes secībā ar confidence sliekšņiem
+ADAPTIVE_STRATEGIES = [
+    {'name': 'no_preprocessing', 'threshold': 0.6,
+     'kwargs': {'preprocess': False, 'clean_text': True}},
+    {'name': 'light_preprocessing', 'threshold': 0.4,
+     'kwargs': {'preprocess': True, 'clean_text': True, 'invoice_mode': False}},
+    {'name': 'aggressive_preprocessing', 'threshold': 0.4,
+     'kwargs': {'preprocess': True, 'clean_text': True, 'invoice_mode': True}},
+]
+
 class OCRNotInitializedError(RuntimeError):
     """OCR sistēma nav inicializēta."""
     pass
@@ -44,6 +62,15 @@ class OCRService:
         self.text_cleaner = TextCleaner()
         self.pdf_processor = PDFProcessor()
         
+        # Kopīgais Tesseract worker pool - visi OCR izsaukumi iet caur to
+        self.ocr_engine = get_ocr_engine()
+        
+        # Adaptīvās OCR sākuma stratēģijas prognozētājs
+        self.strategy_predictor = StrategyPredictor()
+        
+        # OCR rezultātu kešs (satura hash + konfigurācija)
+        self.ocr_cache = OCRCache()
+        
         # Inicializē StructureAwareOCR - POSM 4.5 Week 3
         self.structure_aware_ocr = StructureAwareOCR(ocr_service=self)
         
@@ -56,6 +83,7 @@ class OCRService:
             'total_processed': 0,
             'successful': 0,
             'failed': 0,
+            'cache_hits': 0,  # Iekļauti arī total_processed/successful un vidējā laikā
             'avg_processing_time': 0.0
         }
         
@@ -85,6 +113,12 @@ class OCRService:
             init_result['tesseract_ready'] = tesseract_setup['installed']
             init_result['latvian_support'] = tesseract_setup['latvian_support']
             init_result['setup_info']['tesseract'] = tesseract_setup
+            self.ocr_engine.set_tesseract_cmd(self.tesseract_manager.tesseract_cmd)
+            if tesseract_setup['installed']:
+                # Tesseract/traineddata atjaunināšana automātiski maina keša atslēgas
+                self.ocr_cache.set_engine_fingerprint(
+                    self.tesseract_manager.get_engine_fingerprint()
+                )
             
             if not tesseract_setup['installed']:
                 init_result['errors'].append("Tesseract nav instalēts")
@@ -132,33 +166,43 @@ class OCRService:
         
         return init_result
     
-    async def extract_text_from_image(self, image_path: str, 
+    async def extract_text_from_image(self, image_path: Union[str, np.ndarray], 
                                     preprocess: bool = True,
                                     clean_text: bool = True,
-                                    invoice_mode: bool = True) -> Dict[str, any]:
+                                    invoice_mode: bool = True,
+                                    image_name: Optional[str] = None,
+                                    skew_angle: Optional[float] = None,
+                                    graph: Optional[PreprocessingGraph] = None) -> Dict[str, any]:
         
         """
-        Ekstraktē tekstu no attēla faila
+        Ekstraktē tekstu no attēla faila vai jau dekodēta attēla
         
         Args:
-            image_path: Ceļš uz attēla failu
+            image_path: Ceļš uz attēla failu vai BGR numpy masīvs (piem., PDF lapa)
             preprocess: Vai veikt attēla priekšapstrādi
             clean_text: Vai veikt teksta tīrīšanu
             invoice_mode: Vai izmantot pavadzīmju specializētos uzstādījumus
+            image_name: Attēla nosaukums žurnālam/debug failiem (masīviem)
+            skew_angle: Jau zināms lapas slīpums (0.0 - lapa jau iztaisnota;
+                None - novērtē priekšapstrādes deskew solis)
+            graph: Dokumenta priekšapstrādes grafs, ko dala adaptīvās OCR stratēģijas
+                (dekodē attēlu pats; kopīgais prefikss tiek aprēķināts vienreiz)
             
         Returns:
             Dict: OCR rezultāts ar tekstu un metadatiem
         """
         start_time = time.time()
-        processed_image_path = None
-        print(f"DEBUG start: processed_image_path={processed_image_path}")
+        spilled_image = None
+        is_array = isinstance(image_path, np.ndarray)
+        image_name = image_name or ('image' if is_array else Path(image_path).stem)
 
         result = {
-            'file_path': image_path,
+            'file_path': image_name if is_array else image_path,
             'raw_text': '',
             'cleaned_text': '',
             'structured_data': {},
             'confidence_score': 0.0,
+            'tesseract_confidence': 0.0,
             'processing_time': 0.0,
             'preprocessing_used': preprocess,
             'cleaning_used': clean_text,
@@ -172,27 +216,57 @@ class OCRService:
                 raise OCRNotInitializedError("OCR sistēma nav inicializēta. Izsauciet initialize() metodi.")
 
             # Pārbauda faila eksistenci
-            if not Path(image_path).exists():
-                print(f"DEBUG after if not preprocess: processed_image_path={processed_image_path}")
+            if not is_array and not Path(image_path).exists():
                 raise FileNotFoundError(f"Attēls nav atrasts: {image_path}")
             
-            logger.info(f"Sāk OCR apstrādi: {image_path}")
-            
-            # 1. Attēla priekšapstrāde (ja nepieciešams)
-            processed_image_path = image_path
+            # 0. OCR kešs - tas pats saturs ar to pašu konfigurāciju
+            # (PDF lapas tiek kešotas PDF līmenī)
+            cache_key = None
+            if self.ocr_cache.enabled and not is_array:
+                cache_key = await asyncio.to_thread(self.ocr_cache.make_key, image_path, {
+                    'source': 'image',
+                    'preprocess': preprocess,
+                    'preprocessing': preprocessing_fingerprint(invoice_mode) if preprocess else None,
+                    'invoice_mode': invoice_mode,
+                    'clean_text': clean_text,
+                    'tesseract_config': self._get_tesseract_config(invoice_mode)
+                })
+                cached = await self.ocr_cache.get(cache_key)
+                if cached is not None:
+                    result['raw_text'] = cached['raw_text']
+                    result['cleaned_text'] = cached['cleaned_text']
+                    result['confidence_score'] = cached['confidence']
+                    result['structured_data'] = cached['payload'].get('structured_data', {})
+                    result['tesseract_confidence'] = cached['payload'].get('tesseract_confidence', 0.0)
+                    result['metadata']['cache'] = 'hit'
+                    result['processing_time'] = time.time() - start_time
+                    result['success'] = True
+                    self._update_stats(result['processing_time'], True, cache_hit=True)
+                    logger.info(f"OCR rezultāts no keša: {image_path}")
+                    return result
+            
+            logger.info(f"Sāk OCR apstrādi: {image_name}")
+            
+            # 1. Attēla priekšapstrāde atmiņā (ja nepieciešams)
+            ocr_input = image_path
             if preprocess:
-                print(f"DEBUG after preprocess: processed_image_path={processed_image_path}")
-                if invoice_mode:
-                    processed_image_path = self.image_preprocessor.preprocess_for_invoice(image_path)
-                else:
-                    processed_image_path = self.image_preprocessor.preprocess_image(image_path)
+                # OpenCV priekšapstrāde pavedienā, lai nebloķētu event loop
+                ocr_input = await asyncio.to_thread(
+                    self._preprocess_in_memory, image_path, invoice_mode, image_name, result['metadata'],
+                    skew_angle, graph
+                )
                 
-                result['metadata']['preprocessed_image'] = processed_image_path
-                logger.debug(f"Attēls priekšapstrādāts: {processed_image_path}")
-            
-            # 2. OCR ar Tesseract
-            raw_text = await self._perform_ocr(processed_image_path, invoice_mode)
+                # Diskā tikai debug režīmā
+                spilled_image = self.image_preprocessor.spill(ocr_input, image_name, "preprocessed")
+                if spilled_image:
+                    result['metadata']['preprocessed_image'] = spilled_image
+                logger.debug(f"Attēls priekšapstrādāts: {image_name}")
+            
+            # 2. OCR ar Tesseract (masīvs tiek nodots worker bez PNG faila)
+            ocr_output = await self._perform_ocr(ocr_input, invoice_mode)
+            raw_text = ocr_output['text']
             result['raw_text'] = raw_text
+            result['tesseract_confidence'] = ocr_output['confidence']
             
             if not raw_text:
                 logger.warning("OCR neatrada tekstu attēlā")
@@ -221,6 +295,16 @@ class OCRService:
             result['processing_time'] = time.time() - start_time
             result['success'] = True
             
+            if cache_key:
+                await self.ocr_cache.put(
+                    cache_key, result['raw_text'], result['cleaned_text'],
+                    result['confidence_score'], {
+                        'structured_data': result['structured_data'],
+                        'tesseract_confidence': result['tesseract_confidence']
+                    }
+                )
+                result['metadata']['cache'] = 'miss'
+            
             # Atjaunina globālo statistiku
             self._update_stats(result['processing_time'], True)
             
@@ -236,9 +320,8 @@ class OCRService:
             logger.error(f"OCR kļūda: {e}")
         
         finally:
-            # Iztīra temporary failus
-            if preprocess and processed_image_path and processed_image_path != image_path:
-                print(f"DEBUG after preprocess: processed_image_path={processed_image_path}")
+            # Iztīra debug failus
+            if spilled_image:
                 try:
                     self.image_preprocessor.cleanup_temp_files()
                 except Exception as e:
@@ -246,6 +329,19 @@ class OCRService:
         
         return result
     
+    def _preprocess_in_memory(self, image: Union[str, np.ndarray], invoice_mode: bool,
+                              name: str, metadata: Optional[Dict[str, Any]] = None,
+                              skew_angle: Optional[float] = None,
+                              graph: Optional[PreprocessingGraph] = None) -> np.ndarray:
+        """Dekodē attēlu (ja vajag) un priekšapstrādā to atmiņā (denoise lēmums un soļi - metadata)"""
+        # Dokumenta grafs dekodē attēlu pats (vienreiz visām stratēģijām)
+        image = None if graph is not None else load_image(image)
+        if invoice_mode:
+            return self.image_preprocessor.preprocess_invoice_array(image, name=name, metadata=metadata,
+                                                                    graph=graph, skew_angle=skew_angle)
+        return self.image_preprocessor.preprocess_array(image, name=name, metadata=metadata, graph=graph,
+                                                        skew_angle=skew_angle)
+    
     async def extract_text_from_pdf(self, pdf_path: str, **kwargs) -> Dict[str, any]:
         """
         Ekstraktē tekstu no PDF faila
@@ -275,6 +371,30 @@ class OCRService:
         try:
             logger.info(f"Sāk PDF OCR apstrādi: {pdf_path}")
             
+            # OCR kešs visam PDF
+            cache_key = None
+            if self.ocr_cache.enabled and Path(pdf_path).exists():
+                cache_key = await asyncio.to_thread(self.ocr_cache.make_key, pdf_path, {
+                    'source': 'pdf',
+                    'options': kwargs,
+                    'preprocessing': (preprocessing_fingerprint(kwargs.get('invoice_mode', True))
+                                      if kwargs.get('preprocess', True) else None),
+                    'tesseract_config': self._get_tesseract_config(kwargs.get('invoice_mode', True))
+                })
+                cached = await self.ocr_cache.get(cache_key)
+                if cached is not None:
+                    payload = cached['payload']
+                    result['combined_text'] = cached['cleaned_text']
+                    result['avg_confidence'] = cached['confidence']
+                    result['total_pages'] = payload.get('total_pages', 0)
+                    result['processed_pages'] = payload.get('processed_pages', 0)
+                    result['combined_structured_data'] = payload.get('combined_structured_data', {})
+                    result['cache'] = 'hit'
+                    result['success'] = True
+                    self._update_stats(time.time() - start_time, True, cache_hit=True)
+                    logger.info(f"PDF OCR rezultāts no keša: {pdf_path}")
+                    return result
+            
             # Sagatavo PDF OCR apstrādei
             pdf_prep = self.pdf_processor.process_pdf_for_ocr(pdf_path)
             
@@ -297,21 +417,25 @@ class OCRService:
                     structured = self.text_cleaner.extract_structured_data(cleaned)
                     result['combined_structured_data'] = structured
                 
+                await self._cache_pdf_result(cache_key, pdf_prep['text_content'], result)
                 logger.info("PDF satur tekstu - izmantots direct extraction")                
                 return result
             
-            # OCR katrai lapai
-            image_paths = pdf_prep['image_paths']
-            if not image_paths:
+            # OCR katrai lapai (lapas jau ir atmiņā)
+            page_images = pdf_prep['page_images']
+            if not page_images:
                 raise PDFPreparationError("Nav izveidoti attēli no PDF lapām")
             
             all_texts = []
             all_confidences = []
+            pdf_name = Path(pdf_path).stem
             
-            for i, image_path in enumerate(image_paths):
-                logger.debug(f"Apstrādā PDF lapu {i+1}/{len(image_paths)}")
+            for i, page_image in enumerate(page_images):
+                logger.debug(f"Apstrādā PDF lapu {i+1}/{len(page_images)}")
                 
-                page_result = await self.extract_text_from_image(image_path, **kwargs)
+                page_result = await self.extract_text_from_image(
+                    page_image, image_name=f"{pdf_name}_page_{i + 1:03d}", **kwargs
+                )
                 result['pages_results'].append(page_result)
                 
                 if page_result['success']:
@@ -330,6 +454,11 @@ class OCRService:
                 if kwargs.get('clean_text', True):
                     combined_structured = self.text_cleaner.extract_structured_data(result['combined_text'])
                     result['combined_structured_data'] = combined_structured
+                
+                raw_text = '\n\n--- JAUNA LAPA ---\n\n'.join(
+                    page['raw_text'] for page in result['pages_results'] if page['success']
+                )
+                await self._cache_pdf_result(cache_key, raw_text, result)
             
             logger.info(f"PDF OCR pabeigts: {result['processed_pages']}/{result['total_pages']} lapas")
             
@@ -349,6 +478,20 @@ class OCRService:
         
         return result
     
+    async def _cache_pdf_result(self, cache_key: Optional[str], raw_text: str, result: Dict):
+        """Saglabā veiksmīgu PDF rezultātu kešā"""
+        if not cache_key:
+            return
+        await self.ocr_cache.put(
+            cache_key, raw_text, result['combined_text'], result['avg_confidence'],
+            {
+                'total_pages': result['total_pages'],
+                'processed_pages': result['processed_pages'],
+                'combined_structured_data': result['combined_structured_data']
+            }
+        )
+        result['cache'] = 'miss'
+    
     async def batch_process(self, file_paths: List[str], **kwargs) -> Dict[str, Dict]:
         """
         Apstrādā vairākus failus paralēli
@@ -388,30 +531,33 @@ class OCRService:
             task = self.extract_text_from_pdf(pdf_path, **kwargs)
             tasks.append((pdf_path, task))
         
-        # Gaida visus rezultātus
+        # Gaida visus rezultātus - OCR dzinējs tos izpilda paralēli
+        task_results = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
+        
         results = {}
-        for file_path, task in tasks:
-            try:
-                result = await task
-                results[file_path] = result
-            except Exception as e:
-                logger.error(f"Batch apstrādes kļūda {file_path}: {e}")
+        for (file_path, _), result in zip(tasks, task_results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch apstrādes kļūda {file_path}: {result}")
                 results[file_path] = {
                     'success': False,
-                    'error': str(e),
+                    'error': str(result),
                     'file_path': file_path
                 }
+            else:
+                results[file_path] = result
         
         logger.info(f"Batch apstrāde pabeigta: {len(results)} faili")
         return results
     
-    async def extract_text_with_structure(self, image_path: str, **kwargs) -> Dict[str, any]:
+    async def extract_text_with_structure(self, image_path: str, skew_angle: Optional[float] = None,
+                                          **kwargs) -> Dict[str, any]:
         """
         POSM 4.5 Week 3: Structure-Aware OCR
         Extraktē tekstu ar dokumenta struktūras kontekstu
         
         Args:
             image_path: Ceļš uz attēlu
+            skew_angle: Jau novērtēts lapas slīpums (None - novērtē vienreiz struktūras OCR)
             **kwargs: Papildu parametri
             
         Returns:
@@ -438,7 +584,7 @@ class OCRService:
             logger.info(f"Sāk Structure-Aware OCR: {image_path}")
             
             # Veic Structure-Aware OCR
-            structure_result = await self.structure_aware_ocr.process_with_structure(image_path)
+            structure_result = await self.structure_aware_ocr.process_with_structure(image_path, skew_angle)
             
             result['structure_aware_result'] = {
                 'text': structure_result.text,
@@ -454,6 +600,7 @@ class OCRService:
             result['metadata']['zones_detected'] = len(structure_result.structure.zones)
             result['metadata']['tables_detected'] = len(structure_result.structure.tables)
             result['metadata']['overall_confidence'] = structure_result.confidence
+            result['metadata']['skew'] = structure_result.metadata.get('skew')
             
             # Statistika
             self.processing_stats['total_processed'] += 1
@@ -482,35 +629,45 @@ class OCRService:
         
         return result
     
-    async def _perform_ocr(self, image_path: str, invoice_mode: bool = True) -> str:
-        """Veic OCR ar Tesseract"""
+    def _get_tesseract_config(self, invoice_mode: bool = True) -> str:
+        """Sagatavo Tesseract konfigurācijas string (psm, valoda, whitelist)"""
+        config_overrides = {}
+        if invoice_mode:
+            # Pavadzīmju specifiskā konfigurācija
+            config_overrides = {
+                'psm': '6',  # Uniform text block
+                'config': '--dpi 300 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzĀĒĪŌŪāēīōūčĢģĶķĻļŅņŠšŽž.,€$%-()/'
+            }
+        
+        return self.tesseract_manager.get_ocr_config(config_overrides)
+    
+    async def _perform_ocr(self, image_path: Union[str, np.ndarray],
+                           invoice_mode: bool = True) -> Dict[str, any]:
+        """
+        Veic OCR ar Tesseract
+        
+        Returns:
+            Dict: 'text', Tesseract vārdu vidējā 'confidence' (0-1) un 'word_count'
+        """
         try:
             # Konfigurē Tesseract parametrus
-            config_overrides = {}
-            if invoice_mode:
-                # Pavadzīmju specifiskā konfigurācija
-                config_overrides = {
-                    'psm': '6',  # Uniform text block
-                    'config': '--dpi 300 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzĀĒĪŌŪāēīōūčĢģĶķĻļŅņŠšŽž.,€$%-()/'
-                }
-            
-            tesseract_config = self.tesseract_manager.get_ocr_config(config_overrides)
+            tesseract_config = self._get_tesseract_config(invoice_mode)
             
-            # Iestata tesseract ceļu
-            if self.tesseract_manager.tesseract_cmd:
-                pytesseract.pytesseract.tesseract_cmd = self.tesseract_manager.tesseract_cmd
-            
-            # Veic OCR
-            text = pytesseract.image_to_string(
+            # Teksts un confidence vienā izsaukumā worker pool (nebloķē event loop)
+            ocr_data = await self.ocr_engine.image_to_text_data(
                 image_path,
                 config=tesseract_config
             )
             
-            return text.strip()
+            return {
+                'text': ocr_data['text'].strip(),
+                'confidence': ocr_data['confidence'],
+                'word_count': len(ocr_data['words'])
+            }
             
         except Exception as e:
             logger.error(f"Tesseract OCR kļūda: {e}")
-            return ""
+            return {'text': '', 'confidence': 0.0, 'word_count': 0}
     
     async def _run_test_ocr(self) -> Dict[str, any]:
         """Palaiž OCR testu ar vienkāršu tekstu"""
@@ -532,9 +689,11 @@ class OCRService:
         
         return test_result
     
-    def _update_stats(self, processing_time: float, success: bool):
-        """Atjaunina apstrādes statistiku"""
+    def _update_stats(self, processing_time: float, success: bool, cache_hit: bool = False):
+        """Atjaunina apstrādes statistiku (keša trāpījumi tiek skaitīti arī atsevišķi)"""
         self.processing_stats['total_processed'] += 1
+        if cache_hit:
+            self.processing_stats['cache_hits'] += 1
         
         if success:
             self.processing_stats['successful'] += 1
@@ -556,7 +715,10 @@ class OCRService:
             'tesseract_available': self.tesseract_manager.tesseract_cmd is not None,
             'latvian_support': 'lav' in self.tesseract_manager.supported_languages,
             'pdf_support': len(self.pdf_processor.available_methods) > 0,
-            'processing_stats': self.processing_stats.copy()
+            'processing_stats': self.processing_stats.copy(),
+            'ocr_engine': self.ocr_engine.get_metrics(),
+            'strategy_predictor': self.strategy_predictor.get_metrics(),
+            'ocr_cache': self.ocr_cache.get_metrics()
         }
     
     def get_supported_formats(self) -> List[str]:
@@ -568,58 +730,252 @@ class OCRService:
         
         return formats
 
-    async def extract_text_adaptive(self, image_path: str) -> Dict[str, any]:
+    async def extract_text_adaptive(self, image_path: str, mode: Optional[str] = None,
+                                    supplier_hint: Optional[str] = None,
+                                    skew_angle: Optional[float] = None) -> Dict[str, any]:
         """
         Adaptīva teksta ekstraktēšana ar dažādām priekšapstrādes stratēģijām
         
+        Ja prognozētājs ir ieslēgts, vispirms tiek palaista prognozētā stratēģija;
+        pārējās tiek mēģinātas tikai, ja tā nepārsniedz savu slieksni. Izpētes
+        prognozēm (explore) visas stratēģijas tiek palaistas kā bez prognozes.
+        
         Args:
             image_path: Ceļš uz attēla failu
+            mode: 'race' (paralēli) vai 'sequential' (None = ADAPTIVE_OCR konfigurācija)
+            supplier_hint: Piegādātāja nosaukums, ja jau zināms (piem., atkārtotai apstrādei)
+            skew_angle: Jau novērtēts lapas slīpums (prognozētājs un priekšapstrāde to nenovērtē atkārtoti)
             
         Returns:
             Dict: OCR rezultāts ar labāko stratēģiju
         """
-        logger.info(f"Sākam adaptīvo OCR: {image_path}")
-        
-        # Stratēģija 1: Bez priekšapstrādes
-        logger.debug("Mēģinām bez priekšapstrādes...")
-        result1 = await self.extract_text_from_image(image_path, preprocess=False, clean_text=True)
-        
-        if result1['success'] and result1['confidence_score'] > 0.6:
-            result1['strategy_used'] = 'no_preprocessing'
-            logger.info(f"✅ Veiksmīgs bez priekšapstrādes: {result1['confidence_score']:.2f}")
-            return result1
-        
-        # Stratēģija 2: Viegla priekšapstrāde
-        logger.debug("Mēģinām ar vieglu priekšapstrādi...")
-        result2 = await self.extract_text_from_image(image_path, preprocess=True, 
-                                                   clean_text=True, invoice_mode=False)
-        
-        if result2['success'] and result2['confidence_score'] > 0.4:
-            result2['strategy_used'] = 'light_preprocessing'
-            logger.info(f"✅ Veiksmīgs ar vieglu priekšapstrādi: {result2['confidence_score']:.2f}")
-            return result2
-        
-        # Stratēģija 3: Agresīva priekšapstrāde
-        logger.debug("Mēģinām ar agresīvu priekšapstrādi...")
-        result3 = await self.extract_text_from_image(image_path, preprocess=True, 
-                                                   clean_text=True, invoice_mode=True)
-        
-        # Atgriežam labāko rezultātu
-        best_result = max([result1, result2, result3], 
-                         key=lambda x: x.get('confidence_score', 0) if x.get('success', False) else 0)
-        
-        if best_result == result1:
-            best_result['strategy_used'] = 'no_preprocessing'
-        elif best_result == result2:
-            best_result['strategy_used'] = 'light_preprocessing'
+        mode = mode or ADAPTIVE_OCR.get("mode", "race")
+        logger.info(f"Sākam adaptīvo OCR ({mode}): {image_path}")
+        
+        start_time = time.time()
+        timings: Dict[str, Dict] = {}
+        results: Dict[str, Dict] = {}
+        strategies = list(ADAPTIVE_STRATEGIES)
+        winner = None
+        
+        prediction = None
+        if ADAPTIVE_OCR.get("predictor", True):
+            prediction = await asyncio.to_thread(
+                self.strategy_predictor.predict, image_path, supplier_hint, skew_angle
+            )
+        
+        # Stratēģijas dala dokumenta priekšapstrādes grafu (attēls tiek dekodēts vienreiz);
+        # prognozētāja novērtētais slīpums netiek aprēķināts atkārtoti
+        stats = prediction.get('stats') if prediction else None
+        if stats:
+            skew_angle = stats.get('skew_angle', skew_angle)
+        graph = self.image_preprocessor.graph(partial(load_image, image_path), skew_angle=skew_angle)
+        shortcut = False
+        predicted = None
+        # Izpētes režīmā prognoze netiek izmantota - rezultāts ir neietekmēts grupu vēsturei
+        if prediction is not None and not prediction.get('explore'):
+            predicted = next(s for s in strategies if s['name'] == prediction['strategy'])
+            logger.debug(f"Prognozētā stratēģija: {predicted['name']} ({prediction['source']})")
+            result = await self._run_strategy(image_path, predicted, timings, graph)
+            results[predicted['name']] = result
+            
+            if self._passes_threshold(result, predicted):
+                winner = predicted['name']
+                shortcut = True
+            else:
+                strategies.remove(predicted)
+        
+        if winner is None:
+            if mode == 'sequential':
+                winner = await self._extract_adaptive_sequential(image_path, strategies, results, timings, graph)
+            else:
+                winner = await self._extract_adaptive_race(image_path, strategies, results, timings, graph)
+        
+        if winner is not None:
+            best_name, best_result = winner, results[winner]
         else:
-            best_result['strategy_used'] = 'aggressive_preprocessing'
+            best_name, best_result = self._select_best(results)
+        
+        # Prognozes īsceļa rezultāts tikai apstiprina prognozi - grupu vēsturē netiek skaitīts
+        await asyncio.to_thread(self.strategy_predictor.record_outcome, prediction, best_name,
+                                learn=not shortcut)
+        # Secība, kādā sequential režīms mēģinātu stratēģijas (prognozētā pirmā)
+        order = ([predicted] if predicted is not None else []) + [s for s in strategies if s is not predicted]
+        return self._finalize_adaptive(best_result, best_name, mode, timings, start_time, prediction,
+                                       results=results, order=order, shortcut=shortcut)
+    
+    async def _run_strategy(self, image_path: str, strategy: Dict, timings: Dict[str, Dict],
+                            graph: Optional[PreprocessingGraph] = None) -> Dict[str, any]:
+        """Izpilda vienu adaptīvās OCR stratēģiju un piefiksē tās laiku"""
+        name = strategy['name']
+        start_time = time.time()
+        timings[name] = {'status': 'running'}
         
-        if best_result['success']:
-            logger.info(f"✅ Labākā stratēģija: {best_result['strategy_used']}, "
-                       f"confidence: {best_result['confidence_score']:.2f}")
+        try:
+            result = await self.extract_text_from_image(image_path, graph=graph, **strategy['kwargs'])
+        except asyncio.CancelledError:
+            timings[name] = {
+                'status': 'cancelled',
+                'duration_ms': int((time.time() - start_time) * 1000)
+            }
+            raise
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'confidence_score': 0}
+        
+        timings[name] = {
+            'status': 'completed' if result.get('success') else 'failed',
+            'duration_ms': int((time.time() - start_time) * 1000),
+            'confidence': result.get('confidence_score', 0)
+        }
+        return result
+    
+    @staticmethod
+    def _passes_threshold(result: Dict, strategy: Dict) -> bool:
+        """Vai stratēģijas rezultāts pārsniedz tās confidence slieksni"""
+        return result.get('success', False) and result.get('confidence_score', 0) > strategy['threshold']
+    
+    def _finalize_adaptive(self, result: Dict, strategy_name: str, mode: str,
+                           timings: Dict[str, Dict], start_time: float,
+                           prediction: Optional[Dict] = None,
+                           results: Optional[Dict[str, Dict]] = None,
+                           order: Optional[List[Dict]] = None,
+                           shortcut: bool = False) -> Dict[str, any]:
+        """
+        Pievieno rezultātam izvēlēto stratēģiju un adaptīvās OCR statistiku
+        
+        sequential_time_ms ir laiks, ko tās pašas stratēģijas maksātu secīgi
+        (līdz pirmajai, kas pārsniedz slieksni); None, ja kāda no tām tika
+        atcelta un tās pilnais laiks nav zināms. Atceltās stratēģijas jau
+        palaistie Tesseract un priekšapstrādes darbi tiek pabeigti fonā -
+        race režīms tos neaptur (sk. OCR dzinēja 'abandoned' metriku).
+        """
+        wall_time_ms = int((time.time() - start_time) * 1000)
+        sequential_ms = self._sequential_cost(order or [], results or {}, timings)
+        
+        result['strategy_used'] = strategy_name
+        result['adaptive'] = {
+            'mode': mode,
+            'winner': strategy_name,
+            # Uzvarētājs ir prognozes īsceļš (citas stratēģijas netika mēģinātas)
+            'shortcut': shortcut,
+            'strategies': timings,
+            'wall_time_ms': wall_time_ms,
+            'sequential_time_ms': sequential_ms,
+            'time_saved_ms': (max(0, sequential_ms - wall_time_ms)
+                              if mode == 'race' and sequential_ms is not None else 0),
+            # Atceltās stratēģijas - to jau sāktais darbs turpinās worker pool
+            'cancelled': [name for name, timing in timings.items() if timing.get('status') == 'cancelled'],
+            'prediction': {
+                'strategy': prediction['strategy'],
+                'source': prediction['source'],
+                'hit': prediction['strategy'] == strategy_name,
+                'explore': prediction.get('explore', False),
+                'stats': prediction['stats']
+            } if prediction else None
+        }
+        
+        if result.get('success'):
+            logger.info(f"✅ Labākā stratēģija: {strategy_name}, "
+                       f"confidence: {result['confidence_score']:.2f}, "
+                       f"laiks: {wall_time_ms}ms")
         else:
             logger.warning("❌ Visas stratēģijas neizdevās")
-            best_result['strategy_used'] = 'all_failed'
         
-        return best_result
+        return result
+    
+    def _sequential_cost(self, order: List[Dict], results: Dict[str, Dict],
+                         timings: Dict[str, Dict]) -> Optional[int]:
+        """
+        Secīgās izpildes laiks: stratēģijas secībā līdz pirmajai, kas pārsniedz slieksni
+        
+        Pēdējā stratēģija netiek pārbaudīta (kā _extract_adaptive_sequential).
+        Race režīmā ilgumi mērīti paralēlā slodzē, tāpēc tas ir augšējais novērtējums.
+        
+        Returns:
+            Milisekundes vai None, ja kāda vajadzīgā stratēģija nav pabeigta (atcelta)
+        """
+        total = 0
+        for index, strategy in enumerate(order):
+            timing = timings.get(strategy['name'], {})
+            if timing.get('status') not in ('completed', 'failed'):
+                return None
+            total += timing['duration_ms']
+            if index < len(order) - 1 and self._passes_threshold(results.get(strategy['name'], {}), strategy):
+                break
+        return total
+    
+    def _select_best(self, results: Dict[str, Dict]) -> tuple:
+        """Izvēlas labāko rezultātu no visām stratēģijām (stratēģiju secībā)"""
+        best_name, best_result = None, None
+        for strategy in ADAPTIVE_STRATEGIES:
+            result = results.get(strategy['name'])
+            if result is None:
+                continue
+            score = result.get('confidence_score', 0) if result.get('success', False) else 0
+            best_score = (best_result.get('confidence_score', 0)
+                          if best_result and best_result.get('success', False) else 0)
+            if best_result is None or score > best_score:
+                best_name, best_result = strategy['name'], result
+        
+        if not best_result.get('success', False):
+            best_name = 'all_failed'
+        return best_name, best_result
+    
+    async def _extract_adaptive_sequential(self, image_path: str, strategies: List[Dict],
+                                           results: Dict[str, Dict],
+                                           timings: Dict[str, Dict],
+                                           graph: Optional[PreprocessingGraph] = None) -> Optional[str]:
+        """
+        Stratēģijas viena pēc otras - nākamā tiek palaista tikai, ja iepriekšējā neizdevās
+        
+        Returns:
+            Uzvarējušās stratēģijas nosaukums vai None (jāizvēlas labākais rezultāts)
+        """
+        for index, strategy in enumerate(strategies):
+            logger.debug(f"Mēģinām stratēģiju: {strategy['name']}")
+            result = await self._run_strategy(image_path, strategy, timings, graph)
+            results[strategy['name']] = result
+            
+            # Pēdējā stratēģija netiek pārbaudīta - izvēlas labāko no visām
+            if index < len(strategies) - 1 and self._passes_threshold(result, strategy):
+                return strategy['name']
+        
+        return None
+    
+    async def _extract_adaptive_race(self, image_path: str, strategies: List[Dict],
+                                     results: Dict[str, Dict],
+                                     timings: Dict[str, Dict],
+                                     graph: Optional[PreprocessingGraph] = None) -> Optional[str]:
+        """
+        Visas stratēģijas paralēli OCR worker pool
+        
+        Atgriež pirmo stratēģiju, kuras rezultāts pārsniedz tās slieksni, un
+        atceļ pārējās. Ja neviena nepārsniedz slieksni - None. Atcelšana izņem
+        vēl nesāktos Tesseract darbus no rindas; jau palaistie Tesseract un
+        priekšapstrādes darbi tiek pabeigti (CPU zaudētājiem netiek atbrīvots).
+        """
+        tasks = {
+            asyncio.create_task(self._run_strategy(image_path, strategy, timings, graph)): strategy
+            for strategy in strategies
+        }
+        pending = set(tasks)
+        winner = None
+        
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                
+                # Ja vienlaikus pabeidzas vairākas, priekšroka stratēģiju secībā
+                for task in sorted(done, key=lambda t: ADAPTIVE_STRATEGIES.index(tasks[t])):
+                    strategy = tasks[task]
+                    result = task.result()
+                    results[strategy['name']] = result
+                    if winner is None and self._passes_threshold(result, strategy):
+                        winner = strategy['name']
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        
+        return winner
@@ -7,6 +7,7 @@ from typing import List, Dict, Optional
 from pathlib import Path
 import tempfile
 import os
+import uuid
 
 # PDF apstrādes bibliotēkas
 try:
@@ -85,6 +86,74 @@ class PDFProcessor:
             logger.error(f"Kļūda konvertējot PDF {pdf_path}: {e}")
             return []
     
+    def render_pdf_pages(self, pdf_path: str, dpi: int = 300,
+                         max_pages: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Renderē PDF lapas atmiņā kā BGR masīvus (bez PNG failiem)
+        
+        Args:
+            pdf_path: Ceļš uz PDF failu
+            dpi: Izšķirtspēja konversijai
+            max_pages: Maksimālais lapu skaits (None = visas lapas)
+            
+        Returns:
+            List[np.ndarray]: Lapu attēli
+        """
+        if not self.available_methods:
+            logger.error("Nav pieejamas PDF apstrādes metodes")
+            return []
+        
+        try:
+            if "pymupdf" in self.available_methods:
+                return self._render_with_pymupdf(pdf_path, dpi, max_pages)
+            return self._render_with_pdf2image(pdf_path, dpi, max_pages)
+        except Exception as e:
+            logger.error(f"Kļūda renderējot PDF {pdf_path}: {e}")
+            return []
+    
+    def _render_with_pymupdf(self, pdf_path: str, dpi: int,
+                             max_pages: Optional[int]) -> List[np.ndarray]:
+        """Renderē PDF lapas ar PyMuPDF tieši no pixmap bufera"""
+        pages = []
+        mat = self._get_pymupdf_matrix(dpi)
+        
+        with fitz.open(pdf_path) as pdf_document:
+            page_count = pdf_document.page_count
+            if max_pages:
+                page_count = min(page_count, max_pages)
+            
+            for page_num in range(page_count):
+                pix = pdf_document[page_num].get_pixmap(matrix=mat, alpha=False)
+                pages.append(self._pixmap_to_bgr(pix))
+                logger.debug(f"Renderēta lapa {page_num + 1}/{page_count}")
+        
+        logger.info(f"PDF renderēts atmiņā: {len(pages)} lapas")
+        return pages
+    
+    @staticmethod
+    def _pixmap_to_bgr(pix) -> np.ndarray:
+        """Pārveido PyMuPDF pixmap par OpenCV BGR masīvu"""
+        samples = np.frombuffer(pix.samples, dtype=np.uint8)
+        image = samples.reshape(pix.height, pix.width, pix.n) if pix.n > 1 else samples.reshape(pix.height, pix.width)
+        if pix.n == 1:
+            return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        if pix.n == 4:
+            return cv2.cvtColor(image, cv2.COLOR_RGBA2BGR)
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    
+    def _render_with_pdf2image(self, pdf_path: str, dpi: int,
+                               max_pages: Optional[int]) -> List[np.ndarray]:
+        """Renderē PDF lapas ar pdf2image (PIL -> BGR)"""
+        kwargs = {'last_page': max_pages} if max_pages else {}
+        images = convert_from_path(pdf_path, dpi=dpi, **kwargs)
+        pages = [cv2.cvtColor(np.asarray(image.convert('RGB')), cv2.COLOR_RGB2BGR) for image in images]
+        logger.info(f"PDF renderēts atmiņā: {len(pages)} lapas")
+        return pages
+    
+    def _unique_page_prefix(self, pdf_path: str) -> str:
+        """Unikāls failu prefikss - vienāda nosaukuma PDF nepārraksta viens otru"""
+        return f"{Path(pdf_path).stem}_{uuid.uuid4().hex[:8]}"
+    
     def _save_pdf_page_as_image(self, page, output_path, mat):
         pix = page.get_pixmap(matrix=mat)
         pix.save(str(output_path))
@@ -99,7 +168,7 @@ class PDFProcessor:
         
         try:
             pdf_document = fitz.open(pdf_path)
-            pdf_name = Path(pdf_path).stem
+            pdf_name = self._unique_page_prefix(pdf_path)
             
             mat = self._get_pymupdf_matrix(dpi)
 
@@ -126,7 +195,7 @@ class PDFProcessor:
         try:
             # Konvertē PDF uz PIL Image objektiem
             images = convert_from_path(pdf_path, dpi=dpi)
-            pdf_name = Path(pdf_path).stem
+            pdf_name = self._unique_page_prefix(pdf_path)
             
             for i, image in enumerate(images):
                 output_path = self.temp_dir / f"{pdf_name}_page_{i + 1:03d}.png"
@@ -214,6 +283,7 @@ class PDFProcessor:
             'total_pages': 0,
             'processed_pages': 0,
             'image_paths': [],
+            'page_images': [],
             'text_content': '',
             'method_used': 'none',
             'success': False
@@ -229,18 +299,15 @@ class PDFProcessor:
                 result['success'] = True
                 return result
             
-            # Ja vajag OCR, konvertē uz attēliem
-            image_paths = self.convert_pdf_to_images(pdf_path)
-            
-            if max_pages:
-                image_paths = image_paths[:max_pages]
+            # Ja vajag OCR, renderē lapas atmiņā (tikai nepieciešamās lapas)
+            page_images = self.render_pdf_pages(pdf_path, max_pages=max_pages)
             
-            result['image_paths'] = image_paths
-            result['total_pages'] = len(image_paths)
-            result['processed_pages'] = len(image_paths)
-            result['success'] = len(image_paths) > 0
+            result['page_images'] = page_images
+            result['total_pages'] = len(page_images)
+            result['processed_pages'] = len(page_images)
+            result['success'] = len(page_images) > 0
             
-            logger.info(f"PDF sagatavots OCR: {len(image_paths)} lapas")
+            logger.info(f"PDF sagatavots OCR: {len(page_images)} lapas")
             
         except Exception as e:
             logger.error(f"Kļūda sagatavojot PDF OCR: {e}")
@@ -0,0 +1,169 @@
+"""
+Priekšapstrādes grafs - nosaukti soļi ar kopīgiem starprezultātiem
+Pipeline ar kopīgu soļu prefiksu (piem., light un aggressive stratēģijas) to aprēķina vienreiz dokumentam
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Solis: (nosaukums, sakārtoti parametri) - hashable, tāpēc der par keša atslēgu
+Step = Tuple[str, Tuple[Tuple[str, Any], ...]]
+Pipeline = Tuple[Step, ...]
+
+# Soļa funkcija: (attēls, **parametri) -> attēls. Rakstāmu ievadi drīkst mainīt vietā -
+# avots un kopīgie starprezultāti tiek nodoti kā tikai lasāmi skati
+Operation = Callable[..., np.ndarray]
+
+
+def _freeze(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.setflags(write=False)
+    return view
+
+
+def step(name: str, **params: Any) -> Step:
+    """Izveido pipeline soli ar parametriem"""
+    return name, tuple(sorted(params.items()))
+
+
+def common_prefix(first: Sequence[Step], second: Sequence[Step]) -> Pipeline:
+    """Garākais kopīgais soļu prefikss"""
+    length = 0
+    for a, b in zip(first, second):
+        if a != b:
+            break
+        length += 1
+    return tuple(first[:length])
+
+
+class PreprocessingGraph:
+    """
+    Viena dokumenta priekšapstrādes grafs
+
+    Reģistrētās pipeline veido koku: zaru punkti (kopīgie prefiksi) tiek
+    aprēķināti vienreiz un paturēti atmiņā kā tikai lasāmi masīvi, pārējie
+    starprezultāti ir īslaicīgi. Kad zaru punkts der visām pipeline,
+    dekodētais avota attēls tiek atbrīvots (vajadzības gadījumā ielādēts atkārtoti).
+
+    Paralēli pavedieni (race režīms) gaida viens otra zaru punkta aprēķinu,
+    nevis to atkārto.
+    """
+
+    def __init__(self, source: Union[np.ndarray, Callable[[], np.ndarray]],
+                 operations: Dict[str, Operation],
+                 pipelines: Iterable[Sequence[Step]] = (),
+                 metadata: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            source: Dekodēts attēls vai funkcija, kas to ielādē (izsaukta pirmajā vajadzībā)
+            operations: Soļu nosaukums -> funkcija
+            pipelines: Pipeline, kas tiks izpildītas šim dokumentam (nosaka zaru punktus)
+            metadata: Soļu kopīgā vārdnīca (piem., denoise lēmums)
+        """
+        self._load = source if callable(source) else (lambda: source)
+        self._source: Optional[np.ndarray] = None if callable(source) else _freeze(source)
+        self.operations = operations
+        self.metadata: Dict[str, Any] = metadata if metadata is not None else {}
+
+        pipelines = [tuple(pipeline) for pipeline in pipelines]
+        self._retain = {
+            prefix for i, first in enumerate(pipelines) for second in pipelines[i + 1:]
+            if (prefix := common_prefix(first, second))
+        }
+        # Zaru punkts, no kura sākas visas pipeline - pēc tā avots vairs nav vajadzīgs
+        self._trunk = pipelines[0] if pipelines else ()
+        for pipeline in pipelines[1:]:
+            self._trunk = common_prefix(self._trunk, pipeline)
+
+        self._nodes: Dict[Pipeline, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._node_locks: Dict[Pipeline, threading.Lock] = {}
+
+    @property
+    def source(self) -> np.ndarray:
+        """Dekodētais avota attēls"""
+        with self._lock:
+            if self._source is None:
+                self._source = _freeze(self._load())
+            return self._source
+
+    def run(self, pipeline: Sequence[Step], trace: Optional[List[Dict[str, Any]]] = None,
+            on_step: Optional[Callable[[str, np.ndarray], None]] = None) -> np.ndarray:
+        """
+        Izpilda pipeline, sākot no dziļākā zaru punkta, kas ir tās prefikss
+
+        Args:
+            pipeline: Soļu virkne
+            trace: Saraksts, kurā pievienot {'step', 'cached', 'ms'} katram solim
+            on_step: Izsaukums pēc katra izpildītā soļa (debug saglabāšanai)
+
+        Returns:
+            np.ndarray: Pēdējā soļa rezultāts
+        """
+        pipeline = tuple(pipeline)
+        trace = trace if trace is not None else []
+        shared = self._deepest_shared(pipeline)
+        if shared:
+            image, shared_trace = self._shared_node(shared)
+            trace.extend(shared_trace)
+            if on_step is not None:
+                on_step(shared[-1][0], image)
+        else:
+            image = self.source
+        return self._apply_steps(pipeline[len(shared):], image, trace, on_step)
+
+    def cached_steps(self) -> List[Tuple[str, ...]]:
+        """Paturētie zaru punkti kā soļu nosaukumu virknes (diagnostikai un testiem)"""
+        return [tuple(name for name, _ in key) for key in self._nodes]
+
+    def _deepest_shared(self, pipeline: Pipeline) -> Pipeline:
+        return max((key for key in self._retain if pipeline[:len(key)] == key), key=len, default=())
+
+    def _apply_steps(self, steps: Pipeline, image: np.ndarray, trace: List[Dict[str, Any]],
+                     on_step: Optional[Callable[[str, np.ndarray], None]] = None) -> np.ndarray:
+        for name, params in steps:
+            operation = self.operations.get(name)
+            if operation is None:
+                raise ValueError(f"Nezināms priekšapstrādes solis: {name}")
+            started = time.perf_counter()
+            image = operation(image, **dict(params))
+            trace.append({'step': name, 'cached': False,
+                          'ms': round((time.perf_counter() - started) * 1000, 1)})
+            if on_step is not None:
+                on_step(name, image)
+        return image
+
+    def _shared_node(self, key: Pipeline) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        Zaru punkts, aprēķināts tikai vienreiz
+
+        Slēdzene tiek paņemta pirms prefiksa soļiem, tāpēc paralēlie pavedieni
+        gaida, nevis atkārto to pašu darbu. Ligzdotās slēdzenes vienmēr iet no
+        garāka uz īsāku prefiksu - bez deadlock.
+        """
+        with self._lock:
+            lock = self._node_locks.setdefault(key, threading.Lock())
+        with lock:
+            node = self._nodes.get(key)
+            if node is not None:
+                return node, [{'step': name, 'cached': True, 'ms': 0.0} for name, _ in key]
+
+            base = self._deepest_shared(key[:-1])
+            if base:
+                image, trace = self._shared_node(base)
+            else:
+                image, trace = self.source, []
+            node = _freeze(self._apply_steps(key[len(base):], image, trace))
+            self._nodes[key] = node
+
+        if key == self._trunk:
+            with self._lock:
+                self._source = None
+            logger.debug(f"Priekšapstrādes zaru punkts aprēķināts: {'>'.join(n for n, _ in key)}")
+        return node, trace
@@ -0,0 +1,355 @@
+"""
+Adaptīvās OCR stratēģijas prognozētājs
+Izvēlas sākuma stratēģiju pēc attēla statistikas un piegādātāja vēstures
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+from app.config import ADAPTIVE_OCR
+
+from .noise_estimator import estimate_noise_sigma
+from .skew_estimator import estimate_skew
+
+logger = logging.getLogger(__name__)
+
+# Stratēģiju nosaukumi (sakrīt ar ADAPTIVE_STRATEGIES ocr_main.py)
+STRATEGY_NAMES = ('no_preprocessing', 'light_preprocessing', 'aggressive_preprocessing')
+
+# Analīzes attēla maksimālais izmērs - statistikai pietiek ar samazinātu kopiju
+STATS_MAX_SIDE = 1000
+
+
+def compute_image_stats(image_path: str, skew_angle: Optional[float] = None) -> Optional[Dict[str, float]]:
+    """
+    Aprēķina lētu attēla statistiku (kontrasts, troksnis, DPI, slīpums)
+
+    Args:
+        image_path: Ceļš uz attēla failu
+        skew_angle: Jau novērtēts lapas slīpums (None - novērtē šeit)
+
+    Returns:
+        Dict vai None, ja attēlu nevar nolasīt
+    """
+    gray = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+
+    height, width = gray.shape
+    scale = min(1.0, STATS_MAX_SIDE / max(height, width))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+
+    # Kontrasts - 1. un 99. percentiles starpība (teksts aizņem nelielu daļu lapas)
+    p_low, p_high = np.percentile(small, (1, 99))
+    contrast = float(p_high - p_low) / 255.0
+
+    # Troksnis - Immerkær ātrais sigma novērtējums
+    noise = estimate_noise_sigma(small)
+
+    # Slīpums - tas pats novērtējums, ko izmanto priekšapstrāde (leņķis tiek nodots tālāk)
+    if skew_angle is None:
+        skew_angle = estimate_skew(small).angle
+
+    return {
+        'contrast': round(contrast, 3),
+        'noise': round(noise, 2),
+        'dpi': _estimate_dpi(image_path, width),
+        'skew': abs(skew_angle),
+        'skew_angle': skew_angle,
+    }
+
+
+def _estimate_dpi(image_path: str, width: int) -> float:
+    """Nolasa DPI no faila metadatiem vai novērtē pēc A4 platuma"""
+    try:
+        from PIL import Image
+        with Image.open(image_path) as image:
+            dpi = image.info.get('dpi')
+        if dpi and dpi[0]:
+            return float(dpi[0])
+    except Exception:
+        pass
+    return round(width / 8.27, 1)
+
+
+def stats_bucket(stats: Dict[str, float]) -> str:
+    """Diskretizē statistiku grupā, pēc kuras uzkrāj vēsturi"""
+    contrast = 'low' if stats['contrast'] < 0.35 else 'mid' if stats['contrast'] < 0.6 else 'high'
+    noise = 'clean' if stats['noise'] < 3 else 'noisy' if stats['noise'] < 8 else 'very_noisy'
+    dpi = 'low' if stats['dpi'] < 200 else 'ok'
+    skew = 'skewed' if stats['skew'] > 1.5 else 'straight'
+    return f"c:{contrast}|n:{noise}|d:{dpi}|s:{skew}"
+
+
+def _normalize_supplier(supplier: Optional[str]) -> Optional[str]:
+    if not supplier:
+        return None
+    return ' '.join(supplier.lower().split()) or None
+
+
+class StrategyPredictor:
+    """
+    Prognozē, ar kuru adaptīvās OCR stratēģiju sākt
+
+    Prioritāte: piegādātāja vēsture -> iemācītā statistikas grupu vēsture ->
+    heuristika pēc attēla statistikas.
+
+    Vēsture tiek saglabāta katrus save_every atjauninājumus un ar flush()
+    pie izslēgšanas. Ar varbūtību explore_rate prognoze tiek atzīmēta kā
+    izpēte - adaptīvā OCR palaiž visas stratēģijas bez prognozes.
+    """
+
+    def __init__(self, model_path: Optional[str] = None, min_samples: Optional[int] = None,
+                 save_every: Optional[int] = None, explore_rate: Optional[float] = None):
+        self.model_path = Path(model_path or ADAPTIVE_OCR["predictor_path"])
+        self.min_samples = min_samples or ADAPTIVE_OCR["predictor_min_samples"]
+        self.save_every = save_every or ADAPTIVE_OCR.get("predictor_save_every", 10)
+        self.explore_rate = (explore_rate if explore_rate is not None
+                             else ADAPTIVE_OCR.get("predictor_explore_rate", 0.05))
+
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._unsaved_updates = 0
+        self.supplier_history: Dict[str, Counter] = defaultdict(Counter)
+        self.bucket_history: Dict[str, Counter] = defaultdict(Counter)
+
+        self.metrics = {
+            'predictions': 0,
+            'hits': 0,
+            'misses': 0,
+            'explored': 0,
+            'by_source': Counter()
+        }
+
+        self._load()
+
+    def predict(self, image_path: str, supplier_hint: Optional[str] = None,
+                skew_angle: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Prognozē sākuma stratēģiju
+
+        Args:
+            image_path: Ceļš uz attēla failu
+            supplier_hint: Piegādātāja nosaukums, ja jau zināms
+            skew_angle: Jau novērtēts lapas slīpums (netiek novērtēts atkārtoti)
+
+        Returns:
+            Dict ar 'strategy', 'source', 'stats', 'explore' vai None (nav pietiekamas informācijas)
+        """
+        supplier = _normalize_supplier(supplier_hint)
+        try:
+            stats = compute_image_stats(image_path, skew_angle)
+        except Exception as e:
+            logger.debug(f"Attēla statistiku neizdevās aprēķināt: {e}")
+            stats = None
+        bucket = stats_bucket(stats) if stats else None
+
+        with self._lock:
+            strategy, source = None, None
+
+            if supplier:
+                strategy = self._majority(self.supplier_history.get(supplier))
+                source = 'supplier_history' if strategy else None
+
+            if strategy is None and bucket:
+                strategy = self._majority(self.bucket_history.get(bucket))
+                source = 'image_stats_history' if strategy else None
+
+            if strategy is None and stats:
+                strategy, source = self._heuristic(stats), 'image_stats_heuristic'
+
+        if strategy is None:
+            return None
+
+        return {
+            'strategy': strategy,
+            'source': source,
+            'supplier': supplier,
+            'stats': stats,
+            'bucket': bucket,
+            # Izpēte - prognozētā stratēģija netiek izmantota kā īsceļš
+            'explore': random.random() < self.explore_rate
+        }
+
+    def _majority(self, counts: Optional[Counter]) -> Optional[str]:
+        """Atgriež dominējošo stratēģiju, ja vēsture ir pietiekama un viennozīmīga"""
+        if not counts:
+            return None
+        total = sum(counts.values())
+        if total < self.min_samples:
+            return None
+        strategy, count = counts.most_common(1)[0]
+        return strategy if count / total >= 0.6 else None
+
+    @staticmethod
+    def _heuristic(stats: Dict[str, float]) -> str:
+        """Noklusētā izvēle bez vēstures"""
+        if stats['noise'] >= 8 or stats['contrast'] < 0.35:
+            return 'aggressive_preprocessing'
+        if stats['noise'] >= 3 or stats['dpi'] < 200 or stats['skew'] > 1.5:
+            return 'light_preprocessing'
+        return 'no_preprocessing'
+
+    def record_outcome(self, prediction: Optional[Dict[str, Any]], strategy_used: str,
+                       learn: bool = True):
+        """
+        Reģistrē adaptīvās OCR rezultātu (hit rate un statistikas grupu vēsture)
+
+        Args:
+            prediction: predict() rezultāts vai None
+            strategy_used: Stratēģija, kas tika izmantota beigās
+            learn: Papildināt grupu vēsturi - tikai, ja rezultātu nenoteica prognozes
+                īsceļš (citas stratēģijas tika mēģinātas vai izpētes režīmā)
+        """
+        if prediction is None:
+            return
+
+        with self._lock:
+            self.metrics['predictions'] += 1
+            self.metrics['by_source'][prediction['source']] += 1
+            if prediction.get('explore'):
+                self.metrics['explored'] += 1
+            if prediction['strategy'] == strategy_used:
+                self.metrics['hits'] += 1
+            else:
+                self.metrics['misses'] += 1
+
+            # Piegādātāja vēsture tiek papildināta atsevišķi (learn_supplier),
+            # jo piegādātājs parasti kļūst zināms tikai pēc ekstraktēšanas
+            updated = learn and strategy_used in STRATEGY_NAMES and bool(prediction.get('bucket'))
+            if updated:
+                self.bucket_history[prediction['bucket']][strategy_used] += 1
+
+        if updated:
+            self._updated()
+
+    def learn_supplier(self, supplier: Optional[str], strategy_used: Optional[str]):
+        """Pievieno piegādātāja stratēģiju vēsturei (kad piegādātājs zināms pēc ekstraktēšanas)"""
+        supplier = _normalize_supplier(supplier)
+        if supplier and strategy_used in STRATEGY_NAMES:
+            with self._lock:
+                self.supplier_history[supplier][strategy_used] += 1
+            self._updated()
+
+    def _updated(self):
+        """Skaita nesaglabātos atjauninājumus; katrs save_every saglabā vēsturi"""
+        with self._lock:
+            self._unsaved_updates += 1
+            due = self._unsaved_updates >= self.save_every
+        if due:
+            self.save()
+
+    def flush(self):
+        """Saglabā nesaglabātos atjauninājumus (pie izslēgšanas)"""
+        with self._lock:
+            pending = self._unsaved_updates
+        if pending:
+            self.save()
+
+    def retrain_from_db(self, db, include_image_stats: bool = False,
+                        limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Pārbūvē vēsturi no invoices tabulas (Invoice.ocr_strategy)
+
+        Args:
+            db: SQLAlchemy sesija
+            include_image_stats: Pārrēķināt attēlu statistiku esošajiem failiem
+            limit: Maksimālais apstrādājamo rēķinu skaits
+
+        Returns:
+            Dict: Apmācības kopsavilkums
+        """
+        from app.models import Invoice
+
+        query = (db.query(Invoice.supplier_name, Invoice.ocr_strategy, Invoice.file_path)
+                 .filter(Invoice.ocr_strategy.in_(STRATEGY_NAMES))
+                 .order_by(Invoice.id.desc()))
+        if limit:
+            query = query.limit(limit)
+
+        supplier_history = defaultdict(Counter)
+        bucket_history = defaultdict(Counter)
+        rows = 0
+
+        for supplier_name, strategy, file_path in query.all():
+            rows += 1
+            supplier = _normalize_supplier(supplier_name)
+            if supplier:
+                supplier_history[supplier][strategy] += 1
+
+            if include_image_stats and file_path and Path(file_path).exists():
+                stats = compute_image_stats(file_path)
+                if stats:
+                    bucket_history[stats_bucket(stats)][strategy] += 1
+
+        with self._lock:
+            self.supplier_history = supplier_history
+            if include_image_stats:
+                self.bucket_history = bucket_history
+
+        self.save()
+        logger.info(f"Stratēģiju prognozētājs pārapmācīts: {rows} rēķini, "
+                    f"{len(supplier_history)} piegādātāji")
+
+        return {
+            'invoices': rows,
+            'suppliers': len(supplier_history),
+            'buckets': len(self.bucket_history)
+        }
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Atgriež prognozētāja metriku (hit rate)"""
+        with self._lock:
+            predictions = self.metrics['predictions']
+            return {
+                'predictions': predictions,
+                'hits': self.metrics['hits'],
+                'misses': self.metrics['misses'],
+                'explored': self.metrics['explored'],
+                'hit_rate': self.metrics['hits'] / predictions if predictions else 0.0,
+                'by_source': dict(self.metrics['by_source']),
+                'suppliers': len(self.supplier_history),
+                'buckets': len(self.bucket_history)
+            }
+
+    def save(self):
+        """Saglabā vēsturi uz diska (pagaidu fails + os.replace - fails nekad nav pusrakstīts)"""
+        with self._save_lock:
+            with self._lock:
+                data = {
+                    'supplier_history': {k: dict(v) for k, v in self.supplier_history.items()},
+                    'bucket_history': {k: dict(v) for k, v in self.bucket_history.items()}
+                }
+                self._unsaved_updates = 0
+            temp_path = self.model_path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                self.model_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(temp_path, self.model_path)
+            except Exception as e:
+                logger.error(f"Prognozētāja saglabāšanas kļūda: {e}")
+
+    def _load(self):
+        """Ielādē saglabāto vēsturi"""
+        if not self.model_path.exists():
+            return
+        try:
+            with open(self.model_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for supplier, counts in data.get('supplier_history', {}).items():
+                self.supplier_history[supplier] = Counter(counts)
+            for bucket, counts in data.get('bucket_history', {}).items():
+                self.bucket_history[bucket] = Counter(counts)
+            logger.info(f"Ielādēta stratēģiju vēsture: {len(self.supplier_history)} piegādātāji")
+        except Exception as e:
+            logger.warning(f"Prognozētāja ielādes kļūda: {e}")
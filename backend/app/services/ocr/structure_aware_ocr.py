@@ -6,20 +6,33 @@ Paplašina OCR funkcionalitāti ar dokumenta struktūras kontekstu
 from ast import pattern
 import cv2
 import numpy as np
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Union
 from dataclasses import dataclass, asdict
 import logging
 import asyncio
 from datetime import datetime, timezone
 import json
+import re
+from pathlib import Path
 
 from ..document_structure_service import (
     DocumentStructureAnalyzer, DocumentStructure, DocumentZone, 
     TableRegion, TableCell, BoundingBox, ZoneType
 )
+from ..page_image import PageImage
+from .noise_estimator import apply_denoise, choose_denoise
+from .skew_estimator import SkewEstimate, estimate_skew
+from .tiled_preprocessing import get_tiled_executor
+from .ocr_engine import get_ocr_engine
+from .table_cell_batch import build_cell_composites, assign_words_to_cells
+from .zone_planner import ZoneTile, build_word_index, collect_zone_words, plan_zone_tiles
+from app.config import IMAGE_PREPROCESSING, STRUCTURE_OCR
 
 logger = logging.getLogger(__name__)
 
+# Tesseract whitelist parametrs zonu konfigurācijās
+WHITELIST_PATTERN = re.compile(r"\s*-c tessedit_char_whitelist=\S*")
+
 @dataclass
 class StructureAwareOCRResult:
     """
@@ -97,6 +110,9 @@ class StructureAwareOCR:
         self.structure_analyzer = structure_analyzer or DocumentStructureAnalyzer()
         self.logger = logging.getLogger(__name__)
         
+        # Kopīgais Tesseract worker pool
+        self.ocr_engine = get_ocr_engine()
+        
         # Zone-specific configurations
         self.zone_configs = self._initialize_zone_configs()
         
@@ -106,8 +122,18 @@ class StructureAwareOCR:
             "min_cell_area": 100,  # Minimālais šūnas laukums
             "header_enhancement": True,  # Uzlabo kolonnu virsrakstus
             "data_type_detection": True,  # Nosaka datu tipus
+            "cell_ocr_mode": STRUCTURE_OCR["table_cell_mode"],  # batched vai per_cell
+            "batch_max_cells": STRUCTURE_OCR["batch_max_cells"],
+            "batch_max_height": STRUCTURE_OCR["batch_max_height"],
+            "batch_gutter": STRUCTURE_OCR["batch_gutter"],
         }
         
+        # Maksimālais vienlaicīgo OCR darbu (zonas, tabulas) skaits vienam dokumentam
+        self.max_concurrency = max(1, STRUCTURE_OCR["max_concurrency"])
+        
+        # Zem šī zonu confidence tiek veikts pilnas lapas OCR
+        self.full_page_fallback_confidence = STRUCTURE_OCR["full_page_fallback_confidence"]
+        
         # Confidence weighting
         self.confidence_weights = {
             ZoneType.HEADER: 1.2,     # Header zones get higher weight
@@ -125,14 +151,14 @@ class StructureAwareOCR:
             ZoneType.HEADER: ZoneOCRConfig(
                 zone_type=ZoneType.HEADER,
                 tesseract_config="--psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,:-/ ",
-                preprocessing_steps=["deskew", "denoise", "enhance_contrast"],
+                preprocessing_steps=["denoise", "enhance_contrast"],
                 confidence_threshold=0.7,
                 text_cleaning_level="medium"
             ),
             ZoneType.BODY: ZoneOCRConfig(
                 zone_type=ZoneType.BODY,
                 tesseract_config="--psm 6",
-                preprocessing_steps=["deskew", "denoise"],
+                preprocessing_steps=["denoise"],
                 confidence_threshold=0.6,
                 text_cleaning_level="medium"
             ),
@@ -146,25 +172,36 @@ class StructureAwareOCR:
             ZoneType.SUMMARY: ZoneOCRConfig(
                 zone_type=ZoneType.SUMMARY,
                 tesseract_config="--psm 6 -c tessedit_char_whitelist=0123456789.,€$+-= ",
-                preprocessing_steps=["deskew", "denoise", "enhance_contrast"],
+                preprocessing_steps=["denoise", "enhance_contrast"],
                 confidence_threshold=0.8,
                 text_cleaning_level="aggressive"
             ),
             ZoneType.TABLE: ZoneOCRConfig(
                 zone_type=ZoneType.TABLE,
                 tesseract_config="--psm 6",
-                preprocessing_steps=["deskew", "denoise", "enhance_contrast", "morphology"],
+                preprocessing_steps=["denoise", "enhance_contrast", "morphology"],
                 confidence_threshold=0.75,
                 text_cleaning_level="medium"
             ),
         }
     
-    async def process_with_structure(self, image_path: str) -> StructureAwareOCRResult:
+    async def process_with_structure(self, image_path: Union[str, PageImage],
+                                     skew_angle: Optional[float] = None) -> StructureAwareOCRResult:
         """
         Galvenā metode - OCR ar struktūras kontekstu
         
+        Attēls tiek dekodēts vienreiz; struktūras analīze, zonas, tabulas un
+        backup OCR izmanto to pašu PageImage (zonas un šūnas kā skatus).
+        Slīpums tiek labots vienreiz visai lapai pirms struktūras analīzes -
+        zonas un šūnas netiek rotētas atsevišķi.
+        Pārklājošās zonas tiek atpazītas kā nepārklājošas joslas; tabulas ar
+        šūnām joslās netiek iekļautas (ja šūnu OCR neizdodas, tabula tiek
+        atpazīta kā josla). Pilnas lapas teksts tiek salikts no joslām un
+        šūnām, un pilnas lapas OCR notiek tikai tad, ja zonu confidence ir zems.
+        
         Args:
-            image_path: Ceļš uz attēlu
+            image_path: Ceļš uz attēlu vai jau dekodēts PageImage
+            skew_angle: Jau novērtēts lapas slīpums (None - novērtē šeit)
             
         Returns:
             StructureAwareOCRResult: OCR rezultāts ar struktūras informāciju
@@ -172,33 +209,87 @@ class StructureAwareOCR:
         start_time = datetime.now(timezone.utc)
         
         try:
+            # 0. Lapas slīpuma korekcija (vienreiz, pirms zonām un tabulām)
+            page, skew = await self.deskew_page(image_path, skew_angle)
+            
             # 1. Analizē dokumenta struktūru
-            self.logger.info(f"Analizē struktūru: {image_path}")
-            structure = await self.structure_analyzer.analyze_document(image_path)
-            
-            # 2. Parallēli apstrādā zonas
-            zone_tasks = []
-            for zone in structure.zones:
-                task = self._process_zone_ocr(image_path, zone)
-                zone_tasks.append(task)
-            
-            zone_results = await asyncio.gather(*zone_tasks, return_exceptions=True)
-            
-            # 3. Apstrādā tabulas
-            table_results = []
-            for table in structure.tables:
-                table_result = await self._process_table_ocr(image_path, table)
-                table_results.append(table_result)
-            
-            # 4. Veic standard OCR kā backup
-            standard_ocr_result = await self.ocr_service.extract_text_from_image(image_path)
-            
-            # 5. Kombinē rezultātus
-            zone_dict = {
-                zone.zone_type.value: zone_results[i]
-                for i, zone in enumerate(structure.zones)
-                if i < len(zone_results) and not isinstance(zone_results[i], Exception)
-            }
+            self.logger.info(f"Analizē struktūru: {page.source or 'atmiņas attēls'}")
+            structure = await self.structure_analyzer.analyze_document(page)
+            
+            # 2. Zonu plāns - nepārklājošas joslas (katrs pikselis tiek atpazīts vienreiz);
+            # tabulas ar šūnām tiek atpazītas pa šūnām, tāpēc joslās netiek iekļautas
+            tiles = plan_zone_tiles(structure.zones, binary=page.binary,
+                                    exclude=[table.bounds for table in structure.tables if table.cells])
+            
+            # 3. Tabulas un zonu joslas paralēli uz OCR worker pool;
+            # dokumenta semafors ierobežo vienlaicīgos darbus. Tabulas semaforu ņem
+            # katram OCR izsaukumam (šūnas paralēli), nevis visam uzdevumam -
+            # citādi tabula ar aizņemtu vietu gaidītu uz savām šūnām
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            table_tasks = [
+                self._process_table_ocr(page, table, semaphore=semaphore)
+                for table in structure.tables
+            ]
+            tile_tasks = [
+                self._run_limited(semaphore, self._process_tile_ocr(page, tile, index))
+                for index, tile in enumerate(tiles)
+            ]
+            
+            # Tabulas pirmās - garākie darbi sākas vispirms
+            results = await asyncio.gather(*table_tasks, *tile_tasks, return_exceptions=True)
+            table_count = len(table_tasks)
+            table_outcomes = results[:table_count]
+            table_results = [
+                table_result for table_result in table_outcomes
+                if not isinstance(table_result, Exception)
+            ]
+            tile_results = [
+                tile_result if not isinstance(tile_result, Exception) else {'text': '', 'words': []}
+                for tile_result in results[table_count:]
+            ]
+            
+            # Izslēgtās tabulas, kuru šūnu OCR neizdevās, tiek atpazītas kā joslas
+            units = [(tile.bounds.y1, tile_result) for tile, tile_result in zip(tiles, tile_results)]
+            fallback_tiles = []
+            for table, outcome in zip(structure.tables, table_outcomes):
+                if not table.cells:
+                    continue
+                if self._cell_ocr_succeeded(outcome):
+                    units.append((table.bounds.y1, self._table_unit(outcome, len(units))))
+                elif all(tile.bounds != table.bounds for tile in fallback_tiles):
+                    fallback_tiles.append(ZoneTile(bounds=table.bounds, zone_types=(ZoneType.TABLE,)))
+            if fallback_tiles:
+                self.logger.info(f"Šūnu OCR neizdevās {len(fallback_tiles)} tabulām, atpazīst tās kā joslas")
+                fallback_results = await asyncio.gather(*[
+                    self._run_limited(semaphore, self._process_tile_ocr(page, tile, len(tiles) + index))
+                    for index, tile in enumerate(fallback_tiles)
+                ], return_exceptions=True)
+                units.extend(
+                    (tile.bounds.y1, tile_result if not isinstance(tile_result, Exception) else {'text': '', 'words': []})
+                    for tile, tile_result in zip(fallback_tiles, fallback_results)
+                )
+            # Lapas secībā - augšā uz leju
+            units.sort(key=lambda unit: unit[0])
+            page_units = [unit for _, unit in units]
+            denoise_decisions = [unit['denoise'] for unit in page_units if unit.get('denoise')]
+            
+            # 4. Zonu rezultāti un pilnas lapas teksts no joslu un šūnu vārdiem
+            zone_dict = await self._collect_zone_results(structure.zones, page_units)
+            standard_ocr_result = await self._assemble_page_text(page_units)
+            
+            # 5. Pilnas lapas OCR tikai, ja zonu rezultāts nav pietiekami drošs;
+            # tukšs vai neizdevies rezultāts neaizstāj joslu tekstu
+            full_page_fallback = standard_ocr_result['confidence'] < self.full_page_fallback_confidence
+            if full_page_fallback:
+                self.logger.info(f"Zonu confidence {standard_ocr_result['confidence']:.2f} zems, "
+                                 f"veic pilnas lapas OCR")
+                try:
+                    full_page = await self._extract_full_page(page)
+                except Exception as e:
+                    self.logger.warning(f"Pilnas lapas OCR neizdevās, paliek zonu teksts: {str(e)}")
+                    full_page = None
+                if full_page and full_page['text'].strip():
+                    standard_ocr_result = full_page
             
             # 6. Izveido enhanced text ar struktūras kontekstu
             enhanced_text = self._create_enhanced_text(
@@ -215,7 +306,7 @@ class StructureAwareOCR:
                 table_results
             )
             
-            processing_time = int((datetime.utcnow() - start_time).total_seconds() * 1000)
+            processing_time = int((datetime.now(timezone.utc) - start_time).total_seconds() * 1000)
             
             result = StructureAwareOCRResult(
                 text=standard_ocr_result.get('text', ''),
@@ -224,7 +315,15 @@ class StructureAwareOCR:
                 zone_results=zone_dict,
                 table_results=table_results,
                 enhanced_text=enhanced_text,
-                processing_time_ms=processing_time
+                processing_time_ms=processing_time,
+                metadata={
+                    'ocr_units': len(results) + len(fallback_tiles),
+                    'max_concurrency': self.max_concurrency,
+                    'zone_tiles': len(tiles),
+                    'full_page_fallback': full_page_fallback,
+                    'skew': skew,
+                    'denoise': denoise_decisions
+                }
             )
             
             self.logger.info(f"StructureAware OCR pabeigts: {processing_time}ms, confidence: {weighted_confidence:.2f}")
@@ -246,87 +345,169 @@ class StructureAwareOCR:
                 processing_time_ms=0
             )
     
-    async def _process_zone_ocr(self, image_path: str, zone: DocumentZone) -> Dict[str, Any]:
+    @staticmethod
+    async def _run_limited(semaphore: asyncio.Semaphore, coro):
+        """Izpilda korutīnu, kad dokumenta semaforā ir brīva vieta"""
+        async with semaphore:
+            return await coro
+    
+    def _tile_config(self, tile: ZoneTile) -> ZoneOCRConfig:
         """
-        Apstrādā konkrētu zonu ar optimizētu OCR
+        Joslas OCR konfigurācija
+        
+        Ja joslu aptver vairākas zonas ar atšķirīgiem whitelist, whitelist tiek
+        noņemts (lai neizkropļotu nevienas zonas tekstu); priekšapstrādes soļi apvienoti.
+        """
+        configs = [self.zone_configs[zone_type] for zone_type in tile.zone_types if zone_type in self.zone_configs]
+        if not configs:
+            return self.zone_configs[ZoneType.BODY]
+        if len(configs) == 1:
+            return configs[0]
+        
+        tesseract_configs = {config.tesseract_config for config in configs}
+        tesseract_config = configs[0].tesseract_config
+        if len(tesseract_configs) > 1:
+            tesseract_config = WHITELIST_PATTERN.sub('', tesseract_config).strip()
+        
+        steps = []
+        for config in configs:
+            steps.extend(step for step in config.preprocessing_steps if step not in steps)
+        
+        return ZoneOCRConfig(
+            zone_type=configs[0].zone_type,
+            tesseract_config=tesseract_config,
+            preprocessing_steps=steps,
+            confidence_threshold=min(config.confidence_threshold for config in configs),
+            text_cleaning_level=configs[0].text_cleaning_level
+        )
+    
+    async def _process_tile_ocr(self, page: PageImage, tile: ZoneTile, index: int) -> Dict[str, Any]:
+        """
+        OCR vienai zonu joslai
         
-        Args:
-            image_path: Ceļš uz attēlu
-            zone: Zona ko apstrādāt
-            
         Returns:
-            OCR rezultāts šai zonai
+            Dict: 'text', 'confidence' un 'words' lapas koordinātēs
         """
-        try:
+        config = self._tile_config(tile)
+        tile_image = page.crop(tile.bounds)
+        decisions: List[Dict[str, Any]] = []
+        processed_image = await self._preprocess_zone_image(tile_image, config.preprocessing_steps, decisions)
+        tile_result = await self._extract_text_from_zone(
+            processed_image,
+            config.tesseract_config,
+            config.confidence_threshold
+        )
+        
+        words = [
+            {**word, 'left': word['left'] + tile.bounds.x1, 'top': word['top'] + tile.bounds.y1, 'tile': index}
+            for word in tile_result.get('words', [])
+        ]
+        return {
+            'text': tile_result.get('text', ''),
+            'confidence': tile_result.get('confidence', 0.0),
+            'words': words,
+            'denoise': {**decisions[0], 'tile': index} if decisions else None
+        }
+    
+    async def _collect_zone_results(self, zones: List[DocumentZone],
+                                    tile_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sadala joslu vārdus pa zonām (pārklājošās zonas dala tos pašus vārdus)"""
+        words = [word for tile_result in tile_results for word in tile_result['words']]
+        index = build_word_index(words)
+        
+        zone_dict = {}
+        for zone in zones:
+            zone_ocr = collect_zone_words(words, zone.bounds, index)
             config = self.zone_configs.get(zone.zone_type)
-            if not config:
-                self.logger.warning(f"Nav konfigurācijas priekš zona tipa: {zone.zone_type}")
-                return await self._process_standard_zone(image_path, zone)
-            
-            # 1. Izgriezīs zonas attēlu
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Nevar ielādēt attēlu: {image_path}")
-            
-            zone_image = image[
-                zone.bounds.y1:zone.bounds.y2,
-                zone.bounds.x1:zone.bounds.x2
-            ]
-            
-            # 2. Preprocess ar zone-specific parametriem
-            processed_image = await self._preprocess_zone_image(zone_image, config.preprocessing_steps)
-            
-            # 3. OCR ar zone-specific config
-            # Šeit izmantojam esošo OCR servisu ar custom parametriem
-            zone_result = await self._extract_text_from_zone(
-                processed_image, 
-                config.tesseract_config,
-                config.confidence_threshold
-            )
-            
-            # 4. Text cleaning ar zone-specific līmeni
             cleaned_text = await self._clean_zone_text(
-                zone_result.get('text', ''),
-                config.text_cleaning_level
+                zone_ocr['text'],
+                config.text_cleaning_level if config else "light"
             )
-            
-            return {
+            zone_dict[zone.zone_type.value] = {
                 'text': cleaned_text,
-                'raw_text': zone_result.get('text', ''),
-                'confidence': zone_result.get('confidence', 0.0),
+                'raw_text': zone_ocr['text'],
+                'confidence': zone_ocr['confidence'],
                 'zone_type': zone.zone_type.value,
-                'bounds': asdict(zone.bounds),
-                'config_used': asdict(config)
+                'bounds': zone.bounds.to_dict(),
+                'config_used': asdict(config) if config else 'standard'
             }
-            
-        except Exception as e:
-            self.logger.error(f"Kļūda zone OCR: {str(e)}")
-            return await self._process_standard_zone(image_path, zone)
+        return zone_dict
+    
+    async def _assemble_page_text(self, tile_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Pilnas lapas teksts un confidence no joslu rezultātiem (augšā uz leju)"""
+        raw_text = '\n\n'.join(
+            tile_result['text'].strip() for tile_result in tile_results if tile_result['text'].strip()
+        )
+        confidences = [word['conf'] for tile_result in tile_results for word in tile_result['words']]
+        return {
+            'text': await self._clean_zone_text(raw_text, "medium"),
+            'raw_text': raw_text,
+            'confidence': (sum(confidences) / len(confidences) / 100.0) if confidences else 0.0
+        }
+    
+    @staticmethod
+    def _cell_ocr_succeeded(table_result: Any) -> bool:
+        """Vai tabulas šūnu OCR izdevās un atrada tekstu"""
+        return (isinstance(table_result, dict) and 'cell_ocr' in table_result
+                and any(cell['text'] for cell in table_result['cells']))
+    
+    @staticmethod
+    def _table_unit(table_result: Dict[str, Any], index: int) -> Dict[str, Any]:
+        """
+        Tabulas šūnas kā lapas vārdi - zonu un lapas teksts ietver tabulu bez atkārtota OCR
+        
+        Returns:
+            Dict: Kā _process_tile_ocr ('text', 'confidence', 'words'); viena rinda - viena teksta rinda
+        """
+        cells = sorted((cell for cell in table_result['cells'] if cell['text']),
+                       key=lambda cell: (cell['row'], cell['column']))
+        words = [
+            {
+                'text': cell['text'],
+                'conf': cell['confidence'] * 100.0,
+                'left': cell['bounds']['x1'],
+                'top': cell['bounds']['y1'],
+                'width': cell['bounds']['x2'] - cell['bounds']['x1'],
+                'height': cell['bounds']['y2'] - cell['bounds']['y1'],
+                'block': 0, 'par': 0, 'line': cell['row'],
+                'tile': f"table{index}"
+            }
+            for cell in cells
+        ]
+        rows: Dict[int, List[str]] = {}
+        for cell in cells:
+            rows.setdefault(cell['row'], []).append(cell['text'])
+        return {
+            'text': '\n'.join(' '.join(row) for row in rows.values()),
+            'confidence': sum(cell['confidence'] for cell in cells) / len(cells) if cells else 0.0,
+            'words': words,
+            'denoise': None
+        }
     
-    async def _process_table_ocr(self, image_path: str, table: TableRegion) -> Dict[str, Any]:
+    async def _process_table_ocr(self, image_path: Union[str, PageImage], table: TableRegion,
+                                 semaphore: Optional[asyncio.Semaphore] = None) -> Dict[str, Any]:
         """
         Apstrādā tabulas ar cell-aware OCR
         
         Args:
-            image_path: Ceļš uz attēlu
+            image_path: Ceļš uz attēlu vai PageImage
             table: Tabulas informācija
+            semaphore: Dokumenta semafors, ko ņem katrs šūnu OCR izsaukums
+                (None - atsevišķs ar max_concurrency vietām)
             
         Returns:
             Strukturēts tabulas rezultāts
         """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
         try:
-            # 1. Izgriezīs tabulas attēlu
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError(f"Nevar ielādēt attēlu: {image_path}")
-            
-            table_image = image[
-                table.bounds.y1:table.bounds.y2,
-                table.bounds.x1:table.bounds.x2
-            ]
+            # 1. Tabulas attēls - skats uz kopīgo lapu (bez kopēšanas)
+            page = PageImage.load(image_path)
+            table_image = page.crop(table.bounds)
             
-            # 2. Process katru šūnu atsevišķi
-            cell_results = []
+            # 2. Šūnu izgriezumi (skati uz tabulas attēlu)
+            cells = []
+            cell_images = []
             for cell in table.cells:
                 # Adjust cell coordinates to table-relative
                 rel_cell = BoundingBox(
@@ -344,31 +525,39 @@ class StructureAwareOCR:
                 ]
                 
                 if cell_image.size > 0:
-                    # OCR šūnai ar table-specific config
-                    cell_ocr = await self._extract_text_from_zone(
-                        cell_image,
-                        self.zone_configs[ZoneType.TABLE].tesseract_config,
-                        self.zone_configs[ZoneType.TABLE].confidence_threshold
-                    )
-                    
-                    cell_results.append({
-                        'text': cell_ocr.get('text', '').strip(),
-                        'confidence': cell_ocr.get('confidence', 0.0),
-                        'row': cell.row_index,
-                        'column': cell.column_index,
-                        'bounds': asdict(cell.bounds)
-                    })
-            
-            # 3. Konstruē tabulas matricu
+                    cells.append(cell)
+                    cell_images.append(cell_image)
+            
+            # 3. OCR šūnām - kompozītattēlos vai katrai atsevišķi
+            cell_ocr_mode = self.table_configs["cell_ocr_mode"]
+            if cell_ocr_mode == "batched" and len(cell_images) > 1:
+                cell_ocrs, ocr_calls = await self._ocr_cells_batched(cell_images, semaphore)
+            else:
+                cell_ocr_mode = "per_cell"
+                cell_ocrs, ocr_calls = await self._ocr_cells_individually(cell_images, semaphore), len(cell_images)
+            
+            cell_results = [
+                {
+                    'text': cell_ocr.get('text', '').strip(),
+                    'confidence': cell_ocr.get('confidence', 0.0),
+                    'row': cell.row_index,
+                    'column': cell.column_index,
+                    'bounds': cell.bounds.to_dict()
+                }
+                for cell, cell_ocr in zip(cells, cell_ocrs)
+            ]
+            
+            # 4. Konstruē tabulas matricu
             table_matrix = self._build_table_matrix(cell_results)
             
             return {
                 'cells': cell_results,
                 'matrix': table_matrix,
-                'table_bounds': asdict(table.bounds),
+                'table_bounds': table.bounds.to_dict(),
                 'rows': table.rows,
                 'columns': table.columns,
-                'confidence': table.confidence
+                'confidence': table.confidence,
+                'cell_ocr': {'mode': cell_ocr_mode, 'ocr_calls': ocr_calls}
             }
             
         except Exception as e:
@@ -376,21 +565,92 @@ class StructureAwareOCR:
             return {
                 'cells': [],
                 'matrix': [],
-                'table_bounds': asdict(table.bounds),
+                'table_bounds': table.bounds.to_dict(),
                 'rows': 0,
                 'columns': 0,
                 'confidence': 0.0
             }
     
-    async def _preprocess_zone_image(self, image: np.ndarray, steps: List[str]) -> np.ndarray:
-        """Preprocess attēlu ar zone-specific soļiem"""
+    async def _ocr_cells_individually(self, cell_images: List[np.ndarray],
+                                      semaphore: asyncio.Semaphore) -> List[Dict[str, Any]]:
+        """OCR katrai šūnai ar atsevišķu Tesseract izsaukumu (paralēli, semafora robežās)"""
+        table_config = self.zone_configs[ZoneType.TABLE]
+        return list(await asyncio.gather(*[
+            self._run_limited(semaphore, self._extract_text_from_zone(
+                cell_image,
+                table_config.tesseract_config,
+                table_config.confidence_threshold
+            ))
+            for cell_image in cell_images
+        ]))
+    
+    async def _ocr_cells_batched(self, cell_images: List[np.ndarray],
+                                 semaphore: asyncio.Semaphore) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        OCR šūnām kompozītattēlos - viens Tesseract izsaukums partijai
+        
+        Vārdi tiek piesaistīti šūnām pēc koordinātēm kompozītā. Ja partijas OCR
+        neizdodas, tās šūnas tiek apstrādātas atsevišķi.
+        
+        Returns:
+            Tuple: (rezultāts katrai šūnai, Tesseract izsaukumu skaits)
+        """
+        table_config = self.zone_configs[ZoneType.TABLE]
+        batches = build_cell_composites(
+            cell_images,
+            max_cells=self.table_configs["batch_max_cells"],
+            max_height=self.table_configs["batch_max_height"],
+            gutter=self.table_configs["batch_gutter"]
+        )
+        
+        batch_ocrs = await asyncio.gather(*[
+            self._run_limited(semaphore, self._extract_text_from_zone(
+                composite,
+                table_config.tesseract_config,
+                table_config.confidence_threshold
+            ))
+            for composite, _ in batches
+        ])
+        
+        results: List[Dict[str, Any]] = [{'text': '', 'confidence': 0.0} for _ in cell_images]
+        ocr_calls = len(batches)
+        for (_, slots), batch_ocr in zip(batches, batch_ocrs):
+            if 'words' not in batch_ocr:
+                # Partijas OCR kļūda - atkārto šūnām atsevišķi
+                self.logger.warning(f"Šūnu partijas OCR neizdevās, apstrādā {len(slots)} šūnas atsevišķi")
+                fallback = await self._ocr_cells_individually([cell_images[slot.index] for slot in slots], semaphore)
+                ocr_calls += len(slots)
+                for slot, cell_ocr in zip(slots, fallback):
+                    results[slot.index] = cell_ocr
+                continue
+            
+            for index, cell_ocr in assign_words_to_cells(batch_ocr['words'], slots).items():
+                results[index] = cell_ocr
+        
+        return results, ocr_calls
+    
+    async def _preprocess_zone_image(self, image: np.ndarray, steps: List[str],
+                                     decisions: Optional[List[Dict[str, Any]]] = None) -> np.ndarray:
+        """Preprocess attēlu ar zone-specific soļiem (pavedienā - OpenCV atlaiž GIL)"""
+        return await asyncio.to_thread(self._apply_zone_steps, image, steps, decisions)
+    
+    def _apply_zone_steps(self, image: np.ndarray, steps: List[str],
+                          decisions: Optional[List[Dict[str, Any]]] = None) -> np.ndarray:
+        """
+        Sinhronā zone-specific priekšapstrāde
+        
+        Denoise tiek izpildīts tikai, ja zonas trokšņa novērtējums to prasa
+        (lēmums tiek pievienots decisions sarakstam). Slīpums šeit netiek
+        labots - lapa jau ir iztaisnota process_with_structure.
+        """
         processed = image.copy()
         
         for step in steps:
-            if step == "deskew":
-                processed = self._deskew_image(processed)
-            elif step == "denoise":
-                processed = cv2.fastNlMeansDenoisingColored(processed)
+            if step == "denoise":
+                decision = choose_denoise(processed)
+                processed = apply_denoise(processed, decision)
+                if decisions is not None:
+                    decisions.append(decision.to_dict())
             elif step == "enhance_contrast":
                 processed = self._enhance_contrast(processed)
             elif step == "morphology":
@@ -411,45 +671,14 @@ class StructureAwareOCR:
             OCR rezultāts
         """
         try:
-            # Izmantojam esošo OCR servisu ar custom parametriem
-            # Šeit varētu būt vajadzīga paplašināšana OCRService
+            # Teksts un confidence vienā Tesseract izsaukumā caur kopīgo worker pool
+            ocr_data = await self.ocr_engine.image_to_text_data(image, config=tesseract_config)
             
-            # Pagaidām izmantojam standard metodi
-            # TODO: Paplašināt OCRService lai atbalsta custom tesseract config
-            
-            import pytesseract
-            import tempfile
-            import os
-            import time
-            
-            # Saglabā temp failu ar unique name
-            temp_suffix = f"_{int(time.time() * 1000000)}.png"
-            with tempfile.NamedTemporaryFile(suffix=temp_suffix, delete=False) as tmp_file:
-                temp_path = tmp_file.name
-                
-            try:
-                cv2.imwrite(temp_path, image)
-                
-                # OCR ar custom config
-                text = pytesseract.image_to_string(image, config=tesseract_config)
-                
-                # Get confidence data
-                data = pytesseract.image_to_data(image, config=tesseract_config, output_type=pytesseract.Output.DICT)
-                confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                
-                return {
-                    'text': text,
-                    'confidence': avg_confidence / 100.0  # Convert to 0-1 range
-                }
-                
-            finally:
-                # Cleanup temp file
-                try:
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                except Exception as cleanup_error:
-                    self.logger.warning(f"Nevarēja iztīrīt temp failu {temp_path}: {cleanup_error}")
+            return {
+                'text': ocr_data['text'],
+                'confidence': ocr_data['confidence'],  # 0-1 range
+                'words': ocr_data['words']
+            }
                 
         except Exception as e:
             self.logger.error(f"Kļūda zone OCR extraction: {str(e)}")
@@ -571,29 +800,22 @@ class StructureAwareOCR:
         
         return base_confidence
     
-    async def _process_standard_zone(self, image_path: str, zone: DocumentZone) -> Dict[str, Any]:
-        """Fallback uz standard OCR zonai"""
-        try:
-            # Izmantojam standard OCR
-            result = await self.ocr_service.extract_text_from_image(image_path)
-            return {
-                'text': result.get('text', ''),
-                'raw_text': result.get('text', ''),
-                'confidence': result.get('confidence', 0.0),
-                'zone_type': zone.zone_type.value,
-                'bounds': asdict(zone.bounds),
-                'config_used': 'standard'
-            }
-        except Exception as e:
-            self.logger.error(f"Standard zone fallback kļūda: {str(e)}")
-            return {
-                'text': '',
-                'raw_text': '',
-                'confidence': 0.0,
-                'zone_type': zone.zone_type.value,
-                'bounds': asdict(zone.bounds),
-                'config_used': 'error'
-            }
+    async def _extract_full_page(self, page: PageImage) -> Dict[str, Any]:
+        """
+        Standard OCR visai lapai no jau dekodētā (un iztaisnotā) attēla
+        
+        Returns:
+            Dict: 'text' (iztīrītais vai neapstrādātais teksts), 'raw_text' un 'confidence'
+        """
+        image_name = Path(page.source).stem if page.source else None
+        # Lapa jau iztaisnota (deskew_page) - priekšapstrāde slīpumu nenovērtē un negriež vēlreiz
+        result = await self.ocr_service.extract_text_from_image(page.bgr, image_name=image_name, skew_angle=0.0)
+        raw_text = result.get('raw_text', '') or ''
+        return {
+            'text': result.get('cleaned_text') or raw_text,
+            'raw_text': raw_text,
+            'confidence': result.get('confidence_score', 0.0)
+        }
     
     def _build_table_matrix(self, cell_results: List[Dict[str, Any]]) -> List[List[str]]:
         """Konstruē tabulas matricu no šūnu rezultātiem"""
@@ -618,57 +840,77 @@ class StructureAwareOCR:
         
         return matrix
     
+    async def deskew_page(self, image_path: Union[str, PageImage],
+                          skew_angle: Optional[float] = None) -> Tuple[PageImage, Dict[str, Any]]:
+        """
+        Dekodē un iztaisno lapu (pavedienā)
+        
+        Izmanto arī struktūras analīze ārpus process_with_structure, lai zonas
+        un tabulas tiktu atpazītas iztaisnotā lapā un leņķis - novērtēts vienreiz.
+        
+        Args:
+            image_path: Ceļš uz attēlu vai PageImage
+            skew_angle: Jau novērtēts lapas slīpums (None - novērtē šeit)
+            
+        Returns:
+            (PageImage, slīpuma metadati ar 'angle' un 'applied')
+        """
+        page = await PageImage.load_async(image_path)
+        return await asyncio.to_thread(self._deskew_page, page, skew_angle)
+    
     # Helper methods for image preprocessing
-    def _deskew_image(self, image: np.ndarray) -> np.ndarray:
-        """Izlabo attēla slīpumu"""
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150, apertureSize=3)
-        lines = cv2.HoughLines(edges, 1, np.pi/180, threshold=100)
-        
-        if lines is not None and len(lines) > 0:
-            angles = []
-            for line in lines[:10]:  # Izmanto pirmas 10 līnijas
-                if len(line) >= 2:  # Pārbauda vai line ir pareizā formā
-                    rho, theta = line[0], line[1] if len(line) > 1 else line[0][1]
-                elif len(line[0]) >= 2:  # Ja line ir nested array
-                    rho, theta = line[0][0], line[0][1]
-                else:
-                    continue  # Skip malformed lines
-                    
-                angle = theta * 180 / np.pi
-                angles.append(angle)
-            
-            if angles:
-                median_angle = np.median(angles)
-                if abs(median_angle - 90) < abs(median_angle - 180):
-                    skew_angle = median_angle - 90
-                else:
-                    skew_angle = median_angle - 180
-                
-                if abs(skew_angle) > 0.5:  # Tikai ja skew > 0.5 grādi
-                    (h, w) = image.shape[:2]
-                    center = (w // 2, h // 2)
-                    M = cv2.getRotationMatrix2D(center, skew_angle, 1.0)
-                    return cv2.warpAffine(image, M, (w, h), 
-                                        flags=cv2.INTER_CUBIC, 
-                                        borderMode=cv2.BORDER_REPLICATE)
+    def _deskew_page(self, page: PageImage,
+                     skew_angle: Optional[float] = None) -> Tuple[PageImage, Dict[str, Any]]:
+        """
+        Iztaisno visu lapu vienreiz
+        
+        Slīpums tiek novērtēts samazinātā lapas kopijā (pyramid_level), ja tas
+        nav jau zināms.
+        
+        Returns:
+            (PageImage, slīpuma metadati) - tā pati lapa, ja rotācija nav vajadzīga
+        """
+        if skew_angle is None:
+            level = page.pyramid_level(IMAGE_PREPROCESSING.get("skew_analysis_width", 1000))
+            skew = estimate_skew(level.gray).to_dict()
+        else:
+            skew = SkewEstimate(angle=skew_angle, source='provided').to_dict()
         
-        return image
+        rotated = self._deskew_image(page.bgr, skew['angle'])
+        skew['applied'] = rotated is not page.bgr
+        if not skew['applied']:
+            return page, skew
+        self.logger.debug(f"Lapa pagriezta par {skew['angle']:.2f} grādiem")
+        return PageImage(rotated, source=page.source), skew
+    
+    def _deskew_image(self, image: np.ndarray, angle: Optional[float] = None) -> np.ndarray:
+        """Izlabo attēla slīpumu (leņķi novērtē, ja tas nav dots)"""
+        if angle is None:
+            angle = estimate_skew(image).angle
+        # Lielas lapas tiek rotētas joslās paralēli
+        return get_tiled_executor().rotate(image, angle)
     
     def _enhance_contrast(self, image: np.ndarray) -> np.ndarray:
-        """Uzlabo attēla kontrastu"""
-        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
-        l, a, b = cv2.split(lab)
+        """
+        Uzlabo attēla kontrastu (CLAHE tikai gaišuma kanālam)
         
+        Zonas attēls jau ir kopija, tāpēc CLAHE un LAB konversijas tiek
+        izpildītas vietā - bez split/merge kanālu kopijām.
+        """
         # Adaptive histogram equalization
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-        l = clahe.apply(l)
-        
-        enhanced = cv2.merge([l, a, b])
-        return cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
+        if image.ndim == 2:
+            return clahe.apply(image, dst=image if image.flags.writeable else None)
+        lab = cv2.cvtColor(image, cv2.COLOR_BGR2LAB)
+        lightness = cv2.extractChannel(lab, 0)
+        clahe.apply(lightness, dst=lightness)
+        cv2.insertChannel(lightness, lab, 0)
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2BGR, dst=lab)
     
     def _apply_morphology(self, image: np.ndarray) -> np.ndarray:
         """Piemēro morfoloģiskās operācijas"""
+        if image.ndim == 2:
+            return cv2.morphologyEx(image, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (2, 2)))
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
         # Structural element
@@ -0,0 +1,136 @@
+"""
+Tabulas šūnu OCR pa partijām
+Šūnu izgriezumi tiek salīmēti kompozītattēlā ar baltām atstarpēm; vārdi tiek atpakaļ piesaistīti šūnām
+"""
+
+import bisect
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class CellSlot:
+    """Šūnas vieta kompozītattēlā"""
+    index: int  # Indekss sākotnējā šūnu sarakstā
+    top: int
+    bottom: int
+    left: int
+    right: int
+
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return image
+
+
+def build_cell_composites(
+    crops: Sequence[np.ndarray],
+    max_cells: int = 60,
+    max_height: int = 8000,
+    gutter: int = 40
+) -> List[Tuple[np.ndarray, List[CellSlot]]]:
+    """
+    Salīmē šūnu izgriezumus vertikāli vienā vai vairākos grayscale kompozītattēlos
+
+    Katra šūna aizņem savu joslu; starp joslām ir balta atstarpe (gutter),
+    lai Tesseract nesapludina dažādu šūnu rindas.
+
+    Args:
+        crops: Šūnu attēli (BGR vai grayscale)
+        max_cells: Maksimālais šūnu skaits vienā kompozītā
+        max_height: Maksimālais kompozīta augstums pikseļos
+        gutter: Atstarpe starp šūnām un ap malām
+
+    Returns:
+        List: (kompozītattēls, šūnu vietas) katrai partijai
+    """
+    batches = []
+    current: List[Tuple[int, np.ndarray]] = []
+    height = gutter
+
+    for index, crop in enumerate(crops):
+        if crop is None or crop.size == 0:
+            continue
+        crop_height = crop.shape[0]
+        if current and (len(current) >= max_cells or height + crop_height + gutter > max_height):
+            batches.append(_render_composite(current, gutter))
+            current, height = [], gutter
+        current.append((index, crop))
+        height += crop_height + gutter
+
+    if current:
+        batches.append(_render_composite(current, gutter))
+    return batches
+
+
+def _render_composite(cells: List[Tuple[int, np.ndarray]], gutter: int) -> Tuple[np.ndarray, List[CellSlot]]:
+    width = max(crop.shape[1] for _, crop in cells) + 2 * gutter
+    height = sum(crop.shape[0] for _, crop in cells) + gutter * (len(cells) + 1)
+
+    composite = np.full((height, width), 255, dtype=np.uint8)
+    slots = []
+    y = gutter
+    for index, crop in cells:
+        h, w = crop.shape[:2]
+        composite[y:y + h, gutter:gutter + w] = _to_gray(crop)
+        slots.append(CellSlot(index=index, top=y, bottom=y + h, left=gutter, right=gutter + w))
+        y += h + gutter
+
+    return composite, slots
+
+
+def assign_words_to_cells(words: List[Dict[str, Any]], slots: List[CellSlot]) -> Dict[int, Dict[str, Any]]:
+    """
+    Piesaista kompozīta vārdus šūnām pēc vārda vertikālā centra
+
+    Args:
+        words: parse_tesseract_data() 'words' saraksts
+        slots: build_cell_composites() šūnu vietas
+
+    Returns:
+        Dict: šūnas indekss -> {'text', 'confidence', 'words'}
+    """
+    tops = [slot.top for slot in slots]
+    assigned: Dict[int, List[Dict[str, Any]]] = {slot.index: [] for slot in slots}
+
+    for word in words:
+        center = word['top'] + word['height'] / 2
+        position = bisect.bisect_right(tops, center) - 1
+        if position < 0:
+            position = 0
+        elif position + 1 < len(slots) and center >= slots[position].bottom:
+            # Vārds atstarpē - piesaista tuvākajai šūnai
+            gap_to_previous = center - slots[position].bottom
+            gap_to_next = slots[position + 1].top - center
+            if gap_to_next < gap_to_previous:
+                position += 1
+        slot = slots[position]
+
+        assigned[slot.index].append({
+            **word,
+            'top': word['top'] - slot.top,
+            'left': word['left'] - slot.left
+        })
+
+    results = {}
+    for index, cell_words in assigned.items():
+        lines = []
+        current_key = None
+        for word in cell_words:
+            key = (word.get('block'), word.get('par'), word.get('line'))
+            if key != current_key:
+                lines.append([])
+                current_key = key
+            lines[-1].append(word['text'])
+
+        confidences = [word['conf'] for word in cell_words]
+        results[index] = {
+            'text': '\n'.join(' '.join(line) for line in lines),
+            'confidence': (sum(confidences) / len(confidences) / 100.0) if confidences else 0.0,
+            'words': cell_words
+        }
+    return results
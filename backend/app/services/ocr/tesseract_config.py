@@ -17,6 +17,7 @@ class TesseractManager:
     def __init__(self):
         self.tesseract_cmd = None
         self.supported_languages = []
+        self.tessdata_dir = None
         self.config = {
             # OCR konfigurācijas parametri
             'psm': '6',  # Page Segmentation Mode (6 = uniform text block)
@@ -93,7 +94,12 @@ class TesseractManager:
             
             if result.returncode == 0:
                 # Pirmā rindiņa ir virsraksts, tālāk valodas
-                languages = result.stdout.strip().split('\n')[1:]
+                lines = result.stdout.strip().split('\n')
+                languages = lines[1:]
+                
+                # Virsraksts: List of available languages in "/usr/share/tessdata/" (3):
+                if '"' in lines[0]:
+                    self.tessdata_dir = lines[0].split('"')[1]
                 self.supported_languages = languages
                 logger.info(f"Pieejamās valodas: {languages}")
                 return languages
@@ -150,6 +156,40 @@ class TesseractManager:
             
         return config_string
     
+    def get_engine_fingerprint(self) -> str:
+        """
+        Atgriež Tesseract versijas un traineddata failu nospiedumu
+        
+        Mainās pēc Tesseract vai valodu modeļu atjaunināšanas - izmanto OCR kešs.
+        
+        Returns:
+            str: Nospiedums (versija + traineddata izmēri un laiki)
+        """
+        if not self.tesseract_cmd:
+            return "unavailable"
+        
+        parts = []
+        try:
+            result = subprocess.run(
+                [self.tesseract_cmd, '--version'],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            # Dažas versijas raksta versiju stderr
+            version_output = (result.stdout or result.stderr).strip()
+            parts.append(version_output.split('\n')[0] if version_output else "unknown")
+        except Exception as e:
+            logger.warning(f"Nevarēja nolasīt Tesseract versiju: {e}")
+            parts.append("unknown")
+        
+        if self.tessdata_dir and Path(self.tessdata_dir).exists():
+            for traineddata in sorted(Path(self.tessdata_dir).glob('*.traineddata')):
+                stat = traineddata.stat()
+                parts.append(f"{traineddata.stem}:{stat.st_size}:{int(stat.st_mtime)}")
+        
+        return '|'.join(parts)
+    
     def install_instructions(self) -> Dict[str, str]:
         """
         Atgriež instalācijas instrukcijas pašreizējai sistēmai
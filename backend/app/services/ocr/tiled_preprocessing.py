@@ -0,0 +1,193 @@
+"""
+Lielu lapu priekšapstrāde joslās
+Pārklājošas horizontālas joslas paralēlos pavedienos; katra josla raksta savu daļu vienā izvades masīvā bez šuvēm
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import IMAGE_PREPROCESSING
+
+from .noise_estimator import DenoiseDecision, apply_denoise
+
+logger = logging.getLogger(__name__)
+
+Band = Tuple[int, int]
+
+
+class TiledExecutor:
+    """
+    Lokālo OpenCV operāciju izpilde pārklājošās joslās (OpenCV atlaiž GIL)
+
+    Joslas ir pilna platuma, tāpēc kolonnu malas netiek mainītas; halo rindas
+    ir vismaz operācijas rādiuss, tāpēc joslas kodols sakrīt ar pilnā attēla
+    rezultātu bit-precīzi. Mazām lapām un vienam kodolam izpilda vienā gabalā.
+
+    CLAHE netiek dalīts joslās: šūnu histogrammas atkarīgas no visas lapas
+    režģa, un OpenCV interpolācijas noapaļošana nobīdītās joslās dod ±1
+    atšķirības, kas binarizācijā pārslēdz pikseļus.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_pixels: Optional[int] = None,
+                 min_band_rows: Optional[int] = None):
+        """
+        Args:
+            workers: Pavedienu skaits (None - IMAGE_PREPROCESSING, 0 - CPU kodolu skaits)
+            min_pixels: Mazākais attēls (pikseļi), kuram izmanto joslas
+            min_band_rows: Mazākais joslas augstums bez halo
+        """
+        workers = workers if workers is not None else IMAGE_PREPROCESSING.get("tile_workers", 0)
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.min_pixels = min_pixels or IMAGE_PREPROCESSING.get("tile_min_pixels", 6_000_000)
+        self.min_band_rows = min_band_rows or IMAGE_PREPROCESSING.get("tile_min_band_rows", 256)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def enabled_for(self, image: np.ndarray) -> bool:
+        """Vai attēls ir pietiekami liels joslu izpildei"""
+        height, width = image.shape[:2]
+        return (self.workers > 1 and height * width >= self.min_pixels
+                and height >= 2 * self.min_band_rows)
+
+    def bands(self, height: int) -> List[Band]:
+        """Joslu kodoli (y0, y1) - divreiz vairāk nekā pavedienu, lai izlīdzinātu slodzi"""
+        count = max(1, min(self.workers * 2, height // self.min_band_rows))
+        edges = np.linspace(0, height, count + 1).astype(int)
+        return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+    def map_bands(self, image: np.ndarray, func: Callable[[np.ndarray], np.ndarray],
+                  halo: int) -> np.ndarray:
+        """
+        Izpilda rindu lokālu operāciju joslās
+
+        Args:
+            image: Ievades attēls (netiek mainīts)
+            func: Operācija, kas atgriež tāda paša izmēra uint8 attēlu
+            halo: Papildu rindas katrā joslas pusē (>= operācijas rādiuss)
+
+        Returns:
+            np.ndarray: Salikts rezultāts (func(image), ja joslas netiek izmantotas)
+        """
+        if not self.enabled_for(image):
+            return func(image)
+
+        height = image.shape[0]
+        output = np.empty_like(image)
+
+        def run(band: Band):
+            y0, y1 = band
+            top, bottom = max(0, y0 - halo), min(height, y1 + halo)
+            result = func(image[top:bottom])
+            output[y0:y1] = result[y0 - top:y1 - top]
+
+        self._run(run, self.bands(height))
+        return output
+
+    def denoise(self, image: np.ndarray, decision: DenoiseDecision) -> np.ndarray:
+        """
+        Non-local means joslās (halo = meklēšanas + šablona loga rādiuss)
+
+        Returns:
+            np.ndarray: Kā apply_denoise; decision.tiles - joslu skaits
+        """
+        if decision.variant == 'none' or not self.enabled_for(image):
+            return apply_denoise(image, decision)
+
+        start = time.perf_counter()
+        halo = decision.search_window // 2 + decision.template_window // 2
+        if decision.variant == 'color' and image.ndim == 3:
+            def func(band):
+                return cv2.fastNlMeansDenoisingColored(band, None, decision.h, decision.h,
+                                                       decision.template_window, decision.search_window)
+        else:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+            def func(band):
+                return cv2.fastNlMeansDenoising(band, None, decision.h,
+                                                decision.template_window, decision.search_window)
+
+        denoised = self.map_bands(image, func, halo)
+        decision.tiles = len(self.bands(image.shape[0]))
+        decision.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        return denoised
+
+    def adaptive_threshold(self, gray: np.ndarray, block_size: int, c: int,
+                           threshold_type: int = cv2.THRESH_BINARY) -> np.ndarray:
+        """Gaussian adaptīvais slieksnis joslās (halo = bloka rādiuss)"""
+        return self.map_bands(
+            gray,
+            lambda band: cv2.adaptiveThreshold(band, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                               threshold_type, block_size, c),
+            block_size // 2
+        )
+
+    def rotate(self, image: np.ndarray, angle: float, min_angle: Optional[float] = None) -> np.ndarray:
+        """
+        Rotācija ap centru joslās pēc izvades rindām (tāds pats rezultāts kā rotate_image)
+
+        Katra josla aprēķina savas izvades rindas ar nobīdītu inverso matricu -
+        halo nav vajadzīgs.
+        """
+        if min_angle is None:
+            min_angle = IMAGE_PREPROCESSING.get("deskew_min_angle", 0.5)
+        if abs(angle) <= min_angle:
+            return image
+
+        height, width = image.shape[:2]
+        inverse = cv2.invertAffineTransform(cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0))
+        flags = cv2.INTER_CUBIC | cv2.WARP_INVERSE_MAP
+        if not self.enabled_for(image):
+            return cv2.warpAffine(image, inverse, (width, height), flags=flags, borderMode=cv2.BORDER_REPLICATE)
+
+        output = np.empty_like(image)
+
+        def run(band: Band):
+            y0, y1 = band
+            shifted = inverse.copy()
+            shifted[:, 2] += inverse[:, 1] * y0
+            output[y0:y1] = cv2.warpAffine(image, shifted, (width, y1 - y0), flags=flags,
+                                           borderMode=cv2.BORDER_REPLICATE)
+
+        self._run(run, self.bands(height))
+        return output
+
+    def _run(self, func: Callable, items: List) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="preprocess-tile")
+        # list() - izceļ joslu izņēmumus
+        list(self._executor.map(func, items))
+
+    def shutdown(self, wait: bool = True):
+        """Aptur joslu pavedienus"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+_default_executor: Optional[TiledExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_tiled_executor() -> TiledExecutor:
+    """
+    Atgriež kopīgo joslu izpildītāju
+
+    Returns:
+        TiledExecutor: Procesa mēroga izpildītājs (viens pavedienu pool)
+    """
+    global _default_executor
+
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = TiledExecutor()
+        return _default_executor
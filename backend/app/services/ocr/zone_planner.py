@@ -0,0 +1,170 @@
+"""
+Zonu OCR plānotājs
+Pārklājošās zonas sadala nepārklājošās joslās (tile), lai katrs pikselis tiek atpazīts vienreiz
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from ..document_structure_service import BoundingBox, DocumentZone, ZoneType
+from ..spatial_index import BoxIndex
+
+_ZONE_ORDER = {zone_type: index for index, zone_type in enumerate(ZoneType)}
+
+# Šaurākā joslas daļa blakus izslēgtam apgabalam, kas vēl tiek atpazīta
+MIN_TILE_WIDTH = 16
+
+
+@dataclass
+class ZoneTile:
+    """Nepārklājoša josla un zonas, kas to aptver"""
+    bounds: BoundingBox
+    zone_types: Tuple[ZoneType, ...]
+
+
+def plan_zone_tiles(zones: Sequence[DocumentZone], binary: Optional[np.ndarray] = None,
+                    snap_ratio: float = 0.02, exclude: Sequence[BoundingBox] = ()) -> List[ZoneTile]:
+    """
+    Sadala zonas horizontālās joslās bez pārklāšanās
+
+    Joslu robežas ir visas zonu augšējās/apakšējās malas. Ja zonai ir satura
+    joslas (DocumentZone.bands), tā aptver tikai tās - tukšās joslas starp
+    tām netiek atpazītas. Blakus joslas ar vienādu zonu kopu tiek apvienotas.
+    Izslēgtie apgabali (piem. tabulas, kas tiek atpazītas pa šūnām) tiek
+    izgriezti - to rindās paliek tikai joslas daļas pa kreisi un pa labi.
+    Ja dots binārais attēls, robežas tiek pabīdītas uz tuvāko rindu ar
+    vismazāk teksta pikseļiem, lai nesagrieztu teksta rindas.
+
+    Args:
+        zones: Dokumenta zonas
+        binary: Inversais binārais lapas attēls (teksts = 255) vai None
+        snap_ratio: Robežas pabīdīšanas logs (daļa no lapas augstuma)
+        exclude: Apgabali, kas netiek iekļauti joslās
+
+    Returns:
+        List[ZoneTile]: Joslas no augšas uz leju
+    """
+    zones = [zone for zone in zones if zone.bounds.width > 0 and zone.bounds.height > 0]
+    if not zones:
+        return []
+    exclude = [box for box in exclude if box.width > 0 and box.height > 0]
+
+    # Katras zonas aptvertās joslas: satura joslas vai visa zona
+    spans = [(zone, list(zone.bands) or [zone.bounds]) for zone in zones]
+    fixed_edges = {box.y1 for box in exclude} | {box.y2 for box in exclude}
+    cuts = sorted({box.y1 for _, boxes in spans for box in boxes} | {box.y2 for _, boxes in spans for box in boxes}
+                  | fixed_edges)
+    tiles: List[ZoneTile] = []
+    # Pēdējā josla katrai (x1, x2, zonu kopa) - apvienošanai ar nākamo rindu
+    open_tiles: Dict[Tuple[int, int, Tuple[ZoneType, ...]], ZoneTile] = {}
+    for top, bottom in zip(cuts, cuts[1:]):
+        covering = [
+            (zone, box) for zone, boxes in spans for box in boxes
+            if box.y1 <= top and box.y2 >= bottom
+        ]
+        if not covering:
+            continue
+        zone_types = tuple(sorted({zone.zone_type for zone, _ in covering}, key=_ZONE_ORDER.get))
+        x1 = min(box.x1 for _, box in covering)
+        x2 = max(box.x2 for _, box in covering)
+        blocked = [box for box in exclude if box.y1 <= top and box.y2 >= bottom]
+
+        for left, right in _subtract_spans(x1, x2, blocked):
+            key = (left, right, zone_types)
+            previous = open_tiles.get(key)
+            if previous and previous.bounds.y2 == top:
+                previous.bounds = BoundingBox(left, previous.bounds.y1, right, bottom)
+            else:
+                open_tiles[key] = ZoneTile(bounds=BoundingBox(left, top, right, bottom), zone_types=zone_types)
+                tiles.append(open_tiles[key])
+
+    if binary is not None and len(tiles) > 1:
+        _snap_boundaries(tiles, binary, snap_ratio, fixed_edges)
+    return tiles
+
+
+def _subtract_spans(x1: int, x2: int, blocked: Sequence[BoundingBox]) -> List[Tuple[int, int]]:
+    """Intervāla [x1, x2) daļas ārpus izslēgtajiem apgabaliem (šauras atliekas atmet)"""
+    pieces = [(x1, x2)]
+    for box in blocked:
+        pieces = [
+            piece for left, right in pieces
+            for piece in ((left, min(right, box.x1)), (max(left, box.x2), right))
+            if piece[1] > piece[0]
+        ]
+    if not blocked:
+        return pieces
+    return [(left, right) for left, right in pieces if right - left >= MIN_TILE_WIDTH]
+
+
+def _snap_boundaries(tiles: List[ZoneTile], binary: np.ndarray, snap_ratio: float,
+                     fixed_edges: Set[int] = frozenset()):
+    """Pabīda blakus joslu kopīgās robežas uz tukšākajām rindām (izslēgto apgabalu malas paliek)"""
+    row_ink = np.count_nonzero(binary, axis=1)
+    window = max(2, int(binary.shape[0] * snap_ratio))
+
+    for upper, lower in zip(tiles, tiles[1:]):
+        cut = upper.bounds.y2
+        if lower.bounds.y1 != cut or cut in fixed_edges:
+            continue
+        low = max(upper.bounds.y1 + 1, cut - window)
+        high = min(lower.bounds.y2 - 1, cut + window, len(row_ink) - 1)
+        if low >= high:
+            continue
+        candidates = np.arange(low, high + 1)
+        ink = row_ink[low:high + 1]
+        # Vismazāk teksta; vienādos gadījumos tuvāk sākotnējai robežai
+        best = int(candidates[np.lexsort((np.abs(candidates - cut), ink))[0]])
+        upper.bounds = BoundingBox(upper.bounds.x1, upper.bounds.y1, upper.bounds.x2, best)
+        lower.bounds = BoundingBox(lower.bounds.x1, best, lower.bounds.x2, lower.bounds.y2)
+
+
+def build_word_index(words: Sequence[Dict[str, Any]]) -> BoxIndex:
+    """Telpiskais indekss vārdiem (atslēga - vārda pozīcija sarakstā)"""
+    return BoxIndex.build([
+        (word['left'], word['top'], word['left'] + word['width'], word['top'] + word['height'])
+        for word in words
+    ])
+
+
+def collect_zone_words(words: Sequence[Dict[str, Any]], bounds: BoundingBox,
+                       index: Optional[BoxIndex] = None) -> Dict[str, Any]:
+    """
+    Saliek zonas tekstu no lapas koordinātēs esošiem vārdiem
+
+    Vārds pieder zonai, ja tā centrs ir zonas robežās.
+
+    Args:
+        words: Vārdi ar 'left', 'top', 'width', 'height', 'conf' un 'tile'
+        bounds: Zonas robežas
+        index: build_word_index(words) rezultāts, ja vienus vārdus dala vairākas zonas
+
+    Returns:
+        Dict: 'text', 'confidence' (0-1), 'words'
+    """
+    if index is not None:
+        zone_words = [words[key] for key in index.query_centers(bounds)]
+    else:
+        zone_words = [
+            word for word in words
+            if bounds.x1 <= word['left'] + word['width'] / 2 < bounds.x2
+            and bounds.y1 <= word['top'] + word['height'] / 2 < bounds.y2
+        ]
+
+    lines = []
+    current_key = None
+    for word in zone_words:
+        key = (word.get('tile'), word.get('block'), word.get('par'), word.get('line'))
+        if key != current_key:
+            lines.append([])
+            current_key = key
+        lines[-1].append(word['text'])
+
+    confidences = [word['conf'] for word in zone_words]
+    return {
+        'text': '\n'.join(' '.join(line) for line in lines),
+        'confidence': (sum(confidences) / len(confidences) / 100.0) if confidences else 0.0,
+        'words': zone_words
+    }
@@ -0,0 +1,200 @@
+"""
+Dokumenta lapas attēls - dekodēts vienreiz
+Kopīgs struktūras analīzei, zonu un tabulu OCR; atvasinātās reprezentācijas tiek kešotas
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Optional, Union
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Reprezentācijas, ko var izgriezt ar crop()
+LAYERS = ('bgr', 'gray', 'binary')
+
+
+class PageImage:
+    """
+    Vienas lapas attēls ar kešotām atvasinātajām reprezentācijām
+
+    - bgr: oriģinālais dekodētais attēls (tikai lasāms)
+    - gray: grayscale, aprēķināts pirmajā pieprasījumā
+    - binary: Otsu inversais binārais attēls (teksts = 255)
+    - adaptive_binary(): inversā adaptīvā binarizācija (kešota pēc parametriem)
+    - edges: Canny malu karte ar mediānas sliekšņiem
+
+    crop() atgriež numpy skatu (view) bez kopēšanas, tāpēc reprezentācijas
+    ir atzīmētas kā tikai lasāmas - apstrādes soļiem jāstrādā ar kopiju.
+    """
+
+    def __init__(self, image: np.ndarray, source: Optional[str] = None):
+        if image is None or image.size == 0:
+            raise ValueError(f"Tukšs attēls: {source}")
+
+        self.source = source
+        self.bgr = self._freeze(image)
+        self._layers: Dict[str, np.ndarray] = {'bgr': self.bgr}
+        self._lock = threading.Lock()
+        # Atsevišķa slēdzene katrai reprezentācijai - paralēli detektori negaida
+        # viens otra aprēķinus, bet viena reprezentācija tiek aprēķināta tikai vienreiz
+        self._layer_locks: Dict[str, threading.Lock] = {}
+        self._levels: Dict[int, 'PageImage'] = {}
+
+    @classmethod
+    def load(cls, source: Union[str, bytes, np.ndarray, 'PageImage']) -> 'PageImage':
+        """
+        Izveido PageImage no ceļa, baitiem vai jau dekodēta masīva
+
+        Args:
+            source: Ceļš uz failu, kodēti attēla baiti, ndarray vai PageImage
+
+        Returns:
+            PageImage (esošs objekts tiek atgriezts bez izmaiņām)
+        """
+        if isinstance(source, PageImage):
+            return source
+        if isinstance(source, np.ndarray):
+            return cls(source)
+        if isinstance(source, (bytes, bytearray)):
+            image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError("Nevar dekodēt attēla baitus")
+            return cls(image)
+
+        image = cv2.imread(str(source))
+        if image is None:
+            raise ValueError(f"Nevar ielādēt attēlu: {source}")
+        return cls(image, source=str(source))
+
+    @classmethod
+    async def load_async(cls, source: Union[str, bytes, np.ndarray, 'PageImage']) -> 'PageImage':
+        """Dekodē attēlu pavedienā, lai nebloķētu event loop"""
+        if isinstance(source, (PageImage, np.ndarray)):
+            return cls.load(source)
+        return await asyncio.to_thread(cls.load, source)
+
+    @staticmethod
+    def _freeze(array: np.ndarray) -> np.ndarray:
+        # Tikai lasāms skats - izsaucēja masīvs paliek nemainīts
+        view = array.view()
+        view.setflags(write=False)
+        return view
+
+    @property
+    def width(self) -> int:
+        return self.bgr.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.bgr.shape[0]
+
+    @property
+    def shape(self) -> tuple:
+        return self.bgr.shape
+
+    @property
+    def gray(self) -> np.ndarray:
+        return self._layer('gray')
+
+    @property
+    def binary(self) -> np.ndarray:
+        return self._layer('binary')
+
+    @property
+    def edges(self) -> np.ndarray:
+        return self._layer('edges')
+
+    def adaptive_binary(self, block_size: int = 11, c: int = 2) -> np.ndarray:
+        """Inversā Gaussian adaptīvā binarizācija (teksts un līnijas = 255)"""
+        return self._layer(f'adaptive_{block_size}_{c}')
+
+    def _layer(self, name: str) -> np.ndarray:
+        """Atgriež kešotu reprezentāciju, aprēķinot to tikai vienreiz"""
+        layer = self._layers.get(name)
+        if layer is not None:
+            return layer
+
+        with self._lock:
+            lock = self._layer_locks.setdefault(name, threading.Lock())
+        with lock:
+            layer = self._layers.get(name)
+            if layer is None:
+                layer = self._freeze(self._compute(name))
+                self._layers[name] = layer
+        return layer
+
+    def _compute(self, name: str) -> np.ndarray:
+        if name == 'gray':
+            if self.bgr.ndim == 2:
+                return self.bgr
+            return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        if name == 'binary':
+            _, binary = cv2.threshold(self.gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+            return binary
+        if name == 'edges':
+            kernel_size = max(3, min(7, self.height // 200)) | 1
+            blurred = cv2.GaussianBlur(self.gray, (kernel_size, kernel_size), 0)
+            median_val = np.median(blurred)
+            return cv2.Canny(blurred, int(max(0, 0.7 * median_val)), int(min(255, 1.3 * median_val)))
+        if name.startswith('adaptive_'):
+            block_size, c = (int(value) for value in name.split('_')[1:])
+            return cv2.adaptiveThreshold(self.gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY_INV, block_size, c)
+        raise ValueError(f"Nezināma reprezentācija: {name}")
+
+    def pyramid_level(self, width: int) -> 'PageImage':
+        """
+        Samazināta lapas kopija (INTER_AREA), kešota pēc platuma
+
+        Args:
+            width: Mērķa platums pikseļos; augstums saglabā proporciju
+
+        Returns:
+            PageImage (pati lapa, ja width nav mazāks par lapas platumu)
+        """
+        if width >= self.width:
+            return self
+        level = self._levels.get(width)
+        if level is not None:
+            return level
+
+        with self._lock:
+            lock = self._layer_locks.setdefault(f'level_{width}', threading.Lock())
+        with lock:
+            level = self._levels.get(width)
+            if level is None:
+                height = max(1, round(self.height * width / self.width))
+                resized = cv2.resize(self.bgr, (width, height), interpolation=cv2.INTER_AREA)
+                level = PageImage(resized, source=self.source)
+                self._levels[width] = level
+        return level
+
+    def crop(self, bounds: Any, padding: int = 0, layer: str = 'bgr') -> np.ndarray:
+        """
+        Izgriež apgabalu kā skatu (bez kopēšanas)
+
+        Args:
+            bounds: Objekts ar x1, y1, x2, y2 (piem., BoundingBox)
+            padding: Papildu pikseļi katrā pusē
+            layer: 'bgr', 'gray' vai 'binary'
+
+        Returns:
+            np.ndarray skats; koordinātes ierobežotas ar attēla izmēru
+        """
+        if layer not in LAYERS:
+            raise ValueError(f"Nezināma reprezentācija: {layer}")
+
+        source = self._layer(layer)
+        x1 = min(max(0, int(bounds.x1) - padding), self.width)
+        y1 = min(max(0, int(bounds.y1) - padding), self.height)
+        x2 = min(max(x1, int(bounds.x2) + padding), self.width)
+        y2 = min(max(y1, int(bounds.y2) + padding), self.height)
+        return source[y1:y2, x1:x2]
+
+    def cached_layers(self) -> list:
+        """Jau aprēķinātās reprezentācijas (diagnostikai un testiem)"""
+        return list(self._layers.keys())
@@ -0,0 +1,144 @@
+"""
+Aplikācijas servisu konteiners
+Inicializē OCR, struktūras analīzes un ekstraktēšanas servisus vienreiz startēšanas laikā
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.services.ocr_service import get_ocr_service
+from app.services.extraction_service import ExtractionService
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Aplikācijas mūža servisu konteiners
+
+    Satur vienu OCRService (ar tā StructureAwareOCR un DocumentStructureAnalyzer)
+    un vienu ekstraktēšanas servisu, lai pieprasījumiem nav jāmaksā setup izmaksas.
+    """
+
+    def __init__(self):
+        self.ocr_service = None
+        self.structure_analyzer = None
+        self.extraction_service = None
+        self.use_hybrid = False
+
+        # Gatavības stāvoklis: not_initialized, initializing, ready, degraded, failed
+        self.state = "not_initialized"
+        self.errors = []
+        self.initialized_at: Optional[datetime] = None
+        self.init_time_ms = 0
+
+        self._init_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def ready(self) -> bool:
+        """Vai OCR un ekstraktēšana ir pilnībā gatavas darbam"""
+        return self.state == "ready"
+
+    @property
+    def initialized(self) -> bool:
+        """Vai servisi ir izveidoti (arī ja OCR nav pilnībā konfigurēts)"""
+        return self.state in ("ready", "degraded")
+
+    async def initialize(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Inicializē visus servisus (vienreiz aplikācijas dzīves laikā)
+
+        Args:
+            force: Inicializēt atkārtoti (piem., pēc Tesseract instalēšanas)
+
+        Returns:
+            Dict: Gatavības statuss
+        """
+        if self._init_lock is None:
+            self._init_lock = asyncio.Lock()
+
+        async with self._init_lock:
+            if self.initialized and not force:
+                return self.get_status()
+
+            self.state = "initializing"
+            self.errors = []
+            start_time = time.time()
+
+            try:
+                # 1. OCR serviss (Tesseract setup, StructureAwareOCR, DocumentStructureAnalyzer)
+                if force and self.ocr_service is not None:
+                    await self.ocr_service.initialize()
+                else:
+                    self.ocr_service = await get_ocr_service()
+                self.structure_analyzer = self.ocr_service.structure_aware_ocr.structure_analyzer
+
+                # 2. Ekstraktēšanas serviss
+                self.extraction_service, self.use_hybrid = self._create_extraction_service()
+
+                # 3. Iesilda OCR worker pool, lai pirmais pieprasījums negaida procesu startu
+                if self.ocr_service.system_ready:
+                    await self.ocr_service.ocr_engine.warm_up()
+                    self.state = "ready"
+                else:
+                    self.errors.extend(self.ocr_service.setup_errors)
+                    self.state = "degraded"
+
+            except Exception as e:
+                logger.error(f"Kļūda inicializējot servisu konteineru: {e}")
+                self.errors.append(str(e))
+                self.state = "failed"
+
+            self.init_time_ms = int((time.time() - start_time) * 1000)
+            self.initialized_at = datetime.utcnow()
+
+            logger.info(f"Servisu konteiners inicializēts: {self.state} ({self.init_time_ms}ms)")
+            return self.get_status()
+
+    def _create_extraction_service(self):
+        """Izveido ekstraktēšanas servisu (default: hybrid, fallback: regex)"""
+        try:
+            from app.services.hybrid_service import hybrid_service
+            logger.info("Izmanto hibrido ekstraktēšanas servisu (regex + NER)")
+            return hybrid_service, True
+        except Exception as e:
+            logger.warning(f"Hibridais serviss nav pieejams, izmanto regex: {e}")
+            return ExtractionService(), False
+
+    def get_status(self) -> Dict[str, Any]:
+        """Atgriež gatavības informāciju (readiness endpoint vajadzībām)"""
+        status = {
+            "state": self.state,
+            "ready": self.ready,
+            "errors": list(self.errors),
+            "initialized_at": self.initialized_at.isoformat() if self.initialized_at else None,
+            "init_time_ms": self.init_time_ms,
+            "extraction_service": "hybrid" if self.use_hybrid else "regex",
+        }
+        if self.ocr_service is not None:
+            status["ocr"] = self.ocr_service.get_system_status()
+        return status
+
+
+# Aplikācijas mēroga konteiners
+_container = ServiceContainer()
+
+
+def get_service_container() -> ServiceContainer:
+    """Atgriež aplikācijas servisu konteineru (bez inicializācijas)"""
+    return _container
+
+
+async def get_services() -> ServiceContainer:
+    """
+    Atgriež inicializētu servisu konteineru
+
+    Parasti inicializācija notiek FastAPI startup hook; ja tā nav notikusi
+    (skripti, testi), konteiners tiek inicializēts pirmajā izsaukumā.
+    """
+    if not _container.initialized:
+        await _container.initialize()
+    return _container
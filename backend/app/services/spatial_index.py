@@ -0,0 +1,135 @@
+"""
+Telpiskais indekss taisnstūriem
+Vienmērīgs režģis (grid hash) pārklāšanās vaicājumiem bez pāru salīdzināšanas katrs ar katru
+"""
+
+from collections import defaultdict
+from statistics import median
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+Box = Tuple[int, int, int, int]
+
+
+def box_tuple(box: Any) -> Box:
+    """Objekts ar x1, y1, x2, y2 (piem., BoundingBox) vai tuple -> (x1, y1, x2, y2)"""
+    if isinstance(box, tuple):
+        return box
+    return box.x1, box.y1, box.x2, box.y2
+
+
+class BoxIndex:
+    """
+    Taisnstūru indekss uz vienmērīga režģa
+
+    Katrs taisnstūris tiek reģistrēts visās režģa šūnās, ko tas aptver;
+    vaicājums pārbauda tikai šūnas, kuras aptver vaicājuma taisnstūris.
+    Režģa izmērs pēc noklusējuma ir ievietoto taisnstūru malu mediāna,
+    tāpēc vaicājums aptver dažas šūnas neatkarīgi no lapas blīvuma.
+    """
+
+    def __init__(self, cell_size: int = 64):
+        self.cell_size = max(1, int(cell_size))
+        self._grid: Dict[Tuple[int, int], Set[Hashable]] = defaultdict(set)
+        self._boxes: Dict[Hashable, Box] = {}
+        self._order: Dict[Hashable, int] = {}
+        self._counter = 0
+
+    @classmethod
+    def build(cls, boxes: Sequence[Any], cell_size: Optional[int] = None) -> 'BoxIndex':
+        """
+        Izveido indeksu, kur atslēga ir taisnstūra pozīcija sarakstā
+
+        Args:
+            boxes: BoundingBox objekti vai (x1, y1, x2, y2)
+            cell_size: Režģa šūnas izmērs; None - malu mediāna
+
+        Returns:
+            BoxIndex
+        """
+        tuples = [box_tuple(box) for box in boxes]
+        if cell_size is None:
+            sides = [max(x2 - x1, y2 - y1) for x1, y1, x2, y2 in tuples]
+            cell_size = int(median(sides)) if sides else 64
+        index = cls(cell_size)
+        for key, box in enumerate(tuples):
+            index.insert(key, box)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._boxes)
+
+    def _cells(self, box: Box) -> Iterable[Tuple[int, int]]:
+        x1, y1, x2, y2 = box
+        size = self.cell_size
+        # Pusatvērts [x1, x2) - taisnstūris, kas beidzas uz robežas, neaizņem nākamo šūnu
+        for gx in range(x1 // size, max(x1, x2 - 1) // size + 1):
+            for gy in range(y1 // size, max(y1, y2 - 1) // size + 1):
+                yield gx, gy
+
+    def insert(self, key: Hashable, box: Any):
+        """Pievieno taisnstūri ar doto atslēgu"""
+        box = box_tuple(box)
+        if key in self._boxes:
+            self.remove(key)
+        self._boxes[key] = box
+        self._order[key] = self._counter
+        self._counter += 1
+        for cell in self._cells(box):
+            self._grid[cell].add(key)
+
+    def remove(self, key: Hashable):
+        """Izņem taisnstūri (nezināma atslēga tiek ignorēta)"""
+        box = self._boxes.pop(key, None)
+        if box is None:
+            return
+        del self._order[key]
+        for cell in self._cells(box):
+            bucket = self._grid.get(cell)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._grid[cell]
+
+    def box(self, key: Hashable) -> Box:
+        return self._boxes[key]
+
+    def query(self, box: Any) -> List[Hashable]:
+        """
+        Atslēgas taisnstūriem, kas pārklājas ar doto (pozitīvs krustojuma laukums)
+
+        Returns:
+            List: atslēgas ievietošanas secībā
+        """
+        x1, y1, x2, y2 = box_tuple(box)
+        hits = []
+        for key in self._candidates((x1, y1, x2, y2)):
+            bx1, by1, bx2, by2 = self._boxes[key]
+            if bx1 < x2 and x1 < bx2 and by1 < y2 and y1 < by2:
+                hits.append(key)
+        return sorted(hits, key=self._order.__getitem__)
+
+    def query_point(self, x: float, y: float) -> List[Hashable]:
+        """Atslēgas taisnstūriem, kas satur punktu (x1 <= x < x2, y1 <= y < y2)"""
+        cell = (int(x) // self.cell_size, int(y) // self.cell_size)
+        hits = []
+        for key in self._grid.get(cell, ()):
+            bx1, by1, bx2, by2 = self._boxes[key]
+            if bx1 <= x < bx2 and by1 <= y < by2:
+                hits.append(key)
+        return sorted(hits, key=self._order.__getitem__)
+
+    def query_centers(self, box: Any) -> List[Hashable]:
+        """Atslēgas taisnstūriem, kuru centrs ir dotajā taisnstūrī (x1 <= cx < x2, y1 <= cy < y2)"""
+        x1, y1, x2, y2 = box_tuple(box)
+        hits = []
+        for key in self._candidates((x1, y1, x2, y2)):
+            bx1, by1, bx2, by2 = self._boxes[key]
+            if x1 <= (bx1 + bx2) / 2 < x2 and y1 <= (by1 + by2) / 2 < y2:
+                hits.append(key)
+        return sorted(hits, key=self._order.__getitem__)
+
+    def _candidates(self, box: Box) -> Set[Hashable]:
+        candidates: Set[Hashable] = set()
+        for cell in self._cells(box):
+            candidates.update(self._grid.get(cell, ()))
+        return candidates
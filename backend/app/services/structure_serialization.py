@@ -0,0 +1,97 @@
+"""
+Struktūras analīzes rezultātu serializācija
+Tieša JSON serializācija ar NumPy skalāru atbalstu (orjson, ja pieejams)
+"""
+
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict
+
+import numpy as np
+
+from .document_structure_service import BoxArray, DocumentStructure
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+if ORJSON_AVAILABLE:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def json_default(obj: Any) -> Any:
+    """
+    json/orjson `default` - tipi, ko serializētājs neatbalsta pats
+
+    Izsaukts tikai neatbalstītiem objektiem, tāpēc aizvieto rekursīvo
+    convert_int64 apstaigāšanu: parastie dict/list netiek kopēti.
+    """
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, BoxArray):
+        return obj.to_dicts()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if hasattr(obj, 'to_dict'):
+        return obj.to_dict()
+    if hasattr(obj, 'isoformat'):  # pd.Timestamp, date
+        return obj.isoformat()
+    raise TypeError(f"Objekts {type(obj).__name__} nav JSON serializējams")
+
+
+def dumps(obj: Any) -> str:
+    """
+    Serializē uz JSON virkni
+
+    Args:
+        obj: dict/list ar Python, NumPy vai struktūras objektiem
+
+    Returns:
+        str: JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=json_default, option=_ORJSON_OPTIONS).decode('utf-8')
+    return json.dumps(obj, default=json_default)
+
+
+def structure_summary(structure: DocumentStructure) -> Dict[str, Any]:
+    """
+    Kompakts struktūras kopsavilkums API atbildēm un datubāzes laukiem
+
+    Returns:
+        Dict: izmēri, zonas, tabulas (bez šūnām, ar šūnu skaitu), teksta bloki un confidence
+    """
+    return {
+        'image_width': int(structure.image_width),
+        'image_height': int(structure.image_height),
+        'zones': [
+            {
+                'type': zone.zone_type.value,
+                'bounds': zone.bounds.to_dict(),
+                'confidence': float(zone.confidence)
+            } for zone in structure.zones
+        ],
+        'tables': [
+            {
+                'bounds': table.bounds.to_dict(),
+                'confidence': float(table.confidence),
+                'cell_count': len(table.cells)
+            } for table in structure.tables
+        ],
+        'text_blocks': BoxArray.from_boxes(structure.text_blocks).to_dicts(),
+        'confidence': float(structure.confidence),
+        'processing_time_ms': structure.processing_time_ms
+    }
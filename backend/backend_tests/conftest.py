@@ -0,0 +1,43 @@
+"""
+Kopīgās testu fiksācijas
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+
+def make_synthetic_page(size=(1200, 900), noise_sigma=0.0, angle=0.0, channels=3, rows=None, background=240):
+    """
+    Sintētiska rēķina lapa: gaišs fons ar "Prece {row} 12,50 EUR" rindām
+
+    Args:
+        size: (augstums, platums)
+        noise_sigma: Gausa trokšņa standartnovirze (0 - bez trokšņa)
+        angle: Lapas pagrieziens grādos (pirms trokšņa)
+        channels: 3 - BGR, 1 - pelēktoņu
+        rows: Teksta rindu skaits (None - līdz lapas apakšai, ik pa 120 pikseļiem)
+        background: Fona spilgtums
+
+    Returns:
+        np.ndarray: uint8 attēls
+    """
+    height, width = size
+    page = np.full(size, background, dtype=np.uint8)
+    if rows is None:
+        rows = max(1, height // 120 - 1)
+    for row in range(rows):
+        cv2.putText(page, f"Prece {row} 12,50 EUR", (60, 120 + row * 120), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 20, 2)
+    if angle:
+        matrix = cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0)
+        page = cv2.warpAffine(page, matrix, (width, height), borderValue=background)
+    if noise_sigma:
+        noise = np.random.default_rng(0).normal(0, noise_sigma, size)
+        page = np.clip(page + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(page, cv2.COLOR_GRAY2BGR) if channels == 3 else page
+
+
+@pytest.fixture
+def synthetic_page():
+    """make_synthetic_page kā fiksācija (izsauc ar vajadzīgajiem parametriem)"""
+    return make_synthetic_page
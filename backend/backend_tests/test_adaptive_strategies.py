@@ -0,0 +1,219 @@
+"""
+Tests for adaptive OCR strategy execution - race un sequential režīmi
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ocr.ocr_main import OCRService
+from app.services.ocr.strategy_predictor import StrategyPredictor
+
+
+def make_fake_extract(outcomes, calls):
+    """
+    Izveido extract_text_from_image aizvietotāju
+
+    outcomes: {(preprocess, invoice_mode): (delay_seconds, confidence)}
+    """
+    async def fake_extract(image_path, preprocess=True, clean_text=True, invoice_mode=True, graph=None):
+        key = (preprocess, invoice_mode)
+        calls.append(key)
+        delay, confidence = outcomes[key]
+        await asyncio.sleep(delay)
+        return {'success': confidence > 0, 'text': f"text-{key}", 'confidence_score': confidence}
+    return fake_extract
+
+
+@pytest.fixture
+def ocr_service(tmp_path):
+    service = OCRService()
+    service.strategy_predictor = StrategyPredictor(model_path=str(tmp_path / "history.json"), explore_rate=0)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_race_returns_first_passing_strategy(ocr_service):
+    """Ātrākā stratēģija virs sliekšņa uzvar, pārējās tiek atceltas"""
+    calls = []
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0.5, 0.9),   # no_preprocessing - lēna
+        (True, False): (0.01, 0.7),  # light_preprocessing - ātra
+        (True, True): (0.5, 0.8),    # aggressive_preprocessing - lēna
+    }, calls)
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='race')
+
+    assert result['strategy_used'] == 'light_preprocessing'
+    assert len(calls) == 3
+    adaptive = result['adaptive']
+    assert adaptive['mode'] == 'race'
+    assert adaptive['winner'] == 'light_preprocessing'
+    assert adaptive['strategies']['no_preprocessing']['status'] == 'cancelled'
+    assert adaptive['strategies']['aggressive_preprocessing']['status'] == 'cancelled'
+    assert adaptive['wall_time_ms'] < 400
+    # no_preprocessing tika atcelta - secīgās izpildes laiks nav zināms
+    assert adaptive['sequential_time_ms'] is None
+    assert adaptive['cancelled'] == ['no_preprocessing', 'aggressive_preprocessing']
+
+
+@pytest.mark.asyncio
+async def test_race_falls_back_to_best_result(ocr_service):
+    """Ja neviena stratēģija nepārsniedz slieksni, atgriež labāko"""
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0.01, 0.3),
+        (True, False): (0.02, 0.35),
+        (True, True): (0.03, 0.2),
+    }, [])
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='race')
+
+    assert result['strategy_used'] == 'light_preprocessing'
+    assert result['adaptive']['time_saved_ms'] >= 0
+
+
+@pytest.mark.asyncio
+async def test_race_sequential_cost_stops_at_first_passing_in_priority_order(ocr_service):
+    """Secīgā izpilde apstātos pie no_preprocessing - pārējo stratēģiju laiks netiek skaitīts"""
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0.02, 0.9),
+        (True, False): (0.01, 0.2),
+        (True, True): (0.01, 0.2),
+    }, [])
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='race')
+
+    adaptive = result['adaptive']
+    assert result['strategy_used'] == 'no_preprocessing'
+    assert adaptive['sequential_time_ms'] == adaptive['strategies']['no_preprocessing']['duration_ms']
+    assert adaptive['time_saved_ms'] == max(0, adaptive['sequential_time_ms'] - adaptive['wall_time_ms'])
+
+
+@pytest.mark.asyncio
+async def test_race_all_failed(ocr_service):
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0, 0),
+        (True, False): (0, 0),
+        (True, True): (0, 0),
+    }, [])
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='race')
+
+    assert result['strategy_used'] == 'all_failed'
+    assert result['success'] is False
+
+
+@pytest.mark.asyncio
+async def test_sequential_stops_at_first_passing_strategy(ocr_service):
+    """Sequential režīms saglabā iepriekšējo uzvedību"""
+    calls = []
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0, 0.5),    # zem 0.6 sliekšņa
+        (True, False): (0, 0.45),   # virs 0.4 sliekšņa
+        (True, True): (0, 0.9),
+    }, calls)
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='sequential')
+
+    assert result['strategy_used'] == 'light_preprocessing'
+    assert calls == [(False, True), (True, False)]
+    assert result['adaptive']['mode'] == 'sequential'
+    assert result['adaptive']['time_saved_ms'] == 0
+
+
+@pytest.mark.asyncio
+async def test_predicted_strategy_skips_other_passes(ocr_service):
+    """Ja prognozētā stratēģija izdodas, pārējās netiek palaistas"""
+    calls = []
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0, 0.9),
+        (True, False): (0, 0.9),
+        (True, True): (0, 0.8),
+    }, calls)
+    for _ in range(3):
+        ocr_service.strategy_predictor.learn_supplier("SIA Piegādātājs", 'aggressive_preprocessing')
+
+    result = await ocr_service.extract_text_adaptive(
+        "invoice.png", mode='race', supplier_hint="SIA  piegādātājs"
+    )
+
+    assert calls == [(True, True)]
+    assert result['strategy_used'] == 'aggressive_preprocessing'
+    assert result['adaptive']['prediction']['source'] == 'supplier_history'
+    assert result['adaptive']['shortcut'] is True
+    assert ocr_service.strategy_predictor.get_metrics()['hit_rate'] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_failed_prediction_falls_back_to_remaining(ocr_service):
+    calls = []
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0, 0.9),
+        (True, False): (0, 0.5),
+        (True, True): (0, 0.1),
+    }, calls)
+    for _ in range(3):
+        ocr_service.strategy_predictor.learn_supplier("SIA Piegādātājs", 'aggressive_preprocessing')
+
+    result = await ocr_service.extract_text_adaptive(
+        "invoice.png", mode='sequential', supplier_hint="SIA Piegādātājs"
+    )
+
+    assert calls == [(True, True), (False, True)]
+    assert result['strategy_used'] == 'no_preprocessing'
+    assert result['adaptive']['prediction']['hit'] is False
+    assert result['adaptive']['shortcut'] is False
+    assert ocr_service.strategy_predictor.get_metrics()['misses'] == 1
+
+
+@pytest.mark.asyncio
+async def test_explore_prediction_runs_without_shortcut(ocr_service):
+    """Izpētes prognoze netiek izmantota kā īsceļš; rezultāts papildina grupu vēsturi"""
+    calls = []
+    ocr_service.extract_text_from_image = make_fake_extract({
+        (False, True): (0, 0.9),
+        (True, False): (0, 0.9),
+        (True, True): (0, 0.9),
+    }, calls)
+    predictor = ocr_service.strategy_predictor
+    prediction = {'strategy': 'aggressive_preprocessing', 'source': 'image_stats_heuristic',
+                  'supplier': None, 'stats': None, 'bucket': 'c:low', 'explore': True}
+    predictor.predict = lambda image_path, supplier_hint=None, skew_angle=None: dict(prediction)
+
+    result = await ocr_service.extract_text_adaptive("invoice.png", mode='sequential')
+
+    assert calls == [(False, True)]
+    assert result['strategy_used'] == 'no_preprocessing'
+    assert result['adaptive']['prediction']['explore'] is True
+    assert result['adaptive']['shortcut'] is False
+    assert dict(predictor.bucket_history['c:low']) == {'no_preprocessing': 1}
+
+    # Bez izpētes prognozētās stratēģijas uzvara grupu vēsturi nemaina
+    prediction['explore'] = False
+    await ocr_service.extract_text_adaptive("invoice.png", mode='sequential')
+    assert calls[-1] == (True, True)
+    assert dict(predictor.bucket_history['c:low']) == {'no_preprocessing': 1}
+    assert predictor.get_metrics()['explored'] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_on_same_file_keep_own_graph(ocr_service):
+    """Katrs izsaukums nodod savu dokumenta grafu stratēģijām (ar savu slīpumu)"""
+    seen = []
+
+    async def fake_extract(image_path, preprocess=True, clean_text=True, invoice_mode=True, graph=None):
+        seen.append(graph)
+        await asyncio.sleep(0.01)
+        return {'success': True, 'text': 'text', 'confidence_score': 0.5}
+
+    ocr_service.extract_text_from_image = fake_extract
+    ocr_service.strategy_predictor.predict = lambda image_path, supplier_hint=None, skew_angle=None: None
+
+    await asyncio.gather(*[
+        ocr_service.extract_text_adaptive("invoice.png", mode='race', skew_angle=angle)
+        for angle in (1.5, -2.0)
+    ])
+
+    graphs = {id(graph): graph for graph in seen}
+    assert len(seen) == 6 and len(graphs) == 2
+    assert sorted(graph.metadata['skew']['angle'] for graph in graphs.values()) == [-2.0, 1.5]
@@ -21,7 +21,8 @@ try:
         TableCell,
         TableRegion,
         DocumentZone,
-        DocumentStructure
+        DocumentStructure,
+        BoxArray
     )
     print("✅ Visi document structure servisa objekti veiksmīgi importēti")
 except ImportError as e:
@@ -178,7 +179,10 @@ class TestDocumentStructureAnalyzer:
         zone_types = [zone.type for zone in zones]
         assert "header" in zone_types, "Jāatpazīst header zona"
         assert "body" in zone_types, "Jāatpazīst body zona"
-        assert "footer" in zone_types, "Jāatpazīst footer zona"
+        # Lapas apakšdaļa (zem tabulas, y > 250) ir tukša - footer zona netiek veidota
+        assert "footer" not in zone_types, "Tukšai joslai nav jāveido zona"
+        assert all(zone.bounds.y2 <= 260 for zone in zones)
+        assert all(zone.bands for zone in zones), "Zonām jābūt satura joslām"
         
         # Pārbaudīt confidence vērtības
         for zone in zones:
@@ -269,6 +273,44 @@ class TestDocumentStructureAnalyzer:
         assert len(merged) == 2, f"Sagaidītas 2 apvienotas līnijas, bet ir {len(merged)}"
         print("✅ Paralēlo līniju apvienošana darbojas korekti")
     
+    def test_merge_parallel_lines_matches_sequential_grouping(self, analyzer):
+        """Testa vektorizētās apvienošanas sakritību ar secīgo grupēšanu"""
+        rng = np.random.default_rng(5)
+        y = np.sort(rng.integers(0, 3000, 400))
+        x1 = rng.integers(0, 500, 400)
+        lines = np.stack([x1, y, x1 + rng.integers(50, 2000, 400), y + rng.integers(-3, 4, 400)], axis=1)
+
+        # Atsauce: secīga grupēšana ar attālumu līdz iepriekšējai līnijai
+        reference, group = [], [lines[0]]
+        for line in lines[1:]:
+            if abs((line[1] + line[3]) // 2 - (group[-1][1] + group[-1][3]) // 2) <= 15:
+                group.append(line)
+                continue
+            reference.append(group)
+            group = [line]
+        reference.append(group)
+        expected = [[min(min(l[0], l[2]) for l in g), sum(l[1] for l in g) // len(g),
+                     max(max(l[0], l[2]) for l in g), sum(l[3] for l in g) // len(g)] for g in reference]
+
+        merged = analyzer._merge_parallel_lines(lines, True)
+
+        assert merged.tolist() == expected
+
+    def test_text_blocks_returned_as_box_array(self, analyzer, test_image):
+        """Testa kompakto teksta bloku rezultātu un tā serializāciju"""
+        blocks = analyzer._detect_text_blocks_sync(test_image)
+
+        assert isinstance(blocks, BoxArray)
+        assert blocks.array.shape == (len(blocks), 4) and len(blocks) > 0
+        assert isinstance(blocks[0], BoundingBox) and isinstance(blocks[0].x1, int)
+        assert all(block.width >= 10 and block.height >= 10 for block in blocks)
+        assert blocks[:1] == [blocks[0]]
+
+        structure = DocumentStructure(image_width=800, image_height=600, zones=[], tables=[], text_blocks=blocks)
+        serialized = json.loads(json.dumps(structure.to_dict()))
+        assert serialized["text_blocks"][0] == {"x1": blocks[0].x1, "y1": blocks[0].y1,
+                                                "x2": blocks[0].x2, "y2": blocks[0].y2}
+    
     def test_bbox_overlap_calculation(self, analyzer):
         """Testa bounding box pārklāšanās aprēķinu"""
         bbox1 = BoundingBox(10, 10, 100, 100)
@@ -314,6 +356,119 @@ class TestDocumentStructureAnalyzer:
         
         print("✅ Tabulu kvalitātes filtrēšana darbojas korekti")
 
+    @pytest.mark.asyncio
+    async def test_detector_timings_reported(self, analyzer, test_image):
+        """Testa detektoru laiku atskaiti"""
+        structure = await analyzer.analyze_document(test_image)
+
+        assert set(structure.detector_timings_ms) == {
+            'tables_morphological', 'tables_hough', 'tables_contour', 'table_merge', 'text_blocks', 'zones'
+        }
+        assert all(value >= 0 for value in structure.detector_timings_ms.values())
+        assert structure.to_dict()['detector_timings_ms'] == structure.detector_timings_ms
+
+    @pytest.mark.asyncio
+    async def test_detectors_share_page_features(self, analyzer, test_image):
+        """Testa, ka visi detektori izmanto vienu grayscale un binarizāciju"""
+        from app.services.page_image import PageImage
+
+        page = PageImage.load(test_image)
+        with patch('app.services.page_image.cv2.cvtColor', wraps=cv2.cvtColor) as cvt, \
+                patch('app.services.page_image.cv2.adaptiveThreshold', wraps=cv2.adaptiveThreshold) as adaptive:
+            structure = await analyzer.analyze_document(page)
+
+        assert len(structure.tables) > 0
+        assert cvt.call_count == 1
+        # Pilnas lapas binarizācijas: morfologiskā (15, 10) un contour (11, 2); pārējās ir šūnu izgriezumi
+        full_page = [c.args[4:] for c in adaptive.call_args_list if c.args[0].shape == page.gray.shape]
+        assert sorted(full_page) == [(11, 2), (15, 10)]
+        assert {'gray', 'binary', 'edges', 'adaptive_15_10', 'adaptive_11_2'} <= set(page.cached_layers())
+
+    @pytest.mark.asyncio
+    async def test_downscaled_analysis_maps_back_to_full_resolution(self, analyzer, test_image):
+        """Testa analīzi samazinātā izšķirtspējā ar koordinātu pārrēķinu"""
+        from app.services.page_image import PageImage
+
+        page = PageImage(cv2.resize(test_image, None, fx=3, fy=3, interpolation=cv2.INTER_NEAREST))
+        full = await analyzer.analyze_document(page, analysis_width=0)
+        reduced = await analyzer.analyze_document(page, analysis_width=800)
+
+        assert full.analysis_scale == 1.0
+        assert reduced.analysis_scale == 3.0
+        assert (reduced.image_width, reduced.image_height) == (page.width, page.height)
+        assert {'downscale', 'rescale'} <= set(reduced.detector_timings_ms)
+
+        # Lielākā tabula atrasta abos ceļos ar gandrīz vienādām robežām
+        full_table = max(full.tables, key=lambda table: table.bounds.area)
+        reduced_table = max(reduced.tables, key=lambda table: table.bounds.area)
+        assert analyzer._calculate_bbox_overlap(full_table.bounds, reduced_table.bounds) > 0.95
+        # Šūnas precizētas pilnā izšķirtspējā - tāds pats režģis kā pilnās izšķirtspējas ceļā
+        assert reduced_table.cells
+        assert [(cell.bounds, cell.row_index, cell.column_index) for cell in reduced_table.cells] == \
+            [(cell.bounds, cell.row_index, cell.column_index) for cell in full_table.cells]
+
+    def test_grid_cells_from_line_masks(self, analyzer):
+        """Testa šūnu režģa rekonstrukciju no līniju maskām, ieskaitot apvienotas šūnas"""
+        image = np.full((400, 700, 3), 255, dtype=np.uint8)
+        for y in (50, 120, 190, 260, 330):
+            cv2.line(image, (50, y), (650, y), (0, 0, 0), 2)
+        for x in (50, 250, 450, 650):
+            cv2.line(image, (x, 50), (x, 330), (0, 0, 0), 2)
+        # Pirmās rindas virsraksts pāri 2. un 3. kolonnai - atdalītājs tikai no 120
+        cv2.line(image, (450, 51), (450, 119), (255, 255, 255), 3)
+
+        tables = analyzer._detect_tables_morphological_sync(image)
+        table = max(tables, key=lambda table: table.bounds.area)
+
+        assert (table.rows, table.columns) == (4, 3)
+        assert [(cell.row_index, cell.column_index) for cell in table.cells[:4]] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+        assert len(table.cells) == 11
+        # Šūnas lapas koordinātēs, nepārklājas un neietver līnijas
+        header = table.cells[1]
+        assert (header.bounds.x1, header.bounds.x2) == (252, 649)
+        assert all(cell.bounds.y1 >= 52 and cell.bounds.y2 <= 329 for cell in table.cells)
+        assert all(analyzer._intersection_area(a.bounds, b.bounds) == 0
+                   for i, a in enumerate(table.cells) for b in table.cells[i + 1:])
+
+    def test_grid_adds_missing_outer_borders(self, analyzer):
+        """Testa tabulu bez ārējām vertikālajām malām"""
+        horizontal = np.zeros((100, 300), np.uint8)
+        vertical = np.zeros((100, 300), np.uint8)
+        horizontal[[0, 1, 50, 51, 98, 99], :] = 255
+        vertical[:, 149:151] = 255
+
+        cells = analyzer._extract_grid_cells(horizontal, vertical, origin=(10, 20))
+
+        assert [(cell.row_index, cell.column_index) for cell in cells] == [(0, 0), (0, 1), (1, 0), (1, 1)]
+        assert cells[0].bounds == BoundingBox(10, 22, 159, 70)
+        assert cells[-1].bounds == BoundingBox(161, 72, 310, 118)
+
+    @pytest.mark.asyncio
+    async def test_detectors_run_concurrently_in_threads(self, analyzer, test_image):
+        """Testa, ka detektori darbojas paralēli pavedienos, nevis event loop"""
+        import threading
+        import time
+
+        threads = []
+
+        def slow_detector(image):
+            threads.append(threading.current_thread())
+            time.sleep(0.1)
+            return []
+
+        analyzer._detect_tables_morphological_sync = slow_detector
+        analyzer._detect_tables_hough_sync = slow_detector
+        analyzer._detect_tables_contour_sync = slow_detector
+        analyzer._detect_text_blocks_sync = slow_detector
+
+        start = time.perf_counter()
+        await analyzer.analyze_document(test_image)
+        elapsed = time.perf_counter() - start
+
+        assert len(threads) == 4
+        assert threading.main_thread() not in threads
+        assert elapsed < 0.3, f"Detektori izpildījās secīgi: {elapsed:.2f}s"
+
 
 class TestInvoiceModelIntegration:
     """Testi Invoice modeļa integrācijai ar struktūras analīzi"""
@@ -0,0 +1,122 @@
+"""
+Tests for in-memory OCR attēlu pipeline (bez temp PNG failiem)
+"""
+
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr.image_preprocessor import ImagePreprocessor, gamma_lut, load_image
+from app.services.ocr.ocr_main import OCRService
+from app.services.ocr.pdf_processor import PDFProcessor
+
+
+def test_load_image_from_path_bytes_and_array(tmp_path, synthetic_page):
+    page = synthetic_page(size=(700, 900), rows=1, background=250)
+    path = tmp_path / "page.png"
+    cv2.imwrite(str(path), page)
+
+    assert load_image(page) is page
+    assert load_image(str(path)).shape == page.shape
+    assert load_image(path.read_bytes()).shape == page.shape
+    with pytest.raises(ValueError):
+        load_image(str(tmp_path / "missing.png"))
+
+
+def test_preprocess_arrays_do_not_touch_disk(tmp_path, monkeypatch, synthetic_page):
+    monkeypatch.chdir(tmp_path)
+    preprocessor = ImagePreprocessor()
+    page = synthetic_page(size=(700, 900), rows=1, background=250)
+
+    invoice = preprocessor.preprocess_invoice_array(page, name="page")
+    general = preprocessor.preprocess_array(page, name="page")
+
+    assert invoice.ndim == 2 and invoice.shape == page.shape[:2]
+    assert general.ndim == 2
+    assert preprocessor.spill(invoice, "page", "preprocessed") is None
+    assert not Path("temp").exists()
+
+
+def test_gamma_lut_matches_float_path_in_place():
+    gray = np.arange(256, dtype=np.uint8).reshape(16, 16)
+    expected = (np.power(gray / 255.0, 1.2) * 255.0).astype(np.uint8)
+
+    result = ImagePreprocessor()._gamma(gray, gamma=1.2)
+
+    assert result is gray  # Rakstāms buferis tiek mainīts vietā
+    assert np.array_equal(result, expected)
+    assert gamma_lut(1.2) is gamma_lut(1.2) and not gamma_lut(1.2).flags.writeable
+
+
+def test_invoice_preprocessing_memory_peak():
+    """Pelēktoņu pipeline ar LUT gamma - maksimums zem 2.5 x krāsainās lapas (float64 gamma bija > 16 x)"""
+    preprocessor = ImagePreprocessor()
+    page = np.full((2400, 1800, 3), 235, dtype=np.uint8)
+    for row in range(20):
+        cv2.putText(page, f"Prece {row} 12,50", (100, 150 + row * 100), cv2.FONT_HERSHEY_SIMPLEX,
+                    1.5, (20, 20, 20), 3)
+
+    tracemalloc.start()
+    try:
+        preprocessor.preprocess_invoice_array(page)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < 2.5 * page.nbytes
+
+
+def test_debug_spill_uses_unique_names(tmp_path, monkeypatch, synthetic_page):
+    monkeypatch.chdir(tmp_path)
+    preprocessor = ImagePreprocessor()
+    preprocessor.debug_spill = True
+    page = synthetic_page(size=(700, 900), rows=1, background=250)
+
+    first = preprocessor.spill(page, "invoice", "preprocessed")
+    second = preprocessor.spill(page, "invoice", "preprocessed")
+
+    assert first != second
+    assert Path(first).exists() and Path(second).exists()
+
+
+@pytest.mark.skipif("pymupdf" not in PDFProcessor().available_methods, reason="PyMuPDF nav instalēts")
+def test_pdf_pages_rendered_in_memory(tmp_path):
+    import fitz
+
+    pdf_path = tmp_path / "scan.pdf"
+    with fitz.open() as document:
+        for _ in range(3):
+            document.new_page(width=200, height=100)
+        document.save(str(pdf_path))
+
+    pages = PDFProcessor().render_pdf_pages(str(pdf_path), dpi=72, max_pages=2)
+
+    assert len(pages) == 2
+    assert pages[0].shape == (100, 200, 3)
+    assert pages[0].dtype == np.uint8
+
+
+@pytest.mark.asyncio
+async def test_extract_text_from_array_passes_array_to_engine(tmp_path, monkeypatch, synthetic_page):
+    monkeypatch.chdir(tmp_path)
+    service = OCRService()
+    service.system_ready = True
+    received = []
+
+    async def fake_image_to_text_data(image, config="", timeout=None):
+        received.append(image)
+        return {'text': "SIA Tests rēķins", 'words': [], 'confidence': 0.9}
+
+    monkeypatch.setattr(service.ocr_engine, "image_to_text_data", fake_image_to_text_data)
+
+    page = synthetic_page(size=(700, 900), rows=1, background=250)
+    result = await service.extract_text_from_image(page, image_name="page_001")
+
+    assert result['success']
+    assert result['file_path'] == "page_001"
+    assert isinstance(received[0], np.ndarray) and received[0].ndim == 2
+    assert 'preprocessed_image' not in result['metadata']
+    assert not Path("temp").exists()
@@ -0,0 +1,151 @@
+"""
+Tests for LayoutTemplateCache - piegādātāju izkārtojumu šablonu atkārtota izmantošana
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.document_structure_service import DocumentStructure, DocumentStructureAnalyzer
+from app.services.layout_template_cache import LayoutTemplateCache, layout_fingerprint
+from app.services.page_image import PageImage
+
+
+def invoice_page(rows=8, shift=(0, 0), text="Prece", columns=(80, 420, 620, 820, 1120)):
+    """Rēķina lapa ar preču tabulu; shift nobīda visu izkārtojumu"""
+    image = np.full((1600, 1200, 3), 255, dtype=np.uint8)
+    dx, dy = shift
+    top = 500 + dy
+    for r in range(rows + 1):
+        cv2.line(image, (columns[0] + dx, top + r * 60), (columns[-1] + dx, top + r * 60), (0, 0, 0), 3)
+    for x in columns:
+        cv2.line(image, (x + dx, top), (x + dx, top + rows * 60), (0, 0, 0), 3)
+    for r in range(rows):
+        cv2.putText(image, f"{text} {r}", (columns[0] + 15 + dx, top + r * 60 + 42),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    cv2.putText(image, "SIA Piegadatajs", (80 + dx, 150 + dy), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return PageImage(image)
+
+
+@pytest.fixture
+def template_cache(tmp_path):
+    return LayoutTemplateCache(path=str(tmp_path / "templates.json"), enabled=True, max_templates=2)
+
+
+@pytest.fixture
+def analyzer(template_cache):
+    return DocumentStructureAnalyzer(template_cache=template_cache)
+
+
+@pytest.mark.asyncio
+async def test_same_layout_reuses_template(analyzer, template_cache):
+    first = await analyzer.analyze_document(invoice_page(text="Prece"))
+    second_page = invoice_page(text="Pakalpojums", shift=(12, 18))
+    second = await analyzer.analyze_document(second_page)
+
+    assert first.layout_template is None
+    assert second.layout_template is not None
+    assert 'tables_morphological' not in second.detector_timings_ms
+    assert 'text_blocks' in second.detector_timings_ms
+
+    reused = max(second.tables, key=lambda table: table.bounds.area)
+    detected = max(first.tables, key=lambda table: table.bounds.area)
+    assert (reused.rows, reused.columns) == (detected.rows, detected.columns) == (8, 4)
+    # Režģis pārbīdīts atbilstoši jaunās lapas nobīdei (izlīdzināšanas precizitāte ~ 1 profila bin)
+    assert abs(reused.bounds.x1 - detected.bounds.x1 - 12) <= 6
+    assert abs(reused.bounds.y1 - detected.bounds.y1 - 18) <= 8
+
+    metrics = template_cache.get_metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['stores']) == (1, 1, 1)
+    assert metrics['hit_rate'] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_different_layout_runs_full_detection(analyzer, template_cache):
+    await analyzer.analyze_document(invoice_page())
+    other = await analyzer.analyze_document(invoice_page(rows=14, columns=(80, 300, 1120)))
+
+    assert other.layout_template is None
+    assert 'tables_morphological' in other.detector_timings_ms
+    assert template_cache.get_metrics()['stores'] == 2
+
+
+@pytest.mark.asyncio
+async def test_extra_table_row_rejected_by_alignment(analyzer, template_cache):
+    await analyzer.analyze_document(invoice_page(rows=8))
+    longer = await analyzer.analyze_document(invoice_page(rows=9))
+
+    assert longer.layout_template is None
+    assert template_cache.get_metrics()['rejected_alignment'] == 1
+
+
+@pytest.mark.asyncio
+async def test_page_without_lines_is_not_cached(analyzer, template_cache):
+    blank = PageImage(np.full((1600, 1200, 3), 255, dtype=np.uint8))
+
+    await analyzer.analyze_document(blank)
+    await analyzer.analyze_document(blank)
+
+    metrics = template_cache.get_metrics()
+    assert metrics['uninformative'] == 2
+    assert metrics['stores'] == 0
+
+
+@pytest.mark.asyncio
+async def test_templates_persist_list_and_evict(analyzer, template_cache, tmp_path):
+    await analyzer.analyze_document(invoice_page())
+    await analyzer.analyze_document(invoice_page(rows=14, columns=(80, 300, 1120)))
+    await analyzer.analyze_document(invoice_page(rows=4, columns=(80, 600, 1120)))
+
+    listed = template_cache.list_templates()
+    assert len(listed) == 2  # max_templates - vecākais izlikts
+    assert template_cache.get_metrics()['evictions'] == 1
+    assert {'template_id', 'tables', 'cells', 'hits'} <= set(listed[0])
+
+    reloaded = LayoutTemplateCache(path=str(tmp_path / "templates.json"), enabled=True)
+    assert [t['template_id'] for t in reloaded.list_templates()] == [t['template_id'] for t in listed]
+
+    assert template_cache.evict(listed[0]['template_id']) == 1
+    assert template_cache.evict('missing') == 0
+    assert template_cache.evict() == 1
+    assert template_cache.list_templates() == []
+
+
+def test_parallel_stores_leave_valid_file(tmp_path):
+    path = tmp_path / "templates.json"
+    cache = LayoutTemplateCache(path=str(path), enabled=True, max_templates=50)
+    mask = np.zeros((200, 160), dtype=np.uint8)
+    mask[::20, :] = 255
+    fingerprint = layout_fingerprint(mask, 1200, 1600)
+    structure = DocumentStructure(image_width=1200, image_height=1600, zones=[], tables=[], text_blocks=[])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda _: cache.store(fingerprint, structure), range(32)))
+
+    reloaded = LayoutTemplateCache(path=str(path), enabled=True, max_templates=50)
+    assert {t['template_id'] for t in reloaded.list_templates()} == set(ids)
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert all('zones' not in template for template in reloaded.templates.values())
+
+
+@pytest.mark.asyncio
+async def test_template_hits_persist_across_restart(tmp_path):
+    path = str(tmp_path / "templates.json")
+    cache = LayoutTemplateCache(path=path, enabled=True, save_every=2)
+    analyzer = DocumentStructureAnalyzer(template_cache=cache)
+    await analyzer.analyze_document(invoice_page())
+    template_id = cache.list_templates()[0]['template_id']
+
+    await analyzer.analyze_document(invoice_page(text="Cita prece"))
+    assert LayoutTemplateCache(path=path, enabled=True).list_templates()[0]['hits'] == 0
+
+    await analyzer.analyze_document(invoice_page(text="Trešā prece"))
+    saved = LayoutTemplateCache(path=path, enabled=True).list_templates()[0]
+    assert saved['template_id'] == template_id and saved['hits'] == 2
+
+    await analyzer.analyze_document(invoice_page(text="Ceturtā prece"))
+    cache.flush()
+    saved = LayoutTemplateCache(path=path, enabled=True).list_templates()[0]
+    assert saved['hits'] == 3 and saved['last_used_at'] == cache.list_templates()[0]['last_used_at']
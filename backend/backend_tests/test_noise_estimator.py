@@ -0,0 +1,72 @@
+"""
+Tests for noise_estimator - trokšņa novērtējums un denoise lēmums
+"""
+
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from app.services.ocr.image_preprocessor import ImagePreprocessor
+from app.services.ocr.noise_estimator import apply_denoise, choose_denoise, estimate_noise_sigma
+from app.services.ocr.structure_aware_ocr import StructureAwareOCR
+
+
+@pytest.mark.parametrize("sigma", [2, 5, 10])
+def test_sigma_estimate_ignores_text_edges(sigma, synthetic_page):
+    gray = synthetic_page(noise_sigma=sigma, channels=1)
+
+    assert estimate_noise_sigma(gray, exclude_edges=True) == pytest.approx(sigma, rel=0.15)
+    # Paraugs no joslām dod to pašu novērtējumu
+    assert estimate_noise_sigma(gray, exclude_edges=True, max_pixels=200_000) == pytest.approx(sigma, rel=0.15)
+    assert estimate_noise_sigma(synthetic_page(channels=1), exclude_edges=True) < 0.5
+
+
+@pytest.mark.parametrize("sigma, variant, search_window", [(0, 'none', 21), (5, 'gray', 11), (12, 'gray', 21)])
+def test_decision_by_noise_level(sigma, variant, search_window, synthetic_page):
+    image = synthetic_page(noise_sigma=sigma)
+    decision = choose_denoise(image)
+
+    assert decision.variant == variant
+    assert decision.search_window == search_window
+    if variant == 'none':
+        assert apply_denoise(image, decision) is image
+
+
+def test_color_variant_only_when_color_is_kept(synthetic_page):
+    image = synthetic_page(noise_sigma=6)
+    rng = np.random.default_rng(1)
+    image = np.clip(image + rng.normal(0, 8, image.shape), 0, 255).astype(np.uint8)  # krāsu troksnis
+
+    assert choose_denoise(image).variant == 'gray'
+    decision = choose_denoise(image, keep_color=True)
+    assert decision.variant == 'color' and decision.chroma_sigma > 3
+    assert choose_denoise(image, params={'denoise': False}).reason == 'disabled'
+
+
+def test_preprocessing_records_decision_and_denoises_before_upscaling(synthetic_page):
+    preprocessor = ImagePreprocessor()
+    metadata = {}
+
+    result = preprocessor.preprocess_array(synthetic_page(noise_sigma=6, size=(300, 400)), metadata=metadata)
+
+    assert result.shape[:2] == (600, 800)
+    assert metadata['denoise']['variant'] == 'gray'
+    assert metadata['denoise']['scale'] == 0.5  # Attīrīts avota izšķirtspējā
+    assert metadata['denoise']['elapsed_ms'] > 0
+
+    preprocessor.preprocess_array(synthetic_page(), metadata=metadata)
+    assert metadata['denoise']['variant'] == 'none'
+
+
+def test_zone_steps_skip_denoise_on_clean_zone(synthetic_page):
+    structure_aware = StructureAwareOCR(Mock(spec=['extract_text_from_image']))
+    decisions = []
+
+    processed = structure_aware._apply_zone_steps(synthetic_page(), ['denoise', 'enhance_contrast', 'deskew'],
+                                                  decisions)
+    noisy = structure_aware._apply_zone_steps(synthetic_page(noise_sigma=9), ['denoise', 'morphology'], decisions)
+
+    assert processed.ndim == 3
+    assert noisy.ndim == 2
+    assert [d['variant'] for d in decisions] == ['none', 'gray']
@@ -0,0 +1,123 @@
+"""
+Tests for OCRCache - satura hash kešs ar LRU izlikšanu
+"""
+
+import os
+
+import pytest
+
+from app.services.ocr.ocr_cache import OCRCache
+from app.services.ocr.ocr_main import OCRService
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OCRCache(cache_dir=str(tmp_path / "cache"), max_size_mb=1, enabled=True, use_database=False)
+
+
+@pytest.fixture
+def image_file(tmp_path):
+    path = tmp_path / "invoice.png"
+    path.write_bytes(b"fake image content")
+    return str(path)
+
+
+def test_key_depends_on_content_config_and_engine(cache, image_file, tmp_path):
+    variant = {'preprocess': True, 'tesseract_config': '--psm 6 -l lav+eng'}
+    key = cache.make_key(image_file, variant)
+
+    # Tas pats saturs citā failā - tā pati atslēga
+    copy_path = tmp_path / "copy.png"
+    copy_path.write_bytes(b"fake image content")
+    assert cache.make_key(str(copy_path), variant) == key
+
+    assert cache.make_key(image_file, {**variant, 'preprocess': False}) != key
+
+    cache.set_engine_fingerprint("tesseract 5.3.0|lav:123")
+    assert cache.make_key(image_file, variant) != key
+
+
+def test_hit_miss_counters_and_invalidation(cache, image_file):
+    key = cache.make_key(image_file, {})
+    assert cache.get_sync(key) is None
+
+    cache.put_sync(key, "raw", "cleaned", 0.8, {'structured_data': {'dates': []}})
+    entry = cache.get_sync(key)
+
+    assert entry['cleaned_text'] == "cleaned"
+    assert entry['confidence'] == 0.8
+    metrics = cache.get_metrics()
+    assert metrics['hits'] == 1 and metrics['misses'] == 1 and metrics['stores'] == 1
+
+    # Tikai novecojušie ieraksti (cits dzinēja nospiedums)
+    assert cache.invalidate_sync(stale_only=True)['disk'] == 0
+    cache.set_engine_fingerprint("tesseract 5.4.0")
+    assert cache.invalidate_sync(stale_only=True)['disk'] == 1
+    assert cache.get_sync(key) is None
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = OCRCache(cache_dir=str(tmp_path / "cache"), max_size_mb=0, enabled=True, use_database=False)
+    cache.max_size_bytes = 5000
+    text = "x" * 1000
+
+    cache.put_sync("a", text, text, 0.5)
+    cache.put_sync("b", text, text, 0.5)
+    # "a" kļūst par nesen izmantoto
+    os.utime(cache._entry_path("b"), (1, 1))
+    cache.get_sync("a")
+    cache.put_sync("c", text, text, 0.5)
+
+    assert cache.get_sync("b") is None
+    assert cache.get_sync("a") is not None
+    assert cache.get_sync("c") is not None
+    assert cache.metrics['evictions'] == 1
+
+
+@pytest.mark.asyncio
+async def test_extract_text_from_image_uses_cache(cache, image_file):
+    service = OCRService()
+    service.ocr_cache = cache
+    service.system_ready = True
+    calls = []
+
+    async def fake_perform_ocr(path, invoice_mode=True):
+        calls.append(path)
+        return {'text': "SIA Test rēķins Nr. 123", 'confidence': 0.87, 'word_count': 5}
+
+    service._perform_ocr = fake_perform_ocr
+
+    first = await service.extract_text_from_image(image_file, preprocess=False)
+    second = await service.extract_text_from_image(image_file, preprocess=False)
+
+    assert first['success'] and second['success']
+    assert len(calls) == 1
+    assert first['metadata']['cache'] == 'miss'
+    assert second['metadata']['cache'] == 'hit'
+    assert second['cleaned_text'] == first['cleaned_text']
+    assert second['confidence_score'] == first['confidence_score']
+    assert second['tesseract_confidence'] == 0.87
+
+    stats = service.get_system_status()['processing_stats']
+    assert stats['total_processed'] == stats['successful'] == 2
+    assert stats['cache_hits'] == cache.get_metrics()['hits'] == 1
+
+
+def test_preprocessing_fingerprint_tracks_pipeline_and_config(monkeypatch):
+    from app.services.ocr import image_preprocessor
+    from app.services.ocr.image_preprocessor import preprocessing_fingerprint
+    from app.services.ocr.preprocessing_graph import step
+
+    invoice, light = preprocessing_fingerprint(True), preprocessing_fingerprint(False)
+    assert invoice != light
+
+    monkeypatch.setitem(image_preprocessor.IMAGE_PREPROCESSING, 'tile_workers', 7)
+    assert preprocessing_fingerprint(True) == invoice
+
+    monkeypatch.setitem(image_preprocessor.IMAGE_PREPROCESSING, 'denoise_skip_sigma', 4.0)
+    changed = preprocessing_fingerprint(True)
+    assert changed != invoice
+
+    monkeypatch.setattr(image_preprocessor, 'INVOICE_PIPELINE',
+                        image_preprocessor.INVOICE_PIPELINE + (step('morphology'),))
+    assert preprocessing_fingerprint(True) not in (invoice, changed)
@@ -0,0 +1,130 @@
+"""
+Tests for OCREngine - kopīgais Tesseract worker pool
+"""
+
+import asyncio
+import math
+import time
+
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.services.ocr.ocr_engine import (
+    OCREngine, OCRTimeoutError, get_ocr_engine, parse_tesseract_data
+)
+
+
+@pytest.fixture
+def process_engine():
+    """Process pool dzinējs ar 2 worker procesiem"""
+    engine = OCREngine(max_workers=2, executor_type='process', max_queue=4, default_timeout=30)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.fixture
+def thread_engine():
+    """Thread pool dzinējs (ļauj patch-ot pytesseract tajā pašā procesā)"""
+    engine = OCREngine(max_workers=2, executor_type='thread', max_queue=4, default_timeout=5)
+    yield engine
+    engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_in_process_pool(process_engine):
+    """Testē, ka darbi izpildās worker procesos"""
+    results = await asyncio.gather(*[process_engine.submit(math.sqrt, float(i * i)) for i in range(6)])
+
+    assert results == [float(i) for i in range(6)]
+    metrics = process_engine.get_metrics()
+    assert metrics['completed'] == 6
+    assert metrics['in_flight'] == 0
+    assert metrics['queue_depth'] == 0
+    assert metrics['max_queue_depth'] >= 1  # 6 darbi uz 2 workeriem
+
+
+@pytest.mark.asyncio
+async def test_submit_timeout(thread_engine):
+    """Testē per-call timeout"""
+    with pytest.raises(OCRTimeoutError):
+        await thread_engine.submit(time.sleep, 1.0, timeout=0.05)
+
+    assert thread_engine.get_metrics()['timeouts'] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancel_counts_queued_and_abandoned_jobs():
+    """Atcelts rindā esošs darbs tiek izņemts; jau palaists tiek pabeigts un uzskaitīts kā abandoned"""
+    engine = OCREngine(max_workers=1, executor_type='thread', max_queue=4, default_timeout=5)
+    try:
+        running = asyncio.create_task(engine.submit(time.sleep, 0.2))
+        queued = asyncio.create_task(engine.submit(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        running.cancel()
+        queued.cancel()
+        await asyncio.gather(running, queued, return_exceptions=True)
+
+        metrics = engine.get_metrics()
+        assert (metrics['abandoned'], metrics['cancelled']) == (1, 1)
+    finally:
+        engine.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_image_to_string_accepts_ndarray(thread_engine):
+    """Testē in-memory attēla nodošanu Tesseract"""
+    image = np.ones((50, 100, 3), dtype=np.uint8) * 255
+
+    with patch('pytesseract.image_to_string', return_value="TEST") as mock_ocr:
+        text = await thread_engine.image_to_string(image, config="--psm 6")
+
+    assert text == "TEST"
+    passed_image = mock_ocr.call_args.args[0]
+    assert passed_image.size == (100, 50)
+    assert passed_image.format == 'BMP'
+    assert mock_ocr.call_args.kwargs['config'] == "--psm 6"
+    assert thread_engine.get_metrics()['ocr_calls'] == 1
+
+
+def test_shared_engine_is_singleton():
+    """Testē, ka visi OCR servisi saņem vienu dzinēju"""
+    assert get_ocr_engine() is get_ocr_engine()
+
+
+def test_parse_tesseract_data_builds_text_and_confidence():
+    """Testē teksta un confidence salikšanu no viena image_to_data rezultāta"""
+    data = {
+        'level':     [1, 2, 3, 4, 5, 5, 4, 5, 3, 4, 5],
+        'block_num': [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+        'par_num':   [0, 0, 1, 1, 1, 1, 1, 1, 2, 2, 2],
+        'line_num':  [0, 0, 0, 1, 1, 1, 2, 2, 0, 1, 1],
+        'left':      [0, 0, 0, 0, 10, 60, 0, 10, 0, 0, 10],
+        'top':       [0, 0, 0, 0, 5, 5, 0, 30, 0, 0, 70],
+        'width':     [0, 0, 0, 0, 40, 30, 0, 50, 0, 0, 40],
+        'height':    [0, 0, 0, 0, 12, 12, 0, 12, 0, 0, 12],
+        'conf':      [-1, -1, -1, -1, 90, 80, -1, 70, -1, -1, 60],
+        'text':      ['', '', '', '', 'Rēķins', 'Nr.', '', '12345', '', '', 'Kopā'],
+    }
+
+    result = parse_tesseract_data(data)
+
+    assert result['text'] == "Rēķins Nr.\n12345\n\nKopā"
+    assert len(result['words']) == 4
+    assert result['words'][0]['left'] == 10
+    assert result['confidence'] == pytest.approx(0.75)
+
+
+@pytest.mark.asyncio
+async def test_image_to_text_data_single_tesseract_call(thread_engine):
+    data = {'block_num': [1], 'par_num': [1], 'line_num': [1], 'left': [0], 'top': [0],
+            'width': [10], 'height': [10], 'conf': ['91.5'], 'text': ['SIA']}
+
+    with patch('pytesseract.image_to_data', return_value=data) as mock_data, \
+            patch('pytesseract.image_to_string') as mock_string:
+        result = await thread_engine.image_to_text_data(np.zeros((20, 20), dtype=np.uint8))
+
+    assert mock_data.call_count == 1
+    mock_string.assert_not_called()
+    assert result['text'] == "SIA"
+    assert result['confidence'] == pytest.approx(0.915)
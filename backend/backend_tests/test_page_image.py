@@ -0,0 +1,191 @@
+"""
+Tests for PageImage - vienreizēja dekodēšana un zero-copy izgriezumi
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.document_structure_service import (
+    BoundingBox, DocumentStructure, DocumentZone, TableCell, TableRegion, ZoneType
+)
+from app.services.ocr.structure_aware_ocr import StructureAwareOCR
+from app.services.page_image import PageImage
+
+
+@pytest.fixture
+def page_file(tmp_path):
+    image = np.full((400, 600, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "INVOICE", (40, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    cv2.rectangle(image, (50, 200), (550, 350), (0, 0, 0), 2)
+    path = tmp_path / "page.png"
+    cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def test_crop_is_view_of_page(page_file):
+    page = PageImage.load(page_file)
+
+    crop = page.crop(BoundingBox(10, 20, 110, 70))
+
+    assert crop.shape == (50, 100, 3)
+    assert np.shares_memory(crop, page.bgr)
+    assert not crop.flags.writeable
+
+
+def test_crop_clamps_bounds_and_padding(page_file):
+    page = PageImage.load(page_file)
+
+    crop = page.crop(BoundingBox(590, 390, 700, 500), padding=5)
+
+    assert crop.shape == (15, 15, 3)
+
+
+def test_derived_layers_computed_once(page_file):
+    page = PageImage.load(page_file)
+
+    with patch('app.services.page_image.cv2.cvtColor', wraps=cv2.cvtColor) as cvt:
+        first = page.gray
+        second = page.gray
+        binary = page.crop(BoundingBox(0, 0, 600, 100), layer='binary')
+
+    assert cvt.call_count == 1
+    assert first is second
+    assert binary.ndim == 2 and binary.max() == 255
+    assert np.shares_memory(binary, page.binary)
+    assert page.cached_layers() == ['bgr', 'gray', 'binary']
+
+
+def test_shared_detector_features_match_direct_computation(page_file):
+    page = PageImage.load(page_file)
+    gray = cv2.cvtColor(page.bgr, cv2.COLOR_BGR2GRAY)
+
+    expected_adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                              cv2.THRESH_BINARY_INV, 15, 10)
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    median_val = np.median(blurred)
+    expected_edges = cv2.Canny(blurred, int(0.7 * median_val), int(min(255, 1.3 * median_val)))
+
+    assert np.array_equal(page.adaptive_binary(15, 10), expected_adaptive)
+    assert page.adaptive_binary(15, 10) is page.adaptive_binary(15, 10)
+    assert page.adaptive_binary(11, 2) is not page.adaptive_binary(15, 10)
+    assert np.array_equal(page.edges, expected_edges)
+
+
+def test_pyramid_level_cached_and_proportional(page_file):
+    page = PageImage.load(page_file)
+
+    level = page.pyramid_level(300)
+
+    assert (level.width, level.height) == (300, 200)
+    assert page.pyramid_level(300) is level
+    assert page.pyramid_level(600) is page
+
+
+def test_array_source_stays_writeable():
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+
+    page = PageImage.load(image)
+
+    assert PageImage.load(page) is page
+    assert image.flags.writeable
+    assert not page.bgr.flags.writeable
+
+
+def test_unreadable_file_raises(tmp_path):
+    with pytest.raises(ValueError):
+        PageImage.load(str(tmp_path / "missing.png"))
+
+
+@pytest.mark.asyncio
+async def test_process_with_structure_decodes_once(page_file):
+    """Struktūra, zonas, tabulas un backup OCR izmanto vienu dekodēto attēlu"""
+    ocr_service = Mock(spec=['extract_text_from_image'])
+    ocr_service.extract_text_from_image = AsyncMock(return_value={
+        'raw_text': 'page text', 'cleaned_text': 'page text', 'confidence_score': 0.8
+    })
+
+    structure_aware = StructureAwareOCR(ocr_service)
+    structure_aware.structure_analyzer.analyze_document = AsyncMock(side_effect=lambda page: DocumentStructure(
+        image_width=page.width, image_height=page.height,
+        zones=[DocumentZone(zone_type=ZoneType.HEADER, bounds=BoundingBox(0, 0, 600, 100), confidence=0.9)],
+        tables=[TableRegion(bounds=BoundingBox(50, 200, 550, 350), rows=1, columns=1, confidence=0.8,
+                            cells=[TableCell(bounds=BoundingBox(60, 210, 540, 340), row_index=0, column_index=0)])],
+        text_blocks=[]
+    ))
+
+    crops = []
+
+    async def fake_zone_ocr(image, config, threshold):
+        crops.append(image)
+        return {'text': 'zone', 'confidence': 0.2}
+
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+    structure_aware._preprocess_zone_image = AsyncMock(side_effect=lambda image, steps: image)
+
+    with patch('app.services.page_image.cv2.imread', wraps=cv2.imread) as imread:
+        result = await structure_aware.process_with_structure(page_file)
+
+    assert imread.call_count == 1
+    page = structure_aware.structure_analyzer.analyze_document.call_args.args[0]
+    assert isinstance(page, PageImage)
+    assert all(np.shares_memory(crop, page.bgr) for crop in crops)
+    assert ocr_service.extract_text_from_image.call_args.args[0] is page.bgr
+    assert result.text == 'page text'
+    assert result.table_results[0]['matrix'] == [['zone']]
+
+
+@pytest.mark.asyncio
+async def test_zones_and_tables_run_concurrently_under_document_cap(page_file):
+    """Zonu joslas un tabulas darbojas paralēli, bet ne vairāk kā max_concurrency vienlaicīgi"""
+    ocr_service = Mock(spec=['extract_text_from_image'])
+    ocr_service.extract_text_from_image = AsyncMock()
+    structure_aware = StructureAwareOCR(ocr_service)
+    structure_aware.max_concurrency = 3
+    structure_aware.structure_analyzer.analyze_document = AsyncMock(return_value=DocumentStructure(
+        image_width=600, image_height=400,
+        zones=[DocumentZone(zone_type=zone_type, bounds=BoundingBox(0, y1, 600, y2), confidence=0.9)
+               for zone_type, y1, y2 in ((ZoneType.HEADER, 0, 100), (ZoneType.BODY, 100, 300),
+                                         (ZoneType.FOOTER, 300, 400))],
+        tables=[TableRegion(bounds=BoundingBox(0, 200, 600, 300), rows=1, columns=1, confidence=0.8, cells=[])
+                for _ in range(4)],
+        text_blocks=[]
+    ))
+
+    active = {'now': 0, 'max': 0}
+
+    async def unit(result):
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        await asyncio.sleep(0.05)
+        active['now'] -= 1
+        return result
+
+    def tile_ocr(page, tile, index):
+        name = tile.zone_types[0].value
+        center = (tile.bounds.y1 + tile.bounds.y2) // 2
+        word = {'text': name, 'conf': 90.0, 'left': 10, 'top': center - 5, 'width': 50, 'height': 10,
+                'block': 1, 'par': 1, 'line': 1, 'tile': index}
+        return unit({'text': name, 'confidence': 0.9, 'words': [word]})
+
+    structure_aware._process_table_ocr = lambda page, table, semaphore: structure_aware._run_limited(
+        semaphore, unit({'matrix': [], 'confidence': 0.8}))
+    structure_aware._process_tile_ocr = tile_ocr
+
+    start = time.perf_counter()
+    result = await structure_aware.process_with_structure(page_file)
+    elapsed = time.perf_counter() - start
+
+    assert active['max'] == 3
+    assert elapsed < 7 * 0.05
+    assert len(result.table_results) == 4
+    assert {zone: data['raw_text'] for zone, data in result.zone_results.items()} == {
+        'header': 'header', 'body': 'body', 'footer': 'footer'
+    }
+    assert result.metadata['ocr_units'] == 7
+    assert result.metadata['full_page_fallback'] is False
+    ocr_service.extract_text_from_image.assert_not_called()
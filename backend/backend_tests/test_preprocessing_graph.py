@@ -0,0 +1,102 @@
+"""
+Tests for PreprocessingGraph - pelēktoņu pipeline ar kopīgiem starprezultātiem
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr.image_preprocessor import INVOICE_PIPELINE, LIGHT_PIPELINE, ImagePreprocessor
+from app.services.ocr.ocr_main import OCRService
+from app.services.ocr.preprocessing_graph import PreprocessingGraph, step
+
+
+def counting_operations(calls):
+    def operation(name):
+        def apply(image, amount=1):
+            calls.append(name)
+            time.sleep(0.01)
+            return image + amount
+        return apply
+    return {name: operation(name) for name in ('a', 'b', 'c', 'd')}
+
+
+def test_common_prefix_computed_once_across_threads():
+    calls = []
+    first = (step('a'), step('b'), step('c'))
+    second = (step('a'), step('b'), step('d', amount=2))
+    loads = []
+    graph = PreprocessingGraph(lambda: loads.append(1) or np.zeros((4, 4), np.int32),
+                               counting_operations(calls), pipelines=(first, second))
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(graph.run, [first, second, first, second]))
+
+    assert [int(r[0, 0]) for r in results] == [3, 4, 3, 4]
+    assert calls.count('a') == calls.count('b') == 1
+    assert calls.count('c') == calls.count('d') == 2  # Zari nav kešoti
+    assert graph.cached_steps() == [('a', 'b')]
+    assert len(loads) == 1
+
+
+def test_unknown_step_raises():
+    graph = PreprocessingGraph(np.zeros((2, 2), np.uint8), {})
+
+    with pytest.raises(ValueError):
+        graph.run((step('missing'),))
+
+
+def test_strategies_share_grayscale_prefix(synthetic_page):
+    preprocessor = ImagePreprocessor()
+    page = synthetic_page(size=(900, 1200))
+    loads = []
+    graph = preprocessor.graph(lambda: loads.append(1) or page)
+    light_meta, invoice_meta = {}, {}
+
+    light = preprocessor.preprocess_array(page, metadata=light_meta, graph=graph)
+    invoice = preprocessor.preprocess_invoice_array(page, metadata=invoice_meta, graph=graph)
+
+    assert light.ndim == invoice.ndim == 2
+    assert light.shape == invoice.shape == page.shape[:2]
+    # Vienreizēji rezultāti ir identiski grafa rezultātiem
+    assert np.array_equal(light, preprocessor.preprocess_array(page))
+    assert np.array_equal(invoice, preprocessor.preprocess_invoice_array(page))
+
+    light_steps = light_meta['preprocessing']['steps']
+    invoice_steps = invoice_meta['preprocessing']['steps']
+    assert [s['step'] for s in light_steps] == [name for name, _ in LIGHT_PIPELINE]
+    assert not any(s['cached'] for s in light_steps)
+    assert [s['cached'] for s in invoice_steps] == [True] * 5 + [False] * 4
+    assert invoice_meta['denoise'] == light_meta['denoise']
+    assert graph.cached_steps() == [tuple(name for name, _ in INVOICE_PIPELINE[:5])]
+    assert len(loads) == 1
+
+
+def test_adaptive_strategies_use_document_graph(tmp_path, synthetic_page):
+    service = OCRService()
+    path = tmp_path / "page.png"
+    cv2.imwrite(str(path), synthetic_page(size=(900, 1200)))
+    loads = []
+
+    def load():
+        loads.append(1)
+        return cv2.imread(str(path))
+
+    graph = service.image_preprocessor.graph(load)
+    metadata = {}
+
+    threads = [threading.Thread(target=service._preprocess_in_memory, args=(str(path), mode, "page"),
+                                kwargs={'graph': graph})
+               for mode in (False, True)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    service._preprocess_in_memory(str(path), True, "page", metadata, graph=graph)
+
+    assert len(loads) == 1
+    assert all(s['cached'] for s in metadata['preprocessing']['steps'][:5])
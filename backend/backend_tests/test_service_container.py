@@ -0,0 +1,78 @@
+"""
+Tests for ServiceContainer - vienreizēja servisu inicializācija
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from app.services.service_container import ServiceContainer
+
+
+@pytest.fixture
+def mock_ocr_service():
+    """OCR serviss bez Tesseract (degraded režīms)"""
+    service = Mock()
+    service.system_ready = False
+    service.setup_errors = ["Tesseract nav instalēts"]
+    service.structure_aware_ocr.structure_analyzer = Mock(name="analyzer")
+    service.get_system_status = Mock(return_value={'system_ready': False})
+    service.ocr_engine.warm_up = AsyncMock()
+    return service
+
+
+@pytest.fixture
+def container():
+    """Konteiners ar mock ekstraktēšanas servisu"""
+    container = ServiceContainer()
+    container._create_extraction_service = Mock(return_value=(Mock(name="extraction"), True))
+    return container
+
+
+@pytest.mark.asyncio
+async def test_initialize_once(container, mock_ocr_service):
+    """Testē, ka servisi tiek izveidoti tikai vienreiz"""
+    get_service = AsyncMock(return_value=mock_ocr_service)
+
+    with patch('app.services.service_container.get_ocr_service', get_service):
+        status = await container.initialize()
+        await container.initialize()
+
+    assert get_service.await_count == 1
+    assert container._create_extraction_service.call_count == 1
+    assert status['state'] == 'degraded'
+    assert status['ready'] is False
+    assert container.initialized
+    assert container.structure_analyzer is mock_ocr_service.structure_aware_ocr.structure_analyzer
+    mock_ocr_service.ocr_engine.warm_up.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_ready_state_warms_up_engine(container, mock_ocr_service):
+    """Testē gatavības stāvokli un worker pool iesildīšanu"""
+    mock_ocr_service.system_ready = True
+
+    with patch('app.services.service_container.get_ocr_service', AsyncMock(return_value=mock_ocr_service)):
+        status = await container.initialize()
+
+    assert status['state'] == 'ready'
+    assert container.ready
+    mock_ocr_service.ocr_engine.warm_up.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_endpoints_report_503_when_initialization_failed(container):
+    """Statistikas endpoint pēc neizdevušās inicializācijas atgriež 503 ar gatavības statusu"""
+    from fastapi import HTTPException
+
+    from app.api import process
+
+    with patch('app.services.service_container.get_ocr_service', AsyncMock(side_effect=RuntimeError("no tesseract"))):
+        await container.initialize()
+
+    with patch.object(process, 'get_services', AsyncMock(return_value=container)):
+        for endpoint in (process.get_strategy_predictor_statistics, process.get_ocr_cache_statistics,
+                         process.list_layout_templates):
+            with pytest.raises(HTTPException) as error:
+                await endpoint()
+            assert error.value.status_code == 503
+            assert error.value.detail['state'] == 'failed'
@@ -0,0 +1,126 @@
+"""
+Tests for skew_estimator - lapas slīpums no projekcijas profila, vienreiz dokumentam
+"""
+
+from unittest.mock import Mock
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr import image_preprocessor
+from app.services.ocr.image_preprocessor import ImagePreprocessor
+from app.services.ocr.skew_estimator import estimate_skew, rotate_image
+from app.services.ocr.structure_aware_ocr import StructureAwareOCR
+from app.services.page_image import PageImage
+
+
+@pytest.mark.parametrize("angle", [-4.0, -1.2, 0.0, 2.5, 7.0])
+def test_estimate_recovers_rotation(angle, synthetic_page):
+    page = synthetic_page(size=(1754, 1240), angle=angle, channels=1)
+    estimate = estimate_skew(page, analysis_width=600)
+
+    assert estimate.angle == pytest.approx(-angle, abs=0.2)
+    assert estimate.analysis_width == 600
+    straightened = rotate_image(page, estimate.angle, min_angle=0)
+    assert abs(estimate_skew(straightened).angle) <= 0.2
+
+
+def test_blank_page_has_no_skew(synthetic_page):
+    estimate = estimate_skew(np.full((800, 600), 250, dtype=np.uint8))
+
+    assert estimate.angle == 0.0 and estimate.source == 'no_text'
+    page = synthetic_page(size=(1754, 1240), channels=1)
+    assert rotate_image(page, 0.3) is page  # Zem deskew_min_angle
+
+
+def test_strategies_estimate_skew_once(monkeypatch, synthetic_page):
+    calls = []
+
+    def counting_estimate(image):
+        calls.append(image.shape)
+        return estimate_skew(image)
+
+    monkeypatch.setattr(image_preprocessor, 'estimate_skew', counting_estimate)
+    preprocessor = ImagePreprocessor()
+    page = synthetic_page(size=(1754, 1240), angle=3.0)
+    graph = preprocessor.graph(page)
+    light_meta, invoice_meta = {}, {}
+
+    preprocessor.preprocess_array(page, metadata=light_meta, graph=graph)
+    preprocessor.preprocess_invoice_array(page, metadata=invoice_meta, graph=graph)
+
+    assert len(calls) == 1
+    assert light_meta['skew'] == invoice_meta['skew']
+    assert light_meta['skew']['angle'] == pytest.approx(-3.0, abs=0.2)
+
+    # Prognozētāja leņķis tiek izmantots bez atkārtota novērtējuma
+    known = preprocessor.graph(page, skew_angle=-3.0)
+    preprocessor.preprocess_array(page, metadata=light_meta, graph=known)
+    assert len(calls) == 1
+    assert light_meta['skew']['source'] == 'image_stats'
+
+
+def test_structure_ocr_rotates_page_once_not_zones(synthetic_page):
+    structure_aware = StructureAwareOCR(Mock(spec=['extract_text_from_image']))
+    page = PageImage(synthetic_page(size=(1754, 1240), angle=-2.0))
+
+    straightened, skew = structure_aware._deskew_page(page)
+    same, kept = structure_aware._deskew_page(straightened, skew_angle=0.1)
+
+    assert skew['applied'] and skew['angle'] == pytest.approx(2.0, abs=0.2)
+    assert straightened is not page and straightened.shape == page.shape
+    assert same is straightened and not kept['applied']
+
+    zone = straightened.bgr[100:400, 50:900]
+    assert np.array_equal(structure_aware._apply_zone_steps(zone, ['deskew']), zone)
+
+
+@pytest.mark.asyncio
+async def test_known_angle_reused_by_predictor_and_structure_ocr(tmp_path, monkeypatch, synthetic_page):
+    from unittest.mock import AsyncMock
+
+    from app.services.ocr import strategy_predictor
+    from app.services.ocr.ocr_main import OCRService
+    from app.services.ocr.strategy_predictor import StrategyPredictor
+
+    calls = []
+    monkeypatch.setattr(strategy_predictor, 'estimate_skew', lambda image: calls.append(image) or estimate_skew(image))
+    path = str(tmp_path / "page.png")
+    cv2.imwrite(path, synthetic_page(size=(1754, 1240), angle=2.5, channels=1))
+
+    predictor = StrategyPredictor(model_path=str(tmp_path / "history.json"), explore_rate=0)
+    prediction = predictor.predict(path, skew_angle=-2.5)
+    assert not calls and prediction['stats']['skew_angle'] == -2.5
+
+    service = OCRService()
+    service.system_ready = True
+    service.structure_aware_ocr.process_with_structure = AsyncMock(side_effect=RuntimeError("stop"))
+    await service.extract_text_with_structure(path, skew_angle=-2.5)
+    service.structure_aware_ocr.process_with_structure.assert_awaited_once_with(path, -2.5)
+
+    # Iztaisnotā lapa struktūras analīzei - tas pats leņķis, bez atkārtota novērtējuma
+    page, skew = await StructureAwareOCR(Mock(spec=['extract_text_from_image'])).deskew_page(path, -2.5)
+    assert skew['applied'] and skew['source'] == 'provided'
+    assert abs(estimate_skew(page.gray).angle) <= 0.2
+
+
+@pytest.mark.asyncio
+async def test_full_page_pass_does_not_rotate_deskewed_page_again(monkeypatch, synthetic_page):
+    from app.services.ocr.ocr_main import OCRService
+
+    calls = []
+    monkeypatch.setattr(image_preprocessor, 'estimate_skew', lambda image: calls.append(image) or estimate_skew(image))
+    service = OCRService()
+    service.system_ready = True
+
+    async def fake_perform_ocr(image, invoice_mode=True):
+        return {'text': "Prece 1 12,50 EUR", 'confidence': 0.9, 'word_count': 4}
+
+    service._perform_ocr = fake_perform_ocr
+    page, skew = await service.structure_aware_ocr.deskew_page(
+        PageImage(synthetic_page(size=(1754, 1240), angle=-2.0)))
+    result = await service.structure_aware_ocr._extract_full_page(page)
+
+    assert skew['applied'] and result['raw_text']
+    assert not calls
@@ -0,0 +1,121 @@
+"""
+Tests for BoxIndex - režģa telpiskais indekss un tā izmantošana struktūras analīzē
+"""
+
+import random
+import time
+
+import pytest
+
+from app.services.document_structure_service import (
+    BoundingBox, DocumentStructureAnalyzer, TableCell, TableRegion
+)
+from app.services.ocr.zone_planner import build_word_index, collect_zone_words
+from app.services.spatial_index import BoxIndex
+
+
+def random_boxes(count, seed=7, page=2000, max_side=300):
+    rng = random.Random(seed)
+    boxes = []
+    for _ in range(count):
+        x1, y1 = rng.randrange(page), rng.randrange(page)
+        boxes.append(BoundingBox(x1, y1, x1 + rng.randint(1, max_side), y1 + rng.randint(1, max_side)))
+    return boxes
+
+
+def overlaps(a, b):
+    return a.x1 < b.x2 and b.x1 < a.x2 and a.y1 < b.y2 and b.y1 < a.y2
+
+
+def test_query_matches_brute_force():
+    boxes = random_boxes(500)
+    index = BoxIndex.build(boxes)
+
+    for query in random_boxes(50, seed=11):
+        expected = [i for i, box in enumerate(boxes) if overlaps(box, query)]
+        assert index.query(query) == expected
+
+
+def test_touching_edges_do_not_overlap():
+    index = BoxIndex.build([BoundingBox(0, 0, 100, 100)], cell_size=100)
+
+    assert index.query(BoundingBox(100, 0, 200, 100)) == []
+    assert index.query_point(99, 99) == [0]
+    assert index.query_point(100, 50) == []
+
+
+def test_insert_remove_and_centers():
+    index = BoxIndex(cell_size=50)
+    index.insert('a', (0, 0, 40, 40))
+    index.insert('b', (30, 30, 130, 130))
+
+    assert index.query_centers((0, 0, 50, 50)) == ['a']
+    assert index.query((35, 35, 36, 36)) == ['a', 'b']
+
+    index.remove('a')
+
+    assert index.query((35, 35, 36, 36)) == ['b']
+    assert len(index) == 1
+
+
+def test_merge_matches_pairwise_reference():
+    analyzer = DocumentStructureAnalyzer()
+    tables = [TableRegion(bounds=box, cells=[], confidence=0.7) for box in random_boxes(300, max_side=400)]
+
+    # Sākotnējais algoritms: katrs ar katru
+    reference, used = [], set()
+    for i, table1 in enumerate(tables):
+        if i in used:
+            continue
+        group = [table1]
+        used.add(i)
+        for j in range(i + 1, len(tables)):
+            if j not in used and analyzer._calculate_bbox_overlap(table1.bounds, tables[j].bounds) > 0.3:
+                group.append(tables[j])
+                used.add(j)
+        reference.append(group[0] if len(group) == 1 else analyzer._merge_table_group(group))
+
+    merged = analyzer._merge_overlapping_tables(tables)
+
+    assert [table.bounds for table in merged] == [table.bounds for table in reference]
+
+
+def test_dominated_candidates_pruned():
+    analyzer = DocumentStructureAnalyzer()
+    cell = TableCell(bounds=BoundingBox(0, 0, 10, 10))
+    table = TableRegion(bounds=BoundingBox(100, 100, 900, 600), cells=[cell] * 12, confidence=0.88)
+    grid_cells = [TableRegion(bounds=BoundingBox(x, y, x + 100, y + 100), cells=[], confidence=0.75)
+                  for x in range(100, 900, 100) for y in range(100, 600, 100)]
+    outside = TableRegion(bounds=BoundingBox(850, 550, 1050, 750), cells=[], confidence=0.75)
+
+    kept = analyzer._prune_dominated_tables(grid_cells + [table, outside])
+
+    assert kept == [table, outside]
+
+
+def test_dense_hough_candidates_bounded():
+    analyzer = DocumentStructureAnalyzer()
+    horizontal = [[0, y, 3000, y] for y in range(0, 3000, 10)]
+    vertical = [[x, 0, x, 3000 - x % 7] for x in range(0, 3000, 10)]
+
+    kept_h = analyzer._longest_lines(horizontal, 45, horizontal=True)
+    kept_v = analyzer._longest_lines(vertical, 45, horizontal=False)
+
+    assert len(kept_h) == len(kept_v) == 45
+    assert kept_v[:, 0].tolist() == sorted(kept_v[:, 0].tolist())
+
+    tables = [TableRegion(bounds=box, cells=[], confidence=0.75) for box in random_boxes(5000, page=3000)]
+    start = time.perf_counter()
+    analyzer._merge_overlapping_tables(analyzer._prune_dominated_tables(tables))
+    assert time.perf_counter() - start < 5
+
+
+def test_zone_words_with_index_match_linear_scan():
+    rng = random.Random(3)
+    words = [{'text': f'w{i}', 'conf': 90.0, 'left': rng.randrange(1000), 'top': rng.randrange(1400),
+              'width': rng.randint(5, 80), 'height': 12, 'block': 1, 'par': 1, 'line': i // 8, 'tile': 0}
+             for i in range(400)]
+    index = build_word_index(words)
+
+    for bounds in (BoundingBox(0, 0, 1000, 350), BoundingBox(0, 1120, 1000, 1400), BoundingBox(200, 200, 600, 900)):
+        assert collect_zone_words(words, bounds, index) == collect_zone_words(words, bounds)
@@ -0,0 +1,90 @@
+"""
+Tests for StrategyPredictor - adaptīvās OCR sākuma stratēģijas prognoze
+"""
+
+from unittest.mock import Mock
+
+import cv2
+import pytest
+
+from app.services.ocr.strategy_predictor import StrategyPredictor, compute_image_stats
+
+
+@pytest.fixture
+def predictor(tmp_path):
+    return StrategyPredictor(model_path=str(tmp_path / "history.json"), min_samples=3, explore_rate=0)
+
+
+def test_image_stats_separate_clean_and_noisy(tmp_path, synthetic_page):
+    clean_path, noisy_path = str(tmp_path / "clean.png"), str(tmp_path / "noisy.png")
+    cv2.imwrite(clean_path, synthetic_page(channels=1))
+    cv2.imwrite(noisy_path, synthetic_page(noise_sigma=25, channels=1))
+
+    clean = compute_image_stats(clean_path)
+    noisy = compute_image_stats(noisy_path)
+
+    assert clean['contrast'] > 0.6
+    assert noisy['noise'] > clean['noise']
+    assert clean['skew'] < 1.5
+    assert compute_image_stats(str(tmp_path / "missing.png")) is None
+
+
+def test_heuristic_prediction(tmp_path, predictor, synthetic_page):
+    clean_path, noisy_path = str(tmp_path / "clean.png"), str(tmp_path / "noisy.png")
+    cv2.imwrite(clean_path, synthetic_page(channels=1))
+    cv2.imwrite(noisy_path, synthetic_page(noise_sigma=25, channels=1))
+
+    assert predictor.predict(clean_path)['source'] == 'image_stats_heuristic'
+    assert predictor.predict(noisy_path)['strategy'] != 'no_preprocessing'
+
+
+def test_supplier_history_requires_majority(predictor):
+    predictor.learn_supplier("SIA Alfa", 'light_preprocessing')
+    predictor.learn_supplier("SIA Alfa", 'light_preprocessing')
+    assert predictor.predict("missing.png", supplier_hint="SIA Alfa") is None
+
+    predictor.learn_supplier("sia alfa", 'light_preprocessing')
+    prediction = predictor.predict("missing.png", supplier_hint="SIA Alfa")
+    assert prediction['strategy'] == 'light_preprocessing'
+    assert prediction['source'] == 'supplier_history'
+
+
+def test_retrain_from_db_and_persist(tmp_path, predictor):
+    rows = [("SIA Beta", 'no_preprocessing', None)] * 4 + [("SIA Beta", 'light_preprocessing', None)]
+    db = Mock()
+    db.query.return_value.filter.return_value.order_by.return_value.all.return_value = rows
+
+    summary = predictor.retrain_from_db(db)
+
+    assert summary == {'invoices': 5, 'suppliers': 1, 'buckets': 0}
+    reloaded = StrategyPredictor(model_path=str(tmp_path / "history.json"), min_samples=3)
+    assert reloaded.predict("missing.png", supplier_hint="SIA Beta")['strategy'] == 'no_preprocessing'
+
+
+def test_online_updates_persist_every_n(tmp_path):
+    path = tmp_path / "history.json"
+    predictor = StrategyPredictor(model_path=str(path), min_samples=3, save_every=3, explore_rate=0)
+    prediction = {'strategy': 'no_preprocessing', 'source': 'image_stats_heuristic', 'bucket': 'c:high'}
+
+    predictor.learn_supplier("SIA Gamma", 'light_preprocessing')
+    predictor.record_outcome(prediction, 'light_preprocessing')
+    assert not path.exists()
+
+    predictor.learn_supplier("SIA Gamma", 'light_preprocessing')
+    predictor.record_outcome(prediction, 'light_preprocessing')
+    predictor.learn_supplier("SIA Gamma", 'light_preprocessing')
+    predictor.flush()
+
+    reloaded = StrategyPredictor(model_path=str(path), min_samples=3)
+    assert reloaded.supplier_history['sia gamma']['light_preprocessing'] == 3
+    assert reloaded.bucket_history['c:high']['light_preprocessing'] == 2
+
+
+def test_shortcut_outcome_not_counted_in_bucket_history(predictor):
+    prediction = {'strategy': 'no_preprocessing', 'source': 'image_stats_heuristic', 'bucket': 'c:high'}
+
+    predictor.record_outcome(prediction, 'no_preprocessing', learn=False)
+    predictor.record_outcome(prediction, 'light_preprocessing')
+
+    assert dict(predictor.bucket_history['c:high']) == {'light_preprocessing': 1}
+    assert predictor.get_metrics()['hits'] == 1
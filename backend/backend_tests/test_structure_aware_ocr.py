@@ -17,10 +17,12 @@ from app.services.ocr.structure_aware_ocr import (
     StructureAwareOCR, StructureAwareOCRResult, ZoneOCRConfig
 )
 from app.services.ocr.ocr_main import OCRService
+from app.services.ocr.zone_planner import ZoneTile
 from app.services.document_structure_service import (
     DocumentStructureAnalyzer, DocumentStructure, DocumentZone, 
     TableRegion, BoundingBox, ZoneType
 )
+from app.services.page_image import PageImage
 
 @pytest.fixture
 def sample_image():
@@ -117,7 +119,8 @@ class TestStructureAwareOCR:
         # Header config
         header_config = structure_aware_ocr.zone_configs[ZoneType.HEADER]
         assert header_config.confidence_threshold == 0.7
-        assert "deskew" in header_config.preprocessing_steps
+        assert "denoise" in header_config.preprocessing_steps
+        assert "deskew" not in header_config.preprocessing_steps  # Lapa tiek iztaisnota vienreiz
         assert header_config.text_cleaning_level == "medium"
         
         # Table config
@@ -148,22 +151,17 @@ class TestStructureAwareOCR:
             return_value=sample_document_structure
         )
         
-        # Mock zone processing
-        async def mock_process_zone(image_path, zone):
-            return {
-                'text': f'Zone {zone.zone_type.value} text',
-                'raw_text': f'Raw {zone.zone_type.value} text',
-                'confidence': 0.8,
-                'zone_type': zone.zone_type.value,
-                'bounds': {'x1': zone.bounds.x1, 'y1': zone.bounds.y1, 
-                          'x2': zone.bounds.x2, 'y2': zone.bounds.y2},
-                'config_used': 'test_config'
-            }
+        # Mock zonu joslu processing
+        async def mock_process_tile(page, tile, index):
+            name = tile.zone_types[0].value
+            word = {'text': name, 'conf': 80.0, 'left': 10, 'top': tile.bounds.y1 + 5,
+                    'width': 50, 'height': 10, 'block': 1, 'par': 1, 'line': 1, 'tile': index}
+            return {'text': f'Tile {name} text', 'confidence': 0.8, 'words': [word], 'denoise': None}
         
-        structure_aware_ocr._process_zone_ocr = mock_process_zone
+        structure_aware_ocr._process_tile_ocr = mock_process_tile
         
         # Mock table processing
-        async def mock_process_table(image_path, table):
+        async def mock_process_table(image_path, table, semaphore=None):
             return {
                 'cells': [{'text': 'cell1', 'confidence': 0.9, 'row': 0, 'column': 0}],
                 'matrix': [['cell1', 'cell2'], ['cell3', 'cell4']],
@@ -181,42 +179,52 @@ class TestStructureAwareOCR:
         
         # Assertions
         assert isinstance(result, StructureAwareOCRResult)
-        assert result.text == 'Sample OCR text'  # From mock OCR service
+        assert result.text == 'cleaned text'  # Joslu teksts caur mock text cleaner
         assert result.confidence > 0
         assert len(result.zone_results) == 3  # Header, Body, Footer
+        assert result.zone_results['header']['raw_text'] == 'header'
         assert len(result.table_results) == 1
         assert result.enhanced_text != ''
         assert result.processing_time_ms >= 0
     
     @pytest.mark.asyncio
-    async def test_process_zone_ocr_header(self, structure_aware_ocr, sample_image):
-        """Testē header zonas OCR apstrādi"""
+    async def test_process_tile_ocr_header(self, structure_aware_ocr, sample_image):
+        """Testē header joslas OCR un vārdu sadalījumu zonai"""
         zone = DocumentZone(
             zone_type=ZoneType.HEADER,
             bounds=BoundingBox(0, 0, 800, 100),
             confidence=0.9
         )
-        
-        # Mock image reading
-        with patch('cv2.imread') as mock_imread:
-            mock_image = np.ones((100, 800, 3), dtype=np.uint8) * 255
-            mock_imread.return_value = mock_image
-            
-            # Mock OCR extraction
-            structure_aware_ocr._extract_text_from_zone = AsyncMock(return_value={
-                'text': 'Header text',
-                'confidence': 0.85
-            })
-            
-            # Mock text cleaning
-            structure_aware_ocr._clean_zone_text = AsyncMock(return_value='Cleaned header text')
-            
-            result = await structure_aware_ocr._process_zone_ocr(sample_image, zone)
-            
-            assert result['text'] == 'Cleaned header text'
-            assert result['zone_type'] == 'header'
-            assert result['confidence'] == 0.85
-            assert 'bounds' in result
+        tile = ZoneTile(bounds=BoundingBox(0, 20, 800, 100), zone_types=(ZoneType.HEADER,))
+        
+        # Mock OCR extraction (vārdu koordinātes joslā)
+        structure_aware_ocr._extract_text_from_zone = AsyncMock(return_value={
+            'text': 'Header text',
+            'confidence': 0.85,
+            'words': [
+                {'text': 'Header', 'conf': 85.0, 'left': 50, 'top': 20, 'width': 90, 'height': 20,
+                 'block': 1, 'par': 1, 'line': 1},
+                {'text': 'text', 'conf': 85.0, 'left': 150, 'top': 20, 'width': 60, 'height': 20,
+                 'block': 1, 'par': 1, 'line': 1}
+            ]
+        })
+        
+        # Mock text cleaning
+        structure_aware_ocr._clean_zone_text = AsyncMock(return_value='Cleaned header text')
+        
+        tile_result = await structure_aware_ocr._process_tile_ocr(PageImage.load(sample_image), tile, 0)
+        
+        # Vārdi lapas koordinātēs
+        assert [word['top'] for word in tile_result['words']] == [40, 40]
+        assert all(word['tile'] == 0 for word in tile_result['words'])
+        
+        result = (await structure_aware_ocr._collect_zone_results([zone], [tile_result]))['header']
+        
+        assert result['text'] == 'Cleaned header text'
+        assert result['raw_text'] == 'Header text'
+        assert result['zone_type'] == 'header'
+        assert result['confidence'] == pytest.approx(0.85)
+        assert 'bounds' in result
     
     @pytest.mark.asyncio
     async def test_process_table_ocr(self, structure_aware_ocr, sample_image):
@@ -417,12 +425,15 @@ class TestStructureAwareOCR:
         config = "--psm 6"
         threshold = 0.7
         
-        with patch('pytesseract.image_to_string', return_value="TEST"):
-            with patch('pytesseract.image_to_data', return_value={'conf': [80, 90, 85]}):
-                result = await structure_aware_ocr._extract_text_from_zone(test_image, config, threshold)
-                
-                assert result['text'] == "TEST"
-                assert 0 <= result['confidence'] <= 1
+        engine = structure_aware_ocr.ocr_engine
+        ocr_data = {'text': "TEST", 'words': [{'text': "TEST", 'conf': 85.0}], 'confidence': 0.85}
+        with patch.object(engine, 'image_to_text_data', AsyncMock(return_value=ocr_data)) as mock_ocr:
+            result = await structure_aware_ocr._extract_text_from_zone(test_image, config, threshold)
+            
+            assert result['text'] == "TEST"
+            assert 0 <= result['confidence'] <= 1
+            # Viens Tesseract izsaukums tekstam un confidence
+            assert mock_ocr.await_count == 1
 
 @pytest.mark.asyncio
 async def test_structure_aware_ocr_result_creation():
@@ -0,0 +1,70 @@
+"""
+Tests for structure_serialization - tieša struktūras serializācija bez convert_int64
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from app.services import structure_serialization
+from app.services.document_structure_service import (
+    BoundingBox, BoxArray, DocumentStructure, DocumentZone, TableCell, TableRegion, ZoneType
+)
+from app.services.structure_serialization import dumps, structure_summary
+
+
+def sample_structure():
+    # NumPy skalāri kā no OpenCV / masīvu aprēķiniem
+    cell = TableCell(bounds=BoundingBox(np.int64(10), np.int32(20), 60, 50), text="Prece",
+                     confidence=np.float32(0.5), row_index=np.int64(0), column_index=1)
+    table = TableRegion(bounds=BoundingBox(10, 20, 300, 200), cells=[cell], confidence=np.float64(0.88),
+                        rows=np.int64(1), columns=2)
+    zone = DocumentZone(zone_type=ZoneType.HEADER, bounds=BoundingBox(0, 0, 800, 150), confidence=0.9)
+    return DocumentStructure(image_width=800, image_height=600, zones=[zone], tables=[table],
+                             text_blocks=BoxArray(np.array([[1, 2, 30, 40], [5, 6, 70, 80]])),
+                             confidence=np.float64(0.75))
+
+
+def test_structure_objects_are_slotted():
+    structure = sample_structure()
+
+    for obj in (structure, structure.zones[0], structure.tables[0], structure.tables[0].cells[0],
+                structure.tables[0].bounds):
+        assert not hasattr(obj, '__dict__')
+
+
+def test_to_dict_uses_native_types():
+    data = sample_structure().to_dict()
+
+    assert data['zones'][0]['zone_type'] == 'header'
+    cell = data['tables'][0]['cells'][0]
+    assert cell == {'bounds': {'x1': 10, 'y1': 20, 'x2': 60, 'y2': 50}, 'text': 'Prece',
+                    'confidence': 0.5, 'row_index': 0, 'column_index': 1}
+    assert type(cell['bounds']['x1']) is int and type(data['tables'][0]['rows']) is int
+    assert data['text_blocks'] == [{'x1': 1, 'y1': 2, 'x2': 30, 'y2': 40}, {'x1': 5, 'y1': 6, 'x2': 70, 'y2': 80}]
+    # Standarta json bez default - nav NumPy vai enum objektu
+    json.dumps(data)
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dumps_handles_numpy_without_conversion(monkeypatch, use_orjson):
+    if use_orjson and not structure_serialization.ORJSON_AVAILABLE:
+        pytest.skip("orjson nav instalēts")
+    monkeypatch.setattr(structure_serialization, 'ORJSON_AVAILABLE', use_orjson)
+
+    payload = {'count': np.int64(3), 'score': np.float32(0.25), 'ok': np.bool_(True),
+               'mask': np.array([1, 2]), 'zone': ZoneType.TABLE, 'box': BoundingBox(1, 2, 3, 4)}
+
+    assert json.loads(dumps(payload)) == {'count': 3, 'score': 0.25, 'ok': True, 'mask': [1, 2],
+                                          'zone': 'table', 'box': {'x1': 1, 'y1': 2, 'x2': 3, 'y2': 4}}
+
+
+def test_structure_summary_shape():
+    summary = json.loads(dumps(structure_summary(sample_structure())))
+
+    assert summary['zones'] == [{'type': 'header', 'bounds': {'x1': 0, 'y1': 0, 'x2': 800, 'y2': 150},
+                                 'confidence': 0.9}]
+    assert summary['tables'][0]['cell_count'] == 1
+    assert len(summary['text_blocks']) == 2
+    assert (summary['image_width'], summary['image_height'], summary['confidence']) == (800, 600, 0.75)
@@ -0,0 +1,155 @@
+"""
+Tests for batched table-cell OCR - kompozītattēli un vārdu piesaiste šūnām
+"""
+
+import asyncio
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from app.services.document_structure_service import BoundingBox, TableCell, TableRegion
+from app.services.ocr.structure_aware_ocr import StructureAwareOCR
+from app.services.ocr.table_cell_batch import CellSlot, assign_words_to_cells, build_cell_composites
+
+
+def word(text, top, height=10, left=45, conf=90.0, line=1):
+    return {'text': text, 'conf': conf, 'left': left, 'top': top, 'width': 20, 'height': height,
+            'block': 1, 'par': 1, 'line': line}
+
+
+def test_composite_layout_with_gutters():
+    crops = [np.zeros((20, 50, 3), np.uint8), np.zeros((0, 10, 3), np.uint8), np.zeros((30, 80), np.uint8)]
+
+    batches = build_cell_composites(crops, gutter=10)
+
+    assert len(batches) == 1
+    composite, slots = batches[0]
+    assert composite.shape == (10 + 20 + 10 + 30 + 10, 80 + 20)
+    assert composite.ndim == 2
+    assert [slot.index for slot in slots] == [0, 2]
+    assert (slots[0].top, slots[0].bottom) == (10, 30)
+    assert (slots[1].top, slots[1].bottom) == (40, 70)
+    # Atstarpes paliek baltas
+    assert composite[30:40].min() == 255
+    assert composite[10:30, 10:60].max() == 0
+
+
+def test_composites_split_by_cell_count_and_height():
+    crops = [np.zeros((100, 40), np.uint8) for _ in range(7)]
+
+    assert [len(slots) for _, slots in build_cell_composites(crops, max_cells=3)] == [3, 3, 1]
+    assert [len(slots) for _, slots in build_cell_composites(crops, max_height=300, gutter=20)] == [2, 2, 2, 1]
+
+
+def test_words_assigned_by_vertical_position():
+    slots = [CellSlot(0, 40, 70, 40, 140), CellSlot(3, 110, 160, 40, 140)]
+    words = [
+        word('Prece', 45), word('A', 45, left=80),
+        word('12,50', 115, line=2), word('EUR', 135, line=3, conf=70.0),
+        word('x', 85),  # atstarpē, tuvāk pirmajai šūnai
+    ]
+
+    cells = assign_words_to_cells(words, slots)
+
+    assert cells[0]['text'] == 'Prece A x'
+    assert cells[3]['text'] == '12,50\nEUR'
+    assert cells[3]['confidence'] == pytest.approx(0.8)
+    assert cells[3]['words'][0]['top'] == 5
+
+
+@pytest.fixture
+def structure_aware():
+    return StructureAwareOCR(Mock(spec=['extract_text_from_image']))
+
+
+@pytest.fixture
+def table():
+    cells = [TableCell(bounds=BoundingBox(10 + 100 * c, 10 + 40 * r, 100 + 100 * c, 40 + 40 * r),
+                       row_index=r, column_index=c)
+             for r in range(3) for c in range(2)]
+    return TableRegion(bounds=BoundingBox(0, 0, 220, 130), rows=3, columns=2, confidence=0.9, cells=cells)
+
+
+@pytest.mark.asyncio
+async def test_table_ocr_batched_uses_single_call(structure_aware, table, monkeypatch):
+    page = np.full((130, 220, 3), 255, np.uint8)
+    captured = []
+    calls = []
+
+    def capture(*args, **kwargs):
+        batches = build_cell_composites(*args, **kwargs)
+        captured.extend(batches)
+        return batches
+
+    async def fake_zone_ocr(image, config, threshold):
+        calls.append(image.shape)
+        _, slots = captured[-1]
+        words = [word(f"r{slot.index // 2}c{slot.index % 2}", slot.top + 5, line=slot.index) for slot in slots]
+        return {'text': '', 'confidence': 0.9, 'words': words}
+
+    monkeypatch.setattr('app.services.ocr.structure_aware_ocr.build_cell_composites', capture)
+    structure_aware.table_configs['cell_ocr_mode'] = 'batched'
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware._process_table_ocr(page, table)
+
+    assert len(calls) == 1
+    assert result['cell_ocr'] == {'mode': 'batched', 'ocr_calls': 1}
+    assert result['matrix'] == [['r0c0', 'r0c1'], ['r1c0', 'r1c1'], ['r2c0', 'r2c1']]
+    assert result['cells'][0]['confidence'] == pytest.approx(0.9)
+
+
+@pytest.mark.asyncio
+async def test_table_ocr_batch_failure_falls_back_to_cells(structure_aware, table):
+    calls = []
+
+    async def fake_zone_ocr(image, config, threshold):
+        calls.append(image.ndim)
+        if image.ndim == 2:
+            return {'text': '', 'confidence': 0.0}  # kompozīta OCR kļūda
+        return {'text': 'cell', 'confidence': 0.7, 'words': []}
+
+    structure_aware.table_configs['cell_ocr_mode'] = 'batched'
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware._process_table_ocr(np.full((130, 220, 3), 255, np.uint8), table)
+
+    assert calls == [2] + [3] * 6
+    assert result['cell_ocr'] == {'mode': 'batched', 'ocr_calls': 7}
+    assert all(cell['text'] == 'cell' for cell in result['cells'])
+
+
+@pytest.mark.asyncio
+async def test_table_ocr_per_cell_mode(structure_aware, table):
+    async def fake_zone_ocr(image, config, threshold):
+        return {'text': 'cell', 'confidence': 0.7, 'words': []}
+
+    structure_aware.table_configs['cell_ocr_mode'] = 'per_cell'
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware._process_table_ocr(np.full((130, 220, 3), 255, np.uint8), table)
+
+    assert result['cell_ocr'] == {'mode': 'per_cell', 'ocr_calls': 6}
+    assert len(result['cells']) == 6
+
+
+@pytest.mark.asyncio
+async def test_per_cell_ocr_runs_concurrently_under_semaphore(structure_aware, table):
+    active = {'now': 0, 'max': 0}
+
+    async def fake_zone_ocr(image, config, threshold):
+        active['now'] += 1
+        active['max'] = max(active['max'], active['now'])
+        await asyncio.sleep(0.02)
+        active['now'] -= 1
+        return {'text': 'cell', 'confidence': 0.7, 'words': []}
+
+    structure_aware.table_configs['cell_ocr_mode'] = 'per_cell'
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware._process_table_ocr(np.full((130, 220, 3), 255, np.uint8), table,
+                                                      semaphore=asyncio.Semaphore(2))
+
+    assert active['max'] == 2
+    assert [cell['text'] for cell in result['cells']] == ['cell'] * 6
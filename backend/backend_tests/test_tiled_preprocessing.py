@@ -0,0 +1,72 @@
+"""
+Tests for tiled_preprocessing - joslu rezultāts sakrīt ar pilnā attēla rezultātu
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr.image_preprocessor import ImagePreprocessor
+from app.services.ocr.noise_estimator import DenoiseDecision, apply_denoise
+from app.services.ocr.skew_estimator import rotate_image
+from app.services.ocr.tiled_preprocessing import TiledExecutor
+
+
+@pytest.fixture
+def tiles():
+    executor = TiledExecutor(workers=4, min_pixels=1, min_band_rows=64)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.mark.parametrize("variant", ["gray", "color"])
+def test_denoise_bands_match_whole_image(tiles, variant, synthetic_page):
+    page = synthetic_page(size=(640, 480), noise_sigma=12)
+    decision = DenoiseDecision(sigma=12.0, variant=variant, reason='test', h=10)
+
+    expected = apply_denoise(page, DenoiseDecision(sigma=12.0, variant=variant, reason='test', h=10))
+    result = tiles.denoise(page, decision)
+
+    assert np.array_equal(result, expected)
+    assert decision.tiles == len(tiles.bands(page.shape[0])) > 1
+
+
+@pytest.mark.parametrize("angle", [-3.7, 1.5])
+def test_threshold_and_rotation_bands_match(tiles, angle, synthetic_page):
+    gray = synthetic_page(size=(640, 480), noise_sigma=12, channels=1)
+    expected = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 15, 2)
+
+    assert np.array_equal(tiles.adaptive_threshold(gray, 15, 2), expected)
+    assert np.array_equal(tiles.rotate(gray, angle), rotate_image(gray, angle))
+    assert tiles.rotate(gray, 0.2) is gray
+
+
+def test_small_pages_and_single_worker_run_whole(synthetic_page):
+    page = synthetic_page(size=(640, 480), noise_sigma=12, channels=1)
+
+    assert not TiledExecutor(workers=4, min_pixels=10 ** 7, min_band_rows=64).enabled_for(page)
+    assert not TiledExecutor(workers=1, min_pixels=1, min_band_rows=64).enabled_for(page)
+    assert not TiledExecutor(workers=4, min_pixels=1, min_band_rows=400).enabled_for(page)
+
+    executor = TiledExecutor(workers=16, min_pixels=1, min_band_rows=64)
+    assert len(executor.bands(640)) == 10
+    assert executor.bands(640)[0] == (0, 64) and executor.bands(640)[-1][1] == 640
+
+
+@pytest.mark.parametrize("invoice", [False, True])
+def test_pipeline_output_independent_of_tiling(tiles, invoice, synthetic_page):
+    page = synthetic_page(size=(900, 700), noise_sigma=12)
+    matrix = cv2.getRotationMatrix2D((350, 450), 2.0, 1.0)
+    page = cv2.warpAffine(page, matrix, (700, 900), borderMode=cv2.BORDER_REPLICATE)
+
+    whole, tiled = ImagePreprocessor(), ImagePreprocessor()
+    whole.tiles = TiledExecutor(workers=1)
+    tiled.tiles = tiles
+    run = 'preprocess_invoice_array' if invoice else 'preprocess_array'
+    metadata = {}
+
+    expected = getattr(whole, run)(page)
+    result = getattr(tiled, run)(page, metadata=metadata)
+
+    assert np.array_equal(result, expected)
+    assert metadata['skew']['angle'] == pytest.approx(-2.0, abs=0.2)
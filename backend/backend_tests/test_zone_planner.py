@@ -0,0 +1,262 @@
+"""
+Tests for zonu OCR plānotāju - nepārklājošas joslas un zonu teksta salikšana
+"""
+
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from app.services.document_structure_service import (
+    BoundingBox, DocumentStructure, DocumentStructureAnalyzer, DocumentZone, TableCell, TableRegion, ZoneType
+)
+from app.services.ocr.structure_aware_ocr import StructureAwareOCR
+from app.services.ocr.zone_planner import ZoneTile, collect_zone_words, plan_zone_tiles
+from app.services.page_image import PageImage
+
+
+async def default_zones(width=1000, height=1000):
+    analyzer = DocumentStructureAnalyzer()
+    return await analyzer._detect_zones(np.zeros((height, width, 3), np.uint8))
+
+
+def word(text, top, left=10, conf=90.0, tile=0, line=1):
+    return {'text': text, 'conf': conf, 'left': left, 'top': top, 'width': 40, 'height': 10,
+            'block': 1, 'par': 1, 'line': line, 'tile': tile}
+
+
+@pytest.mark.asyncio
+async def test_default_zones_tiled_without_overlap():
+    tiles = plan_zone_tiles(await default_zones())
+
+    assert [(tile.bounds.y1, tile.bounds.y2) for tile in tiles] == [(0, 250), (250, 800), (800, 850), (850, 1000)]
+    assert [tile.zone_types for tile in tiles] == [
+        (ZoneType.HEADER,),
+        (ZoneType.BODY,),
+        (ZoneType.BODY, ZoneType.SUMMARY),
+        (ZoneType.FOOTER, ZoneType.SUMMARY),
+    ]
+    # Katrs pikselis pieder tieši vienai joslai
+    assert sum(tile.bounds.height for tile in tiles) == 1000
+
+
+def test_boundaries_snap_to_blank_rows():
+    zones = [
+        DocumentZone(zone_type=ZoneType.HEADER, bounds=BoundingBox(0, 0, 100, 100), confidence=0.9),
+        DocumentZone(zone_type=ZoneType.BODY, bounds=BoundingBox(0, 100, 100, 200), confidence=0.9),
+    ]
+    binary = np.zeros((200, 100), np.uint8)
+    binary[92:110] = 255  # teksta rinda pāri zonu robežai
+    binary[90:92] = 255
+
+    tiles = plan_zone_tiles(zones, binary=binary, snap_ratio=0.1)
+
+    assert tiles[0].bounds.y2 == tiles[1].bounds.y1 == 110
+    assert (tiles[0].bounds.y1, tiles[1].bounds.y2) == (0, 200)
+
+
+def test_collect_zone_words_by_center():
+    words = [word('Rēķins', 10), word('Nr', 10, left=60), word('Kopā', 95, tile=1), word('12,00', 95, left=60, tile=1)]
+
+    header = collect_zone_words(words, BoundingBox(0, 0, 200, 50))
+    summary = collect_zone_words(words, BoundingBox(0, 80, 200, 120))
+
+    assert header['text'] == 'Rēķins Nr'
+    assert summary['text'] == 'Kopā 12,00'
+    assert summary['confidence'] == pytest.approx(0.9)
+
+
+def test_tile_config_drops_conflicting_whitelist():
+    structure_aware = StructureAwareOCR(Mock(spec=['extract_text_from_image']))
+
+    merged = structure_aware._tile_config(ZoneTile(BoundingBox(0, 0, 10, 10), (ZoneType.FOOTER, ZoneType.SUMMARY)))
+    single = structure_aware._tile_config(ZoneTile(BoundingBox(0, 0, 10, 10), (ZoneType.SUMMARY,)))
+
+    assert merged.tesseract_config == '--psm 6'
+    assert merged.preprocessing_steps == ['denoise', 'enhance_contrast']
+    assert merged.confidence_threshold == 0.5
+    assert single is structure_aware.zone_configs[ZoneType.SUMMARY]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("word_conf, fallback", [(90.0, False), (30.0, True)])
+async def test_full_page_pass_only_for_low_zone_confidence(word_conf, fallback):
+    ocr_service = Mock(spec=['extract_text_from_image'])
+    ocr_service.extract_text_from_image = AsyncMock(return_value={
+        'success': True, 'raw_text': 'full  page', 'cleaned_text': 'full page', 'confidence_score': 0.7
+    })
+    structure_aware = StructureAwareOCR(ocr_service)
+    zones = await default_zones(400, 400)
+    structure_aware.structure_analyzer.analyze_document = AsyncMock(return_value=DocumentStructure(
+        image_width=400, image_height=400, zones=zones, tables=[], text_blocks=[]
+    ))
+
+    tiles_seen = []
+
+    async def fake_zone_ocr(image, config, threshold):
+        height = image.shape[0]
+        tiles_seen.append(height)
+        return {'text': f'h {height}', 'confidence': word_conf / 100,
+                'words': [word(f'h{height}', height // 2 - 5, conf=word_conf)]}
+
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware.process_with_structure(np.full((400, 400, 3), 255, np.uint8))
+
+    assert sum(tiles_seen) == 400
+    assert result.metadata['full_page_fallback'] is fallback
+    assert ocr_service.extract_text_from_image.await_count == int(fallback)
+    if fallback:
+        assert result.text == 'full page'
+        assert result.confidence > 0
+    else:
+        # Joslas augšā uz leju: header 0-100, body 100-320, body+summary 320-340, footer+summary 340-400
+        assert result.text == 'h 100\n\nh 220\n\nh 20\n\nh 60'
+        assert result.zone_results['summary']['raw_text'] == 'h20\nh60'
+        assert result.zone_results['footer']['raw_text'] == 'h60'
+
+
+@pytest.mark.asyncio
+async def test_empty_full_page_pass_keeps_tile_text():
+    ocr_service = Mock(spec=['extract_text_from_image'])
+    ocr_service.extract_text_from_image = AsyncMock(return_value={
+        'success': False, 'raw_text': '', 'cleaned_text': '', 'confidence_score': 0.0
+    })
+    structure_aware = StructureAwareOCR(ocr_service)
+    structure_aware.structure_analyzer.analyze_document = AsyncMock(return_value=DocumentStructure(
+        image_width=400, image_height=400, zones=await default_zones(400, 400), tables=[], text_blocks=[]
+    ))
+
+    async def fake_zone_ocr(image, config, threshold):
+        return {'text': 'Rekins 17', 'confidence': 0.2, 'words': [word('Rekins', 5, conf=20.0)]}
+
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    result = await structure_aware.process_with_structure(np.full((400, 400, 3), 255, np.uint8))
+
+    assert result.metadata['full_page_fallback'] is True
+    assert ocr_service.extract_text_from_image.await_count == 1
+    assert 'Rekins 17' in result.text
+
+
+def test_excluded_table_cut_out_of_tiles():
+    zones = [DocumentZone(zone_type=ZoneType.BODY, bounds=BoundingBox(0, 0, 800, 600), confidence=0.9)]
+
+    tiles = plan_zone_tiles(zones, exclude=[BoundingBox(200, 200, 800, 400), BoundingBox(0, 0, 0, 0)])
+
+    assert [(tile.bounds.x1, tile.bounds.y1, tile.bounds.x2, tile.bounds.y2) for tile in tiles] == [
+        (0, 0, 800, 200), (0, 200, 200, 400), (0, 400, 800, 600)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cell_text", ["12,00", ""])
+async def test_table_pixels_ocr_once(cell_text):
+    """Tabula ar šūnām netiek atpazīta vēlreiz body joslā; ja šūnu OCR neko neatrod - tiek atpazīta kā josla"""
+    import cv2
+
+    ocr_service = Mock(spec=['extract_text_from_image'])
+    ocr_service.extract_text_from_image = AsyncMock()
+    structure_aware = StructureAwareOCR(ocr_service)
+    structure_aware.table_configs["cell_ocr_mode"] = "per_cell"
+    table = TableRegion(bounds=BoundingBox(0, 200, 400, 280), rows=1, columns=1, confidence=0.8,
+                        cells=[TableCell(bounds=BoundingBox(10, 210, 390, 270), row_index=0, column_index=0)])
+    structure_aware.structure_analyzer.analyze_document = AsyncMock(return_value=DocumentStructure(
+        image_width=400, image_height=400, tables=[table], text_blocks=[],
+        zones=[DocumentZone(zone_type=ZoneType.BODY, bounds=BoundingBox(0, 0, 400, 400), confidence=0.9)]
+    ))
+
+    heights = []
+
+    async def fake_zone_ocr(image, config, threshold):
+        heights.append(image.shape[0])
+        if image.shape[0] == 70:  # Šūna ar padding
+            return {'text': cell_text, 'confidence': 0.9, 'words': []}
+        text = 'tabula' if image.shape[0] == 80 else 'teksts'
+        return {'text': text, 'confidence': 0.9,
+                'words': [word(text, image.shape[0] // 2 - 5)]}
+
+    structure_aware._extract_text_from_zone = fake_zone_ocr
+
+    page = np.full((400, 400, 3), 255, np.uint8)
+    cv2.putText(page, "Rekins", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    result = await structure_aware.process_with_structure(page)
+
+    # Joslas virs un zem tabulas; tabulas rindas - tikai šūnā vai rezerves joslā
+    assert sorted(heights) == ([70, 120, 200] if cell_text else [70, 80, 120, 200])
+    assert result.table_results[0]['matrix'] == [[cell_text]]
+    assert (cell_text or 'tabula') in result.zone_results['body']['raw_text']
+    assert result.metadata['ocr_units'] == len(heights)
+    ocr_service.extract_text_from_image.assert_not_called()
+
+
+def invoice_with_whitespace(width=1000, height=1400):
+    """Rēķins: galvene, tukša josla, tabula, kopsumma un kājene ar lielām tukšām malām"""
+    import cv2
+
+    image = np.full((height, width, 3), 255, np.uint8)
+    cv2.putText(image, "SIA Piegadatajs", (100, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    cv2.putText(image, "Rekins Nr. 17", (100, 130), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    for y in range(500, 741, 60):
+        cv2.line(image, (100, y), (900, y), (0, 0, 0), 2)
+    for x in (100, 500, 900):
+        cv2.line(image, (x, 500), (x, 740), (0, 0, 0), 2)
+    cv2.putText(image, "Kopa: 12,00 EUR", (600, 820), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    cv2.putText(image, "www.piegadatajs.lv", (350, 1330), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    return image
+
+
+@pytest.mark.asyncio
+async def test_zones_follow_content_and_skip_blank_bands():
+    analyzer = DocumentStructureAnalyzer()
+    image = invoice_with_whitespace()
+    cell = TableCell(bounds=BoundingBox(100, 500, 500, 560))
+    table = TableRegion(bounds=BoundingBox(99, 499, 902, 742), cells=[cell], confidence=0.9)
+
+    zones = {zone.zone_type: zone for zone in await analyzer._detect_zones(image, tables=[table])}
+
+    assert set(zones) == {ZoneType.HEADER, ZoneType.BODY, ZoneType.SUMMARY, ZoneType.FOOTER}
+    assert zones[ZoneType.HEADER].bounds.y2 < 160 and zones[ZoneType.HEADER].bounds.x1 >= 90
+    assert zones[ZoneType.BODY].bounds.y1 >= 490 and zones[ZoneType.BODY].bounds.y2 <= 750
+    assert 780 < zones[ZoneType.SUMMARY].bounds.y1 and zones[ZoneType.SUMMARY].bounds.x1 >= 590
+    assert zones[ZoneType.FOOTER].bounds.y1 > 1290
+
+    tiles = plan_zone_tiles(list(zones.values()))
+    tiled = sum(tile.bounds.area for tile in tiles)
+    fixed = sum(tile.bounds.area for tile in plan_zone_tiles(analyzer._fixed_ratio_zones(1000, 1400)))
+    # Tukšās joslas un malas netiek sūtītas OCR
+    assert tiled < 0.3 * fixed
+    assert all(tile.bounds.y2 <= 160 or tile.bounds.y1 >= 490 for tile in tiles)
+
+
+@pytest.mark.asyncio
+async def test_small_footer_text_gets_a_tile():
+    """9 px rinda (zem teksta bloku 10 px filtra) joprojām veido kājenes joslu"""
+    import cv2
+
+    analyzer = DocumentStructureAnalyzer()
+    image = np.full((1754, 1240, 3), 255, np.uint8)
+    cv2.putText(image, "SIA Piegadatajs", (100, 120), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    for row in range(8):
+        cv2.putText(image, f"Prece {row} 3 gab 12,50 EUR", (100, 400 + row * 60),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+    cv2.putText(image, "IBAN LV80BANK0000435195001 SWIFT HABALV22", (100, 1700),
+                cv2.FONT_HERSHEY_PLAIN, 0.8, (0, 0, 0), 1)
+    page = PageImage(image)
+    assert not [block for block in analyzer._detect_text_blocks_sync(page) if block.y1 > 1600]
+
+    zones = {zone.zone_type: zone for zone in await analyzer._detect_zones(page)}
+
+    assert ZoneType.FOOTER in zones and zones[ZoneType.FOOTER].bands
+    assert zones[ZoneType.FOOTER].text_blocks == []
+    tiles = plan_zone_tiles(list(zones.values()), binary=page.binary)
+    assert any(tile.bounds.y1 <= 1692 and tile.bounds.y2 >= 1700 and tile.bounds.x1 <= 100 for tile in tiles)
+
+
+@pytest.mark.asyncio
+async def test_blank_page_falls_back_to_fixed_zones():
+    analyzer = DocumentStructureAnalyzer()
+
+    zones = await analyzer._detect_zones(np.full((1000, 800, 3), 255, np.uint8), text_blocks=[])
+
+    assert [zone.bounds for zone in zones] == [zone.bounds for zone in analyzer._fixed_ratio_zones(800, 1000)]
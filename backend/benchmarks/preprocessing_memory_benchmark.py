@@ -0,0 +1,101 @@
+"""
+Priekšapstrādes atmiņas benchmark - tracemalloc maksimums katrai pipeline
+Lietošana: python -m benchmarks.preprocessing_memory_benchmark [attēli...] [--repeat N] [--max-peak-ratio 2.5]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.ocr.image_preprocessor import ImagePreprocessor, load_image  # noqa: E402
+
+DEFAULT_SAMPLES = [BACKEND_DIR / "uploads" / "test_invoice.png"]
+
+
+def synthetic_a4_page(width: int = 2480, height: int = 3508, noise_sigma: float = 4.0):
+    """Sintētiska 300 DPI A4 krāsaina lapa ar teksta rindām un vieglu troksni"""
+    image = np.full((height, width, 3), (228, 236, 240), dtype=np.uint8)
+    for row in range(36):
+        cv2.putText(image, f"Prece {row + 1}   {row * 3.75:.2f} EUR", (150, 300 + row * 85),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.6, (30, 30, 30), 3)
+    if noise_sigma:
+        noise = np.random.default_rng(0).normal(0, noise_sigma, (height, width)).astype(np.float32)
+        image = cv2.add(image, cv2.merge([noise] * 3), dtype=cv2.CV_8U)
+    return image
+
+
+def legacy_gamma(image: np.ndarray, gamma: float = 1.2) -> np.ndarray:
+    """Iepriekšējā float64 gamma korekcija (salīdzinājumam)"""
+    return (np.power(image / 255.0, gamma) * 255.0).astype(np.uint8)
+
+
+def measure(func, repeat: int):
+    """Izpilda func repeat reizes; atgriež (median ms, maksimālais NumPy/OpenCV izvades piešķīrums baitos)"""
+    timings, peaks = [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return statistics.median(timings), max(peaks)
+
+
+def run_sample(preprocessor: ImagePreprocessor, image: np.ndarray, repeat: int):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def shared():
+        graph = preprocessor.graph(image)
+        preprocessor.preprocess_array(image, graph=graph)
+        preprocessor.preprocess_invoice_array(image, graph=graph)
+
+    cases = {
+        'light': lambda: preprocessor.preprocess_array(image),
+        'invoice': lambda: preprocessor.preprocess_invoice_array(image),
+        'light+invoice': shared,
+        'gamma_float64': lambda: legacy_gamma(image),
+        'gamma_lut': lambda: preprocessor._gamma(gray),  # Rakstāms buferis - LUT vietā
+    }
+    return {name: measure(func, repeat) for name, func in cases.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*", type=Path, default=DEFAULT_SAMPLES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-peak-ratio", type=float, default=None,
+                        help="Kļūda, ja pipeline maksimums pārsniedz N x krāsainās lapas izmēru")
+    args = parser.parse_args()
+
+    samples = [(path.name, load_image(str(path))) for path in args.images if path.exists()]
+    samples.append(("synthetic_a4", synthetic_a4_page()))
+
+    preprocessor = ImagePreprocessor()
+    failed = False
+    print(f"{'paraugs':<20}{'izmērs':>12}{'pipeline':>16}{'median ms':>12}{'peak MB':>10}{'x lapa':>9}")
+    for name, image in samples:
+        results = run_sample(preprocessor, image, args.repeat)
+        for case, (median_ms, peak) in results.items():
+            ratio = peak / image.nbytes
+            print(f"{name:<20}{f'{image.shape[1]}x{image.shape[0]}':>12}{case:>16}{median_ms:>12.0f}"
+                  f"{peak / 2 ** 20:>10.1f}{ratio:>9.2f}")
+            if args.max_peak_ratio and case in ('light', 'invoice', 'light+invoice') \
+                    and ratio > args.max_peak_ratio:
+                print(f"  ! {case}: {ratio:.2f} x lapa > {args.max_peak_ratio}")
+                failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Struktūras analīzes benchmark - pilna izšķirtspēja pret samazinātu analīzi
+Lietošana: python -m benchmarks.structure_analysis_benchmark [attēli...] [--width 1000] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.document_structure_service import DocumentStructureAnalyzer  # noqa: E402
+from app.services.page_image import PageImage  # noqa: E402
+
+DEFAULT_SAMPLES = [BACKEND_DIR / "uploads" / "test_invoice.png"]
+
+
+def synthetic_a4_page(width: int = 2480, height: int = 3508):
+    """Sintētiska 300 DPI A4 lapa ar galveni un preču tabulu (20 x 5)"""
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "PVN REKINS Nr. 2024-001", (150, 300), cv2.FONT_HERSHEY_SIMPLEX, 3, (0, 0, 0), 6)
+    left, top, cell_w, cell_h = 150, 900, 436, 90
+    for r in range(21):
+        y = top + r * cell_h
+        cv2.line(image, (left, y), (left + 5 * cell_w, y), (0, 0, 0), 4)
+    for c in range(6):
+        x = left + c * cell_w
+        cv2.line(image, (x, top), (x, top + 20 * cell_h), (0, 0, 0), 4)
+    for r in range(20):
+        for c in range(5):
+            text = f"Prece {r + 1}" if c == 0 else f"{(r + 1) * (c + 1) * 1.25:.2f}"
+            cv2.putText(image, text, (left + c * cell_w + 20, top + r * cell_h + 60),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.5, (0, 0, 0), 3)
+    return PageImage(image, source="synthetic_a4")
+
+
+async def run_mode(analyzer, source, analysis_width: int, repeat: int):
+    timings, structure = [], None
+    for _ in range(repeat):
+        # Katrs atkārtojums ar jaunu PageImage - bez kešotām reprezentācijām
+        page = PageImage(source.bgr, source=source.source)
+        start = time.perf_counter()
+        structure = await analyzer.analyze_document(page, analysis_width=analysis_width)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, structure
+
+
+def table_agreement(analyzer, full, reduced, min_overlap: float = 0.5) -> float:
+    """
+    Pilnās izšķirtspējas tabulu laukuma īpatsvars, kam samazinātajā analīzē ir atbilstoša tabula
+
+    Svērts pēc laukuma, lai sīki Hough fragmenti neaizēno galvenās tabulas sakritību.
+    """
+    total = sum(table.bounds.area for table in full.tables)
+    if not total:
+        return 1.0 if not reduced.tables else 0.0
+    matched = sum(
+        table.bounds.area for table in full.tables
+        if any(analyzer._calculate_bbox_overlap(table.bounds, other.bounds) >= min_overlap
+               for other in reduced.tables)
+    )
+    return matched / total
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*", type=Path, default=DEFAULT_SAMPLES)
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = [PageImage.load(str(path)) for path in args.images if path.exists()]
+    samples.append(synthetic_a4_page())
+
+    analyzer = DocumentStructureAnalyzer()
+    print(f"{'paraugs':<24}{'izmērs':>12}{'režīms':>10}{'median ms':>12}{'tabulas':>9}{'šūnas':>8}{'sakritība':>11}")
+    for page in samples:
+        name = Path(page.source).name if page.source else "array"
+        full_times, full = await run_mode(analyzer, page, 0, args.repeat)
+        reduced_times, reduced = await run_mode(analyzer, page, args.width, args.repeat)
+        agreement = table_agreement(analyzer, full, reduced)
+
+        for mode, times, structure in (("full", full_times, full), (str(args.width), reduced_times, reduced)):
+            cells = sum(len(table.cells) for table in structure.tables)
+            print(f"{name:<24}{f'{page.width}x{page.height}':>12}{mode:>10}{statistics.median(times):>12.0f}"
+                  f"{len(structure.tables):>9}{cells:>8}{agreement if mode != 'full' else 1.0:>11.2%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,104 @@
+"""
+Tabulas šūnu OCR benchmark - per_cell pret batched režīmu
+Lietošana: python -m benchmarks.table_cell_ocr_benchmark [attēli...] [--repeat N]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.document_structure_service import BoundingBox, TableCell, TableRegion  # noqa: E402
+from app.services.ocr_service import get_ocr_service  # noqa: E402
+from app.services.page_image import PageImage  # noqa: E402
+
+DEFAULT_SAMPLES = [BACKEND_DIR / "uploads" / "test_invoice.png"]
+
+
+def synthetic_product_table(rows: int = 40, columns: int = 5):
+    """Sintētiska preču tabula (rows x columns šūnas), ja paraugos tabulas nav atrastas"""
+    cell_w, cell_h = 240, 48
+    image = np.full((rows * cell_h + 20, columns * cell_w + 20, 3), 255, dtype=np.uint8)
+    cells = []
+    for r in range(rows):
+        for c in range(columns):
+            x1, y1 = 10 + c * cell_w, 10 + r * cell_h
+            cv2.rectangle(image, (x1, y1), (x1 + cell_w, y1 + cell_h), (0, 0, 0), 1)
+            text = f"Prece {r + 1}" if c == 0 else f"{(r + 1) * (c + 1) * 1.25:.2f}"
+            cv2.putText(image, text, (x1 + 10, y1 + 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+            cells.append(TableCell(bounds=BoundingBox(x1 + 2, y1 + 2, x1 + cell_w - 2, y1 + cell_h - 2),
+                                   row_index=r, column_index=c))
+    table = TableRegion(bounds=BoundingBox(0, 0, image.shape[1], image.shape[0]),
+                        rows=rows, columns=columns, confidence=1.0, cells=cells)
+    return PageImage(image, source="synthetic"), [table]
+
+
+async def run_mode(structure_aware, page, tables, mode: str, repeat: int):
+    structure_aware.table_configs["cell_ocr_mode"] = mode
+    timings, results = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [await structure_aware._process_table_ocr(page, table) for table in tables]
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def cell_agreement(per_cell, batched) -> float:
+    """Šūnu īpatsvars, kurās abi režīmi atpazina vienādu tekstu"""
+    pairs = [
+        (a['text'], b['text'])
+        for table_a, table_b in zip(per_cell, batched)
+        for a, b in zip(table_a['cells'], table_b['cells'])
+    ]
+    return sum(1 for a, b in pairs if a == b) / len(pairs) if pairs else 0.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("images", nargs="*", type=Path, default=DEFAULT_SAMPLES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ocr_service = await get_ocr_service()
+    if not ocr_service.system_ready:
+        print(f"OCR sistēma nav gatava: {ocr_service.setup_errors}")
+        return 1
+    structure_aware = ocr_service.structure_aware_ocr
+    await ocr_service.ocr_engine.warm_up()
+
+    samples = []
+    for image_path in args.images:
+        page = PageImage.load(str(image_path))
+        structure = await structure_aware.structure_analyzer.analyze_document(page)
+        if structure.tables:
+            samples.append((image_path.name, page, structure.tables))
+        else:
+            print(f"{image_path.name}: tabulas nav atrastas, izlaists")
+    if not samples:
+        samples.append(("synthetic_40x5",) + synthetic_product_table())
+
+    print(f"{'paraugs':<24}{'šūnas':>7}{'režīms':>10}{'izsaukumi':>11}{'median ms':>12}{'sakritība':>11}")
+    for name, page, tables in samples:
+        cell_count = sum(len(table.cells) for table in tables)
+        per_cell_times, per_cell = await run_mode(structure_aware, page, tables, "per_cell", args.repeat)
+        batched_times, batched = await run_mode(structure_aware, page, tables, "batched", args.repeat)
+        agreement = cell_agreement(per_cell, batched)
+
+        for mode, times, results in (("per_cell", per_cell_times, per_cell), ("batched", batched_times, batched)):
+            calls = sum(result.get('cell_ocr', {}).get('ocr_calls', 0) for result in results)
+            print(f"{name:<24}{cell_count:>7}{mode:>10}{calls:>11}{statistics.median(times):>12.0f}"
+                  f"{agreement if mode == 'batched' else 1.0:>11.2%}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
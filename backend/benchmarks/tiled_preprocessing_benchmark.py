@@ -0,0 +1,83 @@
+"""
+Joslu priekšapstrādes benchmark - sienas laiks pret pavedienu skaitu lielām lapām
+Lietošana: python -m benchmarks.tiled_preprocessing_benchmark [--size 4000] [--workers 1 2 4 8] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.ocr.image_preprocessor import ImagePreprocessor  # noqa: E402
+from app.services.ocr.tiled_preprocessing import TiledExecutor  # noqa: E402
+
+
+def synthetic_page(size: int = 4000, noise_sigma: float = 6.0, angle: float = 1.5):
+    """Sintētiska size x size krāsaina lapa (A3 / telefona foto) ar tekstu, troksni un slīpumu"""
+    image = np.full((size, size, 3), (226, 234, 238), dtype=np.uint8)
+    for row in range(size // 70 - 2):
+        cv2.putText(image, f"Prece {row + 1}   daudzums 3   cena {row * 3.75:.2f} EUR", (120, 120 + row * 70),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.5, (30, 30, 30), 3)
+    matrix = cv2.getRotationMatrix2D((size // 2, size // 2), angle, 1.0)
+    image = cv2.warpAffine(image, matrix, (size, size), borderMode=cv2.BORDER_REPLICATE)
+    if noise_sigma:
+        noise = np.random.default_rng(0).normal(0, noise_sigma, (size, size)).astype(np.float32)
+        image = cv2.add(image, cv2.merge([noise] * 3), dtype=cv2.CV_8U)
+    return image
+
+
+def run(preprocessor: ImagePreprocessor, image: np.ndarray, invoice: bool, repeat: int):
+    timings, result, metadata = [], None, {}
+    for _ in range(repeat):
+        metadata = {}
+        start = time.perf_counter()
+        if invoice:
+            result = preprocessor.preprocess_invoice_array(image, metadata=metadata)
+        else:
+            result = preprocessor.preprocess_array(image, metadata=metadata)
+        timings.append((time.perf_counter() - start) * 1000)
+    steps = {step['step']: step['ms'] for step in metadata['preprocessing']['steps']}
+    return statistics.median(timings), result, steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--invoice", action="store_true", help="preprocess_invoice_array nevis preprocess_array")
+    args = parser.parse_args()
+
+    # Viens OpenCV pavediens - mēra tikai joslu paralēlismu
+    cv2.setNumThreads(1)
+    image = synthetic_page(args.size)
+    print(f"lapa {args.size}x{args.size}, CPU kodoli: {os.cpu_count()}")
+    print(f"{'pavedieni':>10}{'median ms':>12}{'paātrinājums':>14}{'denoise ms':>12}{'deskew ms':>11}"
+          f"{'binarize ms':>13}{'max starpība':>14}")
+
+    baseline_ms, reference = None, None
+    for workers in args.workers:
+        preprocessor = ImagePreprocessor()
+        preprocessor.tiles = TiledExecutor(workers=workers)
+        median_ms, result, steps = run(preprocessor, image, args.invoice, args.repeat)
+        preprocessor.tiles.shutdown()
+        if reference is None:
+            baseline_ms, reference = median_ms, result
+        difference = int(np.abs(result.astype(np.int16) - reference).max())
+        binarize_ms = steps.get('invoice_binarize' if args.invoice else 'binarize', 0)
+        print(f"{workers:>10}{median_ms:>12.0f}{baseline_ms / median_ms:>13.2f}x{steps.get('denoise', 0):>12.0f}"
+              f"{steps.get('deskew', 0):>11.0f}{binarize_ms:>13.0f}{difference:>14}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())